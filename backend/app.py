@@ -1,9 +1,42 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import sys
+import os
 
-from .db.connect import db
-from .routes import residents, vehicles, subscriptions, visitors, dashboard, supervisors
+# Import backend modules by the same absolute names the routes use, so the
+# pool and in-memory indexes initialized here are the instances they share
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db.connect import PRIMARY, db
+from routes import residents, vehicles, subscriptions, visitors, dashboard, supervisors, exports, admin
+from services.alerts import alert_engine
+from services.archiver import record_archiver
+from services.bulk_export import bulk_exporter
+from services.dashboard_snapshot import dashboard_snapshot
+from services.expiry_scheduler import expiry_scheduler
+from services.open_sessions import open_sessions
+from services.plate_index import plate_index
+from services.pool_sizer import pool_sizer
+from services.reports import financial_reports
+from services.rollups import hourly_rollups
+from services.space_allocator import space_allocator
+from services.space_counters import space_counters
+from services.transactions import CommitCounterMiddleware
+
+def warm_up(label: str, loader):
+    """Load an in-memory structure at startup; routes fall back if this fails"""
+    connection = None
+    try:
+        connection = db.get_connection()
+        loader(connection)
+        print(f"✅ {label} loaded")
+    except Exception as e:
+        print(f"⚠️ {label} not loaded: {e}")
+    finally:
+        if connection:
+            connection.close()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -11,15 +44,53 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Parking Management System API...")
     try:
         db.create_pool()
-        print("✅ Database connection pool initialized")
+        if db.is_async:
+            db.create_async_pool()
+        print(f"✅ Database connection pool initialized ({db.mode} mode)")
     except Exception as e:
         print(f"❌ Failed to initialize database: {e}")
+    if db.adaptive:
+        if db.is_async:
+            print("⚠️ DB_POOL_ADAPTIVE ignored in async mode (asyncio pools cannot be resized)")
+        else:
+            pool_sizer.start(db.pools[PRIMARY])
+    
+    warm_up("Plate index", plate_index.load)
+    plate_index.start_reconciliation(db.get_connection)
+    warm_up("Space allocator", space_allocator.load)
+    space_allocator.start_reconciliation(db.get_connection)
+    space_counters.start_reconciliation(db.get_connection)
+    warm_up("Open sessions", open_sessions.load)
+    open_sessions.start_reconciliation(db.get_connection)
+    warm_up("Expiry scheduler", expiry_scheduler.load)
+    expiry_scheduler.start(db.get_connection)
+    warm_up("Dashboard snapshot", dashboard_snapshot.refresh)
+    dashboard_snapshot.start_refresh(db.get_connection)
+    hourly_rollups.start_refresh(db.get_connection)
+    financial_reports.start_refresh(db.get_connection)
+    warm_up("Alert engine", alert_engine.reconcile)
+    alert_engine.start(db.get_connection)
+    record_archiver.start(db.get_connection)
     
     yield
     
     # Shutdown
     print("🛑 Shutting down...")
+    pool_sizer.stop()
+    plate_index.stop_reconciliation()
+    space_allocator.stop_reconciliation()
+    space_counters.stop_reconciliation()
+    open_sessions.stop_reconciliation()
+    expiry_scheduler.stop()
+    dashboard_snapshot.stop_refresh()
+    hourly_rollups.stop_refresh()
+    financial_reports.stop_refresh()
+    alert_engine.stop()
+    record_archiver.stop()
+    # Running exports stop after their current batch and stay resumable
+    bulk_exporter.stop()
     db.close_pool()
+    await db.close_async_pool()
     print("✅ Database connection pool closed")
 
 app = FastAPI(
@@ -38,6 +109,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Commits per request (GET /api/admin/transactions)
+app.add_middleware(CommitCounterMiddleware)
+
 # Include routers
 app.include_router(residents.router)
 app.include_router(vehicles.router)
@@ -45,6 +119,8 @@ app.include_router(subscriptions.router)
 app.include_router(visitors.router)
 app.include_router(dashboard.router)
 app.include_router(supervisors.router)
+app.include_router(exports.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def root():
@@ -59,10 +135,18 @@ def root():
             "subscriptions": "/api/subscriptions",
             "visitors": "/api/visitors",
             "dashboard": "/api/dashboard",
-            "supervisors": "/api/supervisors"
+            "supervisors": "/api/supervisors",
+            "exports": "/api/exports",
+            "admin": "/api/admin",
+            "metrics": "/metrics"
         }
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Connection pool metrics in the Prometheus text format"""
+    return db.exposition()
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
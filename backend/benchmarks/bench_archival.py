@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Hot-path query cost vs history length, with and without archival.
+
+Models VisitorParkingRecord as numpy columns (arrival, departure, fee)
+holding `--daily` visits a day, so 1M rows is ~50 days of history and 50M
+rows ~7 years. The hot-path statements run against the model with the
+plans Oracle uses for them:
+
+  current_visitors   dashboard_stats COUNT(*) WHERE departure_time IS NULL  full scan
+  active_visitors    ACTIVE_VISITORS rows WHERE departure_time IS NULL      full scan
+  overstay_alerts    ALERT_OPEN_VISITORS, arrival > 24 h ago and still open full scan
+  today_arrivals     arrivals since midnight                        index range scan
+
+Each is timed on the full history, then services.archiver.RecordArchiver
+moves everything that closed more than ARCHIVE_AFTER_DAYS ago through a
+stand-in connection (pick / copy / delete, one commit per batch), and the
+statements are timed again on what stays hot.
+
+Fails (exit 1) if, after archival, a full-scan statement at the largest
+size is more than `--max-ratio` times slower than at the smallest.
+
+Usage: python benchmarks/bench_archival.py [--sizes 1000000,50000000] [--daily N]
+       [--after-days N] [--batch-size N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queries
+from services.archiver import RecordArchiver
+from standin_db import StandInConnection
+
+NOW = datetime(2026, 6, 15, 14, 0)
+EPOCH = NOW - timedelta(days=4000)
+
+def seconds(moment: datetime) -> int:
+    return int((moment - EPOCH).total_seconds())
+
+class VisitorTable:
+    """Hot VisitorParkingRecord columns in arrival order; record_id = row + 1"""
+
+    def __init__(self, rows: int, daily: int):
+        now = seconds(NOW)
+        spacing = 86400 / daily
+        index = np.arange(rows, dtype=np.int64)
+        self.record_id = (index + 1).astype(np.int32)
+        self.arrival = (now - (rows - index) * spacing).astype(np.int32)
+        stay = (1800 + (index * 7919) % 14400).astype(np.int32)
+        self.departure = self.arrival + stay
+        # Still parked: arrivals whose stay runs past now, plus a few overstays
+        self.departure[self.departure > now] = -1
+        self.departure[index % 250_000 == 17] = -1
+        self.fee = (10_000 + (index % 9) * 5_000).astype(np.int32)
+        self.alive = None
+        self.archived = 0
+        self._movable = None
+        self._taken = 0
+
+    def __len__(self):
+        return len(self.arrival)
+
+    # ------------------------------------------------------------------
+    # Hot-path statements
+    # ------------------------------------------------------------------
+    def current_visitors(self):
+        return int(np.count_nonzero(self.departure == -1))
+
+    def active_visitors(self):
+        rows = np.flatnonzero(self.departure == -1)
+        return list(zip(self.record_id[rows].tolist(), self.arrival[rows].tolist()))
+
+    def overstay_alerts(self):
+        rows = np.flatnonzero((self.departure == -1) & (self.arrival < seconds(NOW - timedelta(days=1))))
+        return self.record_id[rows].tolist()
+
+    def today_arrivals(self):
+        midnight = np.int32(seconds(NOW.replace(hour=0, minute=0)))
+        return len(self) - int(np.searchsorted(self.arrival, midnight))
+
+    # ------------------------------------------------------------------
+    # Archiver statements
+    # ------------------------------------------------------------------
+    def responder(self, after_days: int):
+        high_water = NOW - timedelta(minutes=1)
+
+        def respond(sql, params):
+            if sql is queries.ARCHIVE_CUTOFF:
+                midnight = NOW.replace(hour=0, minute=0)
+                return ["cutoff"], [(min(midnight - timedelta(days=params["days"]), high_water),)]
+            if sql is queries.ARCHIVE_PICK_VISITOR_RECORDS:
+                if self._movable is None:
+                    cutoff = seconds(params["cutoff"])
+                    self._movable = np.flatnonzero((self.departure >= 0) & (self.departure < cutoff))
+                    self.alive = np.ones(len(self), dtype=bool)
+                batch = self._movable[self._taken:self._taken + params["batch_size"]]
+                self._taken += len(batch)
+                return ["record_id"], [(i,) for i in (batch + 1).tolist()]
+            if sql is queries.ARCHIVE_COPY_VISITOR_RECORDS:
+                positions = np.asarray(params["ids"], dtype=np.int64) - 1
+                self.archived += len(positions)
+                return len(positions)
+            if sql is queries.ARCHIVE_DELETE_VISITOR_RECORDS:
+                positions = np.asarray(params["ids"], dtype=np.int64) - 1
+                self.alive[positions] = False
+                return len(positions)
+            if sql is queries.ARCHIVE_PICK_PARKING_RECORDS:
+                return ["record_id"], []
+            raise AssertionError(f"unexpected statement {sql[:60]}")
+        return respond
+
+    def compact(self):
+        """Drop the deleted rows, as the next full scan would skip them"""
+        if self.alive is not None:
+            for column in ("record_id", "arrival", "departure", "fee"):
+                setattr(self, column, getattr(self, column)[self.alive])
+        self.alive = self._movable = None
+
+STATEMENTS = ("current_visitors", "active_visitors", "overstay_alerts", "today_arrivals")
+FULL_SCANS = STATEMENTS[:3]
+
+def time_statements(table: VisitorTable, repeat: int) -> dict:
+    timings = {}
+    for name in STATEMENTS:
+        fn = getattr(table, name)
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        timings[name] = statistics.median(samples)
+    return timings
+
+def print_timings(label: str, rows: int, timings: dict):
+    cells = "  ".join(f"{timings[name]:9.3f}" for name in STATEMENTS)
+    print(f"{label:<16} {rows:>12,}  {cells}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000000,50000000")
+    parser.add_argument("--daily", type=int, default=20000, help="visits per day")
+    parser.add_argument("--after-days", type=int, default=35)
+    parser.add_argument("--batch-size", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=21)
+    parser.add_argument("--max-ratio", type=float, default=1.5)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print(f"{args.daily:,} visits/day, archive after {args.after_days} days, "
+          f"batches of {args.batch_size:,}; median ms per statement")
+    print(f"{'':<16} {'hot rows':>12}  " + "  ".join(f"{name[:9]:>9}" for name in STATEMENTS))
+    archived_timings = {}
+    failures = []
+    for size in sizes:
+        table = VisitorTable(size, args.daily)
+        open_before = table.current_visitors()
+        print_timings(f"{size:,} live", len(table), time_statements(table, args.repeat))
+
+        archiver = RecordArchiver()
+        archiver.after_days = args.after_days
+        archiver.batch_size = args.batch_size
+        connection = StandInConnection(table.responder(args.after_days), rtt_ms=0)
+        t0 = time.perf_counter()
+        result = archiver.run(connection)
+        move_seconds = time.perf_counter() - t0
+        table.compact()
+        timings = time_statements(table, args.repeat)
+        archived_timings[size] = timings
+        print_timings(f"{size:,} archived", len(table), timings)
+        moved = result["moved"]["VisitorParkingRecord"]
+        print(f"{'':<16} moved {moved:,} rows in {result['batches']} batches, "
+              f"{move_seconds:.1f}s ({moved / move_seconds:,.0f} rows/s, stand-in)")
+        if table.current_visitors() != open_before:
+            failures.append(f"{size:,}: open records changed from {open_before} to {table.current_visitors()}")
+        if moved + len(table) != size:
+            failures.append(f"{size:,}: {moved} moved + {len(table)} hot != {size}")
+        del table
+
+    smallest, largest = archived_timings[sizes[0]], archived_timings[sizes[-1]]
+    for name in FULL_SCANS:
+        ratio = largest[name] / smallest[name]
+        print(f"{name:<18} archived {sizes[-1]:,} vs {sizes[0]:,}: {ratio:.2f}x")
+        if ratio > args.max_ratio:
+            failures.append(f"{name}: {ratio:.2f}x slower at {sizes[-1]:,} rows after archival")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ hot-path cost flat as history grows")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
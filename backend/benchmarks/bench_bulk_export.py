@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Memory and throughput of services.bulk_export on a large date range.
+
+Exports `--rows` ParkingRecord rows through BulkExporter against a cursor
+that generates them on demand in (arrival_time, record_id) order, paying
+`--rtt-ms` per fetch round trip as Oracle would. Process RSS is sampled
+through the run and after every part file; it must stay within
+`--max-rss-mb` of the level before the export, and flat from the first
+part to the last. Progress is polled through GET /api/exports/{id}.
+
+Closed rows in the oldest 70% of the range come from the archive cursor
+and the rest (open rows, recent rows) from the hot one, so the exporter
+merges two streams as it does against migrations/007.
+
+A second, smaller export fails mid-part (after `--fail-at` rows of the
+hot cursor), is resumed from its watermark and read back: every record_id
+must appear exactly once, in order.
+
+Usage: python benchmarks/bench_bulk_export.py [--rows N] [--format csv|parquet]
+       [--part-rows N] [--arraysize N] [--rtt-ms MS]
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from services.bulk_export import bulk_exporter
+from standin_db import StandInConnection
+import queries
+
+BASE = datetime(2024, 1, 1)
+STEP = timedelta(seconds=3)
+PAGE = os.sysconf("SC_PAGE_SIZE")
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE / 2 ** 20
+
+ARCHIVED_SHARE = 0.7
+
+class GeneratedCursor:
+    """ParkingRecord rows i = 0..total-1: record_id i + 1, arrival BASE + i * STEP.
+    Every 10th row is still open; closed rows in the oldest ARCHIVED_SHARE
+    are in the archive table."""
+
+    def __init__(self, connection: StandInConnection, total: int, fail_at: int = None):
+        self.connection = connection
+        self.total = total
+        self.fail_at = fail_at
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.description = None
+        self._next = 0
+        self._fetches = 0
+        self._archived = False
+        self._delivered = 0
+
+    def execute(self, sql, params):
+        self.connection.round_trip()
+        self.description = [(c.upper(),) for c in
+                            ("record_id", "space_id", "vehicle_id", "arrival_time", "departure_time")]
+        # Keyset predicate: ids follow arrival order, so the next row is after_id
+        self._next = max(0, params["after_id"])
+        self._archived = sql is queries.EXPORT_ARCHIVED_PARKING_RECORDS
+        if self._archived:
+            self.fail_at = None
+
+    def fetchmany(self, size: int = None):
+        if self._fetches:
+            self.connection.round_trip()
+        self._fetches += 1
+        size = size or self.arraysize
+        split = int(self.total * ARCHIVED_SHARE)
+        rows = []
+        i = self._next
+        while i < self.total and len(rows) < size:
+            if (i < split and i % 10 != 0) == self._archived:
+                arrival = BASE + STEP * i
+                rows.append((i + 1, i % 800 + 1, i % 1200 + 1, arrival,
+                             arrival + timedelta(minutes=90) if i % 10 else None))
+            i += 1
+        self._next = i
+        self._delivered += len(rows)
+        if self.fail_at is not None and self._delivered > self.fail_at:
+            self.fail_at = None
+            raise RuntimeError("ORA-03113: end-of-file on communication channel")
+        return rows
+
+    def close(self):
+        pass
+
+def connector(total: int, rtt_ms: float, fail_at: int = None):
+    state = {"fail_at": fail_at}
+
+    def get_connection():
+        connection = StandInConnection(None, rtt_ms)
+        fail, state["fail_at"] = state["fail_at"], None
+        connection.cursor = lambda: GeneratedCursor(connection, total, fail)
+        return connection
+    return get_connection
+
+async def get_json(path: str) -> dict:
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET",
+        "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "scheme": "http", "headers": [],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+    }
+    chunks = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return json.loads(b"".join(chunks))
+
+def wait_for(export_id: str, interval: float, on_poll=None) -> dict:
+    job = bulk_exporter.jobs[export_id]
+    while job.thread.is_alive():
+        job.thread.join(timeout=interval)
+        if on_poll:
+            on_poll()
+    return bulk_exporter.get(export_id)
+
+def read_ids(directory: str, parts: list, fmt: str) -> list:
+    ids = []
+    for part in parts:
+        path = os.path.join(directory, part["file"])
+        if fmt == "parquet":
+            import pyarrow.parquet
+            ids.extend(pyarrow.parquet.read_table(path, columns=["record_id"])["record_id"].to_pylist())
+        else:
+            with gzip.open(path, "rt", newline="") as f:
+                reader = csv.reader(f)
+                next(reader)
+                ids.extend(int(row[0]) for row in reader)
+    return ids
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--format", default="csv", choices=("csv", "parquet"))
+    parser.add_argument("--part-rows", type=int, default=1_000_000)
+    parser.add_argument("--arraysize", type=int, default=10000)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--max-rss-mb", type=float, default=150)
+    parser.add_argument("--resume-rows", type=int, default=500_000)
+    parser.add_argument("--fail-at", type=int, default=60_000)
+    args = parser.parse_args()
+
+    bulk_exporter.directory = tempfile.mkdtemp(prefix="bench_export_")
+    bulk_exporter.arraysize = args.arraysize
+    bulk_exporter.part_rows = args.part_rows
+    end = BASE + STEP * args.rows
+    failures = []
+    try:
+        print(f"{args.rows:,} rows to {args.format}, {args.part_rows:,} per part, "
+              f"arraysize {args.arraysize}, rtt {args.rtt_ms} ms")
+        if args.format == "parquet":
+            import pyarrow.parquet  # its import is not export memory
+        baseline = rss_mb()
+        peak = [baseline]
+        part_rss = []
+        sampling = threading.Event()
+
+        def sample():
+            while not sampling.wait(0.05):
+                peak[0] = max(peak[0], rss_mb())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        t0 = time.perf_counter()
+        job = bulk_exporter.begin(connector(args.rows, args.rtt_ms), "parking_records",
+                                  args.format, BASE, end)
+        export_id = job["export_id"]
+
+        def poll():
+            progress = asyncio.run(get_json(f"/api/exports/{export_id}"))
+            parts = len(progress["parts"])
+            if parts > len(part_rss):
+                part_rss.append(rss_mb())
+                print(f"  part {parts:>3}  {progress['rows_exported']:>11,} rows  "
+                      f"{progress['progress']:6.1%}  {progress['rows_per_second'] or 0:>9,} rows/s  "
+                      f"eta {progress['eta_seconds'] or 0:6.1f}s  rss {part_rss[-1]:6.1f} MB")
+
+        result = wait_for(export_id, 0.2, poll)
+        seconds = time.perf_counter() - t0
+        sampling.set()
+        sampler.join()
+        growth = peak[0] - baseline
+        print(f"{result['status']}: {result['rows_exported']:,} rows in {len(result['parts'])} parts, "
+              f"{result['bytes'] / 2 ** 20:,.0f} MB, {seconds:.1f}s = {result['rows_exported'] / seconds:,.0f} rows/s")
+        print(f"rss before {baseline:.1f} MB, peak {peak[0]:.1f} MB (+{growth:.1f} MB)"
+              + (f", first part {part_rss[0]:.1f} MB, last part {part_rss[-1]:.1f} MB" if part_rss else ""))
+        if result["status"] != "completed" or result["rows_exported"] != args.rows:
+            failures.append(f"export {result['status']} with {result['rows_exported']} rows")
+        if growth > args.max_rss_mb:
+            failures.append(f"rss grew {growth:.1f} MB > {args.max_rss_mb:g} MB")
+        if len(part_rss) >= 2 and part_rss[-1] - part_rss[0] > args.max_rss_mb / 3:
+            failures.append(f"rss climbed {part_rss[-1] - part_rss[0]:.1f} MB from first to last part")
+
+        # Fail mid-part, resume, read everything back
+        bulk_exporter.part_rows = args.resume_rows // 5
+        resume_end = BASE + STEP * args.resume_rows
+        get_connection = connector(args.resume_rows, args.rtt_ms, fail_at=args.fail_at)
+        job = bulk_exporter.begin(get_connection, "parking_records", args.format, BASE, resume_end)
+        first = wait_for(job["export_id"], 0.1)
+        bulk_exporter.resume(get_connection, job["export_id"])
+        second = wait_for(job["export_id"], 0.1)
+        ids = read_ids(bulk_exporter.jobs[job["export_id"]].directory, second["parts"], args.format)
+        print(f"resume: run 1 {first['status']} after {len(first['parts'])} parts "
+              f"(watermark id {first['watermark']['id'] if first['watermark'] else None}), "
+              f"run 2 {second['status']}, {len(ids):,} rows read back")
+        if first["status"] != "failed" or second["status"] != "completed":
+            failures.append(f"resume runs ended {first['status']} / {second['status']}")
+        if ids != list(range(1, args.resume_rows + 1)):
+            failures.append(f"resumed export has {len(ids)} rows, {len(set(ids))} distinct, "
+                            f"expected 1..{args.resume_rows} in order")
+    finally:
+        shutil.rmtree(bulk_exporter.directory, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ constant-memory export, resumed without gaps or repeats")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Throughput of the bulk import vs one POST per row.
+
+Builds a `--rows` residents CSV and a vehicles NDJSON file (vehicles name
+their owner by resident_email) with about 1% bad rows, and runs them
+through services.bulk_import against a stand-in database (`--rtt-ms` per
+round trip; executemany is one trip per chunk). The single-row baseline
+is what POST /api/residents/ does per row: an id from the sequence block
+plus INSERT and COMMIT, timed over `--single-rows` rows. The residents
+file is also posted once to POST /api/residents/import in-process in
+64 KB body chunks, to time the streaming route end to end.
+
+Fails (exit 1) if a good row is missing or a bad row was inserted.
+
+Usage: python benchmarks/bench_bulk_import.py [--rows N] [--chunk-size N] [--rtt-ms MS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import db
+from app import app
+from services.bulk_import import bulk_importer
+from services.id_allocator import IdAllocator
+from standin_db import StandInConnection, StandInPool
+import models
+import queries
+
+APARTMENTS = 600
+BODY_CHUNK = 1 << 16
+
+class Tables:
+    """Resident / Vehicle rows with the unique keys Oracle would enforce"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sequence = 1
+        self.residents = {}
+        self.emails = {}
+        self.plates = set()
+
+    def responder(self, sql, params):
+        with self.lock:
+            if "increment_by" in sql:
+                return ["increment_by"], [(1000,)]
+            if "NEXTVAL" in sql:
+                value, self.sequence = self.sequence, self.sequence + 1000
+                return ["nextval"], [(value,)]
+            if sql is queries.IMPORT_APARTMENT_IDS:
+                return ["apartment_id"], [(i,) for i in range(1, APARTMENTS + 1)]
+            if sql is queries.IMPORT_RESIDENT_KEYS:
+                return ["resident_id", "email"], [(i, e) for e, i in self.emails.items()]
+            if sql is queries.IMPORT_VEHICLE_PLATES:
+                return ["license_plate"], [(p,) for p in self.plates]
+            if sql is queries.INSERT_RESIDENT:
+                if len(params["phone_number"]) > 15:
+                    raise RuntimeError("ORA-12899: value too large for column PHONE_NUMBER")
+                self.residents[params["resident_id"]] = params
+                self.emails.setdefault(params["email"].lower(), params["resident_id"])
+                return 1
+            if sql is queries.INSERT_VEHICLE:
+                if params["license_plate"] in self.plates:
+                    raise RuntimeError("ORA-00001: unique constraint violated")
+                self.plates.add(params["license_plate"])
+                return 1
+        return 1
+
+def residents_csv(rows: int, offset: int = 0) -> bytes:
+    lines = ["apartment_id,name,phone_number,email"]
+    for i in range(offset, offset + rows):
+        apartment = i % APARTMENTS + 1
+        if i % 250 == 7:
+            apartment = APARTMENTS + 1  # unknown apartment
+        phone = "09" + f"{i:08d}" if i % 250 != 11 else "0" * 20  # too long for the column
+        lines.append(f'{apartment},"Nguyen, Van {i}",{phone},res{i}@tower.vn')
+    return ("\n".join(lines) + "\n").encode()
+
+def vehicles_ndjson(rows: int) -> bytes:
+    lines = []
+    for i in range(rows):
+        row = {"resident_email": f"res{i}@tower.vn", "license_plate": f"51T{i:06d}", "vehicle_type": "Car"}
+        if i % 250 == 3:
+            row["license_plate"] = f"51T{i - 1:06d}"  # repeated plate
+        if i % 250 == 5:
+            del row["vehicle_type"]
+        lines.append(json.dumps(row))
+    return ("\n".join(lines) + "\n").encode()
+
+def blocks(data: bytes):
+    for start in range(0, len(data), BODY_CHUNK):
+        yield data[start:start + BODY_CHUNK]
+
+def expected_bad(rows: int, entity: str) -> int:
+    # Vehicles of the rejected residents (7, 11) find no owner either
+    bad = (7, 11) if entity == "residents" else (3, 5, 7, 11)
+    return sum(1 for i in range(rows) if i % 250 in bad)
+
+async def post(path: str, body: bytes) -> dict:
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST",
+        "path": path, "raw_path": path.encode(), "query_string": b"format=csv",
+        "root_path": "", "scheme": "http", "headers": [(b"content-type", b"text/csv")],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+    }
+    parts = list(blocks(body))
+    chunks = []
+
+    async def receive():
+        if parts:
+            return {"type": "http.request", "body": parts.pop(0), "more_body": bool(parts)}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return json.loads(b"".join(chunks))
+
+def report_line(label: str, result: dict):
+    print(f"{label:<18} {result['received']:>7} rows  {result['inserted']:>7} inserted  "
+          f"{result['rejected']:>5} rejected  {result['seconds']:7.2f}s  {result['rows_per_second']:>8,} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--single-rows", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+    bulk_importer.chunk_size = args.chunk_size
+    print(f"{args.rows:,} rows, chunks of {args.chunk_size}, rtt {args.rtt_ms} ms")
+
+    failures = []
+    tables = Tables()
+    connection = StandInConnection(tables.responder, args.rtt_ms)
+
+    # One POST per row, as the API offered before
+    single = IdAllocator()
+    t0 = time.perf_counter()
+    for i in range(args.single_rows):
+        new_id = single.next_id(connection, "Resident")
+        models.execute_update(connection, queries.INSERT_RESIDENT, {
+            "resident_id": new_id, "apartment_id": 1, "name": f"Single {i}",
+            "phone_number": "0900000000", "email": f"single{i}@tower.vn"})
+    single_rate = args.single_rows / (time.perf_counter() - t0)
+    print(f"{'single-row POST':<18} {args.single_rows:>7} rows  {single_rate:>37,.0f} rows/s")
+
+    for entity, data in (("residents", residents_csv(args.rows)), ("vehicles", vehicles_ndjson(args.rows))):
+        fmt = "csv" if entity == "residents" else "ndjson"
+        before = len(tables.residents) if entity == "residents" else len(tables.plates)
+        result = bulk_importer.import_stream(connection, entity, fmt, blocks(data)).as_dict()
+        report_line(f"import {entity}", result)
+        after = len(tables.residents) if entity == "residents" else len(tables.plates)
+        bad = expected_bad(args.rows, entity)
+        if result["rejected"] != bad or after - before != args.rows - bad:
+            failures.append(f"{entity}: expected {bad} rejected and {args.rows - bad} stored, "
+                            f"got {result['rejected']} and {after - before}")
+    print(f"{'':<18} speedup over single-row: {result['rows_per_second'] / single_rate:.0f}x")
+    print(f"{'':<18} first errors: {result['errors'][:2]}")
+
+    # Streaming route, end to end
+    db.pool = StandInPool(tables.responder, args.rtt_ms, max=4)
+    body = residents_csv(args.rows, offset=args.rows)
+    result = asyncio.run(post("/api/residents/import", body))
+    report_line("POST /import", result)
+    if result["rejected"] != expected_bad(args.rows, "residents"):
+        failures.append(f"route: {result['rejected']} rejected")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ every good row stored, every bad row reported")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Dashboard stats: per-request query vs the in-memory snapshot.
+
+Simulates concurrent viewers polling /api/dashboard/stats and reports
+database round trips and latency for both paths.
+
+Usage: python benchmarks/bench_dashboard_snapshot.py [--viewers N] [--polls P]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from services.dashboard_snapshot import FIELDS, DashboardSnapshot
+from standin_db import StandInConnection, percentile
+
+def responder(sql, params):
+    return list(FIELDS), [(600, 412, 97, 1_250_000, 1100, 35)]
+
+def run(label, viewers, polls, read):
+    latencies = []
+
+    def viewer(_):
+        for _ in range(polls):
+            t0 = time.perf_counter()
+            read()
+            latencies.append((time.perf_counter() - t0) * 1e6)
+
+    with ThreadPoolExecutor(max_workers=viewers) as pool:
+        list(pool.map(viewer, range(viewers)))
+    print(f"{label:<12} reads={len(latencies)}  p50={percentile(latencies, 50):9.1f}us  "
+          f"p99={percentile(latencies, 99):9.1f}us")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--viewers", type=int, default=100)
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    direct = StandInConnection(responder, args.rtt_ms)
+    run("direct", args.viewers, args.polls, lambda: models.get_dashboard_stats(direct))
+    print(f"{'':<12} database round trips: {direct.round_trips}")
+
+    cached = StandInConnection(responder, args.rtt_ms)
+    snapshot = DashboardSnapshot()
+    run("snapshot", args.viewers, args.polls, lambda: snapshot.read(lambda: cached))
+    print(f"{'':<12} database round trips: {cached.round_trips}  metrics: {snapshot.metrics()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Load test of an `async def` route in DB_MODE=sync vs DB_MODE=async.
+
+Drives the ASGI app in-process with N concurrent requests against a stand-in
+database (fixed round-trip time, 10-connection pool) and reports req/s and
+latency percentiles for each mode. The default path, /api/dashboard/occupancy,
+takes its connection from get_async_db_connection and runs one query;
+/api/visitors/active is served from memory (services/open_sessions.py)
+and no longer touches the pool.
+
+Usage: python benchmarks/bench_db_modes.py [--requests N] [--concurrency C]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import READ, db
+from app import app
+from standin_db import StandInAsyncPool, StandInPool, percentile
+
+ROWS = [(i, i % 800 + 1, f"51V{i:05d}", datetime.now(), 0) for i in range(50)]
+
+def responder(sql, params):
+    return ["record_id", "space_id", "license_plate", "arrival_time", "parking_fee"], ROWS
+
+async def call(path: str) -> int:
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET",
+        "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "scheme": "http", "headers": [],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def load(path: str, total: int, concurrency: int):
+    latencies = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            t0 = time.perf_counter()
+            if await call(path) != 200:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - t0), latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    parser.add_argument("--path", default="/api/dashboard/occupancy")
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        db.mode = mode
+        db.pool = StandInPool(responder, args.rtt_ms, max=10)
+        # GET routes are served from the read pool
+        db.pools[READ].pool = StandInPool(responder, args.rtt_ms, max=10)
+
+        async def run():
+            db.async_pool = StandInAsyncPool(responder, args.rtt_ms, max=10)
+            db.pools[READ].async_pool = StandInAsyncPool(responder, args.rtt_ms, max=10)
+            return await load(args.path, args.requests, args.concurrency)
+
+        rps, latencies, errors = asyncio.run(run())
+        print(f"{mode:<6} {rps:>8.0f} req/s  p50={percentile(latencies, 50):7.1f}ms  "
+              f"p99={percentile(latencies, 99):7.1f}ms  errors={errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Subscription expiry: in-memory schedule vs scanning ParkingSubscription.
+
+Loads N live subscriptions into an ExpiryScheduler through the stand-in
+connection, then times the dashboard counters, the /expiring id list, add
+/ remove, and one day of expiry events. The scan baseline evaluates the same
+BETWEEN predicates over every row in Python, which is the work the
+COUNT(*) subqueries did per call (without the round trip).
+
+Usage: python benchmarks/bench_expiry_scheduler.py [--subscriptions N] [--memory]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.expiry_scheduler import ExpiryScheduler
+from standin_db import StandInConnection, percentile
+
+COLUMNS = ["subscription_id", "vehicle_id", "start_date", "expiration_date"]
+WINDOW = timedelta(days=7)
+
+def build_subscriptions(n: int):
+    rng = random.Random(14)
+    now = datetime.now().replace(microsecond=0)
+    rows = []
+    for subscription_id in range(1, n + 1):
+        # A tenth are renewals that have not started yet
+        start = now + timedelta(seconds=rng.randint(-300 * 86400, 60 * 86400 if subscription_id % 10 == 0 else 0))
+        end = start + timedelta(days=rng.choice([30, 91, 365]))
+        if end < now:
+            end = now + timedelta(seconds=rng.randint(0, 30 * 86400))
+        rows.append((subscription_id, rng.randint(1, n), start, end))
+    return rows
+
+def scan_counts(rows):
+    now = datetime.now()
+    soon = now + WINDOW
+    active = sum(1 for _, _, start, end in rows if start <= now <= end)
+    expiring = sum(1 for _, _, _, end in rows if now <= end <= soon)
+    return {"active_subscriptions": active, "expiring_soon": expiring}
+
+def run(label, fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - t0) / 1000.0)
+    print(f"{label:<26} p50={percentile(samples, 50):>11.2f}us  "
+          f"p99={percentile(samples, 99):>11.2f}us  max={max(samples):>11.2f}us")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscriptions", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--memory", action="store_true", help="report tracemalloc peak for the load")
+    args = parser.parse_args()
+
+    rows = build_subscriptions(args.subscriptions)
+    connection = StandInConnection(lambda sql, params: (COLUMNS, rows), rtt_ms=0)
+
+    scheduler = ExpiryScheduler()
+    if args.memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    scheduler.load(connection)
+    print(f"Loaded {len(scheduler):,} subscriptions in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    if args.memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"schedule holds {current / 2**20:.0f} MB (peak {peak / 2**20:.0f} MB during load)")
+
+    # Both must agree before timing anything
+    assert scheduler.counts(WINDOW) == scan_counts(rows), "counters differ from the scan"
+
+    run("counts (schedule)", lambda: scheduler.counts(WINDOW), args.iterations)
+    run("expiring_ids 7d (schedule)", lambda: scheduler.expiring_ids(WINDOW), max(1, args.iterations // 100))
+    run("counts (scan)", lambda: scan_counts(rows), 5)
+
+    next_id = [args.subscriptions + 1]
+    def add_remove():
+        subscription_id = next_id[0]
+        next_id[0] += 1
+        start = datetime.now()
+        scheduler.add(subscription_id, 1, start, start + timedelta(days=random.randint(1, 365)))
+        scheduler.remove(subscription_id)
+    run("add + remove", add_remove, args.iterations)
+
+    expired = []
+    scheduler.subscribe(lambda events: expired.extend(events))
+    t0 = time.perf_counter()
+    scheduler.advance(datetime.now() + timedelta(days=1))
+    print(f"advance one day: {len(expired):,} events in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Monthly financial reports: parallel backfill, idempotency and incremental refresh.
+
+Models SupervisionShift and ParkingSubscription as numpy columns covering
+`--years` of history, and the two report tables as dicts keyed on
+(month, id), behind a stand-in connection that answers the REPORT_*
+statements of services/reports.py the way Oracle would. Each statement
+over a month costs the round trip plus `--month-ms` of server time, so a
+backfill is bound by how many months run at once:
+
+  backfill      services.reports.backfill() over all history with 1 and
+                `--workers` connections
+  idempotent    a second backfill leaves every row, report id included,
+                unchanged
+  refresh       shifts check out and subscriptions start after the
+                watermark; the refresh recomputes only their months
+
+Every run is checked against the reports aggregated straight from the
+columns. Fails (exit 1) if any differs, if the parallel backfill is less
+than `--min-speedup` times faster, or if the refresh touches months that
+saw no change.
+
+Usage: python benchmarks/bench_financial_reports.py [--years N] [--shifts-per-month N]
+       [--workers N] [--month-ms MS] [--rtt-ms MS]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queries
+from services.dates import add_months, month_start
+from services.reports import FinancialReports, months_between
+from standin_db import StandInConnection
+
+NOW = datetime(2026, 6, 15, 14, 0)
+EPOCH = datetime(2000, 1, 1)
+SUPERVISORS = 40
+MANAGERS = 8
+
+def seconds(moment: datetime) -> int:
+    return int((moment - EPOCH).total_seconds())
+
+def moment(value: int) -> datetime:
+    return EPOCH + timedelta(seconds=int(value))
+
+class ReportDatabase:
+    """Source columns and report tables, answering the report statements"""
+
+    def __init__(self, years: int, shifts_per_month: int, subs_per_month: int, month_ms: float,
+                 pay: dict, seed: int):
+        rng = np.random.default_rng(seed)
+        first = add_months(month_start(NOW), -12 * years)
+        shifts = shifts_per_month * 12 * years
+        subs = subs_per_month * 12 * years
+        self.month_ms = month_ms
+        self.pay = pay
+        self.lock = threading.Lock()
+
+        check_in = np.sort(rng.integers(seconds(first), seconds(NOW), shifts))
+        self.shift_supervisor = rng.integers(1, SUPERVISORS + 1, shifts)
+        self.shift_check_in = check_in
+        self.shift_check_out = check_in + rng.integers(3600, 9 * 3600, shifts)
+        # The last few hours' shifts are still running
+        self.shift_check_out[self.shift_check_out > seconds(NOW)] = -1
+        self.shift_money = rng.integers(0, 2000, shifts) * 1000
+        self.supervisor_manager = {s: (s - 1) % MANAGERS + 1 for s in range(1, SUPERVISORS + 1)}
+
+        self.sub_start = np.sort(rng.integers(seconds(first), seconds(NOW), subs))
+        self.sub_manager = rng.integers(1, MANAGERS + 1, subs)
+        self.sub_type = rng.integers(0, 3, subs)
+        self.sub_cost = np.array([300000, 850000, 3000000])[self.sub_type]
+        self.first = first
+
+        self.supervisor_reports = {}
+        self.manager_reports = {}
+        self.next_report_id = [1, 1]
+        self.high_water = month_start(NOW)
+        self.statements = 0
+
+    # ------------------------------------------------------------------
+    # Source changes after the watermark
+    # ------------------------------------------------------------------
+    def check_out(self, index: int, at: datetime):
+        self.shift_check_out[index] = seconds(at)
+
+    def add_shift(self, supervisor_id: int, check_in: datetime, check_out: datetime, money: int):
+        position = np.searchsorted(self.shift_check_in, seconds(check_in))
+        self.shift_check_in = np.insert(self.shift_check_in, position, seconds(check_in))
+        self.shift_check_out = np.insert(self.shift_check_out, position, seconds(check_out))
+        self.shift_supervisor = np.insert(self.shift_supervisor, position, supervisor_id)
+        self.shift_money = np.insert(self.shift_money, position, money)
+
+    def add_subscription(self, manager_id: int, start: datetime, kind: int):
+        position = np.searchsorted(self.sub_start, seconds(start))
+        self.sub_start = np.insert(self.sub_start, position, seconds(start))
+        self.sub_manager = np.insert(self.sub_manager, position, manager_id)
+        self.sub_type = np.insert(self.sub_type, position, kind)
+        self.sub_cost = np.insert(self.sub_cost, position, [300000, 850000, 3000000][kind])
+
+    # ------------------------------------------------------------------
+    # Aggregates, as the MERGE sources compute them
+    # ------------------------------------------------------------------
+    def _window(self, starts, month_start_: datetime, month_end: datetime) -> slice:
+        return slice(np.searchsorted(starts, seconds(month_start_)), np.searchsorted(starts, seconds(month_end)))
+
+    def supervisor_month(self, month: datetime, pay: dict) -> dict:
+        window = self._window(self.shift_check_in, month, add_months(month, 1))
+        closed = self.shift_check_out[window] >= 0
+        supervisors = self.shift_supervisor[window][closed]
+        counts = np.bincount(supervisors, minlength=SUPERVISORS + 1)
+        money = np.bincount(supervisors, weights=self.shift_money[window][closed], minlength=SUPERVISORS + 1)
+        return {int(s): (self.supervisor_manager[int(s)], int(counts[s]), int(money[s]),
+                         pay["base_salary"] + pay["shift_pay"] * int(counts[s]))
+                for s in np.flatnonzero(counts)}
+
+    def manager_month(self, month: datetime, pay: dict) -> dict:
+        window = self._window(self.sub_start, month, add_months(month, 1))
+        managers = self.sub_manager[window]
+        counts = np.bincount(managers, minlength=MANAGERS + 1)
+        money = np.bincount(managers, weights=self.sub_cost[window], minlength=MANAGERS + 1)
+        by_type = [np.bincount(managers[self.sub_type[window] == kind], minlength=MANAGERS + 1) for kind in range(3)]
+        return {int(m): (int(counts[m]), int(money[m]), int(by_type[0][m]), int(by_type[1][m]), int(by_type[2][m]),
+                         pay["manager_base_salary"] + round(pay["commission"] * int(money[m])))
+                for m in np.flatnonzero(counts)}
+
+    def expected(self, pay: dict) -> tuple:
+        supervisors, managers = {}, {}
+        for month in months_between(self.first, NOW):
+            supervisors.update({(month, s): row for s, row in self.supervisor_month(month, pay).items()})
+            managers.update({(month, m): row for m, row in self.manager_month(month, pay).items()})
+        return supervisors, managers
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+    def _merge(self, table: dict, which: int, month: datetime, rows: dict) -> int:
+        with self.lock:
+            for key, values in rows.items():
+                report_id = table[(month, key)][0] if (month, key) in table else None
+                if report_id is None:
+                    report_id = self.next_report_id[which]
+                    self.next_report_id[which] += 1
+                table[(month, key)] = (report_id,) + values
+        return len(rows)
+
+    def _clear(self, table: dict, month: datetime, keep: dict) -> int:
+        with self.lock:
+            stale = [key for key in table if key[0] == month and key[1] not in keep]
+            for key in stale:
+                del table[key]
+        return len(stale)
+
+    def respond(self, sql, params):
+        with self.lock:
+            self.statements += 1
+        if sql is queries.ROLLUP_WATERMARK_LOCK:
+            return ["high_water", "until"], [(self.high_water, NOW - timedelta(seconds=params["lag_seconds"]))]
+        if sql is queries.ROLLUP_WATERMARK_ADVANCE:
+            self.high_water = params["high_water"]
+            return 1
+        if sql is queries.REPORT_SOURCE_RANGE:
+            return ["first", "last"], [(moment(min(self.shift_check_in[0], self.sub_start[0])),
+                                        moment(max(self.shift_check_in[-1], self.sub_start[-1])))]
+        if sql is queries.REPORT_DIRTY_MONTHS:
+            since, until = seconds(params["since"]), seconds(params["until"])
+            closed = (self.shift_check_out >= since) & (self.shift_check_out < until)
+            started = (self.sub_start >= since) & (self.sub_start < until)
+            months = {month_start(moment(t)) for t in self.shift_check_in[closed].tolist()}
+            months |= {month_start(moment(t)) for t in self.sub_start[started].tolist()}
+            months.add(month_start(params["until"]))
+            return ["month"], [(m,) for m in sorted(months)]
+
+        # Aggregating one month on the server
+        time.sleep(self.month_ms / 1000.0)
+        month = params["month_start"]
+        if sql is queries.REPORT_CLEAR_SUPERVISORS:
+            return self._clear(self.supervisor_reports, month, self.supervisor_month(month, self.pay))
+        if sql is queries.REPORT_MERGE_SUPERVISORS:
+            return self._merge(self.supervisor_reports, 0, month, self.supervisor_month(month, params))
+        if sql is queries.REPORT_CLEAR_MANAGERS:
+            return self._clear(self.manager_reports, month, self.manager_month(month, self.pay))
+        if sql is queries.REPORT_MERGE_MANAGERS:
+            return self._merge(self.manager_reports, 1, month, self.manager_month(month, params))
+        raise AssertionError(f"unexpected statement {sql[:60]}")
+
+def compare(label: str, database: ReportDatabase, expected: tuple) -> list:
+    failures = []
+    for name, table, wanted in (("supervisor", database.supervisor_reports, expected[0]),
+                                ("manager", database.manager_reports, expected[1])):
+        held = {key: row[1:] for key, row in table.items()}
+        if held != wanted:
+            differ = sum(1 for key in held.keys() | wanted.keys() if held.get(key) != wanted.get(key))
+            failures.append(f"{label}: {differ} of {len(wanted):,} {name} reports differ from the source")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--shifts-per-month", type=int, default=3000)
+    parser.add_argument("--subs-per-month", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--month-ms", type=float, default=10.0, help="server time per statement over a month")
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--min-speedup", type=float, default=2.5)
+    args = parser.parse_args()
+
+    reports = FinancialReports()
+    database = ReportDatabase(args.years, args.shifts_per_month, args.subs_per_month, args.month_ms,
+                              reports.pay, seed=11)
+    get_connection = lambda: StandInConnection(database.respond, args.rtt_ms)
+    # A shift from three months ago still open; it checks out after the backfill
+    old_month = add_months(month_start(NOW), -3)
+    late = int(np.searchsorted(database.shift_check_in, seconds(old_month + timedelta(days=3))))
+    database.shift_check_out[late] = -1
+    expected = database.expected(reports.pay)
+    print(f"{len(database.shift_check_in):,} shifts and {len(database.sub_start):,} subscriptions over "
+          f"{args.years} years; {args.month_ms} ms per month statement, rtt {args.rtt_ms} ms")
+
+    failures = []
+    timings = {}
+    for workers in (1, args.workers):
+        database.supervisor_reports.clear()
+        database.manager_reports.clear()
+        result = reports.backfill(get_connection, workers=workers)
+        timings[workers] = result["ms"]
+        print(f"backfill  {workers:>2} workers: {result['months']} months, {result['supervisor_rows']:,} supervisor "
+              f"and {result['manager_rows']:,} manager rows in {result['ms']:,.0f} ms")
+        if result["failed"]:
+            failures.append(f"backfill with {workers} workers: {len(result['failed'])} months failed")
+        failures.extend(compare(f"backfill with {workers} workers", database, expected))
+    speedup = timings[1] / timings[args.workers]
+    print(f"speedup   {args.workers} workers vs 1: {speedup:.2f}x")
+    if speedup < args.min_speedup:
+        failures.append(f"backfill with {args.workers} workers only {speedup:.2f}x faster than with 1")
+
+    before = (dict(database.supervisor_reports), dict(database.manager_reports))
+    reports.backfill(get_connection)
+    unchanged = before == (database.supervisor_reports, database.manager_reports)
+    print(f"idempotent second backfill: {'every row and report id unchanged' if unchanged else 'rows changed'}")
+    if not unchanged:
+        failures.append("a second backfill changed report rows or ids")
+
+    # Changes since the watermark: the late check-out, a new shift and a
+    # subscription this month
+    database.high_water = NOW - timedelta(hours=1)
+    database.check_out(late, NOW - timedelta(minutes=30))
+    database.add_shift(3, NOW - timedelta(hours=5), NOW - timedelta(minutes=20), 450000)
+    database.add_subscription(2, NOW - timedelta(minutes=10), 1)
+    expected = database.expected(reports.pay)
+    stale = compare("before refresh", database, expected)
+    statements = database.statements
+    t0 = time.perf_counter()
+    result = reports.refresh(get_connection())
+    elapsed = (time.perf_counter() - t0) * 1000
+    dirty = sorted(result["months"])
+    print(f"refresh   recomputed {[m.strftime('%Y-%m') for m in dirty]} in {elapsed:.0f} ms "
+          f"({database.statements - statements} statements)")
+    if dirty != sorted({old_month, month_start(NOW)}):
+        failures.append(f"refresh recomputed {dirty}, expected {old_month:%Y-%m} and {NOW:%Y-%m}")
+    if not stale:
+        failures.append("refresh check is vacuous: the reports already matched before it")
+    failures.extend(compare("refresh", database, expected))
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ reports match the source, backfill scales with workers and refresh follows the changes")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
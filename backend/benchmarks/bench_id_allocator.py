@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Concurrent visitor entries: MAX(id)+1 vs the sequence-block allocator.
+
+Fires N parallel visitor entries at a stand-in database that enforces the
+VisitorParkingRecord primary key and counts duplicate-key failures. The
+sequence-block run goes through the real entry route, so the stand-in also
+answers the space allocator's load and its stripe claims; it exits 1 if
+any of those entries fails.
+
+Usage: python benchmarks/bench_id_allocator.py [--entries N] [--rtt-ms MS]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+import queries
+from routes.visitors import VisitorEntry, visitor_entry
+from services.id_allocator import IdAllocator
+import routes.visitors as visitors_route
+from standin_db import StandInConnection
+
+class VisitorTable:
+    """Primary-key-enforcing stand-in for VisitorParkingRecord + its sequence,
+    with one visitor space that has room for every entry"""
+
+    def __init__(self, increment: int, capacity: int):
+        self.lock = threading.Lock()
+        self.ids = set(range(1, 501))
+        self.sequence = 501
+        self.increment = increment
+        self.collisions = 0
+        self.available = capacity
+
+    def responder(self, sql, params):
+        with self.lock:
+            if sql is queries.SPACE_ALLOCATOR_LOAD:
+                return ["space_id", "space_type", "spaces_available"], [(1, "Visitor", self.available)]
+            if sql is queries.SPACE_TAKE:
+                taken = self.available > 0
+                self.available -= taken
+                params["result"].setvalue(0, 1 if taken else 0)
+                return 1
+            if "increment_by" in sql:
+                return ["increment_by"], [(self.increment,)]
+            if "NEXTVAL" in sql:
+                value = self.sequence
+                self.sequence += self.increment
+                return ["nextval"], [(value,)]
+            if "MAX(record_id)" in sql:
+                return ["next_id"], [(max(self.ids) + 1,)]
+            if "INSERT INTO VisitorParkingRecord" in sql:
+                if params["record_id"] in self.ids:
+                    self.collisions += 1
+                    raise RuntimeError("ORA-00001: unique constraint violated")
+                self.ids.add(params["record_id"])
+                if "arrival_time_out" in params:
+                    params["arrival_time_out"].setvalue(0, [datetime.now()])
+                return 1
+        return [], []
+
+def legacy_entry(connection, plate):
+    cursor = connection.cursor()
+    cursor.execute("SELECT NVL(MAX(record_id), 0) + 1 FROM VisitorParkingRecord")
+    new_id = cursor.fetchone()[0]
+    cursor.close()
+    models.execute_update(connection, "INSERT INTO VisitorParkingRecord VALUES (:record_id)",
+                          {"record_id": new_id})
+
+def fire(label, table, entries, rtt_ms, fn):
+    failures = 0
+
+    def one(i):
+        nonlocal failures
+        try:
+            fn(StandInConnection(table.responder, rtt_ms), f"51V{i:05d}")
+        except Exception:
+            failures += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=entries) as pool:
+        list(pool.map(one, range(entries)))
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<18} entries={entries}  collisions={table.collisions}  "
+          f"failed={failures}  {entries / elapsed:8.0f} entries/s")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--block", type=int, default=50)
+    args = parser.parse_args()
+
+    fire("MAX(id)+1", VisitorTable(args.block, args.entries), args.entries, args.rtt_ms, legacy_entry)
+
+    table = VisitorTable(args.block, args.entries)
+    allocator = IdAllocator()
+    visitors_route.id_allocator = allocator
+
+    def allocated_entry(connection, plate):
+        visitor_entry(VisitorEntry(license_plate=plate, space_id=1), connection)
+
+    failed = fire("sequence blocks", table, args.entries, args.rtt_ms, allocated_entry)
+    print(f"sequence refills: {allocator.refills}")
+    if failed or table.collisions:
+        print(f"❌ {failed} allocated entries failed, {table.collisions} collided")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
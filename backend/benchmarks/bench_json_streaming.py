@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Large list responses: dict path vs streamed columnar / NDJSON.
+
+The dict path is what GET /api/visitors/ does today: execute_query builds a
+dict per row, FastAPI runs jsonable_encoder and JSONResponse json.dumps the
+whole body. The streamed paths are services.row_stream, consumed chunk by
+chunk as the ASGI server would. Reports wall time and tracemalloc peak.
+
+Usage: python benchmarks/bench_json_streaming.py [--rows N] [--repeat R]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+import queries
+from services.row_stream import stream_rows
+from standin_db import StandInConnection
+
+COLUMNS = ["record_id", "space_id", "license_plate", "arrival_time", "departure_time", "parking_fee"]
+
+def build_rows(n: int):
+    base = datetime(2024, 1, 1)
+    return [
+        (i, 1 + i % 4, f"51V{i:07d}", base + timedelta(minutes=i),
+         base + timedelta(minutes=i + 95), 20000)
+        for i in range(n, 0, -1)
+    ]
+
+def dict_path(connection) -> int:
+    rows = models.execute_query(connection, queries.VISITORS_PAGE, {"offset": 0, "limit": 0})
+    content = jsonable_encoder({"data": rows, "count": len(rows)})
+    body = json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+    return len(body)
+
+def stream_path(fmt: str, make_connection):
+    def run() -> int:
+        return sum(len(chunk) for chunk in stream_rows(make_connection, queries.VISITORS_PAGE,
+                                                       {"offset": 0, "limit": 0}, fmt))
+    return run
+
+def measure(fn, repeat: int):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak, size
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    make_connection = lambda: StandInConnection(lambda sql, params: (COLUMNS, rows), rtt_ms=0)
+
+    print(f"{args.rows:,} visitor rows")
+    print(f"{'path':<10} {'time':>10} {'rows/s':>12} {'peak mem':>10} {'body':>10}")
+    for name, fn in [
+        ("dict", lambda: dict_path(make_connection())),
+        ("columnar", stream_path("columnar", make_connection)),
+        ("ndjson", stream_path("ndjson", make_connection)),
+    ]:
+        elapsed, peak, size = measure(fn, args.repeat)
+        print(f"{name:<10} {elapsed * 1000:>7.1f} ms {args.rows / elapsed:>12,.0f} "
+              f"{peak / 2**20:>7.1f} MB {size / 2**20:>7.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Visitor listing: OFFSET pages vs keyset (seek) pages.
+
+Builds an in-memory stand-in for the (arrival_time DESC, record_id DESC)
+index over N visitor records. An OFFSET page walks the index from the top
+and discards `offset` entries, as Oracle's row-limiting clause does; a
+keyset page seeks to the cursor and reads `limit` entries. Both go through
+models.get_visitors and the route's cursor encoding (page 1 is the same
+first-page query either way).
+
+Usage: python benchmarks/bench_keyset_pagination.py [--rows N] [--limit L] [--page P]
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from services.pagination import decode_cursor, encode_cursor, next_cursor
+from standin_db import StandInConnection
+
+COLUMNS = ["record_id", "space_id", "license_plate", "arrival_time", "departure_time", "parking_fee"]
+ID_SCALE = 10 ** 8  # composite key = arrival_seconds * ID_SCALE + record_id
+
+def build_index(n: int):
+    rng = np.random.default_rng(11)
+    base = int(datetime(2020, 1, 1).timestamp())
+    arrivals = base + rng.integers(0, 5 * 365 * 86400, n)
+    record_ids = np.arange(1, n + 1)
+    # Ascending on the negated key == descending on (arrival_time, record_id)
+    keys = np.sort(-(arrivals * ID_SCALE + record_ids))
+    return keys
+
+def to_row(key: int):
+    key = -int(key)
+    arrival, record_id = divmod(key, ID_SCALE)
+    return (record_id, 1 + record_id % 4, f"51V{record_id:07d}",
+            datetime.fromtimestamp(arrival), None, 0)
+
+def make_responder(keys):
+    def responder(sql, params):
+        limit = params["limit"]
+        if "offset" in params:
+            walk = itertools.islice(iter(keys), params["offset"], params["offset"] + limit)
+            return COLUMNS, [to_row(k) for k in walk]
+        seek = -(int(params["before_time"].timestamp()) * ID_SCALE + params["before_id"])
+        seek = max(seek, int(keys[0]) - 1)  # first-page sentinels lie past the top
+        start = int(np.searchsorted(keys, seek, side="right"))
+        return COLUMNS, [to_row(k) for k in keys[start:start + limit]]
+    return responder
+
+def time_page(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    keys = build_index(args.rows)
+    print(f"built {args.rows:,}-row visitor index in {time.perf_counter() - t0:.1f}s")
+    connection = StandInConnection(make_responder(keys), args.rtt_ms)
+    keys_of = models.VISITOR_PAGE_KEYS
+
+    # Cursor a client holds after reading page - 1 pages
+    last_row = dict(zip(COLUMNS, to_row(keys[(args.page - 1) * args.limit - 1])))
+    deep_cursor = encode_cursor(keys_of, [last_row[k] for k in keys_of])
+
+    def offset_page(page):
+        return lambda: models.get_visitors(connection, args.limit, (page - 1) * args.limit)
+
+    def keyset_page(token):
+        def run():
+            rows = models.get_visitors(connection, args.limit, 0, decode_cursor(token, keys_of))
+            next_cursor(rows, args.limit, keys_of)
+            return rows
+        return run
+
+    # Both strategies must return the same rows for the deep page
+    assert offset_page(args.page)() == keyset_page(deep_cursor)(), "page contents differ"
+
+    print(f"{'strategy':<10} {'page 1':>12} {f'page {args.page:,}':>14}")
+    for name, first, deep in [
+        ("OFFSET", offset_page(1), offset_page(args.page)),
+        ("keyset", keyset_page(None), keyset_page(deep_cursor)),
+    ]:
+        print(f"{name:<10} {time_page(first, args.repeat):>9.2f} ms "
+              f"{time_page(deep, args.repeat):>11.2f} ms")
+
+if __name__ == "__main__":
+    main()
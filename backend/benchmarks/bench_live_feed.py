@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Fan-out of dashboard deltas to many /api/dashboard/stream subscribers.
+
+Starts N subscribers on one event loop (a single worker), publishes E
+events from a worker thread the way the visitor routes do, and reports
+delivered frames/s and publish-to-receive latency (sampled on every
+50th subscriber).
+
+Usage: python benchmarks/bench_live_feed.py [--subscribers N] [--events E]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.live_feed import LiveFeed
+from standin_db import percentile
+
+async def main_async(subscribers: int, events: int, rate: float):
+    feed = LiveFeed()
+    latencies = []
+    delivered = 0
+    done = asyncio.Event()
+
+    async def subscriber(n: int):
+        nonlocal delivered
+        received = 0
+        sampled = n % 50 == 0
+        async for frame in feed.subscribe():
+            if frame.startswith(b":"):
+                continue
+            received += 1
+            delivered += 1
+            if sampled:
+                data = frame.split(b"data: ", 1)[1]
+                sent = json.loads(data)["detail"]["t"]
+                latencies.append((time.perf_counter() - sent) * 1000)
+            if received == events:
+                break
+        if delivered == subscribers * events:
+            done.set()
+
+    tasks = [asyncio.create_task(subscriber(n)) for n in range(subscribers)]
+    await asyncio.sleep(0.1)
+    print(f"subscribers connected: {feed.subscriber_count}")
+
+    def producer():
+        for i in range(events):
+            feed.publish("visitor_entry", {
+                "delta": {"current_visitors": 1, "total_available_spaces": -1},
+                "stats": {"current_visitors": 100 + i},
+                "detail": {"t": time.perf_counter()},
+            })
+            if rate:
+                time.sleep(1.0 / rate)
+
+    t0 = time.perf_counter()
+    threading.Thread(target=producer).start()
+    await asyncio.wait_for(done.wait(), timeout=120)
+    elapsed = time.perf_counter() - t0
+    await asyncio.gather(*tasks)
+
+    print(f"delivered {delivered} frames in {elapsed:.2f}s  ({delivered / elapsed:,.0f} frames/s)  "
+          f"dropped={feed.dropped}")
+    print(f"latency p50={percentile(latencies, 50):.2f}ms  p99={percentile(latencies, 99):.2f}ms  "
+          f"max={max(latencies):.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50.0, help="events/s, 0 = unthrottled")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.subscribers, args.events, args.rate))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Open-stay reads vs history length: record-table scans vs services.open_sessions.
+
+Models VisitorParkingRecord and ParkingRecord as numpy columns with
+`--open` stays still open among each history size. The record-table paths
+are what the queries did before migrations/008 (departure_time IS NULL
+over the whole table); the index paths are OpenSessions loaded through a
+stand-in connection from the open rows only:
+
+  active_visitors   /api/visitors/active rows, newest first
+  occupied_counts   dashboard current_occupied_spaces + current_visitors
+  exit_lookup       visitor_exit's stay by plate (round trips counted)
+
+Then churns entries and exits through the index, with a reload whose
+reads interleave with more commits, and checks it against the model.
+
+Fails (exit 1) if an index path at the largest size is more than
+`--max-ratio` times slower than at the smallest, if an exit found in the
+index costs a round trip, or if the index drifts from the model.
+
+Usage: python benchmarks/bench_open_sessions.py [--sizes 1000000,10000000] [--open N]
+       [--rtt-ms MS]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+import queries
+from routes.visitors import _open_visitor_records
+from services.open_sessions import OpenSessions, open_sessions
+from standin_db import StandInConnection
+
+NOW = datetime(2026, 6, 15, 14, 0)
+SPACES = 400
+
+def plate(i: int) -> str:
+    return f"{29 + i % 70}V{i:07d}"
+
+class RecordTables:
+    """Both record tables as columns; the last `open` rows of each are still parked"""
+
+    def __init__(self, rows: int, open_stays: int):
+        self.rows = rows
+        index = np.arange(rows, dtype=np.int64)
+        self.record_id = (index + 1).astype(np.int32)
+        self.space_id = (index % SPACES + 1).astype(np.int32)
+        # Seconds before NOW, oldest first
+        self.age = ((rows - index) * 30).astype(np.int32)
+        self.visitor_open = index >= rows - open_stays
+        self.resident_open = (index % (rows // open_stays)) == 0
+
+    def arrival(self, i: int) -> datetime:
+        return NOW - timedelta(seconds=int(self.age[i]))
+
+    def active_visitors(self):
+        rows = np.flatnonzero(self.visitor_open)[::-1]
+        return [{"record_id": int(self.record_id[i]), "space_id": int(self.space_id[i]),
+                 "license_plate": plate(i), "arrival_time": self.arrival(i), "parking_fee": 0}
+                for i in rows.tolist()]
+
+    def occupied_counts(self):
+        return {"current_occupied_spaces": int(np.count_nonzero(self.resident_open)),
+                "current_visitors": int(np.count_nonzero(self.visitor_open))}
+
+    def open_visitor_rows(self):
+        return [(int(self.record_id[i]), int(self.space_id[i]), plate(i), self.arrival(i))
+                for i in np.flatnonzero(self.visitor_open).tolist()]
+
+    def open_resident_rows(self):
+        return [(int(self.record_id[i]), int(self.space_id[i]))
+                for i in np.flatnonzero(self.resident_open).tolist()]
+
+def session_responder(visitor_rows, resident_rows, during_read=None):
+    by_plate = {}
+    for row in ([] if callable(visitor_rows) else visitor_rows):
+        by_plate.setdefault(row[2], []).append(row)
+
+    def respond(sql, params):
+        if sql is queries.OPEN_SESSIONS_CLOCK:
+            return ["now"], [(datetime.now() + timedelta(seconds=2),)]
+        if sql is queries.OPEN_SESSIONS_VISITORS:
+            rows = list(visitor_rows() if callable(visitor_rows) else visitor_rows)
+            if during_read:
+                during_read()
+            return ["record_id", "space_id", "license_plate", "arrival_time"], rows
+        if sql is queries.OPEN_SESSIONS_RESIDENTS:
+            return ["record_id", "space_id"], resident_rows
+        if sql is queries.OPEN_VISITOR_BY_PLATE:
+            row = by_plate.get(params["license_plate"], [None])[0]
+            return (["record_id", "space_id", "license_plate", "arrival_time", "departure_time"],
+                    [row + (datetime.now(),)] if row else [])
+        raise AssertionError(f"unexpected statement {sql[:60]}")
+    return respond
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+def churn(seed: int, open_stays: int, steps: int) -> list:
+    """Entries and exits against a model, with a reload in the middle"""
+    rng = random.Random(seed)
+    truth = {}
+    next_id = [1]
+    index = OpenSessions()
+
+    def enter():
+        record_id = next_id[0]
+        next_id[0] += 1
+        row = (record_id, rng.randint(1, SPACES), plate(rng.randrange(open_stays * 2)),
+               NOW + timedelta(seconds=record_id))
+        truth[record_id] = row
+        index.entered(*row)
+
+    def leave():
+        if truth:
+            record_id = rng.choice(list(truth))
+            del truth[record_id]
+            index.exited(record_id)
+
+    def step():
+        if rng.random() < 0.5 or not truth:
+            enter()
+        else:
+            leave()
+
+    for _ in range(open_stays):
+        enter()
+    for i in range(steps):
+        step()
+        if i == steps // 2:
+            # Commits land between the read and the swap, and are replayed
+            index.load(StandInConnection(session_responder(
+                lambda: sorted(truth.values(), key=lambda r: r[3]), [],
+                during_read=lambda: [step() for _ in range(200)]), rtt_ms=0))
+
+    failures = []
+    held = {r["record_id"]: (r["record_id"], r["space_id"], r["license_plate"], r["arrival_time"])
+            for r in index.visitors()}
+    if held != truth:
+        failures.append(f"churn: index holds {len(held)} stays, model {len(truth)}, "
+                        f"{len(held.keys() ^ truth.keys())} differ")
+    for space_id in range(1, SPACES + 1):
+        expected = sum(1 for r in truth.values() if r[1] == space_id)
+        if index.occupied(space_id)["visitors"] != expected:
+            failures.append(f"churn: space {space_id} holds {index.occupied(space_id)['visitors']}, model {expected}")
+            break
+    for row in list(truth.values())[:500]:
+        found = index.find(row[2])
+        oldest = min((r for r in truth.values() if r[2] == row[2]), key=lambda r: (r[3], r[0]))
+        if found is None or found.record_id != oldest[0]:
+            failures.append(f"churn: plate {row[2]} found {found}, oldest open is {oldest[0]}")
+            break
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000000,10000000")
+    parser.add_argument("--open", type=int, default=2000, help="stays still open")
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=21)
+    parser.add_argument("--max-ratio", type=float, default=1.5)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print(f"{args.open:,} open stays per table, rtt {args.rtt_ms} ms; median ms")
+    print(f"{'history rows':>14}  {'path':<8} {'active_visitors':>16} {'occupied_counts':>16} "
+          f"{'exit_lookup':>12} {'trips':>6}")
+    index_timings = {}
+    failures = []
+    for size in sizes:
+        tables = RecordTables(size, args.open)
+        visitor_rows = tables.open_visitor_rows()
+        connection = StandInConnection(session_responder(visitor_rows, tables.open_resident_rows()), args.rtt_ms)
+        plates = [row[2] for row in visitor_rows]
+
+        def lookup(find):
+            trips = connection.round_trips
+            elapsed = median_ms(lambda: find(random.choice(plates)), args.repeat)
+            return elapsed, (connection.round_trips - trips) / args.repeat
+
+        scan = (median_ms(tables.active_visitors, args.repeat), median_ms(tables.occupied_counts, args.repeat))
+        scan_lookup = lookup(lambda p: models.execute_query(
+            connection, queries.OPEN_VISITOR_BY_PLATE, {"license_plate": p}))
+        print(f"{size:>14,}  {'table':<8} {scan[0]:>16.3f} {scan[1]:>16.3f} "
+              f"{scan_lookup[0]:>12.3f} {scan_lookup[1]:>6.1f}")
+
+        index = open_sessions
+        index.load(connection)
+        timings = (median_ms(index.visitors, args.repeat), median_ms(index.counts, args.repeat))
+        # The exit route's lookup: the index answers, the database is not asked
+        index_lookup = lookup(lambda p: next(_open_visitor_records(connection, p)))
+        index_timings[size] = timings + (index_lookup[0],)
+        print(f"{'':>14}  {'index':<8} {timings[0]:>16.3f} {timings[1]:>16.3f} "
+              f"{index_lookup[0]:>12.3f} {index_lookup[1]:>6.1f}")
+        if index.visitors() != tables.active_visitors():
+            failures.append(f"{size:,}: index listing differs from the record-table scan")
+        if index.counts() != tables.occupied_counts():
+            failures.append(f"{size:,}: index counts {index.counts()} != {tables.occupied_counts()}")
+        if index_lookup[1]:
+            failures.append(f"{size:,}: exit lookups from the index cost {index_lookup[1]:.1f} round trips")
+        del tables
+
+    smallest, largest = index_timings[sizes[0]], index_timings[sizes[-1]]
+    for i, name in enumerate(("active_visitors", "occupied_counts", "exit_lookup")):
+        # Sub-microsecond reads are all noise; compare from 10 us up
+        ratio = max(largest[i], 0.01) / max(smallest[i], 0.01)
+        print(f"{name:<16} index {sizes[-1]:,} vs {sizes[0]:,} history rows: {ratio:.2f}x")
+        if ratio > args.max_ratio:
+            failures.append(f"{name}: {ratio:.2f}x slower at {sizes[-1]:,} history rows")
+
+    churn_failures = churn(7, args.open, 20_000)
+    print(f"churn: 20,000 entries/exits with a reload mid-way, "
+          f"{'index matches the model' if not churn_failures else 'drift'}")
+    failures.extend(churn_failures)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ open-stay reads follow the cars parked, not the history")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
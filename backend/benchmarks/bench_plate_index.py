@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Gate validation latency: in-memory plate index vs the two-query path.
+
+Usage: python benchmarks/bench_plate_index.py [--vehicles N] [--rtt-ms MS]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from services.plate_index import PlateIndex
+from standin_db import StandInConnection, percentile
+
+def build_fleet(n: int):
+    now = datetime.now()
+    rows = []
+    for vehicle_id in range(1, n + 1):
+        plate = f"{random.randint(29, 98)}A{vehicle_id:05d}"
+        start = now - timedelta(days=random.randint(0, 300))
+        end = start + timedelta(days=random.choice([30, 90, 365]))
+        rows.append((vehicle_id, plate, vehicle_id, start, end))
+    return rows
+
+def make_responder(rows):
+    by_plate = {r[1]: r for r in rows}
+    by_vehicle = {r[0]: r for r in rows}
+
+    def responder(sql, params):
+        if "FROM Vehicle v" in sql:
+            return ["vehicle_id", "license_plate", "subscription_id", "start_date", "expiration_date"], rows
+        if "FROM Vehicle" in sql:
+            row = by_plate.get(params["plate"])
+            return ["vehicle_id"], [(row[0],)] if row else []
+        row = by_vehicle.get(params["v_id"])
+        now = datetime.now()
+        return ["count"], [(1 if row and row[3] <= now <= row[4] else 0,)]
+    return responder
+
+def run(label, fn, plates, iterations):
+    samples = []
+    for _ in range(iterations):
+        plate = random.choice(plates)
+        t0 = time.perf_counter_ns()
+        fn(plate)
+        samples.append((time.perf_counter_ns() - t0) / 1000.0)
+    print(f"{label:<22} p50={percentile(samples, 50):>10.2f}us  "
+          f"p99={percentile(samples, 99):>10.2f}us  max={max(samples):>10.2f}us")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=100_000)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rows = build_fleet(args.vehicles)
+    plates = [r[1] for r in rows] + [f"99Z{i:05d}" for i in range(1000)]
+    connection = StandInConnection(make_responder(rows), rtt_ms=args.rtt_ms)
+
+    index = PlateIndex()
+    t0 = time.perf_counter()
+    index.load(StandInConnection(make_responder(rows), rtt_ms=0))
+    print(f"Loaded {len(index)} plates in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    run("plate index", index.validate, plates, args.iterations)
+    run(f"two-query ({args.rtt_ms}ms rtt)",
+        lambda p: models.validate_resident_entry(connection, p),
+        plates, max(1, min(args.iterations, 2000)))
+
+if __name__ == "__main__":
+    main()
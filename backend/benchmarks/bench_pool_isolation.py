@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Gate latency while heavy reports run: one shared pool vs routed reads.
+
+`--reports` threads loop on a slow read (`--report-ms` per query) while
+`--gates` threads run short gate transactions (`--rtt-ms` x 3 trips). In
+the shared run every thread takes connections from the 10-connection
+primary pool, as before db.connect had named pools. In the routed run the
+reports go through Database.get_read_connection: the read pool first, then
+at most DB_READ_FALLBACK_MAX borrowed primary connections.
+
+Fails (exit 1) if the gate p99 in the routed run exceeds `--max-gate-p99-ms`.
+
+Usage: python benchmarks/bench_pool_isolation.py [--reports N] [--gates N] [--seconds S]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import PRIMARY, READ, Database
+from standin_db import StandInPool, percentile
+
+def responder(sql, params):
+    return ["x"], [(1,)]
+
+def run(db: Database, routed: bool, args) -> dict:
+    stop = threading.Event()
+    gate_ms = []
+    report_count = [0]
+    lock = threading.Lock()
+
+    def report():
+        while not stop.is_set():
+            connection = db.get_read_connection() if routed else db.get_connection()
+            try:
+                time.sleep(args.report_ms / 1000.0)
+            finally:
+                connection.close()
+            with lock:
+                report_count[0] += 1
+
+    def gate():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            connection = db.get_connection()
+            try:
+                for _ in range(3):
+                    connection.round_trip()
+            finally:
+                connection.close()
+            with lock:
+                gate_ms.append((time.perf_counter() - t0) * 1000)
+
+    threads = ([threading.Thread(target=report) for _ in range(args.reports)]
+               + [threading.Thread(target=gate) for _ in range(args.gates)])
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {"gate_ms": gate_ms, "reports": report_count[0]}
+
+def make_db(args) -> Database:
+    db = Database()
+    db.pools[PRIMARY].pool = StandInPool(responder, args.rtt_ms, max=db.pools[PRIMARY].max)
+    if READ in db.pools:
+        db.pools[READ].pool = StandInPool(responder, args.rtt_ms, max=db.pools[READ].max,
+                                          wait_ms=db.pools[READ].wait_ms)
+    return db
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=30)
+    parser.add_argument("--gates", type=int, default=8)
+    parser.add_argument("--report-ms", type=float, default=200.0)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--max-gate-p99-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    print(f"{args.reports} report threads ({args.report_ms:.0f} ms each) + {args.gates} gate threads, "
+          f"{args.seconds:.0f}s per run")
+
+    failures = []
+    for label, routed in (("shared pool", False), ("routed", True)):
+        db = make_db(args)
+        result = run(db, routed, args)
+        samples = result["gate_ms"]
+        p99 = percentile(samples, 99) if samples else float("inf")
+        print(f"{label:<12} gate txns {len(samples):>6}  p50={percentile(samples, 50) if samples else 0:7.2f} ms  "
+              f"p99={p99:7.2f} ms  reports {result['reports']}")
+        if routed:
+            routing = db.metrics()["routing"]
+            print(f"{'':<12} reads by pool {routing['reads_by_pool']}  "
+                  f"fallbacks {routing['fallbacks']} (refused {routing['fallbacks_refused']})")
+            if p99 > args.max_gate_p99_ms:
+                failures.append(f"gate p99 {p99:.1f} ms above {args.max_gate_p99_ms:.0f} ms with routed reads")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ reports did not starve the gate")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
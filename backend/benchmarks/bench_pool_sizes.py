@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Throughput and latency of one route under load for several pool sizes.
+
+Drives GET /api/residents/{id} in-process against a stand-in database with
+`--cores` CPU slots: each query needs `--service-ms` of a slot plus the
+network round trip, and every session beyond the core count slows all
+running queries by `--contention` (context switches, latch waits), as an
+oversubscribed server does. Read pools are off so the requests use the
+primary pool, whose max is varied; the last run starts small and lets
+services.pool_sizer resize it. For each run the acquire wait and the hold
+time come from the same counters GET /metrics exposes, so the split
+between waiting for a connection and waiting for the query is visible.
+
+Usage: python benchmarks/bench_pool_sizes.py [--sizes 2,4,8,16,32] [--seconds S] [--clients N]
+"""
+
+import os
+
+# Before db.connect reads them
+os.environ["DB_READ_POOL_MAX"] = "0"
+os.environ["DB_POOL_ADAPTIVE"] = "1"
+os.environ.setdefault("DB_POOL_ADAPTIVE_MAX", "32")
+os.environ.setdefault("DB_POOL_ADAPT_SECONDS", "0.5")
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import PRIMARY, NamedPool, db
+from db.pool_stats import RouteHolds
+from app import app
+from services.pool_sizer import pool_sizer
+from standin_db import StandInPool, percentile
+
+ROW = (1, "Nguyen Van A", "0900000000", "a@example.com", "A-101")
+
+class Server:
+    """CPU slots shared by every stand-in session"""
+
+    def __init__(self, cores: int, service_ms: float, contention: float):
+        self.cores = threading.Semaphore(cores)
+        self.core_count = cores
+        self.service_ms = service_ms
+        self.contention = contention
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def respond(self, sql, params):
+        with self._lock:
+            self.active += 1
+            over = max(0, self.active - self.core_count) / self.core_count
+        try:
+            with self.cores:
+                time.sleep(self.service_ms * (1 + self.contention * over) / 1000.0)
+        finally:
+            with self._lock:
+                self.active -= 1
+        return ["resident_id", "full_name", "phone_number", "email", "apartment_number"], [ROW]
+
+async def call(path: str) -> int:
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET",
+        "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "scheme": "http", "headers": [],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def load(clients: int, seconds: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(i):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            if await call(f"/api/residents/{i + 1}") != 200:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return len(latencies) / (time.perf_counter() - t0), latencies, errors
+
+def run(label: str, size: int, server: Server, args, adaptive: bool = False):
+    named = NamedPool(PRIMARY, db.dsn, 1, size, ceiling=int(os.environ["DB_POOL_ADAPTIVE_MAX"]))
+    named.pool = StandInPool(server.respond, args.rtt_ms, max=size)
+    db.pools[PRIMARY] = named
+    db.holds = RouteHolds()
+    if adaptive:
+        pool_sizer.floor = 2
+        pool_sizer.start(named)
+    try:
+        rps, latencies, errors = asyncio.run(load(args.clients, args.seconds))
+    finally:
+        pool_sizer.stop()
+    metrics = named.metrics()
+    hold = db.holds.stats()[0]
+    waits = metrics["wait_histogram"]
+    final = f"  max {size}->{named.max}" if adaptive else ""
+    print(f"{label:<10} {rps:>7.0f} req/s  p50={percentile(latencies, 50):6.1f} ms  "
+          f"p99={percentile(latencies, 99):6.1f} ms  acquire wait p95<={waits['p95_ms']} ms  "
+          f"hold avg={hold['avg_ms']} ms  errors={errors}{final}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="2,4,8,16,32")
+    # Below the 40 threadpool workers: with more clients than workers the
+    # sync dependency can park every worker in acquire() while the holders
+    # wait for a worker to finish their route
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--cores", type=int, default=8)
+    parser.add_argument("--service-ms", type=float, default=4.0)
+    parser.add_argument("--contention", type=float, default=0.5)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    print(f"{args.clients} clients, {args.cores} db cores, {args.service_ms} ms/query, "
+          f"contention {args.contention}, {args.seconds:.0f}s per run")
+
+    server = Server(args.cores, args.service_ms, args.contention)
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(f"max {size}", size, server, args)
+    run("adaptive", 2, server, args, adaptive=True)
+    for decision in pool_sizer.metrics()["decisions"]:
+        print(f"  {decision['from']:>2} -> {decision['to']:>2}  {decision['reason']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Cost of the query profiler on models.execute_query / execute_update.
+
+Times `--calls` calls of each path against a zero-latency stand-in with
+QueryProfiler enabled and disabled, alternating over `--trials` trials and
+keeping the fastest trial of each, so the difference is the profiler's own
+CPU per statement. That is reported against a statement that takes one
+`--rtt-ms` round trip, the floor for anything that reaches Oracle.
+
+Fails (exit 1) if the overhead on any path exceeds `--max-overhead` percent.
+
+Usage: python benchmarks/bench_query_profiler.py [--calls N] [--trials N] [--rtt-ms MS]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+import queries
+from services.query_profiler import query_profiler
+from standin_db import StandInConnection
+
+ROWS = [(i, f"51V{i:05d}", "Sedan") for i in range(20)]
+
+def responder(sql, params):
+    if sql is queries.UPDATE_VEHICLE:
+        return 1
+    return ["vehicle_id", "license_plate", "vehicle_type"], ROWS
+
+PATHS = {
+    "named select": lambda c: models.execute_query(c, queries.VEHICLE_BY_ID, {"vehicle_id": 7}),
+    "adhoc select": lambda c: models.execute_query(c, "SELECT vehicle_id FROM Vehicle WHERE vehicle_id = 7"),
+    "named update": lambda c: models.execute_update(c, queries.UPDATE_VEHICLE, {
+        "vehicle_id": 7, "license_plate": "51V00007", "vehicle_type": "Sedan"}),
+}
+
+def time_path(fn, connection, calls: int) -> float:
+    """Microseconds per call"""
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn(connection)
+    return (time.perf_counter() - t0) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--trials", type=int, default=7)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--max-overhead", type=float, default=2.0)
+    args = parser.parse_args()
+    connection = StandInConnection(responder, rtt_ms=0)
+    print(f"{args.calls} calls x {args.trials} trials per path; overhead vs a {args.rtt_ms} ms statement")
+
+    failures = []
+    for label, fn in PATHS.items():
+        best = {True: float("inf"), False: float("inf")}
+        for _ in range(args.trials):
+            for enabled in (False, True):
+                query_profiler.enabled = enabled
+                best[enabled] = min(best[enabled], time_path(fn, connection, args.calls))
+        overhead_us = max(0.0, best[True] - best[False])
+        statement_us = best[False] + args.rtt_ms * 1000
+        pct = overhead_us / statement_us * 100
+        print(f"{label:<14} off {best[False]:6.2f} us  on {best[True]:6.2f} us  "
+              f"+{overhead_us:5.2f} us/stmt = {pct:.2f}%")
+        if pct > args.max_overhead:
+            failures.append(f"{label}: {pct:.2f}% overhead")
+    query_profiler.enabled = True
+
+    slowest = query_profiler.stats(limit=3)
+    print("profiled:", ", ".join(f"{s['statement'][:40]} x{s['executions']}" for s in slowest))
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ profiler overhead under {args.max_overhead:g}%")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Visitor space allocation under a burst of simultaneous arrivals.
+
+N arrival threads are released together against a ParkingSpace stand-in
+holding `--spaces` x `--capacity` free places. The stand-in applies
+space_take atomically per space, as the stripe locks would. With
+--workers > 1 each worker has its own SpaceAllocator loaded from the same
+table, so their indexes go stale as the others allocate and the database
+guard has to turn the difference into lost claims.
+
+Fails (exit 1) if any space goes negative or more places are handed out
+than existed.
+
+Usage: python benchmarks/bench_space_allocator.py [--arrivals N] [--spaces S] [--capacity C] [--workers W]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.space_allocator import SpaceAllocator
+from standin_db import StandInConnection, percentile
+
+SPACE_TYPES = ["Standard", "Compact", "Handicapped", "Electric", "Visitor"]
+
+def make_table(spaces: int, capacity: int):
+    return {space_id: [SPACE_TYPES[space_id % len(SPACE_TYPES)], capacity]
+            for space_id in range(1, spaces + 1)}
+
+def make_responder(table, lock):
+    def responder(sql, params):
+        if "space_allocator_load" in sql:
+            with lock:
+                rows = [(space_id, row[0], row[1]) for space_id, row in table.items()]
+            return ["space_id", "space_type", "spaces_available"], rows
+        if "space_take" in sql:
+            with lock:
+                row = table.get(params["space_id"])
+                taken = row is not None and row[1] > 0
+                if taken:
+                    row[1] -= 1
+            params["result"].setvalue(0, int(taken))
+            return 0
+        raise AssertionError(f"unexpected statement: {sql[:60]}")
+    return responder
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arrivals", type=int, default=1000)
+    parser.add_argument("--spaces", type=int, default=400)
+    parser.add_argument("--capacity", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    table = make_table(args.spaces, args.capacity)
+    total = args.spaces * args.capacity
+    lock = threading.Lock()
+    responder = make_responder(table, lock)
+
+    allocators = []
+    for _ in range(args.workers):
+        allocator = SpaceAllocator()
+        allocator.visitor_types = SPACE_TYPES
+        allocator.load(StandInConnection(responder, rtt_ms=0))
+        allocators.append(allocator)
+
+    barrier = threading.Barrier(args.arrivals)
+    results = [None] * args.arrivals
+    latencies = [0.0] * args.arrivals
+
+    def arrive(i):
+        allocator = allocators[i % args.workers]
+        connection = StandInConnection(responder, rtt_ms=args.rtt_ms)
+        barrier.wait()
+        t0 = time.perf_counter()
+        space_id = allocator.allocate(connection)
+        if space_id is not None:
+            connection.commit()
+        latencies[i] = (time.perf_counter() - t0) * 1000
+        results[i] = space_id
+
+    threads = [threading.Thread(target=arrive, args=(i,)) for i in range(args.arrivals)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+
+    assigned = [space_id for space_id in results if space_id is not None]
+    remaining = sum(row[1] for row in table.values())
+    per_space = {}
+    for space_id in assigned:
+        per_space[space_id] = per_space.get(space_id, 0) + 1
+
+    print(f"{args.arrivals:,} arrivals, {total:,} places in {args.spaces} spaces, {args.workers} worker(s)")
+    print(f"assigned {len(assigned):,}  rejected {args.arrivals - len(assigned):,}  "
+          f"left free {remaining:,}  in {elapsed * 1000:.0f} ms")
+    print(f"allocate p50={percentile(latencies, 50):.2f} ms  p99={percentile(latencies, 99):.2f} ms")
+    print(f"lost claims {sum(a.lost_claims for a in allocators)}")
+
+    failures = []
+    if any(row[1] < 0 for row in table.values()):
+        failures.append("a space went negative")
+    if len(assigned) + remaining != total:
+        failures.append("assigned + free does not add up to capacity")
+    if any(count > args.capacity for count in per_space.values()):
+        failures.append("a space was handed out beyond its capacity")
+    if args.workers == 1 and len(assigned) != min(total, args.arrivals):
+        failures.append("free places were left while arrivals were turned away")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ no over-allocation")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Gate throughput on one busy space: single ParkingSpace row vs stripes.
+
+`--gates` threads each run `--cycles` entry/exit transactions against the
+same space: take or return a place, insert or close the record (one round
+trip), commit. The stand-in holds row locks from the update until commit,
+as Oracle does, so with a single counter row every gate queues behind the
+others. The striped run goes through SpaceCounters with the stand-in
+playing space_take / space_give: SKIP LOCKED over the space's stripes,
+blocking only when every stripe with capacity is held.
+
+Fails (exit 1) if a counter goes negative or places are lost.
+
+Usage: python benchmarks/bench_space_stripes.py [--gates N] [--cycles N] [--capacity C] [--rtt-ms MS]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.space_counters import STRIPES, SpaceCounters
+from standin_db import StandInConnection, percentile
+
+SPACE_ID = 1
+
+HOT_TAKE = """
+    UPDATE ParkingSpace SET spaces_available = spaces_available - 1
+    WHERE space_id = :space_id AND spaces_available > 0
+"""
+HOT_GIVE = """
+    UPDATE ParkingSpace SET spaces_available = spaces_available + 1
+    WHERE space_id = :space_id
+"""
+
+class LockingTable:
+    """Counter rows with row locks held by a connection until it commits"""
+
+    def __init__(self, rows):
+        self.rows = dict(rows)
+        self.owner = {}
+        self.cond = threading.Condition()
+
+    def _lock(self, connection, key):
+        # Caller holds cond
+        while self.owner.get(key, connection) is not connection:
+            self.cond.wait()
+        self.owner[key] = connection
+        connection.held.add(key)
+
+    def release(self, connection):
+        with self.cond:
+            for key in connection.held:
+                del self.owner[key]
+            connection.held.clear()
+            self.cond.notify_all()
+
+    def update(self, connection, key, delta) -> bool:
+        """Blocking guarded update of one row"""
+        with self.cond:
+            self._lock(connection, key)
+            if self.rows[key] + delta < 0:
+                return False
+            self.rows[key] += delta
+            return True
+
+    def stripe_call(self, connection, delta, offset) -> int:
+        """space_take (delta -1) / space_give (delta > 0) over the stripes"""
+        order = [(offset + i) % STRIPES for i in range(STRIPES)]
+        with self.cond:
+            for stripe in order:
+                key = (SPACE_ID, stripe)
+                if self.owner.get(key, connection) is connection and self.rows[key] + delta >= 0:
+                    self._lock(connection, key)
+                    self.rows[key] += delta
+                    return 1
+            while True:
+                candidates = [(SPACE_ID, s) for s in order if self.rows[(SPACE_ID, s)] + delta >= 0]
+                if not candidates:
+                    return 0
+                free = [key for key in candidates if self.owner.get(key, connection) is connection]
+                if free:
+                    self._lock(connection, free[0])
+                    self.rows[free[0]] += delta
+                    return 2
+                self.cond.wait()
+
+class GateConnection(StandInConnection):
+    def __init__(self, table: LockingTable, rtt_ms: float):
+        super().__init__(self._respond, rtt_ms)
+        self.table = table
+        self.held = set()
+
+    def _respond(self, sql, params):
+        if sql is HOT_TAKE:
+            return int(self.table.update(self, SPACE_ID, -1))
+        if sql is HOT_GIVE:
+            return int(self.table.update(self, SPACE_ID, 1))
+        if "space_take_many" in sql or "space_give_many" in sql:
+            delta = -1 if "take" in sql else params["counts"][0]
+            params["results"].setvalue(0, [self.table.stripe_call(self, delta, params["offset"] + 1)])
+            return 0
+        if "space_take" in sql or "space_give" in sql:
+            delta = -1 if "take" in sql else params["count"]
+            params["result"].setvalue(0, self.table.stripe_call(self, delta, params["offset"]))
+            return 0
+        # The record insert / close
+        return 1
+
+    def commit(self):
+        super().commit()
+        self.table.release(self)
+
+    def rollback(self):
+        super().rollback()
+        self.table.release(self)
+
+def run_gates(label, table, gates, cycles, rtt_ms, take, give):
+    barrier = threading.Barrier(gates)
+    latencies = [[] for _ in range(gates)]
+
+    def gate(i):
+        connection = GateConnection(table, rtt_ms)
+        barrier.wait()
+        for _ in range(cycles):
+            for step in (take, give):
+                t0 = time.perf_counter()
+                step(connection)
+                connection.cursor().execute("record", {})
+                connection.commit()
+                latencies[i].append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=gate, args=(i,)) for i in range(gates)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+    samples = [ms for per_gate in latencies for ms in per_gate]
+    print(f"{label:<12} {len(samples) / elapsed:>8.0f} txn/s  "
+          f"p50={percentile(samples, 50):.2f} ms  p99={percentile(samples, 99):.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gates", type=int, default=32)
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--capacity", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+    print(f"{args.gates} gates x {args.cycles} entry/exit cycles on one space of {args.capacity}, "
+          f"rtt {args.rtt_ms} ms")
+
+    single = LockingTable({SPACE_ID: args.capacity})
+    run_gates("single row", single, args.gates, args.cycles, args.rtt_ms,
+              lambda c: c.cursor().execute(HOT_TAKE, {"space_id": SPACE_ID}),
+              lambda c: c.cursor().execute(HOT_GIVE, {"space_id": SPACE_ID}))
+
+    stripes = LockingTable({
+        (SPACE_ID, s): args.capacity // STRIPES + (1 if s < args.capacity % STRIPES else 0)
+        for s in range(STRIPES)
+    })
+    counters = SpaceCounters()
+    run_gates("striped", stripes, args.gates, args.cycles, args.rtt_ms,
+              lambda c: counters.take(c, SPACE_ID),
+              lambda c: counters.give(c, SPACE_ID))
+    metrics = counters.metrics()
+    print(f"striped lock waits {metrics['lock_waits']} of {metrics['takes'] + metrics['gives']} "
+          f"({metrics['lock_wait_ratio']:.1%}), {metrics['full']} full")
+
+    failures = []
+    if single.rows[SPACE_ID] != args.capacity:
+        failures.append("single row counter lost places")
+    if any(v < 0 for v in stripes.rows.values()):
+        failures.append("a stripe went negative")
+    if sum(stripes.rows.values()) != args.capacity:
+        failures.append("striped counter lost places")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ counters back at capacity")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Vectorized tariff engine throughput.
+
+Prices N random stays with Tariff.price_many and checks a sample against
+the scalar Tariff.price.
+
+Usage: python benchmarks/bench_tariff.py [--stays N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.tariff import visitor_tariff
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stays", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    base = np.datetime64("2024-01-01T00:00:00", "s")
+    arrivals = base + rng.integers(0, 365 * 86400, args.stays).astype("timedelta64[s]")
+    departures = arrivals + rng.integers(60, 72 * 3600, args.stays).astype("timedelta64[s]")
+
+    t0 = time.perf_counter()
+    fees = visitor_tariff.price_many(arrivals, departures)
+    elapsed = time.perf_counter() - t0
+    print(f"priced {args.stays:,} stays in {elapsed * 1000:.1f} ms "
+          f"({args.stays / elapsed:,.0f} stays/s), total {int(fees.sum()):,} VND")
+
+    sample = rng.integers(0, args.stays, 1000)
+    mismatches = sum(
+        visitor_tariff.price(arrivals[i].item(), departures[i].item()) != fees[i] for i in sample
+    )
+    print(f"scalar cross-check: {mismatches} mismatches in {len(sample)} samples")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Visitor gate events/s: single-event endpoints vs the batch endpoints.
+
+Runs the route handlers against a stand-in database with a fixed
+round-trip time; every execute, executemany and commit costs one trip.
+
+Usage: python benchmarks/bench_visitor_batch.py [--events N] [--batch B] [--rtt-ms MS]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queries
+import routes.visitors as visitors
+from services.id_allocator import IdAllocator
+from standin_db import StandInConnection
+
+class VisitorStore:
+    """Just enough of VisitorParkingRecord/SpaceStripe to answer the routes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sequence = 1
+        self.open = {}  # plate -> record
+        self.records = {}
+
+    def responder(self, sql, params):
+        with self.lock:
+            if sql is queries.SPACE_ALLOCATOR_LOAD:
+                return ["space_id", "space_type", "spaces_available"], [(1, "Visitor", 1_000_000)]
+            if "increment_by" in sql:
+                return ["increment_by"], [(1000,)]
+            if "NEXTVAL" in sql:
+                value, self.sequence = self.sequence, self.sequence + 1000
+                return ["nextval"], [(value,)]
+            if "INSERT INTO VisitorParkingRecord" in sql:
+                record = {
+                    "record_id": params["record_id"], "space_id": params["space_id"],
+                    "license_plate": params["license_plate"],
+                    "arrival_time": params.get("arrival_time") or datetime.now() - timedelta(hours=3),
+                }
+                self.records[record["record_id"]] = record
+                self.open[record["license_plate"]] = record
+                if "arrival_time_out" in params:
+                    params["arrival_time_out"].setvalue(0, [record["arrival_time"]])
+                return 1
+            if "space_take_many" in sql or "space_give_many" in sql:
+                params["results"].setvalue(0, [1] * len(params["space_ids"]))
+                return 0
+            if "space_take" in sql or "space_give" in sql:
+                params["result"].setvalue(0, 1)
+                return 0
+            if "TABLE(:plates)" in sql:
+                now = datetime.now()
+                rows = [(r["record_id"], p, r["arrival_time"], r["space_id"], now)
+                        for p in params["plates"] if (r := self.open.get(p))]
+                return ["record_id", "license_plate", "arrival_time", "space_id", "now_ts"], rows
+            if "SELECT record_id, arrival_time, space_id" in sql:
+                r = self.open.get(params["license_plate"])
+                return ["record_id", "arrival_time", "space_id", "departure_time"], \
+                    [(r["record_id"], r["arrival_time"], r["space_id"], datetime.now())] if r else []
+            if "UPDATE VisitorParkingRecord" in sql:
+                record = self.records[params["record_id"]]
+                return 1 if self.open.pop(record["license_plate"], None) else 0
+        return 0
+
+def timed(label, events, fn):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<16} {events:>6} events  {elapsed:7.2f}s  {events / elapsed:>9,.0f} events/s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    plates = [f"51V{i:05d}" for i in range(args.events)]
+    chunks = [plates[i:i + args.batch] for i in range(0, len(plates), args.batch)]
+
+    for label, batched in (("single", False), ("batch", True)):
+        store = VisitorStore()
+        visitors.id_allocator = IdAllocator()
+        connection = StandInConnection(store.responder, args.rtt_ms)
+
+        if batched:
+            timed(f"{label} entry", args.events, lambda: [
+                visitors.visitor_entries_batch(visitors.VisitorEntryBatch(events=[
+                    visitors.VisitorEntryEvent(license_plate=p, space_id=1) for p in chunk
+                ]), connection) for chunk in chunks])
+            timed(f"{label} exit", args.events, lambda: [
+                visitors.visitor_exits_batch(visitors.VisitorExitBatch(events=[
+                    visitors.VisitorExitEvent(license_plate=p) for p in chunk
+                ]), connection) for chunk in chunks])
+        else:
+            timed(f"{label} entry", args.events, lambda: [
+                visitors.visitor_entry(visitors.VisitorEntry(license_plate=p, space_id=1), connection)
+                for p in plates])
+            timed(f"{label} exit", args.events, lambda: [
+                visitors.visitor_exit(visitors.VisitorExit(license_plate=p), connection)
+                for p in plates])
+        print(f"{'':<16} round trips: {connection.round_trips}  commits: {connection.commits}  "
+              f"still open: {len(store.open)}")
+
+if __name__ == "__main__":
+    main()
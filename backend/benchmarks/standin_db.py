@@ -0,0 +1,267 @@
+"""Local stand-in for an Oracle connection, used by the benchmarks.
+
+Each execute() sleeps for a configurable round-trip time and answers from a
+responder callable, so database-bound code paths can be timed without a
+running Oracle instance.
+"""
+
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# responder(sql, params) -> (column names, rows), or an int rowcount for DML
+Responder = Callable[[str, dict], Tuple[Sequence[str], List[tuple]]]
+
+class StandInBatchError:
+    def __init__(self, offset: int, message: str):
+        self.offset = offset
+        self.message = message
+        self.full_code = "ORA-00001"
+
+class StandInType:
+    """Collection type returned by connection.gettype(); objects are lists"""
+
+    def newobject(self, values=None):
+        return list(values or [])
+
+class StandInVar:
+    def __init__(self, value=None):
+        self.value = value
+
+    def getvalue(self):
+        return self.value
+
+    def setvalue(self, _pos, value):
+        self.value = value
+
+class StandInCursor:
+    def __init__(self, connection: "StandInConnection"):
+        self.connection = connection
+        self.description: Optional[list] = None
+        self.rowcount = 0
+        self.arraysize = 100
+        self._rows: List[tuple] = []
+        self._pos = 0
+        self._batch_errors: List[StandInBatchError] = []
+        self._row_counts: List[int] = []
+
+    def _load(self, result):
+        if isinstance(result, int):
+            self.description = None
+            self._rows = []
+            self.rowcount = result
+        else:
+            columns, rows = result
+            self.description = [(c.upper(),) for c in columns] if columns else None
+            self._rows = list(rows)
+            self.rowcount = len(self._rows)
+        self._pos = 0
+
+    def setinputsizes(self, *_args, **_kwargs):
+        pass
+
+    def getbatcherrors(self):
+        return self._batch_errors
+
+    def getarraydmlrowcounts(self):
+        return self._row_counts
+
+    def var(self, *_args, **_kwargs):
+        return StandInVar()
+
+    def execute(self, sql: str, params: dict = None):
+        self.connection.round_trip()
+        self._load(self.connection.responder(sql, params or {}))
+
+    def executemany(self, sql: str, seq_of_params, batcherrors: bool = False,
+                    arraydmlrowcounts: bool = False, **_kwargs):
+        # One round trip for the whole array, like an array bind
+        self.connection.round_trip()
+        self._run_many(sql, seq_of_params, batcherrors)
+
+    def _run_many(self, sql, seq_of_params, batcherrors):
+        self._batch_errors = []
+        self._row_counts = []
+        for offset, params in enumerate(seq_of_params):
+            try:
+                result = self.connection.responder(sql, params)
+            except Exception as e:
+                if not batcherrors:
+                    raise
+                self._batch_errors.append(StandInBatchError(offset, str(e)))
+                self._row_counts.append(0)
+                continue
+            self._row_counts.append(result if isinstance(result, int) else 1)
+        self.rowcount = sum(self._row_counts)
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size: int = None):
+        size = size or self.arraysize
+        if self._pos >= len(self._rows):
+            return []
+        if self._pos:
+            # First batch arrives with the execute; later ones cost a trip
+            self.connection.round_trip()
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def close(self):
+        pass
+
+class StandInConnection:
+    def __init__(self, responder: Responder, rtt_ms: float = 0.5):
+        self.responder = responder
+        self.rtt = rtt_ms / 1000.0
+        self.round_trips = 0
+        self.commits = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def gettype(self, _name: str):
+        self.round_trip()
+        return StandInType()
+
+    def commit(self):
+        self.round_trip()
+        self.commits += 1
+
+    def rollback(self):
+        self.round_trip()
+
+    def close(self):
+        pass
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted sample list"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+class StandInPool:
+    """Blocking pool of stand-in connections, capped at `max` like oracledb"""
+
+    def __init__(self, responder: Responder, rtt_ms: float = 0.5, max: int = 10,
+                 wait_ms: Optional[float] = None):
+        import threading
+        self.responder = responder
+        self.rtt_ms = rtt_ms
+        self.max = max
+        # Like POOL_GETMODE_TIMEDWAIT: acquire() gives up after wait_ms
+        self.wait_ms = wait_ms
+        self._cond = threading.Condition()
+        self._busy = 0
+        self.opened = 0
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    def acquire(self):
+        timeout = self.wait_ms / 1000.0 if self.wait_ms is not None else None
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._busy < self.max, timeout=timeout):
+                import oracledb
+                raise oracledb.Error("DPY-4005: timed out waiting for the connection pool to return a connection")
+            self._busy += 1
+            self.opened = max(self.opened, self._busy)
+        connection = StandInConnection(self.responder, self.rtt_ms)
+        connection.close = self._release
+        return connection
+
+    def _release(self):
+        with self._cond:
+            self._busy -= 1
+            self._cond.notify()
+
+    def reconfigure(self, **kwargs):
+        # Like oracledb: a smaller max lets busy connections drain
+        with self._cond:
+            if kwargs.get("max") is not None:
+                self.max = kwargs["max"]
+                self.opened = min(self.opened, self.max)
+            self._cond.notify_all()
+
+    def close(self):
+        pass
+
+class StandInAsyncCursor(StandInCursor):
+    async def execute(self, sql: str, params: dict = None):
+        await self.connection.async_round_trip()
+        self._load(self.connection.responder(sql, params or {}))
+
+    async def executemany(self, sql: str, seq_of_params, batcherrors: bool = False,
+                          arraydmlrowcounts: bool = False, **_kwargs):
+        await self.connection.async_round_trip()
+        self._run_many(sql, seq_of_params, batcherrors)
+
+    async def fetchone(self):
+        return StandInCursor.fetchone(self)
+
+    async def fetchmany(self, size: int = None):
+        if self._pos and self._pos < len(self._rows):
+            await self.connection.async_round_trip()
+        rows = self._rows[self._pos:self._pos + (size or self.arraysize)]
+        self._pos += len(rows)
+        return rows
+
+    async def fetchall(self):
+        return StandInCursor.fetchall(self)
+
+class StandInAsyncConnection(StandInConnection):
+    def __init__(self, responder: Responder, rtt_ms: float = 0.5, release=None):
+        super().__init__(responder, rtt_ms)
+        self._release = release
+
+    async def async_round_trip(self):
+        import asyncio
+        self.round_trips += 1
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+
+    def cursor(self):
+        return StandInAsyncCursor(self)
+
+    async def commit(self):
+        await self.async_round_trip()
+        self.commits += 1
+
+    async def rollback(self):
+        await self.async_round_trip()
+
+    async def close(self):
+        if self._release:
+            self._release()
+
+class StandInAsyncPool:
+    """asyncio pool of stand-in connections, capped at `max`"""
+
+    def __init__(self, responder: Responder, rtt_ms: float = 0.5, max: int = 10):
+        import asyncio
+        self.responder = responder
+        self.rtt_ms = rtt_ms
+        self.max = max
+        self._slots = asyncio.Semaphore(max)
+
+    async def acquire(self):
+        await self._slots.acquire()
+        return StandInAsyncConnection(self.responder, self.rtt_ms, release=self._slots.release)
+
+    async def close(self):
+        pass
@@ -1,10 +1,183 @@
+import asyncio
+import threading
+import time
 import oracledb
-from typing import Optional
+from typing import Dict, Optional
 import os
 from dotenv import load_dotenv
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from db.pool_stats import WAIT_BUCKETS_MS, Exposition, Histogram, RouteHolds
 
 load_dotenv()
 
+PRIMARY = "primary"
+READ = "read"
+STANDBY = "standby"
+
+# Reads try these in order before borrowing from the primary pool
+READ_ORDER = (STANDBY, READ)
+
+# An acquire slower than this counts as having waited for a connection
+WAIT_THRESHOLD_MS = 1.0
+
+# A read pool that failed to open or acquire is skipped for this long
+RETRY_DOWN_SECONDS = 30
+
+def _timed_out(error: Exception) -> bool:
+    """The pool had no free connection within wait_timeout"""
+    return "DPY-4005" in str(error)
+
+class NamedPool:
+    """One sync/async oracledb pool for a DSN, plus its acquire counters.
+
+    Besides the running totals it keeps a window (acquires, waits, peak
+    busy, hold time) that services.pool_sizer reads and resets on each
+    tick. `ceiling` is the largest max the pool may be resized to; it
+    equals max unless adaptive sizing is on.
+    """
+
+    def __init__(self, name: str, dsn: str, min: int, max: int, wait_ms: Optional[int] = None,
+                 increment: int = 1, ceiling: Optional[int] = None):
+        self.name = name
+        self.dsn = dsn
+        self.min = min
+        self.max = max
+        self.increment = increment
+        self.ceiling = ceiling or max
+        # None: acquire blocks until a connection is free (the primary pool)
+        self.wait_ms = wait_ms
+        self.pool = None
+        self.async_pool = None
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self.acquires = 0
+        self.waits = 0
+        self.wait_ms_total = 0.0
+        self.max_wait_ms = 0.0
+        self.wait_histogram = Histogram(WAIT_BUCKETS_MS)
+        self.timeouts = 0
+        self.errors = 0
+        self.resizes = 0
+        self._reset_window()
+
+    def _reset_window(self):
+        self.window = {"started": time.monotonic(), "acquires": 0, "waits": 0, "wait_ms": 0.0,
+                       "timeouts": 0, "peak_busy": 0, "holds": 0, "hold_ms": 0.0}
+
+    def _options(self, user: str, password: str, stmt_cache_size: int) -> Dict:
+        options = dict(user=user, password=password, dsn=self.dsn,
+                       min=self.min, max=self.max, increment=self.increment,
+                       stmtcachesize=stmt_cache_size)
+        if self.wait_ms is not None:
+            options.update(getmode=oracledb.POOL_GETMODE_TIMEDWAIT, wait_timeout=self.wait_ms)
+        return options
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, error: Exception):
+        with self._lock:
+            self.errors += 1
+            self.last_error = str(error)
+            self.down_until = time.monotonic() + RETRY_DOWN_SECONDS
+
+    def record_acquire(self, started: float, pool=None):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        busy = getattr(pool, "busy", None) or 0
+        with self._lock:
+            self.acquires += 1
+            self.wait_histogram.observe(elapsed_ms)
+            self.window["acquires"] += 1
+            self.window["peak_busy"] = max(self.window["peak_busy"], busy)
+            if elapsed_ms >= WAIT_THRESHOLD_MS:
+                self.waits += 1
+                self.wait_ms_total += elapsed_ms
+                self.max_wait_ms = max(self.max_wait_ms, elapsed_ms)
+                self.window["waits"] += 1
+                self.window["wait_ms"] += elapsed_ms
+
+    def record_timeout(self, error: Exception):
+        with self._lock:
+            self.timeouts += 1
+            self.window["timeouts"] += 1
+            self.last_error = str(error)
+
+    def record_hold(self, hold_ms: float):
+        with self._lock:
+            self.window["holds"] += 1
+            self.window["hold_ms"] += hold_ms
+
+    def take_window(self) -> Dict:
+        """The counters since the last call, then start a new window"""
+        with self._lock:
+            window = self.window
+            self._reset_window()
+        window["seconds"] = time.monotonic() - window.pop("started")
+        return window
+
+    def resize(self, new_max: int):
+        """Change max on the open sync pool (oracledb 2.0 cannot reconfigure async pools)"""
+        if self.pool is not None:
+            self.pool.reconfigure(max=new_max)
+        with self._lock:
+            self.max = new_max
+            self.resizes += 1
+
+    def metrics(self) -> Dict:
+        pool = self.async_pool or self.pool
+        busy = getattr(pool, "busy", None)
+        with self._lock:
+            return {
+                "name": self.name,
+                "dsn": self.dsn,
+                "min": self.min,
+                "max": self.max,
+                "ceiling": self.ceiling,
+                "increment": self.increment,
+                "wait_ms": self.wait_ms,
+                "open": pool is not None,
+                "opened": getattr(pool, "opened", None),
+                "busy": busy,
+                "saturation": round(busy / self.max, 3) if busy is not None and self.max else None,
+                "acquires": self.acquires,
+                "waits": self.waits,
+                "avg_wait_ms": round(self.wait_ms_total / self.waits, 2) if self.waits else None,
+                "max_wait_ms": round(self.max_wait_ms, 2),
+                "wait_histogram": self.wait_histogram.snapshot(),
+                "timeouts": self.timeouts,
+                "resizes": self.resizes,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "down": not self.available,
+            }
+
+class _Borrowed:
+    """A primary connection lent to a read; close() also frees the lending slot"""
+
+    def __init__(self, connection, release):
+        self._connection = connection
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        try:
+            self._connection.close()
+        finally:
+            self._release()
+
+class _AsyncBorrowed(_Borrowed):
+    async def close(self):
+        try:
+            await self._connection.close()
+        finally:
+            self._release()
+
 class Database:
     def __init__(self):
         self.user = os.getenv("DB_USER", "hr")
@@ -14,45 +187,435 @@ class Database:
         self.service_name = os.getenv("DB_SERVICE_NAME", "orcl")
         # Construct DSN from components
         self.dsn = f"{self.host}:{self.port}/{self.service_name}"
-        self.pool: Optional[oracledb.ConnectionPool] = None
-    
+        # 'sync' serves routes from the threaded pool; 'async' from an asyncio pool
+        self.mode = os.getenv("DB_MODE", "sync").lower()
+        self.pool_max = int(os.getenv("DB_POOL_MAX", "10"))
+        # Let services.pool_sizer move the primary max between
+        # DB_POOL_ADAPTIVE_MIN and DB_POOL_ADAPTIVE_MAX from observed waits
+        self.adaptive = os.getenv("DB_POOL_ADAPTIVE", "0") == "1"
+        pool_ceiling = int(os.getenv("DB_POOL_ADAPTIVE_MAX", str(self.pool_max * 2))) if self.adaptive else None
+        # Unset: gate acquires queue until a primary connection frees up
+        pool_wait_ms = os.getenv("DB_POOL_WAIT_MS")
+        # Open cursors kept per connection; must cover every queries.py statement
+        self.stmt_cache_size = int(os.getenv("DB_STMT_CACHE_SIZE", "100"))
+        self._thread_gates: Dict[str, asyncio.Semaphore] = {}
+
+        # Gate writes and everything else: the primary pool. GET routes read
+        # from the standby (DB_STANDBY_DSN) and/or the separate read pool, so a
+        # heavy report can only ever hold DB_READ_FALLBACK_MAX primary sessions
+        self.pools: Dict[str, NamedPool] = {
+            PRIMARY: NamedPool(PRIMARY, self.dsn, int(os.getenv("DB_POOL_MIN", "2")), self.pool_max,
+                               int(pool_wait_ms) if pool_wait_ms else None,
+                               int(os.getenv("DB_POOL_INCREMENT", "1")), pool_ceiling)
+        }
+        read_wait_ms = int(os.getenv("DB_READ_WAIT_MS", "1000"))
+        read_max = int(os.getenv("DB_READ_POOL_MAX", "4"))
+        if read_max > 0:
+            self.pools[READ] = NamedPool(READ, os.getenv("DB_READ_DSN", self.dsn), 1, read_max, read_wait_ms)
+        standby_dsn = os.getenv("DB_STANDBY_DSN")
+        if standby_dsn:
+            self.pools[STANDBY] = NamedPool(STANDBY, standby_dsn, 1,
+                                            int(os.getenv("DB_STANDBY_POOL_MAX", "4")), read_wait_ms)
+        self.read_fallback_max = int(os.getenv("DB_READ_FALLBACK_MAX", "2"))
+        self._fallback_slots = threading.BoundedSemaphore(max(self.read_fallback_max, 1))
+        self._fallback_lock = threading.Lock()
+        self.reads_by_pool: Dict[str, int] = {}
+        self.read_fallbacks = 0
+        self.read_fallbacks_refused = 0
+        # Time from acquire to close, per route (get_db_connection)
+        self.holds = RouteHolds()
+
+    @property
+    def is_async(self) -> bool:
+        return self.mode == "async"
+
+    # The primary pool under its original names
+    @property
+    def pool(self):
+        return self.pools[PRIMARY].pool
+
+    @pool.setter
+    def pool(self, value):
+        self.pools[PRIMARY].pool = value
+
+    @property
+    def async_pool(self):
+        return self.pools[PRIMARY].async_pool
+
+    @async_pool.setter
+    def async_pool(self, value):
+        self.pools[PRIMARY].async_pool = value
+
+    # ------------------------------------------------------------------
+    # Sync pools
+    # ------------------------------------------------------------------
+    def _open(self, named: NamedPool):
+        named.pool = oracledb.create_pool(**named._options(self.user, self.password, self.stmt_cache_size))
+
     def create_pool(self):
-        """Create connection pool"""
-        try:
-            self.pool = oracledb.create_pool(
-                user=self.user,
-                password=self.password,
-                dsn=self.dsn,
-                min=2,
-                max=10,
-                increment=1
-            )
+        """Create the primary pool, then the read pools (which may fail alone)"""
+        try:
+            self._open(self.pools[PRIMARY])
             print("✅ Connection pool created successfully")
         except Exception as e:
             print(f"❌ Error creating connection pool: {e}")
             raise
-    
-    def get_connection(self):
-        """Get a connection from the pool"""
-        if not self.pool:
-            self.create_pool()
-        return self.pool.acquire()
-    
+        for name in READ_ORDER:
+            named = self.pools.get(name)
+            if named is None:
+                continue
+            try:
+                self._open(named)
+                print(f"✅ {name.capitalize()} pool created (max {named.max})")
+            except Exception as e:
+                named.mark_down(e)
+                print(f"⚠️ {name.capitalize()} pool not created, reads fall back to primary: {e}")
+
+    def get_connection(self, name: str = PRIMARY):
+        """Get a connection from the pool (the primary unless named)"""
+        named = self.pools[name]
+        if not named.pool:
+            if name == PRIMARY:
+                self.create_pool()
+            else:
+                self._open(named)
+        started = time.perf_counter()
+        try:
+            connection = named.pool.acquire()
+        except oracledb.Error as e:
+            if _timed_out(e):
+                named.record_timeout(e)
+            raise
+        named.record_acquire(started, named.pool)
+        return connection
+
+    def _borrow_primary(self, borrowed_class):
+        """A fallback slot for a read, or None when all are lent out"""
+        if self.read_fallback_max <= 0 or not self._fallback_slots.acquire(blocking=False):
+            with self._fallback_lock:
+                self.read_fallbacks_refused += 1
+            return None
+        with self._fallback_lock:
+            self.read_fallbacks += 1
+        return lambda connection: borrowed_class(connection, self._fallback_slots.release)
+
+    def _served(self, name: str):
+        with self._fallback_lock:
+            self.reads_by_pool[name] = self.reads_by_pool.get(name, 0) + 1
+
+    def _has_read_pools(self) -> bool:
+        # DB_READ_POOL_MAX=0 without a standby: reads share the primary pool
+        return any(name in self.pools for name in READ_ORDER)
+
+    def get_read_connection(self):
+        """Connection for a read-only request.
+
+        Tries the standby, then the read pool, each waiting at most
+        DB_READ_WAIT_MS. If both are down or saturated the read borrows one
+        of DB_READ_FALLBACK_MAX primary connections; with those lent out it
+        waits on the read pool instead, never on the primary.
+        """
+        if not self._has_read_pools():
+            connection = self.get_connection(PRIMARY)
+            self._served(PRIMARY)
+            return connection
+        last_error = None
+        for name in READ_ORDER:
+            named = self.pools.get(name)
+            if named is None or not named.available:
+                continue
+            try:
+                connection = self.get_connection(name)
+                self._served(name)
+                return connection
+            except Exception as e:
+                last_error = e
+                if named.pool is None or not _timed_out(e):
+                    named.mark_down(e)
+                # Else up but saturated for DB_READ_WAIT_MS (counted as a timeout)
+
+        wrap = self._borrow_primary(_Borrowed)
+        if wrap is not None:
+            try:
+                connection = wrap(self.get_connection(PRIMARY))
+            except Exception:
+                self._fallback_slots.release()
+                raise
+            self._served(PRIMARY)
+            return connection
+
+        for name in READ_ORDER:
+            named = self.pools.get(name)
+            if named is not None and named.pool is not None:
+                connection = self._acquire_blocking(named)
+                self._served(name)
+                return connection
+        raise last_error or RuntimeError("No read pool available")
+
+    def _acquire_blocking(self, named: NamedPool):
+        # Read pools time out after wait_ms; keep queueing on this one
+        started = time.perf_counter()
+        while True:
+            try:
+                connection = named.pool.acquire()
+                break
+            except oracledb.Error as e:
+                if not _timed_out(e):
+                    raise
+        named.record_acquire(started, named.pool)
+        return connection
+
     def close_pool(self):
-        """Close the connection pool"""
-        if self.pool:
-            self.pool.close()
-            print("Connection pool closed")
+        """Close every pool"""
+        for named in self.pools.values():
+            if named.pool:
+                named.pool.close()
+                named.pool = None
+        print("Connection pool closed")
+
+    # ------------------------------------------------------------------
+    # Async pools
+    # ------------------------------------------------------------------
+    def _open_async(self, named: NamedPool):
+        named.async_pool = oracledb.create_pool_async(**named._options(self.user, self.password, self.stmt_cache_size))
+
+    def create_async_pool(self):
+        """Create asyncio connection pools (thin mode only)"""
+        try:
+            self._open_async(self.pools[PRIMARY])
+            print("✅ Async connection pool created successfully")
+        except Exception as e:
+            print(f"❌ Error creating async connection pool: {e}")
+            raise
+        for name in READ_ORDER:
+            named = self.pools.get(name)
+            if named is None:
+                continue
+            try:
+                self._open_async(named)
+            except Exception as e:
+                named.mark_down(e)
+                print(f"⚠️ Async {name} pool not created, reads fall back to primary: {e}")
+
+    def _thread_gate(self, key: str, size: int) -> asyncio.Semaphore:
+        gate = self._thread_gates.get(key)
+        if gate is None:
+            gate = self._thread_gates[key] = asyncio.Semaphore(size)
+        return gate
+
+    def _read_capacity(self) -> int:
+        if not self._has_read_pools():
+            return self.pools[PRIMARY].ceiling
+        return sum(self.pools[name].ceiling for name in READ_ORDER if name in self.pools) + self.read_fallback_max
+
+    async def get_threaded_connection(self, read: bool = False):
+        """Acquire a sync pooled connection from async code.
+
+        At most as many acquires as the pools hold wait in worker threads at
+        once; without the gate every threadpool worker can block in acquire()
+        while the connection holders wait for a free worker to finish their
+        queries. Reads have their own gate so they cannot crowd out writes.
+        """
+        if read:
+            gate = self._thread_gate(READ, self._read_capacity())
+        else:
+            # The ceiling, so the gate never holds back a pool the sizer grew
+            gate = self._thread_gate(PRIMARY, self.pools[PRIMARY].ceiling)
+        await gate.acquire()
+        try:
+            return await run_in_threadpool(self.get_read_connection if read else self.get_connection)
+        except Exception:
+            gate.release()
+            raise
+
+    async def release_threaded_connection(self, connection, read: bool = False):
+        try:
+            await run_in_threadpool(connection.close)
+        finally:
+            self._thread_gates[READ if read else PRIMARY].release()
+
+    async def get_async_connection(self, name: str = PRIMARY):
+        """Get a connection from an asyncio pool (the primary unless named)"""
+        named = self.pools[name]
+        if not named.async_pool:
+            if name == PRIMARY:
+                self.create_async_pool()
+            else:
+                self._open_async(named)
+        started = time.perf_counter()
+        try:
+            connection = await named.async_pool.acquire()
+        except oracledb.Error as e:
+            if _timed_out(e):
+                named.record_timeout(e)
+            raise
+        named.record_acquire(started, named.async_pool)
+        return connection
+
+    async def get_read_async_connection(self):
+        """Async counterpart of get_read_connection"""
+        if not self._has_read_pools():
+            connection = await self.get_async_connection(PRIMARY)
+            self._served(PRIMARY)
+            return connection
+        last_error = None
+        for name in READ_ORDER:
+            named = self.pools.get(name)
+            if named is None or not named.available:
+                continue
+            try:
+                connection = await self.get_async_connection(name)
+                self._served(name)
+                return connection
+            except Exception as e:
+                last_error = e
+                if named.async_pool is None or not _timed_out(e):
+                    named.mark_down(e)
+
+        wrap = self._borrow_primary(_AsyncBorrowed)
+        if wrap is not None:
+            try:
+                connection = wrap(await self.get_async_connection(PRIMARY))
+            except Exception:
+                self._fallback_slots.release()
+                raise
+            self._served(PRIMARY)
+            return connection
+
+        for name in READ_ORDER:
+            named = self.pools.get(name)
+            if named is not None and named.async_pool is not None:
+                started = time.perf_counter()
+                while True:
+                    try:
+                        connection = await named.async_pool.acquire()
+                        break
+                    except oracledb.Error as e:
+                        if not _timed_out(e):
+                            raise
+                named.record_acquire(started, named.async_pool)
+                self._served(name)
+                return connection
+        raise last_error or RuntimeError("No read pool available")
+
+    async def close_async_pool(self):
+        """Close every asyncio pool"""
+        closed = False
+        for named in self.pools.values():
+            if named.async_pool:
+                await named.async_pool.close()
+                named.async_pool = None
+                closed = True
+        if closed:
+            print("Async connection pool closed")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def metrics(self) -> Dict:
+        with self._fallback_lock:
+            routing = {
+                "read_order": [name for name in READ_ORDER if name in self.pools] + [PRIMARY],
+                "reads_by_pool": dict(self.reads_by_pool),
+                "fallbacks": self.read_fallbacks,
+                "fallbacks_refused": self.read_fallbacks_refused,
+                "fallback_max": self.read_fallback_max,
+            }
+        return {
+            "mode": self.mode,
+            "adaptive": self.adaptive,
+            "pools": [named.metrics() for named in self.pools.values()],
+            "routing": routing,
+            "holds": self.holds.stats(),
+        }
+
+    def record_hold(self, request: Request, connection, read: bool, started: float):
+        """Charge the time `connection` was held to its route and pool"""
+        hold_ms = (time.perf_counter() - started) * 1000
+        route = request.scope.get("route")
+        self.holds.observe(f"{request.method} {getattr(route, 'path', request.url.path)}", hold_ms)
+        if not read or not self._has_read_pools() or isinstance(connection, _Borrowed):
+            self.pools[PRIMARY].record_hold(hold_ms)
+
+    def exposition(self) -> str:
+        """Pool and hold metrics in the Prometheus text format"""
+        out = Exposition()
+        for named in self.pools.values():
+            metrics = named.metrics()
+            pool = {"pool": named.name}
+            out.gauge("parking_db_pool_max", "Connections the pool may open", metrics["max"], **pool)
+            out.gauge("parking_db_pool_opened", "Connections currently open", metrics["opened"], **pool)
+            out.gauge("parking_db_pool_busy", "Connections currently lent out", metrics["busy"], **pool)
+            out.gauge("parking_db_pool_down", "1 while the pool is skipped after a failure",
+                      int(metrics["down"]), **pool)
+            out.counter("parking_db_pool_acquires_total", "Connections handed out", metrics["acquires"], **pool)
+            out.counter("parking_db_pool_waits_total",
+                        f"Acquires that waited at least {WAIT_THRESHOLD_MS:g} ms", metrics["waits"], **pool)
+            out.counter("parking_db_pool_timeouts_total", "Acquires that gave up waiting",
+                        metrics["timeouts"], **pool)
+            out.counter("parking_db_pool_errors_total", "Pool open or acquire failures", metrics["errors"], **pool)
+            out.counter("parking_db_pool_resizes_total", "Adaptive changes of max", metrics["resizes"], **pool)
+            with named._lock:
+                out.histogram("parking_db_pool_acquire_wait_seconds", "Time spent waiting for a connection",
+                              named.wait_histogram, **pool)
+        for route, histogram in self.holds.histograms():
+            out.histogram("parking_db_connection_hold_seconds",
+                          "Time a request held its connection, acquire to close", histogram, route=route)
+        with self._fallback_lock:
+            reads = dict(self.reads_by_pool)
+            fallbacks, refused = self.read_fallbacks, self.read_fallbacks_refused
+        for name, count in reads.items():
+            out.counter("parking_db_reads_total", "Read requests served, by pool", count, pool=name)
+        out.counter("parking_db_read_fallbacks_total", "Reads that borrowed a primary connection", fallbacks)
+        out.counter("parking_db_read_fallbacks_refused_total",
+                    "Reads that found every primary fallback slot taken", refused)
+        return out.render()
 
 # Global database instance
 db = Database()
 
-def get_db_connection():
-    """Dependency for getting database connection"""
+def _is_read(request: Request) -> bool:
+    return request.method in ("GET", "HEAD")
+
+def get_db_connection(request: Request):
+    """Dependency for getting database connection.
+
+    GET requests are served from the read pools (see
+    Database.get_read_connection); everything else from the primary. The
+    time until the connection goes back is recorded per route.
+    """
+    read = _is_read(request)
+    connection = None
+    try:
+        connection = db.get_read_connection() if read else db.get_connection()
+        started = time.perf_counter()
+        yield connection
+    finally:
+        if connection:
+            connection.close()
+            db.record_hold(request, connection, read, started)
+
+async def get_async_db_connection(request: Request):
+    """Dependency for `async def` routes.
+
+    In async mode this yields an oracledb.AsyncConnection from the asyncio
+    pools; in sync mode it yields a regular pooled connection, acquired and
+    later used through the threadpool (see models.execute_query_async).
+    GET requests are routed to the read pools as in get_db_connection.
+    """
+    read = _is_read(request)
     connection = None
     try:
-        connection = db.get_connection()
+        if db.is_async:
+            connection = await (db.get_read_async_connection() if read else db.get_async_connection())
+        else:
+            connection = await db.get_threaded_connection(read)
+        started = time.perf_counter()
         yield connection
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            if db.is_async:
+                await connection.close()
+            else:
+                await db.release_threaded_connection(connection, read)
+            db.record_hold(request, connection, read, started)
@@ -0,0 +1,125 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds (ms) of the acquire wait and hold time buckets
+WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+HOLD_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    """Fixed-bucket latency histogram; not thread-safe, callers lock"""
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bound plus the overflow bucket
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = 0
+        while index < len(self.bounds) and value > self.bounds[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count, 2) if self.count else None,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {f"le_{bound:g}": count for bound, count in zip(self.bounds, self.counts) if count},
+            "overflow": self.counts[-1],
+        }
+
+class RouteHolds:
+    """How long each route keeps its pooled connection, per route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Histogram] = {}
+
+    def observe(self, route: str, hold_ms: float):
+        with self._lock:
+            histogram = self._routes.get(route)
+            if histogram is None:
+                histogram = self._routes[route] = Histogram(HOLD_BUCKETS_MS)
+            histogram.observe(hold_ms)
+
+    def histograms(self) -> List[Tuple[str, Histogram]]:
+        with self._lock:
+            return [(route, _copy(h)) for route, h in sorted(self._routes.items())]
+
+    def stats(self) -> List[Dict]:
+        return [dict(route=route, **h.snapshot()) for route, h in self.histograms()]
+
+def _copy(histogram: Histogram) -> Histogram:
+    copy = Histogram(histogram.bounds)
+    copy.counts = list(histogram.counts)
+    copy.count = histogram.count
+    copy.sum = histogram.sum
+    return copy
+
+# ----------------------------------------------------------------------
+# Prometheus text exposition (GET /metrics)
+# ----------------------------------------------------------------------
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class Exposition:
+    """Collects metric families and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def _family(self, name: str, kind: str, help_text: str) -> List[str]:
+        if name not in self._families:
+            self._families[name] = (kind, help_text, [])
+        return self._families[name][2]
+
+    def gauge(self, name: str, help_text: str, value, **labels):
+        if value is not None:
+            self._family(name, "gauge", help_text).append(f"{name}{_labels(labels)} {float(value):g}")
+
+    def counter(self, name: str, help_text: str, value, **labels):
+        if value is not None:
+            self._family(name, "counter", help_text).append(f"{name}{_labels(labels)} {float(value):g}")
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram, **labels):
+        # Prometheus buckets are cumulative and in seconds
+        lines = self._family(name, "histogram", help_text)
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(dict(labels, le=f'{bound / 1000:g}'))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(dict(labels, le='+Inf'))} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram.sum / 1000:g}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    def render(self) -> str:
+        out: List[str] = []
+        for name, (kind, help_text, lines) in self._families.items():
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
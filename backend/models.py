@@ -1,15 +1,47 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date
+from collections import defaultdict, deque
+import inspect
+import time
 import oracledb
+from starlette.concurrency import run_in_threadpool
+
+from services.query_profiler import query_profiler
+from services.space_counters import space_counters
+from services.tariff import visitor_tariff
+from services.transactions import transaction_stats
+import queries
+
+def _run(cursor, query: str, params: dict = None) -> float:
+    """Execute `query`; returns the execute time in ms for the profiler,
+    which hears about failures here and about successes from the caller"""
+    started = time.perf_counter()
+    try:
+        # Named queries count themselves; anything else is tallied as ad hoc SQL
+        if isinstance(query, queries.Query):
+            query.execute(cursor, params)
+        else:
+            queries.registry.record_adhoc()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+    except Exception:
+        query_profiler.record(query, params, (time.perf_counter() - started) * 1000, failed=True)
+        raise
+    return (time.perf_counter() - started) * 1000
 
 def execute_query(connection, query: str, params: dict = None) -> List[Dict[str, Any]]:
-    """Execute a SELECT query and return results as list of dicts"""
+    """Execute a SELECT query and return results as list of dicts.
+
+    `query` is normally a queries.Query; plain strings still work but bypass
+    the per-query counters (the profiler files them under their normalized
+    text).
+    """
     cursor = connection.cursor()
     try:
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+        exec_ms = _run(cursor, query, params)
+        fetch_started = time.perf_counter()
         
         # Get column names
         columns = [col[0].lower() for col in cursor.description]
@@ -18,186 +50,412 @@ def execute_query(connection, query: str, params: dict = None) -> List[Dict[str,
         rows = cursor.fetchall()
         result = [dict(zip(columns, row)) for row in rows]
         
+        query_profiler.record(query, params, exec_ms, (time.perf_counter() - fetch_started) * 1000, len(rows))
         return result
     finally:
         cursor.close()
 
+def commit(connection):
+    """connection.commit(), counted against the request being served"""
+    connection.commit()
+    transaction_stats.committed()
+
+class UnitOfWork:
+    """Statements on one connection that commit together, once.
+
+        with models.UnitOfWork(connection) as uow:
+            uow.execute(queries.CLOSE_VISITOR, {...})
+            space_counters.give(connection, space_id)
+
+    Leaving the block commits; an exception rolls back and propagates.
+    Helpers that take the connection (id_allocator, space_counters) join
+    the same transaction. returning() reads the columns the database filled
+    in (RETURNING ... INTO) instead of a SELECT after the write.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = None
+        self.statements = 0
+
+    def __enter__(self) -> "UnitOfWork":
+        self.cursor = self.connection.cursor()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None:
+                self.connection.rollback()
+                return False
+            try:
+                commit(self.connection)
+            except Exception:
+                self.connection.rollback()
+                raise
+            return False
+        finally:
+            self.cursor.close()
+
+    def execute(self, query: str, params: dict = None) -> int:
+        """Run one statement in the transaction; returns its rowcount"""
+        exec_ms = _run(self.cursor, query, params)
+        self.statements += 1
+        query_profiler.record(query, params, exec_ms, rows=self.cursor.rowcount)
+        return self.cursor.rowcount
+
+    def executemany(self, query: str, rows: list, **kwargs):
+        """Array-bind `rows`; the cursor is returned for batch errors / row counts"""
+        started = time.perf_counter()
+        try:
+            if isinstance(query, queries.Query):
+                query.executemany(self.cursor, rows, **kwargs)
+            else:
+                queries.registry.record_adhoc()
+                self.cursor.executemany(query, rows, **kwargs)
+        except Exception:
+            query_profiler.record(query, rows, (time.perf_counter() - started) * 1000, failed=True, many=True)
+            raise
+        self.statements += 1
+        query_profiler.record(query, rows, (time.perf_counter() - started) * 1000,
+                              rows=self.cursor.rowcount, many=True)
+        return self.cursor
+
+    def returning(self, query: str, params: dict, **columns) -> Optional[Dict[str, Any]]:
+        """Run a DML statement ending in RETURNING ... INTO :name for each of
+        `columns` (name=oracledb type); the first row's values, or None"""
+        out = {name: self.cursor.var(db_type) for name, db_type in columns.items()}
+        if not self.execute(query, {**(params or {}), **out}):
+            return None
+        return {name: var.getvalue()[0] for name, var in out.items()}
+
 def execute_update(connection, query: str, params: dict = None) -> int:
-    """Execute an INSERT/UPDATE/DELETE query"""
+    """Execute an INSERT/UPDATE/DELETE query and commit it"""
+    with UnitOfWork(connection) as uow:
+        return uow.execute(query, params)
+
+def execute_returning(connection, query: str, params: dict, **columns) -> Optional[Dict[str, Any]]:
+    """Execute and commit a DML statement with RETURNING ... INTO (see UnitOfWork.returning)"""
+    with UnitOfWork(connection) as uow:
+        return uow.returning(query, params, **columns)
+
+def is_async_connection(connection) -> bool:
+    """True for oracledb.AsyncConnection (or anything with a coroutine commit)"""
+    return inspect.iscoroutinefunction(getattr(connection, "commit", None))
+
+async def _run_async(cursor, query: str, params: dict = None) -> float:
+    """Async _run: execute time in ms, failures reported to the profiler"""
+    named = isinstance(query, queries.Query)
+    if not named:
+        queries.registry.record_adhoc()
+    started = time.perf_counter()
+    try:
+        await cursor.execute(query, params or {})
+    except Exception:
+        if named:
+            query.record(started, failed=True)
+        query_profiler.record(query, params, (time.perf_counter() - started) * 1000, failed=True)
+        raise
+    if named:
+        query.record(started)
+    return (time.perf_counter() - started) * 1000
+
+async def execute_query_async(connection, query: str, params: dict = None) -> List[Dict[str, Any]]:
+    """Async variant of execute_query.
+
+    Awaits natively on an async connection; a sync connection is driven
+    through the threadpool so `async def` routes work in either DB_MODE.
+    """
+    if not is_async_connection(connection):
+        return await run_in_threadpool(execute_query, connection, query, params)
+
     cursor = connection.cursor()
     try:
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        connection.commit()
+        exec_ms = await _run_async(cursor, query, params)
+        fetch_started = time.perf_counter()
+        
+        columns = [col[0].lower() for col in cursor.description]
+        rows = await cursor.fetchall()
+        query_profiler.record(query, params, exec_ms, (time.perf_counter() - fetch_started) * 1000, len(rows))
+        return [dict(zip(columns, row)) for row in rows]
+    finally:
+        cursor.close()
+
+async def execute_update_async(connection, query: str, params: dict = None) -> int:
+    """Async variant of execute_update"""
+    if not is_async_connection(connection):
+        return await run_in_threadpool(execute_update, connection, query, params)
+
+    cursor = connection.cursor()
+    try:
+        exec_ms = await _run_async(cursor, query, params)
+        query_profiler.record(query, params, exec_ms, rows=cursor.rowcount)
+        await connection.commit()
+        transaction_stats.committed()
         return cursor.rowcount
     except Exception as e:
-        connection.rollback()
+        await connection.rollback()
         raise e
     finally:
         cursor.close()
 
-def get_residents(connection, limit: int = 100, offset: int = 0) -> List[Dict]:
-    """Get list of residents with pagination"""
-    query = """
-        SELECT r.resident_id, r.apartment_id, r.name, r.phone_number, r.email,
-               a.building_id, a.floor
-        FROM Resident r
-        JOIN Apartment a ON r.apartment_id = a.apartment_id
-        ORDER BY r.resident_id
-        OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+# Sort keys of the keyset-paginated listings (see services.pagination)
+RESIDENT_PAGE_KEYS = ("resident_id",)
+VEHICLE_PAGE_KEYS = ("vehicle_id",)
+SUBSCRIPTION_PAGE_KEYS = ("subscription_id",)
+VISITOR_PAGE_KEYS = ("arrival_time", "record_id")
+
+# Seek position of a first page, before any real key
+_FIRST_ID = 0
+_LAST_ID = 10 ** 18
+_LAST_TIME = datetime(9999, 12, 31)
+
+def get_residents(connection, limit: int = 100, offset: int = 0,
+                  after: Optional[tuple] = None) -> List[Dict]:
+    """Get list of residents with pagination.
+
+    Pages seek past `after` (RESIDENT_PAGE_KEYS of the previous page's last
+    row); a non-zero `offset` without `after` uses the legacy OFFSET scan.
     """
-    return execute_query(connection, query, {"offset": offset, "limit": limit})
+    if offset and after is None:
+        return execute_query(connection, queries.RESIDENTS_PAGE, {"offset": offset, "limit": limit})
+    after_id, = after or (_FIRST_ID,)
+    return execute_query(connection, queries.RESIDENTS_AFTER, {"after_id": after_id, "limit": limit})
 
 def get_vehicles_by_resident(connection, resident_id: int) -> List[Dict]:
     """Get vehicles for a specific resident"""
-    query = """
-        SELECT vehicle_id, resident_id, license_plate, vehicle_type
-        FROM Vehicle
-        WHERE resident_id = :resident_id
-    """
-    return execute_query(connection, query, {"resident_id": resident_id})
-
-def get_all_vehicles(connection, limit: int = 100, offset: int = 0) -> List[Dict]:
-    """Get all vehicles with pagination"""
-    query = """
-        SELECT v.vehicle_id, v.resident_id, v.license_plate, v.vehicle_type,
-               r.name as resident_name
-        FROM Vehicle v
-        JOIN Resident r ON v.resident_id = r.resident_id
-        ORDER BY v.vehicle_id
-        OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
-    """
-    return execute_query(connection, query, {"offset": offset, "limit": limit})
-
-def get_subscriptions(connection, limit: int = 100, offset: int = 0) -> List[Dict]:
-    """Get parking subscriptions"""
-    query = """
-        SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
-               ps.is_monthly, ps.is_quarterly, ps.is_yearly,
-               ps.start_date, ps.expiration_date, ps.cost,
-               v.license_plate, r.name as resident_name
-        FROM ParkingSubscription ps
-        JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
-        JOIN Resident r ON ps.resident_id = r.resident_id
-        ORDER BY ps.subscription_id DESC
-        OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
-    """
-    return execute_query(connection, query, {"offset": offset, "limit": limit})
+    return execute_query(connection, queries.VEHICLES_BY_RESIDENT, {"resident_id": resident_id})
+
+def get_all_vehicles(connection, limit: int = 100, offset: int = 0,
+                     after: Optional[tuple] = None) -> List[Dict]:
+    """Get all vehicles with pagination (keyset on VEHICLE_PAGE_KEYS)"""
+    if offset and after is None:
+        return execute_query(connection, queries.VEHICLES_PAGE, {"offset": offset, "limit": limit})
+    after_id, = after or (_FIRST_ID,)
+    return execute_query(connection, queries.VEHICLES_AFTER, {"after_id": after_id, "limit": limit})
+
+def get_subscriptions(connection, limit: int = 100, offset: int = 0,
+                      after: Optional[tuple] = None) -> List[Dict]:
+    """Get parking subscriptions, newest first (keyset on SUBSCRIPTION_PAGE_KEYS)"""
+    if offset and after is None:
+        return execute_query(connection, queries.SUBSCRIPTIONS_PAGE, {"offset": offset, "limit": limit})
+    before_id, = after or (_LAST_ID,)
+    return execute_query(connection, queries.SUBSCRIPTIONS_BEFORE, {"before_id": before_id, "limit": limit})
 
 def get_expiring_subscriptions(connection, days: int = 7) -> List[Dict]:
     """Get subscriptions expiring within specified days"""
-    query = """
-        SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
-               ps.expiration_date, ps.cost,
-               CASE
-                   WHEN ps.is_monthly = 1 THEN 'Monthly'
-                   WHEN ps.is_quarterly = 1 THEN 'Quarterly'
-                   WHEN ps.is_yearly = 1 THEN 'Yearly'
-               END as subscription_type,
-               v.license_plate, r.name as resident_name, r.email, r.phone_number
-        FROM ParkingSubscription ps
-        JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
-        JOIN Resident r ON ps.resident_id = r.resident_id
-        WHERE ps.expiration_date BETWEEN SYSDATE AND SYSDATE + :days
-        AND ps.expiration_date >= SYSDATE
-        ORDER BY ps.expiration_date
-    """
-    return execute_query(connection, query, {"days": days})
-
-def get_visitors(connection, limit: int = 100, offset: int = 0) -> List[Dict]:
-    """Get visitor parking records"""
-    query = """
-        SELECT record_id, space_id, license_plate, arrival_time, 
-               departure_time, parking_fee
-        FROM VisitorParkingRecord
-        ORDER BY arrival_time DESC
-        OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
-    """
-    return execute_query(connection, query, {"offset": offset, "limit": limit})
+    return execute_query(connection, queries.EXPIRING_SUBSCRIPTIONS, {"days": days})
+
+def get_subscriptions_by_ids(connection, subscription_ids: List[int]) -> List[Dict]:
+    """Get expiring-list rows for the given subscriptions, soonest expiration first"""
+    if not subscription_ids:
+        return []
+    ids = connection.gettype("SYS.ODCINUMBERLIST").newobject(subscription_ids)
+    return execute_query(connection, queries.SUBSCRIPTIONS_BY_IDS, {"ids": ids})
+
+def visitors_page_query(limit: int = 100, offset: int = 0,
+                        after: Optional[tuple] = None) -> Tuple[queries.Query, Dict]:
+    """Statement and binds for one page of visitor records"""
+    if offset and after is None:
+        return queries.VISITORS_PAGE, {"offset": offset, "limit": limit}
+    before_time, before_id = after or (_LAST_TIME, _LAST_ID)
+    return queries.VISITORS_BEFORE, {
+        "before_time": before_time,
+        "before_id": before_id,
+        "limit": limit
+    }
+
+def get_visitors(connection, limit: int = 100, offset: int = 0,
+                 after: Optional[tuple] = None) -> List[Dict]:
+    """Get visitor parking records, latest arrival first (keyset on VISITOR_PAGE_KEYS)"""
+    query, params = visitors_page_query(limit, offset, after)
+    return execute_query(connection, query, params)
 
 def get_supervisors(connection) -> List[Dict]:
     """Get all supervisors"""
-    query = """
-        SELECT supervisor_id, name, phone_number, email
-        FROM Supervisor
-        ORDER BY supervisor_id
-    """
-    return execute_query(connection, query)
+    return execute_query(connection, queries.SUPERVISORS)
 
 def get_supervisor_shifts(connection, supervisor_id: Optional[int] = None) -> List[Dict]:
     """Get supervisor shifts"""
     if supervisor_id:
-        query = """
-            SELECT ss.shift_id, ss.space_id, ss.supervisor_id, ss.day,
-                   ss.check_in_time, ss.check_out_time, ss.total_money_collected,
-                   s.name as supervisor_name
-            FROM SupervisionShift ss
-            JOIN Supervisor s ON ss.supervisor_id = s.supervisor_id
-            WHERE ss.supervisor_id = :supervisor_id
-            ORDER BY ss.check_in_time DESC
-        """
-        return execute_query(connection, query, {"supervisor_id": supervisor_id})
+        return execute_query(connection, queries.SHIFTS_BY_SUPERVISOR, {"supervisor_id": supervisor_id})
     else:
-        query = """
-            SELECT ss.shift_id, ss.space_id, ss.supervisor_id, ss.day,
-                   ss.check_in_time, ss.check_out_time, ss.total_money_collected,
-                   s.name as supervisor_name
-            FROM SupervisionShift ss
-            JOIN Supervisor s ON ss.supervisor_id = s.supervisor_id
-            ORDER BY ss.check_in_time DESC
-            FETCH FIRST 100 ROWS ONLY
-        """
-        return execute_query(connection, query)
+        return execute_query(connection, queries.RECENT_SHIFTS)
 
 def get_dashboard_stats(connection) -> Dict:
     """Get dashboard statistics from manager_dashboard view"""
-    query = """
-        SELECT 
-            (SELECT COUNT(*) FROM ParkingRecord WHERE departure_time IS NULL) as current_occupied_spaces,
-            (SELECT SUM(spaces_available) FROM ParkingSpace) as total_available_spaces,
-            (SELECT COUNT(*) FROM VisitorParkingRecord WHERE departure_time IS NULL) as current_visitors,
-            (SELECT COALESCE(SUM(parking_fee), 0) FROM VisitorParkingRecord 
-             WHERE TRUNC(departure_time) = TRUNC(SYSDATE)) as today_visitor_revenue,
-            (SELECT COUNT(*) FROM ParkingSubscription 
-             WHERE SYSDATE BETWEEN start_date AND expiration_date) as active_subscriptions,
-            (SELECT COUNT(*) FROM ParkingSubscription 
-             WHERE expiration_date BETWEEN SYSDATE AND SYSDATE + 7) as expiring_soon
-        FROM DUAL
-    """
-    results = execute_query(connection, query)
+    results = execute_query(connection, queries.DASHBOARD_STATS)
+    return results[0] if results else {}
+
+def get_subscription_counts(connection, days: int = 7) -> Dict:
+    """Get active_subscriptions / expiring_soon (within `days`) by scanning ParkingSubscription"""
+    results = execute_query(connection, queries.SUBSCRIPTION_COUNTS, {"days": days})
     return results[0] if results else {}
 
 def validate_resident_entry(connection, license_plate: str) -> Dict:
-    """Validate resident entry with license plate"""
+    """Validate resident entry with license plate (two round trips).
+
+    The gate route answers from services.plate_index; this remains the
+    fallback when the index has not been loaded.
+    """
     cursor = connection.cursor()
-    v_vehicle_id = cursor.var(int)
-    v_subscription_valid = cursor.var(int)
-    v_available_space = cursor.var(int)
-    v_message = cursor.var(str)
-    
     try:
         # Check vehicle existence
-        cursor.execute("""
-            SELECT vehicle_id INTO :v_id FROM Vehicle WHERE license_plate = :plate
-        """, {"v_id": v_vehicle_id, "plate": license_plate})
-        
+        queries.VEHICLE_ID_BY_PLATE.execute(cursor, {"plate": license_plate})
+        row = cursor.fetchone()
+        if not row:
+            return {"status": "VEHICLE_NOT_REGISTERED", "message": "Vehicle not registered."}
+
         # Validate subscription
-        cursor.execute("""
-            SELECT COUNT(*) INTO :valid
-            FROM ParkingSubscription ps
-            WHERE ps.vehicle_id = :v_id
-            AND SYSDATE BETWEEN ps.start_date AND ps.expiration_date
-            AND (ps.is_monthly = 1 OR ps.is_quaterly = 1 OR ps.is_yearly = 1)
-        """, {"valid": v_subscription_valid, "v_id": v_vehicle_id.getvalue()})
-        
-        if v_subscription_valid.getvalue() > 0:
+        queries.ACTIVE_SUBSCRIPTION_COUNT.execute(cursor, {"v_id": row[0]})
+
+        if cursor.fetchone()[0] > 0:
             return {"status": "BARRIER_OPEN", "message": "Welcome! Barrier opened."}
         else:
             return {"status": "SUBSCRIPTION_EXPIRED", "message": "Subscription expired. Please renew."}
+    finally:
+        cursor.close()
+
+def record_visitor_entries(connection, events: List[Dict], record_ids: List[int]) -> List[Dict]:
+    """Insert many visitor entries with array binds in one transaction.
+
+    Each entry first takes a place of its space; entries into a full space
+    are not inserted. Returns one result per event in order; entries without
+    a place and rows rejected by Oracle are reported with status 'error'
+    instead of failing the whole batch.
+    """
+    results = [
+        {"index": i, "license_plate": event["license_plate"], "record_id": record_id, "status": "ok"}
+        for i, (event, record_id) in enumerate(zip(events, record_ids))
+    ]
+    with UnitOfWork(connection) as uow:
+        taken = space_counters.take_many(connection, [event["space_id"] for event in events])
+        for result, space_taken in zip(results, taken):
+            if not space_taken:
+                result.update(status="error", record_id=None, detail="No free parking space")
+
+        claimed = [r["index"] for r in results if r["status"] == "ok"]
+        if claimed:
+            uow.cursor.setinputsizes(arrival_time=oracledb.DB_TYPE_TIMESTAMP)
+            cursor = uow.executemany(queries.INSERT_VISITOR_BATCH, [
+                {
+                    "record_id": record_ids[i],
+                    "space_id": events[i]["space_id"],
+                    "license_plate": events[i]["license_plate"],
+                    "arrival_time": events[i].get("arrival_time")
+                }
+                for i in claimed
+            ], batcherrors=True)
+            rejected = []
+            for error in cursor.getbatcherrors():
+                i = claimed[error.offset]
+                results[i].update(status="error", record_id=None, detail=error.message)
+                rejected.append(events[i]["space_id"])
+            if rejected:
+                # Return the places taken for rows Oracle refused
+                space_counters.give_many(connection, rejected)
+    return results
+
+def record_visitor_exits(connection, events: List[Dict]) -> List[Dict]:
+    """Close many open visitor records and price them in one transaction.
+
+    Each event closes the oldest open record for its plate; departure_time
+    defaults to the database clock. Returns one result per event in order.
+    """
+    results = [
+        {"index": i, "license_plate": event["license_plate"], "status": "ok"}
+        for i, event in enumerate(events)
+    ]
+    plates = connection.gettype("SYS.ODCIVARCHAR2LIST").newobject(
+        list({event["license_plate"] for event in events})
+    )
+    open_records = defaultdict(deque)
+    now = None
+    for row in execute_query(connection, queries.OPEN_VISITORS_BY_PLATES, {"plates": plates}):
+        open_records[row["license_plate"]].append(row)
+        now = row["now_ts"]
+
+    matched = []
+    for result, event in zip(results, events):
+        records = open_records[event["license_plate"]]
+        if not records:
+            result.update(status="error", detail="Active visitor record not found")
+            continue
+        record = records.popleft()
+        departure_time = event.get("departure_time") or now
+        if departure_time < record["arrival_time"]:
+            result.update(status="error", detail="Departure before arrival")
+            continue
+        matched.append((result, record, departure_time))
+
+    fees = visitor_tariff.price_many(
+        [record["arrival_time"] for _, record, _ in matched],
+        [departure_time for _, _, departure_time in matched]
+    ) if matched else []
+    updates = []
+    for (result, record, departure_time), fee in zip(matched, fees):
+        parking_fee = int(fee)
+        result.update(record_id=record["record_id"], space_id=record["space_id"], parking_fee=parking_fee)
+        updates.append((result, {
+            "record_id": record["record_id"],
+            "departure_time": departure_time,
+            "parking_fee": parking_fee
+        }))
+
+    with UnitOfWork(connection) as uow:
+        if updates:
+            cursor = uow.executemany(queries.CLOSE_VISITOR, [params for _, params in updates], arraydmlrowcounts=True)
+            closed = []
+            for (result, _), count in zip(updates, cursor.getarraydmlrowcounts()):
+                if count == 0:
+                    # Closed by a concurrent exit since the SELECT above
+                    result.update(status="error", parking_fee=None, detail="Visitor record already closed")
+                else:
+                    closed.append(result)
             
+            if closed:
+                freed = space_counters.give_many(connection, [result["space_id"] for result in closed])
+                for result in closed:
+                    result["space_freed"] = freed[result["space_id"]]
+    return results
+
+def reprice_visitor_records(connection, start: datetime, end: datetime,
+                            apply: bool = False, chunk_size: int = 10000) -> Dict:
+    """Re-price closed visitor stays that departed in [start, end).
+
+    Streams the range in chunks, prices each chunk with the vectorized
+    tariff, and (when apply=True) writes back the changed fees with array
+    binds in a single transaction. Returns a summary of the differences.
+    """
+    summary = {"records": 0, "changed": 0, "old_total": 0, "new_total": 0}
+    reader = connection.cursor()
+    writer = connection.cursor()
+    try:
+        reader.arraysize = chunk_size
+        queries.CLOSED_VISITORS_IN_RANGE.execute(reader, {"range_start": start, "range_end": end})
+        while True:
+            rows = reader.fetchmany()
+            if not rows:
+                break
+            fees = visitor_tariff.price_many([r[1] for r in rows], [r[2] for r in rows])
+            # r[4]: archived (migrations/007)
+            changed = {0: [], 1: []}
+            for r, fee in zip(rows, fees):
+                if (r[3] or 0) != fee:
+                    changed[r[4]].append({"record_id": r[0], "parking_fee": int(fee)})
+            summary["records"] += len(rows)
+            summary["changed"] += len(changed[0]) + len(changed[1])
+            summary["old_total"] += sum(r[3] or 0 for r in rows)
+            summary["new_total"] += int(fees.sum())
+            if apply and changed[0]:
+                queries.REPRICE_VISITOR.executemany(writer, changed[0])
+            if apply and changed[1]:
+                queries.REPRICE_ARCHIVED_VISITOR.executemany(writer, changed[1])
+        if apply:
+            commit(connection)
+        return summary
     except Exception as e:
-        return {"status": "VEHICLE_NOT_REGISTERED", "message": "Vehicle not registered."}
+        connection.rollback()
+        raise e
     finally:
-        cursor.close()
\ No newline at end of file
+        reader.close()
+        writer.close()
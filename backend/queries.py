@@ -0,0 +1,1374 @@
+"""Named SQL statements shared by the routes, models and services.
+
+Every statement the API runs is defined here once, with bind variables
+only, so its text is identical on every call: the pool's statement cache
+(DB_STMT_CACHE_SIZE) reuses the open cursor instead of sending a new parse,
+and Oracle shares one child cursor per statement. Each text starts with a
+/* name */ tag so the matching V$SQL rows can be found by name.
+"""
+
+import textwrap
+import threading
+import time
+from typing import Dict, List
+
+class Query(str):
+    """SQL text with a registry name and client-side execution counters.
+
+    Subclasses str so it can be passed straight to cursor.execute().
+    """
+
+    def __new__(cls, name: str, sql: str):
+        query = super().__new__(cls, f"/* {name} */ " + textwrap.dedent(sql).strip())
+        query.name = name
+        query.executions = 0
+        query.errors = 0
+        query.total_ms = 0.0
+        return query
+
+    def execute(self, cursor, params: dict = None):
+        """cursor.execute() this statement and count it"""
+        started = time.perf_counter()
+        try:
+            result = cursor.execute(self, params or {})
+        except Exception:
+            self.record(started, failed=True)
+            raise
+        self.record(started)
+        return result
+
+    def executemany(self, cursor, rows: list, **kwargs):
+        """cursor.executemany() this statement (array bind) and count it"""
+        started = time.perf_counter()
+        try:
+            result = cursor.executemany(self, rows, **kwargs)
+        except Exception:
+            self.record(started, failed=True)
+            raise
+        self.record(started)
+        return result
+
+    def record(self, started: float, failed: bool = False):
+        """Count one execution that began at time.perf_counter() `started`"""
+        elapsed = (time.perf_counter() - started) * 1000
+        with registry.lock:
+            self.executions += 1
+            self.total_ms += elapsed
+            if failed:
+                self.errors += 1
+
+class QueryRegistry:
+    """All named queries, plus a counter for SQL run outside the registry"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries: Dict[str, Query] = {}
+        self.adhoc_executions = 0
+
+    def register(self, name: str, sql: str) -> Query:
+        if name in self.queries:
+            raise ValueError(f"Query {name!r} is already registered")
+        query = Query(name, sql)
+        self.queries[name] = query
+        return query
+
+    def record_adhoc(self):
+        with self.lock:
+            self.adhoc_executions += 1
+
+    def stats(self) -> List[Dict]:
+        """Client-side execution counts per query, busiest first"""
+        with self.lock:
+            rows = [
+                {
+                    "name": q.name,
+                    "executions": q.executions,
+                    "errors": q.errors,
+                    "avg_ms": round(q.total_ms / q.executions, 3) if q.executions else None
+                }
+                for q in self.queries.values()
+            ]
+        return sorted(rows, key=lambda r: r["executions"], reverse=True)
+
+    def oracle_stats(self, connection) -> List[Dict]:
+        """Parse and execute counts per query from V$SQL.
+
+        parse_calls close to executions means every call re-parses; with the
+        statement cache working it stays near the number of sessions. Needs
+        SELECT on V$SQL; returns an empty list without it.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(ORACLE_PARSE_STATS)
+            totals: Dict[str, Dict] = {}
+            for sql_text, parse_calls, executions, loads in cursor:
+                name = sql_text[3:sql_text.find(" */")]
+                if name not in self.queries:
+                    continue
+                entry = totals.setdefault(name, {"name": name, "parse_calls": 0, "executions": 0, "loads": 0})
+                entry["parse_calls"] += parse_calls
+                entry["executions"] += executions
+                entry["loads"] += loads
+        except Exception as e:
+            print(f"⚠️ V$SQL not readable, skipping parse stats: {e}")
+            return []
+        finally:
+            cursor.close()
+        return sorted(totals.values(), key=lambda r: r["executions"], reverse=True)
+
+# Global query registry instance
+registry = QueryRegistry()
+
+register = registry.register
+
+ORACLE_PARSE_STATS = register("oracle_parse_stats", """
+    SELECT sql_text, parse_calls, executions, loads
+    FROM V$SQL
+    WHERE sql_text LIKE '/* %'
+""")
+
+
+# ------------------------------------------------------------------
+# Dashboard
+# ------------------------------------------------------------------
+
+MANAGER_REPORT_CURRENT_MONTH = register("manager_report_current_month", """
+    SELECT manager_report_id, manager_id, month,
+           total_subscription_made, total_money_made,
+           monthly_subs, quaterly_subs, yearly_subs, salary
+    FROM ManagerFinancialReport
+    WHERE manager_id = :manager_id
+    AND month >= TRUNC(SYSDATE, 'MM')
+    AND month < ADD_MONTHS(TRUNC(SYSDATE, 'MM'), 1)
+""")
+
+# Today's usage per space: rollup buckets up to the watermark plus the raw
+# records that arrived or closed after it (services/rollups.py)
+OCCUPANCY_DETAILS = register("occupancy_details", """
+    WITH wm AS (
+        SELECT NVL(MAX(high_water), DATE '1970-01-01') AS high_water
+        FROM RollupWatermark
+        WHERE name = 'hourly'
+    ),
+    usage AS (
+        SELECT space_id, arrivals, closed_stays, stay_minutes
+        FROM OccupancyRollup
+        WHERE hour_start >= TRUNC(SYSDATE)
+        AND hour_start < TRUNC(SYSDATE) + 1
+
+        UNION ALL
+
+        SELECT pr.space_id, 1, 0, 0
+        FROM ParkingRecord pr, wm
+        WHERE pr.arrival_time >= GREATEST(wm.high_water, TRUNC(SYSDATE))
+        AND pr.arrival_time < TRUNC(SYSDATE) + 1
+
+        UNION ALL
+
+        SELECT pr.space_id, 0, 1,
+               EXTRACT(DAY FROM (pr.departure_time - pr.arrival_time)) * 1440 +
+               EXTRACT(HOUR FROM (pr.departure_time - pr.arrival_time)) * 60 +
+               EXTRACT(MINUTE FROM (pr.departure_time - pr.arrival_time))
+        FROM ParkingRecord pr, wm
+        WHERE pr.departure_time >= wm.high_water
+        AND pr.arrival_time >= TRUNC(SYSDATE)
+        AND pr.arrival_time < TRUNC(SYSDATE) + 1
+    )
+    SELECT
+        ps.space_type,
+        ps.space_id,
+        ps.spaces_available,
+        COALESCE(SUM(u.arrivals), 0) AS total_usage_today,
+        ROUND(SUM(u.stay_minutes) / NULLIF(SUM(u.closed_stays), 0), 2) AS avg_duration_minutes
+    FROM ParkingSpace ps
+    LEFT JOIN usage u ON u.space_id = ps.space_id
+    GROUP BY ps.space_type, ps.space_id, ps.spaces_available
+    ORDER BY ps.space_type, ps.space_id
+""")
+
+ALERTS = register("alerts", """
+    SELECT
+        'EXPIRED_SUBSCRIPTION' AS alert_type,
+        r.name AS resident_name,
+        r.email,
+        v.license_plate,
+        ps.expiration_date,
+        'Subscription expired - parking access revoked' AS message
+    FROM ParkingSubscription ps
+    JOIN Resident r ON ps.resident_id = r.resident_id
+    JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
+    WHERE ps.expiration_date < SYSDATE
+
+    UNION ALL
+
+    SELECT
+        'OVERSTAY_VISITOR' AS alert_type,
+        'Visitor' AS resident_name,
+        NULL AS email,
+        vpr.license_plate,
+        vpr.arrival_time AS expiration_date,
+        'Visitor overstay - parked for > 24 hours' AS message
+    FROM OpenVisitorSession vpr
+    WHERE vpr.arrival_time < SYSDATE - 1
+
+    UNION ALL
+
+    SELECT
+        'SPACE_CAPACITY_LOW' AS alert_type,
+        NULL AS resident_name,
+        NULL AS email,
+        NULL AS license_plate,
+        NULL AS expiration_date,
+        'Parking space ' || space_id || ' has only ' || spaces_available || ' spaces remaining' AS message
+    FROM ParkingSpace
+    WHERE spaces_available <= 5
+    AND space_type IN ('Car', 'Motorcycle')
+""")
+
+# Month-to-date revenue: at most ~744 hourly buckets plus the raw tail
+# after the watermark, however long the history grows
+REVENUE_DETAILS = register("revenue_details", """
+    WITH wm AS (
+        SELECT NVL(MAX(high_water), DATE '1970-01-01') AS high_water
+        FROM RollupWatermark
+        WHERE name = 'hourly'
+    ),
+    revenue AS (
+        SELECT hour_start AS earned_at, source, amount
+        FROM RevenueRollup
+        WHERE hour_start >= TRUNC(SYSDATE, 'MM')
+        AND hour_start < ADD_MONTHS(TRUNC(SYSDATE, 'MM'), 1)
+
+        UNION ALL
+
+        SELECT vpr.departure_time, 'VISITOR', vpr.parking_fee
+        FROM VisitorParkingRecord vpr, wm
+        WHERE vpr.departure_time >= GREATEST(wm.high_water, TRUNC(SYSDATE, 'MM'))
+        AND vpr.departure_time < ADD_MONTHS(TRUNC(SYSDATE, 'MM'), 1)
+
+        UNION ALL
+
+        SELECT ps.start_date, 'SUBSCRIPTION', ps.cost
+        FROM ParkingSubscription ps, wm
+        WHERE ps.start_date >= GREATEST(wm.high_water, TRUNC(SYSDATE, 'MM'))
+        AND ps.start_date < ADD_MONTHS(TRUNC(SYSDATE, 'MM'), 1)
+    )
+    SELECT
+        'Today' as period,
+        COALESCE(SUM(CASE WHEN source = 'VISITOR' AND earned_at >= TRUNC(SYSDATE)
+                          AND earned_at < TRUNC(SYSDATE) + 1 THEN amount END), 0) as visitor_revenue,
+        0 as subscription_revenue
+    FROM revenue
+
+    UNION ALL
+
+    SELECT
+        'This Month' as period,
+        COALESCE(SUM(CASE WHEN source = 'VISITOR' THEN amount END), 0) as visitor_revenue,
+        COALESCE(SUM(CASE WHEN source = 'SUBSCRIPTION' THEN amount END), 0) as subscription_revenue
+    FROM revenue
+""")
+
+# This month's supervisor reports (services/reports.py), not the raw shifts
+SUPERVISOR_COLLECTIONS_THIS_MONTH = register("supervisor_collections_this_month", """
+    SELECT
+        supervisor_id,
+        total_shifts_made as total_shifts_this_month,
+        total_money_made as total_collected_this_month
+    FROM SupervisorFinancialReport
+    WHERE month = TRUNC(SYSDATE, 'MM')
+""")
+
+
+# ------------------------------------------------------------------
+# Residents
+# ------------------------------------------------------------------
+
+RESIDENT_BY_ID = register("resident_by_id", """
+    SELECT r.resident_id, r.apartment_id, r.name, r.phone_number, r.email,
+           a.building_id, a.floor
+    FROM Resident r
+    JOIN Apartment a ON r.apartment_id = a.apartment_id
+    WHERE r.resident_id = :resident_id
+""")
+
+INSERT_RESIDENT = register("insert_resident", """
+    INSERT INTO Resident (resident_id, apartment_id, name, phone_number, email)
+    VALUES (:resident_id, :apartment_id, :name, :phone_number, :email)
+""")
+
+UPDATE_RESIDENT = register("update_resident", """
+    UPDATE Resident
+    SET name = NVL(:name, name),
+        phone_number = NVL(:phone_number, phone_number),
+        email = NVL(:email, email)
+    WHERE resident_id = :resident_id
+""")
+
+DELETE_RESIDENT = register("delete_resident", """
+    DELETE FROM Resident WHERE resident_id = :resident_id
+""")
+
+
+# ------------------------------------------------------------------
+# Vehicles
+# ------------------------------------------------------------------
+
+VEHICLE_BY_ID = register("vehicle_by_id", """
+    SELECT v.vehicle_id, v.resident_id, v.license_plate, v.vehicle_type,
+           r.name as resident_name
+    FROM Vehicle v
+    JOIN Resident r ON v.resident_id = r.resident_id
+    WHERE v.vehicle_id = :vehicle_id
+""")
+
+INSERT_VEHICLE = register("insert_vehicle", """
+    INSERT INTO Vehicle (vehicle_id, resident_id, license_plate, vehicle_type)
+    VALUES (:vehicle_id, :resident_id, :license_plate, :vehicle_type)
+""")
+
+UPDATE_VEHICLE = register("update_vehicle", """
+    UPDATE Vehicle
+    SET license_plate = NVL(:license_plate, license_plate),
+        vehicle_type = NVL(:vehicle_type, vehicle_type)
+    WHERE vehicle_id = :vehicle_id
+""")
+
+DELETE_VEHICLE = register("delete_vehicle", """
+    DELETE FROM Vehicle WHERE vehicle_id = :vehicle_id
+""")
+
+# Foreign-key maps for services/bulk_import.py, loaded once per import
+
+IMPORT_APARTMENT_IDS = register("import_apartment_ids", """
+    SELECT apartment_id FROM Apartment
+""")
+
+IMPORT_RESIDENT_KEYS = register("import_resident_keys", """
+    SELECT resident_id, LOWER(email) FROM Resident
+""")
+
+IMPORT_VEHICLE_PLATES = register("import_vehicle_plates", """
+    SELECT license_plate FROM Vehicle
+""")
+
+
+# ------------------------------------------------------------------
+# Subscriptions
+# ------------------------------------------------------------------
+
+SUBSCRIPTION_BY_ID = register("subscription_by_id", """
+    SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
+           ps.is_monthly, ps.is_quarterly, ps.is_yearly,
+           ps.start_date, ps.expiration_date, ps.cost,
+           v.license_plate, r.name as resident_name
+    FROM ParkingSubscription ps
+    JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
+    JOIN Resident r ON ps.resident_id = r.resident_id
+    WHERE ps.subscription_id = :subscription_id
+""")
+
+INSERT_SUBSCRIPTION = register("insert_subscription", """
+    INSERT INTO ParkingSubscription (
+        subscription_id, vehicle_id, resident_id,
+        is_monthly, is_quarterly, is_yearly,
+        start_date, expiration_date, cost
+    )
+    VALUES (
+        :subscription_id, :vehicle_id, :resident_id,
+        :is_monthly, :is_quarterly, :is_yearly,
+        SYSDATE, ADD_MONTHS(SYSDATE, :months), :cost
+    )
+    RETURNING start_date, expiration_date INTO :start_date_out, :expiration_date_out
+""")
+
+SUBSCRIPTION_FOR_RENEWAL = register("subscription_for_renewal", """
+    SELECT expiration_date,
+           CASE
+               WHEN is_monthly = 1 THEN 'monthly'
+               WHEN is_quarterly = 1 THEN 'quarterly'
+               WHEN is_yearly = 1 THEN 'yearly'
+           END as subscription_type,
+           cost, vehicle_id, resident_id
+    FROM ParkingSubscription
+    WHERE subscription_id = :subscription_id
+""")
+
+INSERT_RENEWAL = register("insert_renewal", """
+    INSERT INTO ParkingSubscription (
+        subscription_id, vehicle_id, resident_id,
+        is_monthly, is_quarterly, is_yearly,
+        start_date, expiration_date, cost
+    )
+    VALUES (
+        :subscription_id, :vehicle_id, :resident_id,
+        :is_monthly, :is_quarterly, :is_yearly,
+        :start_date + 1, ADD_MONTHS(:start_date + 1, :months), :cost
+    )
+    RETURNING start_date, expiration_date INTO :start_date_out, :expiration_date_out
+""")
+
+DELETE_SUBSCRIPTION = register("delete_subscription", """
+    DELETE FROM ParkingSubscription WHERE subscription_id = :subscription_id
+""")
+
+
+# ------------------------------------------------------------------
+# Visitors
+# ------------------------------------------------------------------
+
+# Open stays only (migrations/008); the fee is set when the record closes
+ACTIVE_VISITORS = register("active_visitors", """
+    SELECT record_id, space_id, license_plate, arrival_time, 0 AS parking_fee
+    FROM OpenVisitorSession
+    ORDER BY arrival_time DESC
+""")
+
+VISITOR_STATS_TODAY = register("visitor_stats_today", """
+    SELECT 
+        COUNT(*) as total_visitors_today,
+        COUNT(CASE WHEN departure_time IS NULL THEN 1 END) as currently_parked,
+        COALESCE(SUM(parking_fee), 0) as total_revenue_today
+    FROM VisitorParkingRecord
+    WHERE arrival_time >= TRUNC(SYSDATE)
+    AND arrival_time < TRUNC(SYSDATE) + 1
+""")
+
+INSERT_VISITOR = register("insert_visitor", """
+    INSERT INTO VisitorParkingRecord (
+        record_id, space_id, license_plate, arrival_time, departure_time, parking_fee
+    )
+    VALUES (
+        :record_id, :space_id, :license_plate, SYSTIMESTAMP, NULL, 0
+    )
+    RETURNING arrival_time INTO :arrival_time_out
+""")
+
+# Exit fallback while services/open_sessions.py is not loaded or missed
+OPEN_VISITOR_BY_PLATE = register("open_visitor_by_plate", """
+    SELECT record_id, arrival_time, space_id,
+           CAST(SYSTIMESTAMP AS TIMESTAMP) AS departure_time
+    FROM OpenVisitorSession
+    WHERE license_plate = :license_plate
+    ORDER BY arrival_time
+""")
+
+# Hot or archived (migrations/007): a primary-key lookup in each
+VISITOR_BY_ID = register("visitor_by_id", """
+    SELECT record_id, space_id, license_plate, arrival_time,
+           departure_time, parking_fee
+    FROM VisitorParkingRecordHistory
+    WHERE record_id = :record_id
+""")
+
+CLOSE_VISITOR = register("close_visitor", """
+    UPDATE VisitorParkingRecord
+    SET departure_time = :departure_time,
+        parking_fee = :parking_fee
+    WHERE record_id = :record_id
+    AND departure_time IS NULL
+""")
+
+
+# ------------------------------------------------------------------
+# Supervisors
+# ------------------------------------------------------------------
+
+SUPERVISOR_BY_ID = register("supervisor_by_id", """
+    SELECT supervisor_id, name, phone_number, email, manager_id
+    FROM Supervisor
+    WHERE supervisor_id = :supervisor_id
+""")
+
+INSERT_SUPERVISOR = register("insert_supervisor", """
+    INSERT INTO Supervisor (supervisor_id, name, phone_number, email, manager_id)
+    VALUES (:supervisor_id, :name, :phone_number, :email, :manager_id)
+""")
+
+INSERT_SHIFT = register("insert_shift", """
+    INSERT INTO SupervisionShift (
+        shift_id, space_id, supervisor_id, day,
+        check_in_time, check_out_time, total_money_collected
+    )
+    VALUES (
+        :shift_id, :space_id, :supervisor_id,
+        TO_CHAR(SYSDATE, 'Day'),
+        SYSTIMESTAMP, NULL, 0
+    )
+""")
+
+CHECK_OUT_SHIFT = register("check_out_shift", """
+    UPDATE SupervisionShift
+    SET check_out_time = SYSTIMESTAMP
+    WHERE shift_id = :shift_id
+    AND check_out_time IS NULL
+""")
+
+SUPERVISOR_REPORTS = register("supervisor_reports", """
+    SELECT supervisor_report_id, supervisor_id, manager_id, month,
+           total_shifts_made, total_money_made, salary
+    FROM SupervisorFinancialReport
+    WHERE supervisor_id = :supervisor_id
+    ORDER BY month DESC
+""")
+
+SUPERVISOR_REPORTS_CURRENT_MONTH = register("supervisor_reports_current_month", """
+    SELECT sfr.supervisor_report_id, sfr.supervisor_id, sfr.manager_id, sfr.month,
+           sfr.total_shifts_made, sfr.total_money_made, sfr.salary,
+           s.name as supervisor_name
+    FROM SupervisorFinancialReport sfr
+    JOIN Supervisor s ON sfr.supervisor_id = s.supervisor_id
+    WHERE sfr.month >= TRUNC(SYSDATE, 'MM')
+    AND sfr.month < ADD_MONTHS(TRUNC(SYSDATE, 'MM'), 1)
+    ORDER BY sfr.total_money_made DESC
+""")
+
+
+# ------------------------------------------------------------------
+# List helpers, gate fallback and batch paths (models.py)
+# ------------------------------------------------------------------
+
+RESIDENTS_PAGE = register("residents_page", """
+    SELECT r.resident_id, r.apartment_id, r.name, r.phone_number, r.email,
+           a.building_id, a.floor
+    FROM Resident r
+    JOIN Apartment a ON r.apartment_id = a.apartment_id
+    ORDER BY r.resident_id
+    OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+""")
+
+RESIDENTS_AFTER = register("residents_after", """
+    SELECT r.resident_id, r.apartment_id, r.name, r.phone_number, r.email,
+           a.building_id, a.floor
+    FROM Resident r
+    JOIN Apartment a ON r.apartment_id = a.apartment_id
+    WHERE r.resident_id > :after_id
+    ORDER BY r.resident_id
+    FETCH FIRST :limit ROWS ONLY
+""")
+
+VEHICLES_BY_RESIDENT = register("vehicles_by_resident", """
+    SELECT vehicle_id, resident_id, license_plate, vehicle_type
+    FROM Vehicle
+    WHERE resident_id = :resident_id
+""")
+
+VEHICLES_PAGE = register("vehicles_page", """
+    SELECT v.vehicle_id, v.resident_id, v.license_plate, v.vehicle_type,
+           r.name as resident_name
+    FROM Vehicle v
+    JOIN Resident r ON v.resident_id = r.resident_id
+    ORDER BY v.vehicle_id
+    OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+""")
+
+VEHICLES_AFTER = register("vehicles_after", """
+    SELECT v.vehicle_id, v.resident_id, v.license_plate, v.vehicle_type,
+           r.name as resident_name
+    FROM Vehicle v
+    JOIN Resident r ON v.resident_id = r.resident_id
+    WHERE v.vehicle_id > :after_id
+    ORDER BY v.vehicle_id
+    FETCH FIRST :limit ROWS ONLY
+""")
+
+SUBSCRIPTIONS_PAGE = register("subscriptions_page", """
+    SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
+           ps.is_monthly, ps.is_quarterly, ps.is_yearly,
+           ps.start_date, ps.expiration_date, ps.cost,
+           v.license_plate, r.name as resident_name
+    FROM ParkingSubscription ps
+    JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
+    JOIN Resident r ON ps.resident_id = r.resident_id
+    ORDER BY ps.subscription_id DESC
+    OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+""")
+
+SUBSCRIPTIONS_BEFORE = register("subscriptions_before", """
+    SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
+           ps.is_monthly, ps.is_quarterly, ps.is_yearly,
+           ps.start_date, ps.expiration_date, ps.cost,
+           v.license_plate, r.name as resident_name
+    FROM ParkingSubscription ps
+    JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
+    JOIN Resident r ON ps.resident_id = r.resident_id
+    WHERE ps.subscription_id < :before_id
+    ORDER BY ps.subscription_id DESC
+    FETCH FIRST :limit ROWS ONLY
+""")
+
+EXPIRING_SUBSCRIPTIONS = register("expiring_subscriptions", """
+    SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
+           ps.expiration_date, ps.cost,
+           CASE
+               WHEN ps.is_monthly = 1 THEN 'Monthly'
+               WHEN ps.is_quarterly = 1 THEN 'Quarterly'
+               WHEN ps.is_yearly = 1 THEN 'Yearly'
+           END as subscription_type,
+           v.license_plate, r.name as resident_name, r.email, r.phone_number
+    FROM ParkingSubscription ps
+    JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
+    JOIN Resident r ON ps.resident_id = r.resident_id
+    WHERE ps.expiration_date BETWEEN SYSDATE AND SYSDATE + :days
+    AND ps.expiration_date >= SYSDATE
+    ORDER BY ps.expiration_date
+""")
+
+# Same columns for ids picked by services/expiry_scheduler.py
+SUBSCRIPTIONS_BY_IDS = register("subscriptions_by_ids", """
+    SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
+           ps.expiration_date, ps.cost,
+           CASE
+               WHEN ps.is_monthly = 1 THEN 'Monthly'
+               WHEN ps.is_quarterly = 1 THEN 'Quarterly'
+               WHEN ps.is_yearly = 1 THEN 'Yearly'
+           END as subscription_type,
+           v.license_plate, r.name as resident_name, r.email, r.phone_number
+    FROM ParkingSubscription ps
+    JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
+    JOIN Resident r ON ps.resident_id = r.resident_id
+    WHERE ps.subscription_id IN (SELECT column_value FROM TABLE(:ids))
+    ORDER BY ps.expiration_date, ps.subscription_id
+""")
+
+# The listing covers hot and archived records (migrations/007). Each table
+# gives its own first rows in page order and only those are merged: Oracle
+# would sort the whole of a UNION ALL view before a FETCH FIRST.
+VISITORS_PAGE = register("visitors_page", """
+    SELECT record_id, space_id, license_plate, arrival_time,
+           departure_time, parking_fee
+    FROM (
+        SELECT * FROM (
+            SELECT record_id, space_id, license_plate, arrival_time,
+                   departure_time, parking_fee
+            FROM VisitorParkingRecord
+            ORDER BY arrival_time DESC, record_id DESC
+            FETCH FIRST :offset + :limit ROWS ONLY
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT record_id, space_id, license_plate, arrival_time,
+                   departure_time, parking_fee
+            FROM VisitorParkingRecordArchive
+            ORDER BY arrival_time DESC, record_id DESC
+            FETCH FIRST :offset + :limit ROWS ONLY
+        )
+    )
+    ORDER BY arrival_time DESC, record_id DESC
+    OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+""")
+
+# record_id breaks arrival_time ties; the first predicate alone bounds the
+# range scans on VPR_arrival_ix (migrations/002) and VPRA_arrival_ix (007)
+VISITORS_BEFORE = register("visitors_before", """
+    SELECT record_id, space_id, license_plate, arrival_time,
+           departure_time, parking_fee
+    FROM (
+        SELECT * FROM (
+            SELECT record_id, space_id, license_plate, arrival_time,
+                   departure_time, parking_fee
+            FROM VisitorParkingRecord
+            WHERE arrival_time <= :before_time
+            AND (arrival_time < :before_time OR record_id < :before_id)
+            ORDER BY arrival_time DESC, record_id DESC
+            FETCH FIRST :limit ROWS ONLY
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT record_id, space_id, license_plate, arrival_time,
+                   departure_time, parking_fee
+            FROM VisitorParkingRecordArchive
+            WHERE arrival_time <= :before_time
+            AND (arrival_time < :before_time OR record_id < :before_id)
+            ORDER BY arrival_time DESC, record_id DESC
+            FETCH FIRST :limit ROWS ONLY
+        )
+    )
+    ORDER BY arrival_time DESC, record_id DESC
+    FETCH FIRST :limit ROWS ONLY
+""")
+
+SUPERVISORS = register("supervisors", """
+    SELECT supervisor_id, name, phone_number, email, manager_id
+    FROM Supervisor
+    ORDER BY supervisor_id
+""")
+
+SHIFTS_BY_SUPERVISOR = register("shifts_by_supervisor", """
+    SELECT ss.shift_id, ss.space_id, ss.supervisor_id, ss.day,
+           ss.check_in_time, ss.check_out_time, ss.total_money_collected,
+           s.name as supervisor_name
+    FROM SupervisionShift ss
+    JOIN Supervisor s ON ss.supervisor_id = s.supervisor_id
+    WHERE ss.supervisor_id = :supervisor_id
+    ORDER BY ss.check_in_time DESC
+""")
+
+RECENT_SHIFTS = register("recent_shifts", """
+    SELECT ss.shift_id, ss.space_id, ss.supervisor_id, ss.day,
+           ss.check_in_time, ss.check_out_time, ss.total_money_collected,
+           s.name as supervisor_name
+    FROM SupervisionShift ss
+    JOIN Supervisor s ON ss.supervisor_id = s.supervisor_id
+    ORDER BY ss.check_in_time DESC
+    FETCH FIRST 100 ROWS ONLY
+""")
+
+DASHBOARD_STATS = register("dashboard_stats", """
+    SELECT
+        (SELECT COUNT(*) FROM OpenParkingSession) as current_occupied_spaces,
+        (SELECT SUM(available) FROM SpaceStripe) as total_available_spaces,
+        (SELECT COUNT(*) FROM OpenVisitorSession) as current_visitors,
+        (SELECT COALESCE(SUM(parking_fee), 0) FROM VisitorParkingRecord
+         WHERE departure_time >= TRUNC(SYSDATE)
+         AND departure_time < TRUNC(SYSDATE) + 1) as today_visitor_revenue
+    FROM DUAL
+""")
+
+# Fallback for the dashboard while services/expiry_scheduler.py is not loaded
+SUBSCRIPTION_COUNTS = register("subscription_counts", """
+    SELECT
+        (SELECT COUNT(*) FROM ParkingSubscription
+         WHERE SYSDATE BETWEEN start_date AND expiration_date) as active_subscriptions,
+        (SELECT COUNT(*) FROM ParkingSubscription
+         WHERE expiration_date BETWEEN SYSDATE AND SYSDATE + :days) as expiring_soon
+    FROM DUAL
+""")
+
+VEHICLE_ID_BY_PLATE = register("vehicle_id_by_plate", """
+    SELECT vehicle_id FROM Vehicle WHERE license_plate = :plate
+""")
+
+ACTIVE_SUBSCRIPTION_COUNT = register("active_subscription_count", """
+    SELECT COUNT(*)
+    FROM ParkingSubscription ps
+    WHERE ps.vehicle_id = :v_id
+    AND SYSDATE BETWEEN ps.start_date AND ps.expiration_date
+    AND (ps.is_monthly = 1 OR ps.is_quarterly = 1 OR ps.is_yearly = 1)
+""")
+
+INSERT_VISITOR_BATCH = register("insert_visitor_batch", """
+    INSERT INTO VisitorParkingRecord (
+        record_id, space_id, license_plate, arrival_time, departure_time, parking_fee
+    )
+    VALUES (
+        :record_id, :space_id, :license_plate, NVL(:arrival_time, SYSTIMESTAMP), NULL, 0
+    )
+""")
+
+OPEN_VISITORS_BY_PLATES = register("open_visitors_by_plates", """
+    SELECT record_id, license_plate, arrival_time, space_id,
+           CAST(SYSTIMESTAMP AS TIMESTAMP) AS now_ts
+    FROM OpenVisitorSession
+    WHERE license_plate IN (SELECT column_value FROM TABLE(:plates))
+    ORDER BY arrival_time
+""")
+
+CLOSED_VISITORS_IN_RANGE = register("closed_visitors_in_range", """
+    SELECT record_id, arrival_time, departure_time, parking_fee, archived
+    FROM VisitorParkingRecordHistory
+    WHERE departure_time >= :range_start
+    AND departure_time < :range_end
+""")
+
+REPRICE_VISITOR = register("reprice_visitor", """
+    UPDATE VisitorParkingRecord
+    SET parking_fee = :parking_fee
+    WHERE record_id = :record_id
+""")
+
+REPRICE_ARCHIVED_VISITOR = register("reprice_archived_visitor", """
+    UPDATE VisitorParkingRecordArchive
+    SET parking_fee = :parking_fee
+    WHERE record_id = :record_id
+""")
+
+
+# ------------------------------------------------------------------
+# History exports (services/bulk_export.py)
+# ------------------------------------------------------------------
+
+# Keyset order over [after, end_time): (after_time, after_id) is the last
+# row already exported, or (start, -1) for a new export. The first
+# predicate bounds the range scan on PR_arrival_ix (migrations/006),
+# VPR_arrival_ix (002) and SS_check_in_ix (003).
+EXPORT_PARKING_RECORDS = register("export_parking_records", """
+    SELECT record_id, space_id, vehicle_id, arrival_time, departure_time
+    FROM ParkingRecord
+    WHERE arrival_time >= :after_time AND arrival_time < :end_time
+    AND (arrival_time > :after_time OR record_id > :after_id)
+    ORDER BY arrival_time, record_id
+""")
+
+EXPORT_VISITOR_RECORDS = register("export_visitor_records", """
+    SELECT record_id, space_id, license_plate, arrival_time,
+           departure_time, parking_fee
+    FROM VisitorParkingRecord
+    WHERE arrival_time >= :after_time AND arrival_time < :end_time
+    AND (arrival_time > :after_time OR record_id > :after_id)
+    ORDER BY arrival_time, record_id
+""")
+
+# Same keyset over the archived records (migrations/007); the exporter
+# merges both streams in key order
+EXPORT_ARCHIVED_PARKING_RECORDS = register("export_archived_parking_records", """
+    SELECT record_id, space_id, vehicle_id, arrival_time, departure_time
+    FROM ParkingRecordArchive
+    WHERE arrival_time >= :after_time AND arrival_time < :end_time
+    AND (arrival_time > :after_time OR record_id > :after_id)
+    ORDER BY arrival_time, record_id
+""")
+
+EXPORT_ARCHIVED_VISITOR_RECORDS = register("export_archived_visitor_records", """
+    SELECT record_id, space_id, license_plate, arrival_time,
+           departure_time, parking_fee
+    FROM VisitorParkingRecordArchive
+    WHERE arrival_time >= :after_time AND arrival_time < :end_time
+    AND (arrival_time > :after_time OR record_id > :after_id)
+    ORDER BY arrival_time, record_id
+""")
+
+EXPORT_SHIFTS = register("export_shifts", """
+    SELECT shift_id, space_id, supervisor_id, day, check_in_time,
+           check_out_time, total_money_collected
+    FROM SupervisionShift
+    WHERE check_in_time >= :after_time AND check_in_time < :end_time
+    AND (check_in_time > :after_time OR shift_id > :after_id)
+    ORDER BY check_in_time, shift_id
+""")
+
+# ------------------------------------------------------------------
+# Archival (services/archiver.py, migrations/007)
+# ------------------------------------------------------------------
+
+# Records that closed before this move to the archive: ARCHIVE_AFTER_DAYS
+# ago, but never past the rollup watermark, so the incremental folds have
+# seen every archived closure
+ARCHIVE_CUTOFF = register("archive_cutoff", """
+    SELECT LEAST(TRUNC(SYSDATE) - :days, NVL(MAX(high_water), DATE '1970-01-01'))
+    FROM RollupWatermark
+    WHERE name = 'hourly'
+""")
+
+# One batch of closed records, locked until the move commits so a
+# re-price cannot land between the copy and the delete. Rows another
+# archiver holds are skipped. Range scans on PR_departure_ix (004) and
+# VPR_departure_ix (003).
+ARCHIVE_PICK_PARKING_RECORDS = register("archive_pick_parking_records", """
+    SELECT record_id
+    FROM ParkingRecord
+    WHERE departure_time < :cutoff
+    AND ROWNUM <= :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+ARCHIVE_COPY_PARKING_RECORDS = register("archive_copy_parking_records", """
+    INSERT INTO ParkingRecordArchive (record_id, space_id, vehicle_id, arrival_time, departure_time)
+    SELECT record_id, space_id, vehicle_id, arrival_time, departure_time
+    FROM ParkingRecord
+    WHERE record_id IN (SELECT column_value FROM TABLE(:ids))
+""")
+
+ARCHIVE_DELETE_PARKING_RECORDS = register("archive_delete_parking_records", """
+    DELETE FROM ParkingRecord
+    WHERE record_id IN (SELECT column_value FROM TABLE(:ids))
+""")
+
+ARCHIVE_PICK_VISITOR_RECORDS = register("archive_pick_visitor_records", """
+    SELECT record_id
+    FROM VisitorParkingRecord
+    WHERE departure_time < :cutoff
+    AND ROWNUM <= :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+ARCHIVE_COPY_VISITOR_RECORDS = register("archive_copy_visitor_records", """
+    INSERT INTO VisitorParkingRecordArchive (
+        record_id, space_id, license_plate, arrival_time, departure_time, parking_fee
+    )
+    SELECT record_id, space_id, license_plate, arrival_time, departure_time, parking_fee
+    FROM VisitorParkingRecord
+    WHERE record_id IN (SELECT column_value FROM TABLE(:ids))
+""")
+
+ARCHIVE_DELETE_VISITOR_RECORDS = register("archive_delete_visitor_records", """
+    DELETE FROM VisitorParkingRecord
+    WHERE record_id IN (SELECT column_value FROM TABLE(:ids))
+""")
+
+# ------------------------------------------------------------------
+# Hourly rollups (services/rollups.py)
+# ------------------------------------------------------------------
+
+ROLLUP_WATERMARK_LOCK = register("rollup_watermark_lock", """
+    SELECT high_water, SYSDATE - :lag_seconds / 86400 AS until
+    FROM RollupWatermark
+    WHERE name = :name
+    FOR UPDATE NOWAIT
+""")
+
+ROLLUP_WATERMARK_WAIT = register("rollup_watermark_wait", """
+    SELECT high_water
+    FROM RollupWatermark
+    WHERE name = :name
+    FOR UPDATE
+""")
+
+ROLLUP_WATERMARK_ADVANCE = register("rollup_watermark_advance", """
+    UPDATE RollupWatermark
+    SET high_water = :high_water
+    WHERE name = :name
+""")
+
+# Arrivals in [since, until) and closures in [since, until), both bucketed
+# by arrival hour
+ROLLUP_FOLD_OCCUPANCY = register("rollup_fold_occupancy", """
+    MERGE INTO OccupancyRollup r
+    USING (
+        SELECT space_id, hour_start,
+               SUM(arrivals) AS arrivals,
+               SUM(closed_stays) AS closed_stays,
+               SUM(stay_minutes) AS stay_minutes
+        FROM (
+            SELECT space_id, TRUNC(arrival_time, 'HH') AS hour_start,
+                   1 AS arrivals, 0 AS closed_stays, 0 AS stay_minutes
+            FROM ParkingRecord
+            WHERE arrival_time >= :since
+            AND arrival_time < :until
+
+            UNION ALL
+
+            SELECT space_id, TRUNC(arrival_time, 'HH'), 0, 1,
+                   EXTRACT(DAY FROM (departure_time - arrival_time)) * 1440 +
+                   EXTRACT(HOUR FROM (departure_time - arrival_time)) * 60 +
+                   EXTRACT(MINUTE FROM (departure_time - arrival_time))
+            FROM ParkingRecord
+            WHERE departure_time >= :since
+            AND departure_time < :until
+        )
+        GROUP BY space_id, hour_start
+    ) d
+    ON (r.hour_start = d.hour_start AND r.space_id = d.space_id)
+    WHEN MATCHED THEN UPDATE SET
+        r.arrivals = r.arrivals + d.arrivals,
+        r.closed_stays = r.closed_stays + d.closed_stays,
+        r.stay_minutes = r.stay_minutes + d.stay_minutes
+    WHEN NOT MATCHED THEN INSERT (space_id, hour_start, arrivals, closed_stays, stay_minutes)
+        VALUES (d.space_id, d.hour_start, d.arrivals, d.closed_stays, d.stay_minutes)
+""")
+
+ROLLUP_FOLD_REVENUE = register("rollup_fold_revenue", """
+    MERGE INTO RevenueRollup r
+    USING (
+        SELECT TRUNC(departure_time, 'HH') AS hour_start, 'VISITOR' AS source,
+               SUM(parking_fee) AS amount, COUNT(*) AS items
+        FROM VisitorParkingRecord
+        WHERE departure_time >= :since
+        AND departure_time < :until
+        GROUP BY TRUNC(departure_time, 'HH')
+
+        UNION ALL
+
+        SELECT TRUNC(start_date, 'HH'), 'SUBSCRIPTION', SUM(cost), COUNT(*)
+        FROM ParkingSubscription
+        WHERE start_date >= :since
+        AND start_date < :until
+        GROUP BY TRUNC(start_date, 'HH')
+    ) d
+    ON (r.hour_start = d.hour_start AND r.source = d.source)
+    WHEN MATCHED THEN UPDATE SET
+        r.amount = r.amount + d.amount,
+        r.items = r.items + d.items
+    WHEN NOT MATCHED THEN INSERT (hour_start, source, amount, items)
+        VALUES (d.hour_start, d.source, d.amount, d.items)
+""")
+
+ROLLUP_CLEAR_OCCUPANCY = register("rollup_clear_occupancy", """
+    DELETE FROM OccupancyRollup
+    WHERE hour_start >= :range_start
+    AND hour_start < :range_end
+""")
+
+ROLLUP_CLEAR_REVENUE = register("rollup_clear_revenue", """
+    DELETE FROM RevenueRollup
+    WHERE hour_start >= :range_start
+    AND hour_start < :range_end
+""")
+
+# Closures count only up to the watermark, as the incremental folds would.
+# Rebuilds read archived records too (migrations/007).
+ROLLUP_REBUILD_OCCUPANCY = register("rollup_rebuild_occupancy", """
+    INSERT INTO OccupancyRollup (space_id, hour_start, arrivals, closed_stays, stay_minutes)
+    SELECT space_id, TRUNC(arrival_time, 'HH'), COUNT(*),
+           COUNT(CASE WHEN departure_time < :high_water THEN 1 END),
+           COALESCE(SUM(CASE WHEN departure_time < :high_water THEN
+               EXTRACT(DAY FROM (departure_time - arrival_time)) * 1440 +
+               EXTRACT(HOUR FROM (departure_time - arrival_time)) * 60 +
+               EXTRACT(MINUTE FROM (departure_time - arrival_time))
+           END), 0)
+    FROM ParkingRecordHistory
+    WHERE arrival_time >= :range_start
+    AND arrival_time < :range_end
+    GROUP BY space_id, TRUNC(arrival_time, 'HH')
+""")
+
+ROLLUP_REBUILD_REVENUE = register("rollup_rebuild_revenue", """
+    INSERT INTO RevenueRollup (hour_start, source, amount, items)
+    SELECT TRUNC(departure_time, 'HH'), 'VISITOR', SUM(parking_fee), COUNT(*)
+    FROM VisitorParkingRecordHistory
+    WHERE departure_time >= :range_start
+    AND departure_time < :range_end
+    GROUP BY TRUNC(departure_time, 'HH')
+
+    UNION ALL
+
+    SELECT TRUNC(start_date, 'HH'), 'SUBSCRIPTION', SUM(cost), COUNT(*)
+    FROM ParkingSubscription
+    WHERE start_date >= :range_start
+    AND start_date < :range_end
+    GROUP BY TRUNC(start_date, 'HH')
+""")
+
+
+# ------------------------------------------------------------------
+# Financial reports (services/reports.py, migrations/009)
+# ------------------------------------------------------------------
+
+# Months with a shift checked out or a subscription started in
+# [since, until), plus the month in progress; the watermark row is the
+# 'reports' one locked with ROLLUP_WATERMARK_LOCK
+REPORT_DIRTY_MONTHS = register("report_dirty_months", """
+    SELECT TRUNC(check_in_time, 'MM') AS month
+    FROM SupervisionShift
+    WHERE check_out_time >= :since
+    AND check_out_time < :until
+
+    UNION
+
+    SELECT TRUNC(start_date, 'MM')
+    FROM ParkingSubscription
+    WHERE start_date >= :since
+    AND start_date < :until
+
+    UNION
+
+    SELECT TRUNC(CAST(:until AS DATE), 'MM') FROM DUAL
+    ORDER BY 1
+""")
+
+# Oldest and newest month with source rows, for a backfill of everything
+REPORT_SOURCE_RANGE = register("report_source_range", """
+    SELECT LEAST(NVL(s.first_shift, p.first_start), NVL(p.first_start, s.first_shift)),
+           GREATEST(NVL(s.last_shift, p.last_start), NVL(p.last_start, s.last_shift))
+    FROM (SELECT MIN(check_in_time) AS first_shift, MAX(check_in_time) AS last_shift
+          FROM SupervisionShift) s,
+         (SELECT MIN(start_date) AS first_start, MAX(start_date) AS last_start
+          FROM ParkingSubscription) p
+""")
+
+# A month is rewritten whole: rows for supervisors / managers with nothing
+# left in it go, the others are merged on (month, id) (SS_check_in_ix,
+# PS_start_ix)
+REPORT_CLEAR_SUPERVISORS = register("report_clear_supervisors", """
+    DELETE FROM SupervisorFinancialReport r
+    WHERE r.month = :month_start
+    AND NOT EXISTS (
+        SELECT 1
+        FROM SupervisionShift ss
+        WHERE ss.supervisor_id = r.supervisor_id
+        AND ss.check_in_time >= :month_start
+        AND ss.check_in_time < :month_end
+        AND ss.check_out_time IS NOT NULL
+    )
+""")
+
+REPORT_MERGE_SUPERVISORS = register("report_merge_supervisors", """
+    MERGE INTO SupervisorFinancialReport r
+    USING (
+        SELECT ss.supervisor_id, s.manager_id,
+               COUNT(*) AS shifts,
+               COALESCE(SUM(ss.total_money_collected), 0) AS money
+        FROM SupervisionShift ss
+        JOIN Supervisor s ON s.supervisor_id = ss.supervisor_id
+        WHERE ss.check_in_time >= :month_start
+        AND ss.check_in_time < :month_end
+        AND ss.check_out_time IS NOT NULL
+        GROUP BY ss.supervisor_id, s.manager_id
+    ) d
+    ON (r.month = :month_start AND r.supervisor_id = d.supervisor_id)
+    WHEN MATCHED THEN UPDATE SET
+        r.manager_id = d.manager_id,
+        r.total_shifts_made = d.shifts,
+        r.total_money_made = d.money,
+        r.salary = :base_salary + :shift_pay * d.shifts
+    WHEN NOT MATCHED THEN INSERT (
+        supervisor_report_id, supervisor_id, manager_id, month,
+        total_shifts_made, total_money_made, salary
+    ) VALUES (
+        SupervisorFinancialReport_seq.NEXTVAL, d.supervisor_id, d.manager_id, :month_start,
+        d.shifts, d.money, :base_salary + :shift_pay * d.shifts
+    )
+""")
+
+REPORT_CLEAR_MANAGERS = register("report_clear_managers", """
+    DELETE FROM ManagerFinancialReport r
+    WHERE r.month = :month_start
+    AND NOT EXISTS (
+        SELECT 1
+        FROM ParkingSubscription ps
+        JOIN Resident res ON res.resident_id = ps.resident_id
+        JOIN Apartment a ON a.apartment_id = res.apartment_id
+        JOIN BuildingManager bm ON bm.building_id = a.building_id
+        WHERE bm.manager_id = r.manager_id
+        AND ps.start_date >= :month_start
+        AND ps.start_date < :month_end
+    )
+""")
+
+REPORT_MERGE_MANAGERS = register("report_merge_managers", """
+    MERGE INTO ManagerFinancialReport r
+    USING (
+        SELECT bm.manager_id,
+               COUNT(*) AS subscriptions,
+               COALESCE(SUM(ps.cost), 0) AS money,
+               SUM(CASE WHEN ps.is_monthly = 1 THEN 1 ELSE 0 END) AS monthly_subs,
+               SUM(CASE WHEN ps.is_quarterly = 1 THEN 1 ELSE 0 END) AS quarterly_subs,
+               SUM(CASE WHEN ps.is_yearly = 1 THEN 1 ELSE 0 END) AS yearly_subs
+        FROM ParkingSubscription ps
+        JOIN Resident res ON res.resident_id = ps.resident_id
+        JOIN Apartment a ON a.apartment_id = res.apartment_id
+        JOIN BuildingManager bm ON bm.building_id = a.building_id
+        WHERE ps.start_date >= :month_start
+        AND ps.start_date < :month_end
+        GROUP BY bm.manager_id
+    ) d
+    ON (r.month = :month_start AND r.manager_id = d.manager_id)
+    WHEN MATCHED THEN UPDATE SET
+        r.total_subscription_made = d.subscriptions,
+        r.total_money_made = d.money,
+        r.monthly_subs = d.monthly_subs,
+        r.quaterly_subs = d.quarterly_subs,
+        r.yearly_subs = d.yearly_subs,
+        r.salary = :manager_base_salary + ROUND(:commission * d.money)
+    WHEN NOT MATCHED THEN INSERT (
+        manager_report_id, manager_id, month, total_subscription_made, total_money_made,
+        monthly_subs, quaterly_subs, yearly_subs, salary
+    ) VALUES (
+        ManagerFinancialReport_seq.NEXTVAL, d.manager_id, :month_start, d.subscriptions, d.money,
+        d.monthly_subs, d.quarterly_subs, d.yearly_subs,
+        :manager_base_salary + ROUND(:commission * d.money)
+    )
+""")
+
+
+# ------------------------------------------------------------------
+# Alerts (services/alerts.py)
+# ------------------------------------------------------------------
+
+# Latest subscription per vehicle that expired within the lookback or
+# expires within the timer horizon; a renewal suppresses the alert
+ALERT_SUBSCRIPTIONS = register("alert_subscriptions", """
+    SELECT ps.subscription_id, ps.vehicle_id, r.name AS resident_name, r.email,
+           v.license_plate, ps.expiration_date
+    FROM ParkingSubscription ps
+    JOIN Resident r ON ps.resident_id = r.resident_id
+    JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
+    WHERE ps.expiration_date >= SYSDATE - :lookback_days
+    AND ps.expiration_date < SYSDATE + :horizon_seconds / 86400
+    AND NOT EXISTS (
+        SELECT 1
+        FROM ParkingSubscription later
+        WHERE later.vehicle_id = ps.vehicle_id
+        AND later.expiration_date > ps.expiration_date
+    )
+""")
+
+ALERT_OPEN_VISITORS = register("alert_open_visitors", """
+    SELECT record_id, license_plate, arrival_time
+    FROM OpenVisitorSession
+""")
+
+# Live availability: the stripe sums, not the last reconciled copy
+ALERT_SPACE_CAPACITY = register("alert_space_capacity", """
+    SELECT ps.space_id, ps.space_type,
+           NVL(SUM(st.available), ps.spaces_available) AS spaces_available
+    FROM ParkingSpace ps
+    LEFT JOIN SpaceStripe st ON st.space_id = ps.space_id
+    GROUP BY ps.space_id, ps.space_type, ps.spaces_available
+""")
+
+
+# ------------------------------------------------------------------
+# Space availability stripes (services/space_counters.py)
+# ------------------------------------------------------------------
+
+# space_take / space_give are defined in migrations/005_space_stripes.sql:
+# 1 = done on an unlocked stripe, 2 = done after a lock wait, 0 = full
+# (take) or no stripes (give). Both run in the caller's transaction.
+# migrations/010 caps space_give at each stripe's share of capacity.
+SPACE_TAKE = register("space_take", """
+    BEGIN
+        :result := space_take(:space_id, :offset);
+    END;
+""")
+
+SPACE_GIVE = register("space_give", """
+    BEGIN
+        :result := space_give(:space_id, :count, :offset);
+    END;
+""")
+
+SPACE_TAKE_MANY = register("space_take_many", """
+    DECLARE
+        v_spaces SYS.ODCINUMBERLIST := :space_ids;
+        v_results SYS.ODCINUMBERLIST := SYS.ODCINUMBERLIST();
+    BEGIN
+        v_results.EXTEND(v_spaces.COUNT);
+        FOR i IN 1..v_spaces.COUNT LOOP
+            v_results(i) := space_take(v_spaces(i), :offset + i);
+        END LOOP;
+        :results := v_results;
+    END;
+""")
+
+SPACE_GIVE_MANY = register("space_give_many", """
+    DECLARE
+        v_spaces SYS.ODCINUMBERLIST := :space_ids;
+        v_counts SYS.ODCINUMBERLIST := :counts;
+        v_results SYS.ODCINUMBERLIST := SYS.ODCINUMBERLIST();
+    BEGIN
+        v_results.EXTEND(v_spaces.COUNT);
+        FOR i IN 1..v_spaces.COUNT LOOP
+            v_results(i) := space_give(v_spaces(i), v_counts(i), :offset + i);
+        END LOOP;
+        :results := v_results;
+    END;
+""")
+
+# Space by space: lock its stripes (in-flight gates finish first, new ones
+# wait), recount its open visitor records and, if the stripes disagree,
+# spread capacity - open over them again. spaces_available gets the same
+# value. Committed per space so no gate waits for more than one space.
+SPACE_RECONCILE = register("space_reconcile", """
+    DECLARE
+        v_sum NUMBER;
+        v_stripes NUMBER;
+        v_open NUMBER;
+        v_truth NUMBER;
+        v_spaces NUMBER := 0;
+        v_fixed NUMBER := 0;
+        v_drift NUMBER := 0;
+    BEGIN
+        FOR s IN (SELECT space_id, capacity FROM ParkingSpace
+                  WHERE capacity IS NOT NULL ORDER BY space_id) LOOP
+            v_sum := 0;
+            v_stripes := 0;
+            FOR st IN (SELECT available FROM SpaceStripe
+                       WHERE space_id = s.space_id FOR UPDATE) LOOP
+                v_sum := v_sum + st.available;
+                v_stripes := v_stripes + 1;
+            END LOOP;
+
+            SELECT COUNT(*) INTO v_open
+            FROM OpenVisitorSession
+            WHERE space_id = s.space_id;
+            v_truth := GREATEST(s.capacity - v_open, 0);
+
+            IF v_stripes = 0 THEN
+                INSERT INTO SpaceStripe (space_id, stripe_no, available)
+                SELECT s.space_id, LEVEL - 1,
+                       FLOOR(v_truth / 8) + CASE WHEN LEVEL - 1 < MOD(v_truth, 8) THEN 1 ELSE 0 END
+                FROM DUAL CONNECT BY LEVEL <= 8;
+            ELSIF v_sum != v_truth THEN
+                UPDATE SpaceStripe
+                SET available = FLOOR(v_truth / 8)
+                    + CASE WHEN stripe_no < MOD(v_truth, 8) THEN 1 ELSE 0 END
+                WHERE space_id = s.space_id;
+            END IF;
+            IF v_stripes = 0 OR v_sum != v_truth THEN
+                v_fixed := v_fixed + 1;
+                v_drift := v_drift + ABS(v_truth - v_sum);
+            END IF;
+
+            UPDATE ParkingSpace
+            SET spaces_available = v_truth
+            WHERE space_id = s.space_id
+            AND DECODE(spaces_available, v_truth, 1, 0) = 0;
+            COMMIT;
+            v_spaces := v_spaces + 1;
+        END LOOP;
+        :spaces := v_spaces;
+        :fixed := v_fixed;
+        :drift := v_drift;
+    END;
+""")
+
+
+# ------------------------------------------------------------------
+# Services
+# ------------------------------------------------------------------
+
+# Every vehicle with its current and future subscription windows
+PLATE_INDEX_LOAD = register("plate_index_load", """
+    SELECT v.vehicle_id, v.license_plate,
+           ps.subscription_id, ps.start_date, ps.expiration_date
+    FROM Vehicle v
+    LEFT JOIN ParkingSubscription ps ON ps.vehicle_id = v.vehicle_id
+        AND ps.expiration_date >= SYSDATE
+        AND (ps.is_monthly = 1 OR ps.is_quarterly = 1 OR ps.is_yearly = 1)
+""")
+
+PLATE_INDEX_VEHICLE = register("plate_index_vehicle", """
+    SELECT v.vehicle_id, v.license_plate,
+           ps.subscription_id, ps.start_date, ps.expiration_date
+    FROM Vehicle v
+    LEFT JOIN ParkingSubscription ps ON ps.vehicle_id = v.vehicle_id
+        AND ps.expiration_date >= SYSDATE
+        AND (ps.is_monthly = 1 OR ps.is_quarterly = 1 OR ps.is_yearly = 1)
+    WHERE v.vehicle_id = :vehicle_id
+""")
+
+SPACE_ALLOCATOR_LOAD = register("space_allocator_load", """
+    SELECT ps.space_id, ps.space_type,
+           NVL(SUM(st.available), ps.spaces_available) AS spaces_available
+    FROM ParkingSpace ps
+    LEFT JOIN SpaceStripe st ON st.space_id = ps.space_id
+    GROUP BY ps.space_id, ps.space_type, ps.spaces_available
+""")
+
+# Every subscription that has not expired, for the in-memory expiry schedule
+EXPIRY_SCHEDULER_LOAD = register("expiry_scheduler_load", """
+    SELECT subscription_id, vehicle_id, start_date, expiration_date
+    FROM ParkingSubscription
+    WHERE expiration_date >= SYSDATE
+""")
+
+# Open stays for services/open_sessions.py (migrations/008), oldest first
+OPEN_SESSIONS_VISITORS = register("open_sessions_visitors", """
+    SELECT record_id, space_id, license_plate, arrival_time
+    FROM OpenVisitorSession
+    ORDER BY arrival_time, record_id
+""")
+
+OPEN_SESSIONS_RESIDENTS = register("open_sessions_residents", """
+    SELECT record_id, space_id
+    FROM OpenParkingSession
+""")
+
+# The database clock, read with each load to price exits served from memory
+OPEN_SESSIONS_CLOCK = register("open_sessions_clock", """
+    SELECT CAST(SYSTIMESTAMP AS TIMESTAMP) FROM DUAL
+""")
+
+SEQUENCE_INCREMENT = register("sequence_increment", """
+    SELECT increment_by FROM USER_SEQUENCES WHERE sequence_name = :name
+""")
+
+def nextval(sequence: str) -> Query:
+    """NEXTVAL for `sequence`; one registered statement per sequence"""
+    name = f"nextval_{sequence.lower()}"
+    with registry.lock:
+        query = registry.queries.get(name)
+        if query is None:
+            query = registry.queries[name] = Query(name, f"SELECT {sequence}.NEXTVAL FROM DUAL")
+    return query
@@ -0,0 +1,219 @@
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+import oracledb
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import db, get_db_connection
+from services.archiver import record_archiver
+from services.bulk_import import bulk_importer
+from services.expiry_scheduler import expiry_scheduler
+from services.open_sessions import open_sessions
+from services.pool_sizer import pool_sizer
+from services.query_profiler import query_profiler
+from services.reports import financial_reports
+from services.rollups import hourly_rollups
+from services.space_counters import space_counters
+from services.transactions import transaction_stats
+import queries
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+@router.get("/queries")
+def get_query_stats(
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Per-query execution counts, plus Oracle parse counts where V$SQL is readable"""
+    try:
+        return {
+            "statement_cache_size": db.stmt_cache_size,
+            "registered": len(queries.registry.queries),
+            "adhoc_executions": queries.registry.adhoc_executions,
+            "queries": queries.registry.stats(),
+            "oracle": queries.registry.oracle_stats(connection)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/queries/profile")
+def get_query_profile(sort: str = "total_ms", limit: Optional[int] = None):
+    """Execute / fetch time, rows and bind sizes per statement, largest `sort` first"""
+    return {
+        "enabled": query_profiler.enabled,
+        "statements": query_profiler.stats(sort, limit)
+    }
+
+@router.get("/queries/slow")
+def get_slow_queries(limit: Optional[int] = None, minutes: Optional[int] = None):
+    """The slowest single executions of the last `minutes` (QUERY_SLOW_WINDOW_MINUTES by default)"""
+    return {
+        "window_minutes": minutes or query_profiler.window_minutes,
+        "queries": query_profiler.slowest(limit, minutes)
+    }
+
+@router.delete("/queries/profile")
+def reset_query_profile():
+    """Start the per-statement profile and slow log over"""
+    query_profiler.reset()
+    return {"message": "Query profile reset"}
+
+@router.get("/pools")
+def get_pool_metrics():
+    """Per-pool size, busy sessions, acquire waits, hold times per route and read routing"""
+    return dict(db.metrics(), sizer=pool_sizer.metrics())
+
+@router.get("/transactions")
+def get_transaction_stats():
+    """Commits per request for each write route served by this worker"""
+    return {"routes": transaction_stats.stats()}
+
+@router.get("/rollups")
+def get_rollup_metrics():
+    """Hourly rollup watermark and refresh counters for this worker"""
+    return hourly_rollups.metrics()
+
+@router.post("/rollups/refresh")
+def refresh_rollups(
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Fold new records into the hourly rollups now"""
+    try:
+        result = hourly_rollups.refresh(connection)
+        if result is None:
+            raise HTTPException(status_code=409, detail="Rollup refresh already running")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/rollups/rebuild")
+def rebuild_rollups(
+    start: datetime,
+    end: datetime,
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Recompute the hourly buckets in [start, end) from the raw records"""
+    try:
+        return hourly_rollups.rebuild(connection, start, end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/reports")
+def get_report_metrics():
+    """Financial report watermark, refresh counters and the last backfill of this worker"""
+    return financial_reports.metrics()
+
+@router.post("/reports/refresh")
+def refresh_reports(
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Recompute the monthly reports dirtied since the watermark now"""
+    try:
+        result = financial_reports.refresh(connection)
+        if result is None:
+            raise HTTPException(status_code=409, detail="Report refresh already running")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/reports/backfill")
+def backfill_reports(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    workers: Optional[int] = None
+):
+    """Recompute the monthly reports from start's month to end's (default: all history), months in parallel"""
+    try:
+        if start and end and end < start:
+            raise ValueError("end must not be before start")
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        result = financial_reports.backfill(db.get_connection, start, end, workers)
+        if result is None:
+            raise HTTPException(status_code=409, detail="Report backfill already running")
+        return result
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/expiry")
+def get_expiry_metrics():
+    """In-memory subscription expiry schedule: size, load time and event counts"""
+    return expiry_scheduler.metrics()
+
+@router.post("/expiry/reload")
+def reload_expiry_schedule(
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Rebuild the expiry schedule from ParkingSubscription now"""
+    try:
+        expiry_scheduler.load(connection)
+        return expiry_scheduler.metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sessions")
+def get_open_session_metrics():
+    """Open stays held in memory, exit lookup hits and the database clock offset"""
+    return open_sessions.metrics()
+
+@router.post("/sessions/reload")
+def reload_open_sessions(
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Rebuild the open-session index from the session tables now"""
+    try:
+        open_sessions.load(connection)
+        return open_sessions.metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/archive")
+def get_archive_metrics():
+    """Archival cutoff, records moved per table and the last run of this worker"""
+    return record_archiver.metrics()
+
+@router.post("/archive/run")
+def run_archive(
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Move closed records past the cutoff to the archive tables now"""
+    try:
+        result = record_archiver.run(connection)
+        if result is None:
+            raise HTTPException(status_code=409, detail="Archival already running")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/imports")
+def get_import_metrics():
+    """Bulk import totals and the last import of this worker"""
+    return bulk_importer.metrics()
+
+@router.get("/spaces")
+def get_space_counter_metrics():
+    """Stripe lock waits and reconcile corrections for this worker"""
+    return space_counters.metrics()
+
+@router.post("/spaces/reconcile")
+def reconcile_space_counters(
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Reset every space's stripes to capacity minus its open visitor records now"""
+    try:
+        return space_counters.reconcile(connection)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
 import oracledb
 import sys
 import os
@@ -6,22 +9,47 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.connect import get_db_connection
+from db.connect import db, get_db_connection, get_async_db_connection
+from services.alerts import ALERT_PAGE_KEYS, alert_engine
+from services.dashboard_snapshot import dashboard_snapshot
+from services.live_feed import encode_event, live_feed
+from services.pagination import decode_cursor, next_cursor
+from services.row_stream import FORMAT_PATTERN, MEDIA_TYPES, start_stream
 import models
+import queries
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 @router.get("/stats")
-def get_dashboard_stats(
-    connection: oracledb.Connection = Depends(get_db_connection)
-):
-    """Get dashboard statistics"""
+def get_dashboard_stats():
+    """Get dashboard statistics (served from the in-memory snapshot)"""
     try:
-        stats = models.get_dashboard_stats(connection)
+        stats = dashboard_snapshot.read(db.get_connection)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/stats/metrics")
+def get_dashboard_stats_metrics():
+    """Get snapshot hit/miss counts and staleness"""
+    return dashboard_snapshot.metrics()
+
+@router.get("/stream")
+async def stream_dashboard():
+    """Server-Sent Events stream of occupancy and revenue deltas"""
+    stats = dashboard_snapshot.current()
+    if stats is None:
+        try:
+            stats = await run_in_threadpool(dashboard_snapshot.read, db.get_connection)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        live_feed.subscribe(encode_event("snapshot", {"stats": stats})),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/manager/{manager_id}")
 def get_manager_dashboard(
     manager_id: int,
@@ -30,18 +58,10 @@ def get_manager_dashboard(
     """Get manager-specific dashboard data"""
     try:
         # Get general stats
-        stats = models.get_dashboard_stats(connection)
+        stats = dashboard_snapshot.read(db.get_connection)
         
         # Get manager financial report for current month
-        query = """
-            SELECT manager_report_id, manager_id, month,
-                   total_subscription_made, total_money_made,
-                   monthly_subs, quaterly_subs, yearly_subs, salary
-            FROM ManagerFinancialReport
-            WHERE manager_id = :manager_id
-            AND TRUNC(month, 'MM') = TRUNC(SYSDATE, 'MM')
-        """
-        financial_report = models.execute_query(connection, query, {"manager_id": manager_id})
+        financial_report = models.execute_query(connection, queries.MANAGER_REPORT_CURRENT_MONTH, {"manager_id": manager_id})
         
         return {
             "stats": stats,
@@ -51,109 +71,72 @@ def get_manager_dashboard(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/occupancy")
-def get_occupancy_details(
-    connection: oracledb.Connection = Depends(get_db_connection)
+async def get_occupancy_details(
+    connection: oracledb.Connection = Depends(get_async_db_connection)
 ):
     """Get detailed occupancy analysis"""
     try:
-        query = """
-            SELECT
-                ps.space_type,
-                ps.space_id,
-                ps.spaces_available,
-                COUNT(pr.record_id) AS total_usage_today,
-                ROUND(AVG(
-                    EXTRACT(HOUR FROM (pr.departure_time - pr.arrival_time)) * 60 +
-                    EXTRACT(MINUTE FROM (pr.departure_time - pr.arrival_time))
-                ), 2) AS avg_duration_minutes
-            FROM ParkingSpace ps
-            LEFT JOIN ParkingRecord pr ON ps.space_id = pr.space_id
-                AND TRUNC(pr.arrival_time) = TRUNC(SYSDATE)
-            GROUP BY ps.space_type, ps.space_id, ps.spaces_available
-            ORDER BY ps.space_type, ps.space_id
-        """
-        occupancy = models.execute_query(connection, query)
+        occupancy = await models.execute_query_async(connection, queries.OCCUPANCY_DETAILS)
         return {"data": occupancy, "count": len(occupancy)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/alerts")
 def get_alerts(
-    connection: oracledb.Connection = Depends(get_db_connection)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_acknowledged: bool = True
 ):
-    """Get system alerts for violations and issues"""
+    """Get active alerts, newest first, from the in-memory alert engine"""
+    try:
+        after = decode_cursor(cursor, ALERT_PAGE_KEYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        query = """
-            SELECT
-                'EXPIRED_SUBSCRIPTION' AS alert_type,
-                r.name AS resident_name,
-                r.email,
-                v.license_plate,
-                ps.expiration_date,
-                'Subscription expired - parking access revoked' AS message
-            FROM ParkingSubscription ps
-            JOIN Resident r ON ps.resident_id = r.resident_id
-            JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
-            WHERE ps.expiration_date < SYSDATE
-            
-            UNION ALL
-            
-            SELECT
-                'OVERSTAY_VISITOR' AS alert_type,
-                'Visitor' AS resident_name,
-                NULL AS email,
-                vpr.license_plate,
-                vpr.arrival_time AS expiration_date,
-                'Visitor overstay - parked for > 24 hours' AS message
-            FROM VisitorParkingRecord vpr
-            WHERE vpr.departure_time IS NULL
-            AND vpr.arrival_time < SYSDATE - 1
-            
-            UNION ALL
-            
-            SELECT
-                'SPACE_CAPACITY_LOW' AS alert_type,
-                NULL AS resident_name,
-                NULL AS email,
-                NULL AS license_plate,
-                NULL AS expiration_date,
-                'Parking space ' || space_id || ' has only ' || spaces_available || ' spaces remaining' AS message
-            FROM ParkingSpace
-            WHERE spaces_available <= 5
-            AND space_type IN ('Car', 'Motorcycle')
-        """
-        alerts = models.execute_query(connection, query)
-        return {"data": alerts, "count": len(alerts)}
+        alert_engine.ensure_loaded(db.get_connection)
+        alerts = alert_engine.page(limit, after[0] if after else None, include_acknowledged)
+        return {
+            "data": alerts,
+            "count": len(alerts),
+            "active": len(alert_engine),
+            "next_cursor": next_cursor(alerts, limit, ALERT_PAGE_KEYS)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/alerts/metrics")
+def get_alert_metrics():
+    """Get active alert counts, pending timers and raise/clear totals"""
+    return alert_engine.metrics()
+
+@router.post("/alerts/{alert_id}/acknowledge")
+def acknowledge_alert(alert_id: int):
+    """Acknowledge an active alert; it stays listed until its condition clears"""
+    alert = alert_engine.acknowledge(alert_id)
+    if alert is None:
+        raise HTTPException(status_code=404, detail="Active alert not found")
+    return alert
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    fmt: str = Query("columnar", alias="format", pattern=FORMAT_PATTERN)
+):
+    """Every alert condition re-evaluated from the tables (unbounded), streamed
+    from the cursor as columnar JSON or NDJSON"""
+    try:
+        body = await run_in_threadpool(start_stream, db.get_read_connection, queries.ALERTS, None, fmt)
+        return StreamingResponse(body, media_type=MEDIA_TYPES[fmt])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/revenue")
-def get_revenue_details(
-    connection: oracledb.Connection = Depends(get_db_connection)
+async def get_revenue_details(
+    connection: oracledb.Connection = Depends(get_async_db_connection)
 ):
     """Get revenue breakdown"""
     try:
-        query = """
-            SELECT
-                'Today' as period,
-                COALESCE(SUM(parking_fee), 0) as visitor_revenue,
-                0 as subscription_revenue
-            FROM VisitorParkingRecord
-            WHERE TRUNC(departure_time) = TRUNC(SYSDATE)
-            
-            UNION ALL
-            
-            SELECT
-                'This Month' as period,
-                (SELECT COALESCE(SUM(parking_fee), 0)
-                 FROM VisitorParkingRecord
-                 WHERE TRUNC(departure_time, 'MM') = TRUNC(SYSDATE, 'MM')) as visitor_revenue,
-                (SELECT COALESCE(SUM(cost), 0)
-                 FROM ParkingSubscription
-                 WHERE TRUNC(start_date, 'MM') = TRUNC(SYSDATE, 'MM')) as subscription_revenue
-            FROM DUAL
-        """
-        revenue = models.execute_query(connection, query)
+        revenue = await models.execute_query_async(connection, queries.REVENUE_DETAILS)
         return {"data": revenue}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -162,22 +145,13 @@ def get_revenue_details(
 def get_supervisors_summary(
     connection: oracledb.Connection = Depends(get_db_connection)
 ):
-    """Get supervisors and their collection summary"""
+    """Get supervisors and this month's collections from their financial reports"""
     try:
         # Get all supervisors
         supervisors = models.get_supervisors(connection)
         
         # Get collection summary for each supervisor
-        query = """
-            SELECT 
-                supervisor_id,
-                COUNT(*) as total_shifts_this_month,
-                SUM(total_money_collected) as total_collected_this_month
-            FROM SupervisionShift
-            WHERE TRUNC(check_in_time, 'MM') = TRUNC(SYSDATE, 'MM')
-            GROUP BY supervisor_id
-        """
-        collections = models.execute_query(connection, query)
+        collections = models.execute_query(connection, queries.SUPERVISOR_COLLECTIONS_THIS_MONTH)
         
         # Merge data
         collections_dict = {c['supervisor_id']: c for c in collections}
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from datetime import datetime
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import db
+from services.bulk_export import DATASET_PATTERN, FORMAT_PATTERN, bulk_exporter
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+
+@router.post("/")
+def start_export(
+    start: datetime,
+    end: datetime,
+    dataset: str = Query(..., pattern=DATASET_PATTERN),
+    fmt: str = Query("csv", alias="format", pattern=FORMAT_PATTERN)
+):
+    """Export parking_records, visitor_records or shifts with their time in [start, end).
+
+    Runs in the background on a read connection; poll GET /api/exports/{export_id}
+    for progress and download the part files as they finish.
+    """
+    try:
+        job = bulk_exporter.begin(db.get_read_connection, dataset, fmt, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=409, detail="Too many exports running; try again later")
+    return job
+
+@router.get("/")
+def get_exports():
+    """Every export on this server, newest first"""
+    try:
+        return {"data": bulk_exporter.list_exports(), **bulk_exporter.metrics()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{export_id}")
+def get_export(export_id: str):
+    """Status, rows exported, share of the date range covered, rate and ETA"""
+    try:
+        return bulk_exporter.get(export_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Export not found")
+
+@router.post("/{export_id}/resume")
+def resume_export(export_id: str):
+    """Continue a failed, cancelled or interrupted export after its last finished part"""
+    try:
+        job = bulk_exporter.resume(db.get_read_connection, export_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Export not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=409, detail="Too many exports running; try again later")
+    return job
+
+@router.delete("/{export_id}")
+def cancel_export(export_id: str):
+    """Stop a running export; the parts written so far are kept and it can be resumed"""
+    try:
+        return bulk_exporter.cancel(export_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Export not found")
+
+@router.get("/{export_id}/files/{name}")
+def download_export_part(export_id: str, name: str):
+    """Download one finished part file"""
+    try:
+        path = bulk_exporter.file_path(export_id, name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Export part not found")
+    media_type = "application/gzip" if name.endswith(".gz") else "application/vnd.apache.parquet"
+    return FileResponse(path, media_type=media_type, filename=f"{export_id}-{name}")
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
 from pydantic import BaseModel
 import oracledb
 import sys
@@ -8,8 +8,12 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.connect import get_db_connection
+from db.connect import db, get_db_connection
+from services.bulk_import import FORMAT_PATTERN, bulk_importer
+from services.id_allocator import id_allocator
+from services.pagination import decode_cursor, next_cursor
 import models
+import queries
 
 router = APIRouter(prefix="/api/residents", tags=["residents"])
 
@@ -28,12 +32,22 @@ class ResidentUpdate(BaseModel):
 def get_residents(
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     connection: oracledb.Connection = Depends(get_db_connection)
 ):
-    """Get list of residents"""
+    """Get list of residents; pass next_cursor back as ?cursor= for the next page"""
     try:
-        residents = models.get_residents(connection, limit, offset)
-        return {"data": residents, "count": len(residents)}
+        after = decode_cursor(cursor, models.RESIDENT_PAGE_KEYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        residents = models.get_residents(connection, limit, offset, after)
+        return {
+            "data": residents,
+            "count": len(residents),
+            "next_cursor": next_cursor(residents, limit, models.RESIDENT_PAGE_KEYS)
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -44,14 +58,7 @@ def get_resident(
 ):
     """Get specific resident details"""
     try:
-        query = """
-            SELECT r.resident_id, r.apartment_id, r.name, r.phone_number, r.email,
-                   a.building_id, a.floor
-            FROM Resident r
-            JOIN Apartment a ON r.apartment_id = a.apartment_id
-            WHERE r.resident_id = :resident_id
-        """
-        result = models.execute_query(connection, query, {"resident_id": resident_id})
+        result = models.execute_query(connection, queries.RESIDENT_BY_ID, {"resident_id": resident_id})
         if not result:
             raise HTTPException(status_code=404, detail="Resident not found")
         return result[0]
@@ -68,16 +75,9 @@ def create_resident(
     """Create new resident"""
     try:
         # Get next resident ID
-        cursor = connection.cursor()
-        cursor.execute("SELECT NVL(MAX(resident_id), 0) + 1 FROM Resident")
-        new_id = cursor.fetchone()[0]
-        cursor.close()
+        new_id = id_allocator.next_id(connection, "Resident")
         
-        query = """
-            INSERT INTO Resident (resident_id, apartment_id, name, phone_number, email)
-            VALUES (:resident_id, :apartment_id, :name, :phone_number, :email)
-        """
-        models.execute_update(connection, query, {
+        models.execute_update(connection, queries.INSERT_RESIDENT, {
             "resident_id": new_id,
             "apartment_id": resident.apartment_id,
             "name": resident.name,
@@ -89,6 +89,28 @@ def create_resident(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/import")
+async def import_residents(
+    request: Request,
+    fmt: str = Query("csv", alias="format", pattern=FORMAT_PATTERN),
+    dry_run: bool = False
+):
+    """Bulk-create residents from a CSV (header row) or NDJSON request body.
+
+    Fields: apartment_id, name, phone_number, email. The body is read as
+    it streams; rows are validated and inserted IMPORT_CHUNK_SIZE at a
+    time, one commit per chunk. Rejected rows are listed by line number;
+    the others are kept. dry_run only validates.
+    """
+    try:
+        report = await bulk_importer.import_body(
+            request.stream(), db.get_threaded_connection, db.release_threaded_connection,
+            "residents", fmt, dry_run
+        )
+        return report.as_dict()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{resident_id}")
 def update_resident(
     resident_id: int,
@@ -97,24 +119,18 @@ def update_resident(
 ):
     """Update resident information"""
     try:
-        updates = []
-        params = {"resident_id": resident_id}
-        
-        if resident.name:
-            updates.append("name = :name")
-            params["name"] = resident.name
-        if resident.phone_number:
-            updates.append("phone_number = :phone_number")
-            params["phone_number"] = resident.phone_number
-        if resident.email:
-            updates.append("email = :email")
-            params["email"] = resident.email
+        params = {
+            "resident_id": resident_id,
+            "name": resident.name or None,
+            "phone_number": resident.phone_number or None,
+            "email": resident.email or None
+        }
         
-        if not updates:
+        if not any(params[field] for field in ("name", "phone_number", "email")):
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        query = f"UPDATE Resident SET {', '.join(updates)} WHERE resident_id = :resident_id"
-        rowcount = models.execute_update(connection, query, params)
+        # One shared statement; NULL binds keep the current column value
+        rowcount = models.execute_update(connection, queries.UPDATE_RESIDENT, params)
         
         if rowcount == 0:
             raise HTTPException(status_code=404, detail="Resident not found")
@@ -132,8 +148,7 @@ def delete_resident(
 ):
     """Delete resident"""
     try:
-        query = "DELETE FROM Resident WHERE resident_id = :resident_id"
-        rowcount = models.execute_update(connection, query, {"resident_id": resident_id})
+        rowcount = models.execute_update(connection, queries.DELETE_RESIDENT, {"resident_id": resident_id})
         
         if rowcount == 0:
             raise HTTPException(status_code=404, detail="Resident not found")
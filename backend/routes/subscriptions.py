@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from datetime import datetime
+from typing import Optional
+from datetime import timedelta
 import oracledb
 import sys
 import os
@@ -9,7 +10,13 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db.connect import get_db_connection
+from services.dates import subscription_months
+from services.expiry_scheduler import expiry_scheduler
+from services.id_allocator import id_allocator
+from services.pagination import decode_cursor, next_cursor
+from services.plate_index import plate_index
 import models
+import queries
 
 router = APIRouter(prefix="/api/subscriptions", tags=["subscriptions"])
 
@@ -27,12 +34,22 @@ class SubscriptionRenew(BaseModel):
 def get_subscriptions(
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     connection: oracledb.Connection = Depends(get_db_connection)
 ):
-    """Get list of parking subscriptions"""
+    """Get list of parking subscriptions; pass next_cursor back as ?cursor= for the next page"""
     try:
-        subscriptions = models.get_subscriptions(connection, limit, offset)
-        return {"data": subscriptions, "count": len(subscriptions)}
+        after = decode_cursor(cursor, models.SUBSCRIPTION_PAGE_KEYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        subscriptions = models.get_subscriptions(connection, limit, offset, after)
+        return {
+            "data": subscriptions,
+            "count": len(subscriptions),
+            "next_cursor": next_cursor(subscriptions, limit, models.SUBSCRIPTION_PAGE_KEYS)
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -43,7 +60,12 @@ def get_expiring_subscriptions(
 ):
     """Get subscriptions expiring within specified days"""
     try:
-        subscriptions = models.get_expiring_subscriptions(connection, days)
+        # Ids come from the in-memory schedule; scan only when it is not loaded
+        if expiry_scheduler.loaded:
+            ids = expiry_scheduler.expiring_ids(timedelta(days=days))
+            subscriptions = models.get_subscriptions_by_ids(connection, ids)
+        else:
+            subscriptions = models.get_expiring_subscriptions(connection, days)
         return {"data": subscriptions, "count": len(subscriptions)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -55,17 +77,7 @@ def get_subscription(
 ):
     """Get specific subscription details"""
     try:
-        query = """
-            SELECT ps.subscription_id, ps.vehicle_id, ps.resident_id,
-                   ps.is_monthly, ps.is_quarterly, ps.is_yearly,
-                   ps.start_date, ps.expiration_date, ps.cost,
-                   v.license_plate, r.name as resident_name
-            FROM ParkingSubscription ps
-            JOIN Vehicle v ON ps.vehicle_id = v.vehicle_id
-            JOIN Resident r ON ps.resident_id = r.resident_id
-            WHERE ps.subscription_id = :subscription_id
-        """
-        result = models.execute_query(connection, query, {"subscription_id": subscription_id})
+        result = models.execute_query(connection, queries.SUBSCRIPTION_BY_ID, {"subscription_id": subscription_id})
         if not result:
             raise HTTPException(status_code=404, detail="Subscription not found")
         return result[0]
@@ -82,46 +94,31 @@ def create_subscription(
     """Create new parking subscription"""
     try:
         # Get next subscription ID
-        cursor = connection.cursor()
-        cursor.execute("SELECT NVL(MAX(subscription_id), 0) + 1 FROM ParkingSubscription")
-        new_id = cursor.fetchone()[0]
-        cursor.close()
+        new_id = id_allocator.next_id(connection, "ParkingSubscription")
         
         # Determine subscription flags
         is_monthly = 1 if subscription.subscription_type == 'monthly' else 0
         is_quarterly = 1 if subscription.subscription_type == 'quarterly' else 0
         is_yearly = 1 if subscription.subscription_type == 'yearly' else 0
         
-        # Calculate expiration date
-        if subscription.subscription_type == 'monthly':
-            expiration_clause = "ADD_MONTHS(SYSDATE, 1)"
-        elif subscription.subscription_type == 'quarterly':
-            expiration_clause = "ADD_MONTHS(SYSDATE, 3)"
-        else:  # yearly
-            expiration_clause = "ADD_MONTHS(SYSDATE, 12)"
-        
-        query = f"""
-            INSERT INTO ParkingSubscription (
-                subscription_id, vehicle_id, resident_id,
-                is_monthly, is_quarterly, is_yearly,
-                start_date, expiration_date, cost
-            )
-            VALUES (
-                :subscription_id, :vehicle_id, :resident_id,
-                :is_monthly, :is_quarterly, :is_yearly,
-                SYSDATE, {expiration_clause}, :cost
-            )
-        """
+        # Expiration is ADD_MONTHS(SYSDATE, :months)
+        months = subscription_months(subscription.subscription_type)
         
-        models.execute_update(connection, query, {
+        # The database computes the window; RETURNING hands it back for the
+        # in-memory indexes without a second read
+        window = models.execute_returning(connection, queries.INSERT_SUBSCRIPTION, {
             "subscription_id": new_id,
             "vehicle_id": subscription.vehicle_id,
             "resident_id": subscription.resident_id,
             "is_monthly": is_monthly,
             "is_quarterly": is_quarterly,
             "is_yearly": is_yearly,
+            "months": months,
             "cost": subscription.cost
-        })
+        }, start_date_out=oracledb.DB_TYPE_DATE, expiration_date_out=oracledb.DB_TYPE_DATE)
+        start, end = window["start_date_out"], window["expiration_date_out"]
+        plate_index.add_subscription(subscription.vehicle_id, new_id, start, end)
+        expiry_scheduler.add(new_id, subscription.vehicle_id, start, end)
         
         return {"message": "Subscription created successfully", "subscription_id": new_id}
     except Exception as e:
@@ -136,18 +133,7 @@ def renew_subscription(
     """Renew parking subscription"""
     try:
         # Get current subscription details
-        query = """
-            SELECT expiration_date,
-                   CASE
-                       WHEN is_monthly = 1 THEN 'monthly'
-                       WHEN is_quarterly = 1 THEN 'quarterly'
-                       WHEN is_yearly = 1 THEN 'yearly'
-                   END as subscription_type,
-                   cost, vehicle_id, resident_id
-            FROM ParkingSubscription
-            WHERE subscription_id = :subscription_id
-        """
-        result = models.execute_query(connection, query, {"subscription_id": subscription_id})
+        result = models.execute_query(connection, queries.SUBSCRIPTION_FOR_RENEWAL, {"subscription_id": subscription_id})
         
         if not result:
             raise HTTPException(status_code=404, detail="Subscription not found")
@@ -156,10 +142,7 @@ def renew_subscription(
         sub_type = renewal.new_subscription_type if renewal.renewal_type == 'CHANGE' and renewal.new_subscription_type else current_sub['subscription_type']
         
         # Get next subscription ID
-        cursor = connection.cursor()
-        cursor.execute("SELECT NVL(MAX(subscription_id), 0) + 1 FROM ParkingSubscription")
-        new_id = cursor.fetchone()[0]
-        cursor.close()
+        new_id = id_allocator.next_id(connection, "ParkingSubscription")
         
         # Determine subscription flags
         is_monthly = 1 if sub_type == 'monthly' else 0
@@ -167,27 +150,9 @@ def renew_subscription(
         is_yearly = 1 if sub_type == 'yearly' else 0
         
         # Calculate new dates
-        if sub_type == 'monthly':
-            months = 1
-        elif sub_type == 'quarterly':
-            months = 3
-        else:  # yearly
-            months = 12
-        
-        query = f"""
-            INSERT INTO ParkingSubscription (
-                subscription_id, vehicle_id, resident_id,
-                is_monthly, is_quarterly, is_yearly,
-                start_date, expiration_date, cost
-            )
-            VALUES (
-                :subscription_id, :vehicle_id, :resident_id,
-                :is_monthly, :is_quarterly, :is_yearly,
-                :start_date + 1, ADD_MONTHS(:start_date + 1, :months), :cost
-            )
-        """
+        months = subscription_months(sub_type)
         
-        models.execute_update(connection, query, {
+        window = models.execute_returning(connection, queries.INSERT_RENEWAL, {
             "subscription_id": new_id,
             "vehicle_id": current_sub['vehicle_id'],
             "resident_id": current_sub['resident_id'],
@@ -197,7 +162,10 @@ def renew_subscription(
             "start_date": current_sub['expiration_date'],
             "months": months,
             "cost": current_sub['cost']
-        })
+        }, start_date_out=oracledb.DB_TYPE_DATE, expiration_date_out=oracledb.DB_TYPE_DATE)
+        start, end = window["start_date_out"], window["expiration_date_out"]
+        plate_index.add_subscription(current_sub['vehicle_id'], new_id, start, end)
+        expiry_scheduler.add(new_id, current_sub['vehicle_id'], start, end)
         
         return {"message": "Subscription renewed successfully", "new_subscription_id": new_id}
     except HTTPException:
@@ -212,12 +180,14 @@ def delete_subscription(
 ):
     """Delete subscription"""
     try:
-        query = "DELETE FROM ParkingSubscription WHERE subscription_id = :subscription_id"
-        rowcount = models.execute_update(connection, query, {"subscription_id": subscription_id})
+        rowcount = models.execute_update(connection, queries.DELETE_SUBSCRIPTION, {"subscription_id": subscription_id})
         
         if rowcount == 0:
             raise HTTPException(status_code=404, detail="Subscription not found")
         
+        plate_index.remove_subscription(subscription_id)
+        expiry_scheduler.remove(subscription_id)
+        
         return {"message": "Subscription deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from typing import Optional
 import oracledb
 import sys
 import os
@@ -8,7 +9,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db.connect import get_db_connection
+from services.id_allocator import id_allocator
 import models
+import queries
 
 router = APIRouter(prefix="/api/supervisors", tags=["supervisors"])
 
@@ -16,6 +19,7 @@ class SupervisorCreate(BaseModel):
     name: str
     phone_number: str
     email: str
+    manager_id: Optional[int] = None
 
 class ShiftCheckIn(BaseModel):
     supervisor_id: int
@@ -39,12 +43,7 @@ def get_supervisor(
 ):
     """Get specific supervisor details"""
     try:
-        query = """
-            SELECT supervisor_id, name, phone_number, email
-            FROM Supervisor
-            WHERE supervisor_id = :supervisor_id
-        """
-        result = models.execute_query(connection, query, {"supervisor_id": supervisor_id})
+        result = models.execute_query(connection, queries.SUPERVISOR_BY_ID, {"supervisor_id": supervisor_id})
         if not result:
             raise HTTPException(status_code=404, detail="Supervisor not found")
         return result[0]
@@ -61,20 +60,14 @@ def create_supervisor(
     """Create new supervisor"""
     try:
         # Get next supervisor ID
-        cursor = connection.cursor()
-        cursor.execute("SELECT NVL(MAX(supervisor_id), 0) + 1 FROM Supervisor")
-        new_id = cursor.fetchone()[0]
-        cursor.close()
+        new_id = id_allocator.next_id(connection, "Supervisor")
         
-        query = """
-            INSERT INTO Supervisor (supervisor_id, name, phone_number, email)
-            VALUES (:supervisor_id, :name, :phone_number, :email)
-        """
-        models.execute_update(connection, query, {
+        models.execute_update(connection, queries.INSERT_SUPERVISOR, {
             "supervisor_id": new_id,
             "name": supervisor.name,
             "phone_number": supervisor.phone_number,
-            "email": supervisor.email
+            "email": supervisor.email,
+            "manager_id": supervisor.manager_id
         })
         
         return {"message": "Supervisor created successfully", "supervisor_id": new_id}
@@ -112,23 +105,9 @@ def shift_check_in(
     """Supervisor check-in to start shift"""
     try:
         # Get next shift ID
-        cursor = connection.cursor()
-        cursor.execute("SELECT NVL(MAX(shift_id), 0) + 1 FROM SupervisionShift")
-        new_id = cursor.fetchone()[0]
-        cursor.close()
+        new_id = id_allocator.next_id(connection, "SupervisionShift")
         
-        query = """
-            INSERT INTO SupervisionShift (
-                shift_id, space_id, supervisor_id, day,
-                check_in_time, check_out_time, total_money_collected
-            )
-            VALUES (
-                :shift_id, :space_id, :supervisor_id,
-                TO_CHAR(SYSDATE, 'Day'),
-                SYSTIMESTAMP, NULL, 0
-            )
-        """
-        models.execute_update(connection, query, {
+        models.execute_update(connection, queries.INSERT_SHIFT, {
             "shift_id": new_id,
             "space_id": shift.space_id,
             "supervisor_id": shift.supervisor_id
@@ -145,13 +124,7 @@ def shift_check_out(
 ):
     """Supervisor check-out to end shift"""
     try:
-        query = """
-            UPDATE SupervisionShift
-            SET check_out_time = SYSTIMESTAMP
-            WHERE shift_id = :shift_id
-            AND check_out_time IS NULL
-        """
-        rowcount = models.execute_update(connection, query, {"shift_id": shift_id})
+        rowcount = models.execute_update(connection, queries.CHECK_OUT_SHIFT, {"shift_id": shift_id})
         
         if rowcount == 0:
             raise HTTPException(status_code=404, detail="Active shift not found")
@@ -169,14 +142,7 @@ def get_supervisor_financial_report(
 ):
     """Get financial report for a supervisor"""
     try:
-        query = """
-            SELECT supervisor_report_id, supervisor_id, manager_id, month,
-                   total_shifts_made, total_money_made, salary
-            FROM SupervisorFinancialReport
-            WHERE supervisor_id = :supervisor_id
-            ORDER BY month DESC
-        """
-        reports = models.execute_query(connection, query, {"supervisor_id": supervisor_id})
+        reports = models.execute_query(connection, queries.SUPERVISOR_REPORTS, {"supervisor_id": supervisor_id})
         return {"data": reports, "count": len(reports)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -187,16 +153,7 @@ def get_all_supervisor_reports_current_month(
 ):
     """Get financial reports for all supervisors for current month"""
     try:
-        query = """
-            SELECT sfr.supervisor_report_id, sfr.supervisor_id, sfr.manager_id, sfr.month,
-                   sfr.total_shifts_made, sfr.total_money_made, sfr.salary,
-                   s.name as supervisor_name
-            FROM SupervisorFinancialReport sfr
-            JOIN Supervisor s ON sfr.supervisor_id = s.supervisor_id
-            WHERE TRUNC(sfr.month, 'MM') = TRUNC(SYSDATE, 'MM')
-            ORDER BY sfr.total_money_made DESC
-        """
-        reports = models.execute_query(connection, query)
+        reports = models.execute_query(connection, queries.SUPERVISOR_REPORTS_CURRENT_MONTH)
         return {"data": reports, "count": len(reports)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
+from typing import Optional
 import oracledb
 import sys
 import os
@@ -7,8 +8,13 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.connect import get_db_connection
+from db.connect import db, get_db_connection
+from services.bulk_import import FORMAT_PATTERN, bulk_importer
+from services.id_allocator import id_allocator
+from services.pagination import decode_cursor, next_cursor
+from services.plate_index import plate_index
 import models
+import queries
 
 router = APIRouter(prefix="/api/vehicles", tags=["vehicles"])
 
@@ -25,12 +31,22 @@ class VehicleUpdate(BaseModel):
 def get_vehicles(
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     connection: oracledb.Connection = Depends(get_db_connection)
 ):
-    """Get list of vehicles"""
+    """Get list of vehicles; pass next_cursor back as ?cursor= for the next page"""
     try:
-        vehicles = models.get_all_vehicles(connection, limit, offset)
-        return {"data": vehicles, "count": len(vehicles)}
+        after = decode_cursor(cursor, models.VEHICLE_PAGE_KEYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        vehicles = models.get_all_vehicles(connection, limit, offset, after)
+        return {
+            "data": vehicles,
+            "count": len(vehicles),
+            "next_cursor": next_cursor(vehicles, limit, models.VEHICLE_PAGE_KEYS)
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -53,14 +69,7 @@ def get_vehicle(
 ):
     """Get specific vehicle details"""
     try:
-        query = """
-            SELECT v.vehicle_id, v.resident_id, v.license_plate, v.vehicle_type,
-                   r.name as resident_name
-            FROM Vehicle v
-            JOIN Resident r ON v.resident_id = r.resident_id
-            WHERE v.vehicle_id = :vehicle_id
-        """
-        result = models.execute_query(connection, query, {"vehicle_id": vehicle_id})
+        result = models.execute_query(connection, queries.VEHICLE_BY_ID, {"vehicle_id": vehicle_id})
         if not result:
             raise HTTPException(status_code=404, detail="Vehicle not found")
         return result[0]
@@ -77,26 +86,41 @@ def create_vehicle(
     """Register new vehicle"""
     try:
         # Get next vehicle ID
-        cursor = connection.cursor()
-        cursor.execute("SELECT NVL(MAX(vehicle_id), 0) + 1 FROM Vehicle")
-        new_id = cursor.fetchone()[0]
-        cursor.close()
+        new_id = id_allocator.next_id(connection, "Vehicle")
         
-        query = """
-            INSERT INTO Vehicle (vehicle_id, resident_id, license_plate, vehicle_type)
-            VALUES (:vehicle_id, :resident_id, :license_plate, :vehicle_type)
-        """
-        models.execute_update(connection, query, {
+        models.execute_update(connection, queries.INSERT_VEHICLE, {
             "vehicle_id": new_id,
             "resident_id": vehicle.resident_id,
             "license_plate": vehicle.license_plate,
             "vehicle_type": vehicle.vehicle_type
         })
+        plate_index.refresh_vehicle(connection, new_id)
         
         return {"message": "Vehicle registered successfully", "vehicle_id": new_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/import")
+async def import_vehicles(
+    request: Request,
+    fmt: str = Query("csv", alias="format", pattern=FORMAT_PATTERN),
+    dry_run: bool = False
+):
+    """Bulk-register vehicles from a CSV (header row) or NDJSON request body.
+
+    Fields: resident_id or resident_email, license_plate, vehicle_type.
+    Plates already registered (or repeated in the file) are rejected; see
+    POST /api/residents/import for chunking, errors and dry_run.
+    """
+    try:
+        report = await bulk_importer.import_body(
+            request.stream(), db.get_threaded_connection, db.release_threaded_connection,
+            "vehicles", fmt, dry_run
+        )
+        return report.as_dict()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{vehicle_id}")
 def update_vehicle(
     vehicle_id: int,
@@ -105,25 +129,24 @@ def update_vehicle(
 ):
     """Update vehicle information"""
     try:
-        updates = []
-        params = {"vehicle_id": vehicle_id}
+        params = {
+            "vehicle_id": vehicle_id,
+            "license_plate": vehicle.license_plate or None,
+            "vehicle_type": vehicle.vehicle_type or None
+        }
         
-        if vehicle.license_plate:
-            updates.append("license_plate = :license_plate")
-            params["license_plate"] = vehicle.license_plate
-        if vehicle.vehicle_type:
-            updates.append("vehicle_type = :vehicle_type")
-            params["vehicle_type"] = vehicle.vehicle_type
-        
-        if not updates:
+        if not (params["license_plate"] or params["vehicle_type"]):
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        query = f"UPDATE Vehicle SET {', '.join(updates)} WHERE vehicle_id = :vehicle_id"
-        rowcount = models.execute_update(connection, query, params)
+        # One shared statement; NULL binds keep the current column value
+        rowcount = models.execute_update(connection, queries.UPDATE_VEHICLE, params)
         
         if rowcount == 0:
             raise HTTPException(status_code=404, detail="Vehicle not found")
         
+        if vehicle.license_plate:
+            plate_index.refresh_vehicle(connection, vehicle_id)
+        
         return {"message": "Vehicle updated successfully"}
     except HTTPException:
         raise
@@ -137,24 +160,28 @@ def delete_vehicle(
 ):
     """Delete vehicle"""
     try:
-        query = "DELETE FROM Vehicle WHERE vehicle_id = :vehicle_id"
-        rowcount = models.execute_update(connection, query, {"vehicle_id": vehicle_id})
+        rowcount = models.execute_update(connection, queries.DELETE_VEHICLE, {"vehicle_id": vehicle_id})
         
         if rowcount == 0:
             raise HTTPException(status_code=404, detail="Vehicle not found")
         
+        plate_index.remove_vehicle(vehicle_id)
+        
         return {"message": "Vehicle deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/validate-entry")
-def validate_entry(
-    license_plate: str,
-    connection: oracledb.Connection = Depends(get_db_connection)
-):
+def validate_entry(license_plate: str):
     """Validate vehicle entry with license plate (ALPR simulation)"""
     try:
-        result = models.validate_resident_entry(connection, license_plate)
-        return result
+        # Served from memory; only touch the pool when the index is not loaded
+        if plate_index.loaded:
+            return plate_index.validate(license_plate)
+        connection = db.get_connection()
+        try:
+            return models.validate_resident_entry(connection, license_plate)
+        finally:
+            connection.close()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
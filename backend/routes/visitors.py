@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
+from datetime import datetime, timedelta
+from typing import List, Optional
 import oracledb
 import sys
 import os
@@ -8,108 +10,192 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.connect import get_db_connection
+from db.connect import db, get_db_connection, get_async_db_connection
+from services.alerts import alert_engine
+from services.dashboard_snapshot import dashboard_snapshot
+from services.id_allocator import id_allocator
+from services.open_sessions import open_sessions
+from services.pagination import decode_cursor, next_cursor
+from services.rollups import hourly_rollups
+from services.space_allocator import space_allocator
+from services.space_counters import space_counters
+from services.row_stream import FORMAT_PATTERN, MEDIA_TYPES, start_stream
+from services.tariff import visitor_tariff
 import models
+import queries
 
 router = APIRouter(prefix="/api/visitors", tags=["visitors"])
 
 class VisitorEntry(BaseModel):
     license_plate: str
-    space_id: int
+    space_id: Optional[int] = None  # a specific space; otherwise one is assigned
+    space_type: Optional[str] = None  # defaults to VISITOR_SPACE_TYPES in order
 
 class VisitorExit(BaseModel):
     license_plate: str
 
+def _local_time(value: Optional[datetime]) -> Optional[datetime]:
+    # Gate clocks may send an offset or Z; the record columns hold naive
+    # local time, as SYSTIMESTAMP does, so convert before anything compares
+    # or binds it
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+class VisitorEntryEvent(VisitorEntry):
+    space_id: int  # where the car parked
+    arrival_time: Optional[datetime] = None  # gate timestamp; defaults to SYSTIMESTAMP
+
+    @field_validator("arrival_time")
+    @classmethod
+    def arrival_local(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return _local_time(value)
+
+class VisitorExitEvent(VisitorExit):
+    departure_time: Optional[datetime] = None  # gate timestamp; defaults to SYSTIMESTAMP
+
+    @field_validator("departure_time")
+    @classmethod
+    def departure_local(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return _local_time(value)
+
+class VisitorEntryBatch(BaseModel):
+    events: List[VisitorEntryEvent]
+
+class VisitorExitBatch(BaseModel):
+    events: List[VisitorExitEvent]
+
+MAX_BATCH_SIZE = 1000
+
 @router.get("/")
 def get_visitors(
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     connection: oracledb.Connection = Depends(get_db_connection)
 ):
-    """Get visitor parking records"""
+    """Get visitor parking records; pass next_cursor back as ?cursor= for the next page"""
     try:
-        visitors = models.get_visitors(connection, limit, offset)
-        return {"data": visitors, "count": len(visitors)}
+        after = decode_cursor(cursor, models.VISITOR_PAGE_KEYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        visitors = models.get_visitors(connection, limit, offset, after)
+        return {
+            "data": visitors,
+            "count": len(visitors),
+            "next_cursor": next_cursor(visitors, limit, models.VISITOR_PAGE_KEYS)
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/active")
-def get_active_visitors(
-    connection: oracledb.Connection = Depends(get_db_connection)
+@router.get("/stream")
+def stream_visitors(
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fmt: str = Query("columnar", alias="format", pattern=FORMAT_PATTERN),
+    arraysize: int = Query(1000, ge=1, le=10000)
 ):
-    """Get currently parked visitors"""
+    """Visitor records streamed from the cursor as columnar JSON or NDJSON.
+
+    Same paging as GET /; rows are arrays in `columns` order. Meant for
+    large pages (limit in the thousands) that the dict path would buffer.
+    """
+    try:
+        after = decode_cursor(cursor, models.VISITOR_PAGE_KEYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        query = """
-            SELECT record_id, space_id, license_plate, arrival_time, parking_fee
-            FROM VisitorParkingRecord
-            WHERE departure_time IS NULL
-            ORDER BY arrival_time DESC
-        """
-        visitors = models.execute_query(connection, query)
+        query, params = models.visitors_page_query(limit, offset, after)
+        body = start_stream(db.get_read_connection, query, params, fmt, arraysize,
+                            page_keys=models.VISITOR_PAGE_KEYS, limit=limit)
+        return StreamingResponse(body, media_type=MEDIA_TYPES[fmt])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/active")
+def get_active_visitors(space_id: Optional[int] = None):
+    """Get currently parked visitors, newest first, optionally in one space"""
+    try:
+        # Served from memory; only touch the pool when the index is not loaded
+        if open_sessions.loaded:
+            visitors = open_sessions.visitors(space_id)
+        else:
+            connection = db.get_read_connection()
+            try:
+                visitors = models.execute_query(connection, queries.ACTIVE_VISITORS)
+            finally:
+                connection.close()
+            if space_id is not None:
+                visitors = [v for v in visitors if v["space_id"] == space_id]
         return {"data": visitors, "count": len(visitors)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stats")
-def get_visitor_stats(
-    connection: oracledb.Connection = Depends(get_db_connection)
+async def get_visitor_stats(
+    connection: oracledb.Connection = Depends(get_async_db_connection)
 ):
     """Get visitor parking statistics"""
     try:
-        query = """
-            SELECT 
-                COUNT(*) as total_visitors_today,
-                COUNT(CASE WHEN departure_time IS NULL THEN 1 END) as currently_parked,
-                COALESCE(SUM(parking_fee), 0) as total_revenue_today
-            FROM VisitorParkingRecord
-            WHERE TRUNC(arrival_time) = TRUNC(SYSDATE)
-        """
-        result = models.execute_query(connection, query)
+        result = await models.execute_query_async(connection, queries.VISITOR_STATS_TODAY)
         return result[0] if result else {}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/spaces")
+def get_free_spaces():
+    """Free visitor capacity per space_type from the space allocator"""
+    return space_allocator.metrics()
+
 @router.post("/entry")
 def visitor_entry(
     visitor: VisitorEntry,
     connection: oracledb.Connection = Depends(get_db_connection)
 ):
-    """Record visitor entry"""
+    """Record visitor entry, assigning a free space unless one is given"""
     try:
         # Get next record ID
-        cursor = connection.cursor()
-        cursor.execute("SELECT NVL(MAX(record_id), 0) + 1 FROM VisitorParkingRecord")
-        new_id = cursor.fetchone()[0]
-        cursor.close()
+        new_id = id_allocator.next_id(connection, "VisitorParkingRecord")
         
-        # Insert visitor record
-        query = """
-            INSERT INTO VisitorParkingRecord (
-                record_id, space_id, license_plate, arrival_time, departure_time, parking_fee
-            )
-            VALUES (
-                :record_id, :space_id, :license_plate, SYSTIMESTAMP, NULL, 0
-            )
-        """
-        models.execute_update(connection, query, {
-            "record_id": new_id,
-            "space_id": visitor.space_id,
-            "license_plate": visitor.license_plate
-        })
+        # Claim the space and insert the record in one transaction
+        space_id = None
+        try:
+            with models.UnitOfWork(connection) as uow:
+                space_id = space_allocator.allocate(connection, visitor.space_type, visitor.space_id)
+                if space_id is None:
+                    raise HTTPException(status_code=409, detail="No free parking space")
+                inserted = uow.returning(queries.INSERT_VISITOR, {
+                    "record_id": new_id,
+                    "space_id": space_id,
+                    "license_plate": visitor.license_plate
+                }, arrival_time_out=oracledb.DB_TYPE_TIMESTAMP)
+        except Exception:
+            if space_id is not None:
+                space_allocator.release(space_id)
+            raise
         
-        # Update space availability
-        update_query = """
-            UPDATE ParkingSpace
-            SET spaces_available = spaces_available - 1
-            WHERE space_id = :space_id AND space_type = 'Visitor'
-        """
-        models.execute_update(connection, update_query, {"space_id": visitor.space_id})
+        dashboard_snapshot.visitor_entered(
+            space_id=space_id,
+            license_plate=visitor.license_plate
+        )
+        open_sessions.entered(new_id, space_id, visitor.license_plate, inserted["arrival_time_out"])
+        alert_engine.visitor_arrived(new_id, visitor.license_plate, inserted["arrival_time_out"])
+        alert_engine.space_changed(space_id, -1)
         
         return {
             "message": "Visitor entry recorded successfully",
             "record_id": new_id,
+            "space_id": space_id,
             "license_plate": visitor.license_plate
         }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -120,84 +206,45 @@ def visitor_exit(
 ):
     """Record visitor exit and calculate parking fee"""
     try:
-        cursor = connection.cursor()
+        closed = 0
+        stale = []
+        # One transaction whichever lookup finds the stay: a stale index
+        # entry's guarded UPDATE changes nothing and the DB lookup follows
+        with models.UnitOfWork(connection) as uow:
+            for record in _open_visitor_records(connection, visitor.license_plate):
+                record_id = record['record_id']
+                space_id = record['space_id']
+                parking_fee = visitor_tariff.price(record['arrival_time'], record['departure_time'])
+                
+                # Close the record; the guard makes a concurrent exit a no-op
+                closed = uow.execute(queries.CLOSE_VISITOR, {
+                    "departure_time": record['departure_time'],
+                    "parking_fee": parking_fee,
+                    "record_id": record_id
+                })
+                if closed:
+                    # Free up space on whichever stripe no other gate holds
+                    space_freed = int(space_counters.give(connection, space_id))
+                    break
+                # Closed by another worker since this one indexed it
+                stale.append(record_id)
         
-        # Get arrival time and space_id
-        query = """
-            SELECT record_id, arrival_time, space_id
-            FROM VisitorParkingRecord
-            WHERE license_plate = :license_plate
-            AND departure_time IS NULL
-        """
-        result = models.execute_query(connection, query, {"license_plate": visitor.license_plate})
-        
-        if not result:
+        for stale_id in stale:
+            open_sessions.exited(stale_id)
+        if not closed:
             raise HTTPException(status_code=404, detail="Active visitor record not found")
         
-        record = result[0]
-        record_id = record['record_id']
-        arrival_time = record['arrival_time']
-        space_id = record['space_id']
-        
-        # Calculate duration and fee using PL/SQL block
-        pl_sql = """
-        DECLARE
-            v_arrival_time TIMESTAMP;
-            v_departure_time TIMESTAMP;
-            v_duration_hours NUMBER;
-            v_parking_fee NUMBER;
-            v_hourly_rate NUMBER;
-        BEGIN
-            SELECT arrival_time INTO v_arrival_time
-            FROM VisitorParkingRecord
-            WHERE record_id = :record_id;
-            
-            v_departure_time := SYSTIMESTAMP;
-            
-            -- Calculate duration in hours (round up)
-            v_duration_hours := CEIL(
-                EXTRACT(DAY FROM (v_departure_time - v_arrival_time)) * 24 +
-                EXTRACT(HOUR FROM (v_departure_time - v_arrival_time)) +
-                EXTRACT(MINUTE FROM (v_departure_time - v_arrival_time)) / 60
-            );
-            
-            -- Apply day/night tariff
-            -- Day rate (6:00-18:00): 15,000 VND/hour
-            -- Night rate (18:00-6:00): 10,000 VND/hour
-            IF EXTRACT(HOUR FROM v_departure_time) BETWEEN 6 AND 17 THEN
-                v_hourly_rate := 15000;
-            ELSE
-                v_hourly_rate := 10000;
-            END IF;
-            
-            v_parking_fee := v_duration_hours * v_hourly_rate;
-            
-            -- Update visitor record
-            UPDATE VisitorParkingRecord
-            SET departure_time = v_departure_time,
-                parking_fee = v_parking_fee
-            WHERE record_id = :record_id;
-            
-            -- Free up space
-            UPDATE ParkingSpace
-            SET spaces_available = spaces_available + 1
-            WHERE space_id = :space_id;
-            
-            :fee := v_parking_fee;
-            
-            COMMIT;
-        END;
-        """
-        
-        fee_var = cursor.var(int)
-        cursor.execute(pl_sql, {
-            "record_id": record_id,
-            "space_id": space_id,
-            "fee": fee_var
-        })
-        
-        parking_fee = fee_var.getvalue()
-        cursor.close()
+        open_sessions.exited(record_id)
+        dashboard_snapshot.visitor_exited(
+            parking_fee,
+            spaces_freed=space_freed,
+            space_id=space_id,
+            license_plate=visitor.license_plate
+        )
+        alert_engine.visitor_departed(record_id)
+        if space_freed:
+            space_allocator.release(space_id)
+            alert_engine.space_changed(space_id, space_freed)
         
         return {
             "message": "Visitor exit recorded successfully",
@@ -210,20 +257,160 @@ def visitor_exit(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _open_visitor_records(connection, license_plate: str):
+    """The plate's oldest open stay: from the open-session index, then from
+    OpenVisitorSession if the index misses or its stay turns out closed.
+    Departure is the database clock either way."""
+    session = open_sessions.find(license_plate)
+    if session is not None:
+        yield {
+            "record_id": session.record_id,
+            "space_id": session.space_id,
+            "arrival_time": session.arrival_time,
+            "departure_time": max(open_sessions.now(), session.arrival_time)
+        }
+    result = models.execute_query(connection, queries.OPEN_VISITOR_BY_PLATE, {"license_plate": license_plate})
+    if result and (session is None or result[0]['record_id'] != session.record_id):
+        yield result[0]
+
+def _check_batch_size(events: list):
+    if not events:
+        raise HTTPException(status_code=400, detail="No events in batch")
+    if len(events) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_SIZE} events")
+
+def _batch_response(results: List[dict]) -> dict:
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+def _repair_rollups(connection, departure_times: List[datetime]):
+    # Buffered exits can land behind the rollup watermark; re-sum their hours
+    if not departure_times:
+        return
+    earliest = min(departure_times)
+    now = datetime.now()
+    if earliest < now - timedelta(seconds=hourly_rollups.lag_seconds):
+        try:
+            hourly_rollups.rebuild(connection, earliest, now)
+        except Exception as e:
+            print(f"⚠️ Rollup rebuild after batch exit failed: {e}")
+
+@router.post("/entries:batch")
+def visitor_entries_batch(
+    batch: VisitorEntryBatch,
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Record many buffered visitor entries in one transaction"""
+    _check_batch_size(batch.events)
+    try:
+        # Entries into spaces visitors may not use are refused before any write
+        space_allocator.ensure_loaded(connection)
+        results = []
+        accepted = []
+        for i, event in enumerate(batch.events):
+            try:
+                space_allocator.check_visitor_space(event.space_id, event.space_type)
+                accepted.append(i)
+            except ValueError as e:
+                results.append({"index": i, "license_plate": event.license_plate, "record_id": None,
+                                "status": "error", "detail": str(e)})
+        
+        if accepted:
+            record_ids = id_allocator.next_ids(connection, "VisitorParkingRecord", len(accepted))
+            recorded = models.record_visitor_entries(
+                connection, [batch.events[i].model_dump() for i in accepted], record_ids
+            )
+            for r in recorded:
+                r["index"] = accepted[r["index"]]
+            results = sorted(results + recorded, key=lambda r: r["index"])
+        
+        entered = [r for r in results if r["status"] == "ok"]
+        if entered:
+            dashboard_snapshot.visitor_entered(spaces_taken=len(entered), count=len(entered))
+        for event, r in zip(batch.events, results):
+            if r["status"] == "ok":
+                open_sessions.entered(r["record_id"], event.space_id, event.license_plate, event.arrival_time)
+                alert_engine.visitor_arrived(r["record_id"], event.license_plate, event.arrival_time)
+                space_allocator.taken(event.space_id)
+                alert_engine.space_changed(event.space_id, -1)
+        
+        return _batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/exits:batch")
+def visitor_exits_batch(
+    batch: VisitorExitBatch,
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Record many buffered visitor exits and price them in one transaction"""
+    _check_batch_size(batch.events)
+    try:
+        results = models.record_visitor_exits(
+            connection, [event.model_dump() for event in batch.events]
+        )
+        
+        exited = [r for r in results if r["status"] == "ok"]
+        if exited:
+            dashboard_snapshot.visitor_exited(
+                sum(r["parking_fee"] for r in exited),
+                spaces_freed=sum(1 for r in exited if r.get("space_freed")),
+                count=len(exited)
+            )
+            _repair_rollups(connection, [
+                event.departure_time for event, r in zip(batch.events, results)
+                if r["status"] == "ok" and event.departure_time
+            ])
+        for r in exited:
+            open_sessions.exited(r["record_id"])
+            alert_engine.visitor_departed(r["record_id"])
+            if r.get("space_freed"):
+                space_allocator.release(r["space_id"])
+                alert_engine.space_changed(r["space_id"], 1)
+        
+        return _batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tariff")
+def get_tariff(
+    arrival_time: Optional[datetime] = None,
+    departure_time: Optional[datetime] = None
+):
+    """Get the visitor tariff table, optionally quoting a stay"""
+    result = visitor_tariff.to_dict()
+    if arrival_time and departure_time:
+        result["quote"] = {
+            "parking_fee": visitor_tariff.price(arrival_time, departure_time),
+            "segments": visitor_tariff.segments(arrival_time, departure_time)
+        }
+    return result
+
+@router.post("/reprice")
+def reprice_visitors(
+    start: datetime,
+    end: datetime,
+    apply: bool = False,
+    connection: oracledb.Connection = Depends(get_db_connection)
+):
+    """Re-price closed visitor stays departed in [start, end) with the current tariff"""
+    try:
+        summary = models.reprice_visitor_records(connection, start, end, apply)
+        if apply and summary["changed"]:
+            # Fees behind the rollup watermark changed; re-sum those hours
+            summary["rollups"] = hourly_rollups.rebuild(connection, start, end)
+        return summary
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{record_id}")
-def get_visitor_record(
+async def get_visitor_record(
     record_id: int,
-    connection: oracledb.Connection = Depends(get_db_connection)
+    connection: oracledb.Connection = Depends(get_async_db_connection)
 ):
     """Get specific visitor record"""
     try:
-        query = """
-            SELECT record_id, space_id, license_plate, arrival_time, 
-                   departure_time, parking_fee
-            FROM VisitorParkingRecord
-            WHERE record_id = :record_id
-        """
-        result = models.execute_query(connection, query, {"record_id": record_id})
+        result = await models.execute_query_async(connection, queries.VISITOR_BY_ID, {"record_id": record_id})
         if not result:
             raise HTTPException(status_code=404, detail="Visitor record not found")
         return result[0]
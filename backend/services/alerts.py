@@ -0,0 +1,348 @@
+import bisect
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import models
+import queries
+from services.expiry_scheduler import ADDED, REMOVED, expiry_scheduler
+from services.live_feed import live_feed
+from services.periodic import PeriodicTask
+from services.timer_wheel import TimerWheel
+
+EXPIRED_SUBSCRIPTION = "EXPIRED_SUBSCRIPTION"
+OVERSTAY_VISITOR = "OVERSTAY_VISITOR"
+SPACE_CAPACITY_LOW = "SPACE_CAPACITY_LOW"
+
+OVERSTAY_AFTER = timedelta(hours=24)
+
+ALERT_PAGE_KEYS = ("alert_id",)
+
+# (alert_type, subscription_id | record_id | space_id)
+Key = Tuple[str, int]
+
+class AlertEngine:
+    """Deduplicated set of active alerts, evaluated as things happen.
+
+    Each rule is keyed on the row it is about, so an alert is raised once
+    and cleared when its condition ends:
+
+      EXPIRED_SUBSCRIPTION  timer at expiration_date; cleared by a renewal,
+                            a newer subscription or deleting it
+      OVERSTAY_VISITOR      timer at arrival_time + 24h; cleared on exit
+      SPACE_CAPACITY_LOW    spaces_available at or below the threshold
+
+    Timers live in a TimerWheel advanced every ALERT_TICK_SECONDS. Routes
+    report arrivals, exits and space changes as they commit, subscription
+    writes arrive through the expiry scheduler's hooks, and every ALERT_RECONCILE_SECONDS the open visitors, the watched
+    spaces and the subscriptions expiring in [now - lookback, now + one
+    wheel rotation) are re-read to schedule upcoming expiries and repair
+    drift. Alerts are kept in raise order for keyset paging, and raised or
+    cleared alerts are published on the live feed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.threshold = int(os.getenv("ALERT_CAPACITY_THRESHOLD", "5"))
+        self.capacity_types = {t.strip() for t in os.getenv("ALERT_CAPACITY_TYPES", "Car,Motorcycle").split(",") if t.strip()}
+        self.lookback_days = int(os.getenv("ALERT_EXPIRED_LOOKBACK_DAYS", "30"))
+        tick_seconds = float(os.getenv("ALERT_TICK_SECONDS", "30"))
+        slots = max(1, int(86400 // tick_seconds))
+        self._wheel = TimerWheel(tick_seconds, slots)
+        # Subscriptions are scheduled one wheel rotation (a day) ahead
+        self.horizon = timedelta(seconds=tick_seconds * slots)
+
+        self._active: Dict[Key, Dict] = {}
+        self._by_id: Dict[int, Dict] = {}
+        self._order: List[int] = []  # alert ids in raise order, cleared ones removed lazily
+        self._next_id = 1
+        self._spaces: Dict[int, int] = {}
+        self._subscription_vehicle: Dict[int, int] = {}
+
+        self.loaded_at: Optional[datetime] = None
+        self.raised = 0
+        self.cleared = 0
+        self.acknowledged = 0
+        self.reconciles = 0
+        self._ticker = PeriodicTask("alert-timer-tick", self.tick, tick_seconds)
+        self._reconciler = PeriodicTask("alert-reconcile", self.reconcile,
+                                        float(os.getenv("ALERT_RECONCILE_SECONDS", "300")))
+
+    # ------------------------------------------------------------------
+    # Active set
+    # ------------------------------------------------------------------
+    def _raise(self, key: Key, fields: Dict, now: datetime, events: List):
+        # Caller holds the lock
+        if key in self._active:
+            return
+        alert = {
+            "alert_id": self._next_id,
+            "alert_type": key[0],
+            "resident_name": None,
+            "email": None,
+            "license_plate": None,
+            "expiration_date": None,
+            **fields,
+            "raised_at": now,
+            "acknowledged_at": None,
+        }
+        self._next_id += 1
+        self._active[key] = alert
+        self._by_id[alert["alert_id"]] = alert
+        self._order.append(alert["alert_id"])
+        self.raised += 1
+        events.append(("alert", dict(alert)))
+
+    def _clear(self, key: Key, events: List):
+        # Caller holds the lock
+        alert = self._active.pop(key, None)
+        if alert is None:
+            return
+        del self._by_id[alert["alert_id"]]
+        if len(self._order) > 2 * len(self._by_id) + 1024:
+            self._order = [alert_id for alert_id in self._order if alert_id in self._by_id]
+        self.cleared += 1
+        events.append(("alert_cleared", {"alert_id": alert["alert_id"], "alert_type": alert["alert_type"]}))
+
+    def _publish(self, events: List):
+        for event, payload in events:
+            live_feed.publish(event, payload)
+
+    # ------------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------------
+    def _subscription_fields(self, row: Dict) -> Dict:
+        return {
+            "resident_name": row["resident_name"],
+            "email": row["email"],
+            "license_plate": row["license_plate"],
+            "expiration_date": row["expiration_date"],
+            "message": "Subscription expired - parking access revoked",
+        }
+
+    def _overstay_fields(self, license_plate: str, arrival_time: datetime) -> Dict:
+        return {
+            "resident_name": "Visitor",
+            "license_plate": license_plate,
+            "expiration_date": arrival_time,
+            "message": "Visitor overstay - parked for > 24 hours",
+        }
+
+    def _check_space(self, space_id: int, now: datetime, events: List):
+        # Caller holds the lock
+        available = self._spaces[space_id]
+        key = (SPACE_CAPACITY_LOW, space_id)
+        if available <= self.threshold:
+            self._raise(key, {
+                "message": f"Parking space {space_id} has only {available} spaces remaining",
+            }, now, events)
+        else:
+            self._clear(key, events)
+
+    def _fire(self, now: datetime, events: List):
+        # Caller holds the lock
+        for key, _, fields in self._wheel.advance(now):
+            self._raise(key, fields, now, events)
+
+    def tick(self):
+        """Raise the alerts whose timers are due"""
+        events = []
+        with self._lock:
+            self._fire(datetime.now(), events)
+        self._publish(events)
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    def reconcile(self, connection):
+        """Re-read every rule's inputs; schedules upcoming timers and clears stale alerts"""
+        read_at = datetime.now()
+        subscriptions = models.execute_query(connection, queries.ALERT_SUBSCRIPTIONS, {
+            "lookback_days": self.lookback_days,
+            "horizon_seconds": int(self.horizon.total_seconds()),
+        })
+        visitors = models.execute_query(connection, queries.ALERT_OPEN_VISITORS)
+        spaces = models.execute_query(connection, queries.ALERT_SPACE_CAPACITY)
+
+        events = []
+        with self._lock:
+            now = datetime.now()
+
+            subscription_vehicle = {}
+            for row in subscriptions:
+                key = (EXPIRED_SUBSCRIPTION, row["subscription_id"])
+                subscription_vehicle[row["subscription_id"]] = row["vehicle_id"]
+                if row["expiration_date"] <= now:
+                    self._wheel.cancel(key)
+                    self._raise(key, self._subscription_fields(row), now, events)
+                else:
+                    self._wheel.schedule(key, row["expiration_date"], self._subscription_fields(row))
+            self._subscription_vehicle = subscription_vehicle
+
+            open_records = {}
+            for row in visitors:
+                key = (OVERSTAY_VISITOR, row["record_id"])
+                open_records[key] = row
+                due = row["arrival_time"] + OVERSTAY_AFTER
+                if due <= now:
+                    self._wheel.cancel(key)
+                    self._raise(key, self._overstay_fields(row["license_plate"], row["arrival_time"]), now, events)
+                elif key not in self._wheel:
+                    self._wheel.schedule(key, due, self._overstay_fields(row["license_plate"], row["arrival_time"]))
+
+            # Drop what the read no longer returns; visitors who arrived after
+            # the read (timers due past read_at + 24h) are left alone
+            for key in self._wheel.keys():
+                if key[0] == EXPIRED_SUBSCRIPTION and key[1] not in subscription_vehicle:
+                    self._wheel.cancel(key)
+                elif (key[0] == OVERSTAY_VISITOR and key not in open_records
+                      and self._wheel.due(key) <= read_at + OVERSTAY_AFTER):
+                    self._wheel.cancel(key)
+            for key, alert in list(self._active.items()):
+                if alert["raised_at"] > read_at:
+                    continue
+                if key[0] == EXPIRED_SUBSCRIPTION and key[1] not in subscription_vehicle:
+                    self._clear(key, events)
+                elif key[0] == OVERSTAY_VISITOR and key not in open_records:
+                    self._clear(key, events)
+
+            self._spaces = {
+                row["space_id"]: row["spaces_available"] or 0
+                for row in spaces if row["space_type"] in self.capacity_types
+            }
+            for key in [k for k in self._active if k[0] == SPACE_CAPACITY_LOW and k[1] not in self._spaces]:
+                self._clear(key, events)
+            for space_id in self._spaces:
+                self._check_space(space_id, now, events)
+
+            self._fire(now, events)
+            self.loaded_at = now
+            self.reconciles += 1
+        self._publish(events)
+
+    def start(self, get_connection: Callable):
+        """Advance timers every ALERT_TICK_SECONDS and reconcile every ALERT_RECONCILE_SECONDS"""
+        self._ticker.start()
+        self._reconciler.start(get_connection)
+
+    def stop(self):
+        self._ticker.stop()
+        self._reconciler.stop()
+
+    # ------------------------------------------------------------------
+    # Events from the routes
+    # ------------------------------------------------------------------
+    def visitor_arrived(self, record_id: int, license_plate: str, arrival_time: Optional[datetime] = None):
+        arrival_time = arrival_time or datetime.now()
+        with self._lock:
+            self._wheel.schedule((OVERSTAY_VISITOR, record_id), arrival_time + OVERSTAY_AFTER,
+                                 self._overstay_fields(license_plate, arrival_time))
+
+    def visitor_departed(self, record_id: int):
+        events = []
+        with self._lock:
+            key = (OVERSTAY_VISITOR, record_id)
+            self._wheel.cancel(key)
+            self._clear(key, events)
+        self._publish(events)
+
+    def space_changed(self, space_id: int, delta: int):
+        """spaces_available of `space_id` moved by `delta`"""
+        events = []
+        with self._lock:
+            if space_id not in self._spaces:
+                return
+            self._spaces[space_id] += delta
+            self._check_space(space_id, datetime.now(), events)
+        self._publish(events)
+
+    def subscriptions_changed(self, events: List):
+        """Expiry scheduler hook: a newer subscription supersedes the vehicle's
+        expired or expiring ones; a deleted one takes its alert with it"""
+        cleared = []
+        with self._lock:
+            for event, subscription_id, vehicle_id, _ in events:
+                if event == ADDED:
+                    superseded = [s for s, v in self._subscription_vehicle.items()
+                                  if v == vehicle_id and s != subscription_id]
+                    for superseded_id in superseded:
+                        self._drop_subscription(superseded_id, cleared)
+                elif event == REMOVED:
+                    self._drop_subscription(subscription_id, cleared)
+        self._publish(cleared)
+
+    def _drop_subscription(self, subscription_id: int, events: List):
+        # Caller holds the lock
+        key = (EXPIRED_SUBSCRIPTION, subscription_id)
+        self._subscription_vehicle.pop(subscription_id, None)
+        self._wheel.cancel(key)
+        self._clear(key, events)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def ensure_loaded(self, get_connection: Callable):
+        if self.loaded_at is not None:
+            return
+        # Concurrent first readers share one load
+        with self._load_lock:
+            if self.loaded_at is None:
+                connection = get_connection()
+                try:
+                    self.reconcile(connection)
+                finally:
+                    connection.close()
+
+    def page(self, limit: int, before_id: Optional[int] = None,
+             include_acknowledged: bool = True) -> List[Dict]:
+        """Newest alerts first, starting below `before_id`"""
+        rows = []
+        with self._lock:
+            i = len(self._order) if before_id is None else bisect.bisect_left(self._order, before_id)
+            while i > 0 and len(rows) < limit:
+                i -= 1
+                alert = self._by_id.get(self._order[i])
+                if alert is None or (alert["acknowledged_at"] and not include_acknowledged):
+                    continue
+                rows.append(dict(alert))
+        return rows
+
+    def acknowledge(self, alert_id: int) -> Optional[Dict]:
+        """Mark an active alert as seen; it stays active until its condition clears"""
+        with self._lock:
+            alert = self._by_id.get(alert_id)
+            if alert is None:
+                return None
+            if alert["acknowledged_at"] is None:
+                alert["acknowledged_at"] = datetime.now()
+                self.acknowledged += 1
+            return dict(alert)
+
+    def __len__(self):
+        return len(self._active)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            by_type = {EXPIRED_SUBSCRIPTION: 0, OVERSTAY_VISITOR: 0, SPACE_CAPACITY_LOW: 0}
+            unacknowledged = 0
+            for alert in self._active.values():
+                by_type[alert["alert_type"]] += 1
+                unacknowledged += alert["acknowledged_at"] is None
+            return {
+                "active": len(self._active),
+                "unacknowledged": unacknowledged,
+                "by_type": by_type,
+                "pending_timers": len(self._wheel),
+                "watched_spaces": len(self._spaces),
+                "raised": self.raised,
+                "cleared": self.cleared,
+                "acknowledged": self.acknowledged,
+                "reconciles": self.reconciles,
+                "loaded_at": self.loaded_at,
+            }
+
+# Global alert engine instance
+alert_engine = AlertEngine()
+expiry_scheduler.subscribe(alert_engine.subscriptions_changed)
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, NamedTuple, Optional
+
+import models
+import queries
+from services.periodic import PeriodicTask
+
+class ArchivedTable(NamedTuple):
+    name: str
+    pick: queries.Query
+    copy: queries.Query
+    delete: queries.Query
+
+TABLES = (
+    ArchivedTable("ParkingRecord", queries.ARCHIVE_PICK_PARKING_RECORDS,
+                  queries.ARCHIVE_COPY_PARKING_RECORDS, queries.ARCHIVE_DELETE_PARKING_RECORDS),
+    ArchivedTable("VisitorParkingRecord", queries.ARCHIVE_PICK_VISITOR_RECORDS,
+                  queries.ARCHIVE_COPY_VISITOR_RECORDS, queries.ARCHIVE_DELETE_VISITOR_RECORDS),
+)
+
+class RecordArchiver:
+    """Moves old closed parking records to the archive tables (migrations/007).
+
+    Today's usage and revenue, the rollup tail and the listings read the
+    hot ParkingRecord / VisitorParkingRecord tables (open stays are read
+    from the session tables of migrations/008). Every
+    ARCHIVE_INTERVAL_SECONDS this job moves records that closed more than
+    ARCHIVE_AFTER_DAYS ago, ARCHIVE_BATCH_SIZE at a time: lock a batch of
+    ids, copy them to the archive, delete them, commit. The hot tables then
+    hold open records plus a fixed window of recent ones, and reading them
+    costs the same however long the history gets.
+
+    The cutoff never passes the rollup watermark, so every archived closure
+    has already been folded into the hourly buckets. Readers of old records
+    (record by id, the listing, re-pricing, rollup rebuilds, exports) go
+    through both tables. Workers running the job at once take disjoint
+    batches (SKIP LOCKED).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self.after_days = int(os.getenv("ARCHIVE_AFTER_DAYS", "35"))
+        self.batch_size = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+        self.runs = 0
+        self.moved = {table.name: 0 for table in TABLES}
+        self.cutoff: Optional[datetime] = None
+        self.last_run: Optional[Dict] = None
+        self._task = PeriodicTask("record-archiver", self.run,
+                                  float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600")))
+
+    def run(self, connection) -> Optional[Dict]:
+        """Archive everything past the cutoff; None if a run is in progress"""
+        if not self._running.acquire(blocking=False):
+            return None
+        started = time.perf_counter()
+        try:
+            cursor = connection.cursor()
+            try:
+                queries.ARCHIVE_CUTOFF.execute(cursor, {"days": self.after_days})
+                cutoff, = cursor.fetchone()
+            finally:
+                cursor.close()
+            moved = {}
+            batches = 0
+            for table in TABLES:
+                moved[table.name], table_batches = self._move(connection, table, cutoff)
+                batches += table_batches
+        finally:
+            self._running.release()
+
+        result = {"cutoff": cutoff, "moved": moved, "batches": batches,
+                  "ms": round((time.perf_counter() - started) * 1000, 2)}
+        with self._lock:
+            self.runs += 1
+            self.cutoff = cutoff
+            for name, count in moved.items():
+                self.moved[name] += count
+            self.last_run = dict(result, at=datetime.now())
+        return result
+
+    def _move(self, connection, table: ArchivedTable, cutoff: datetime):
+        number_list = connection.gettype("SYS.ODCINUMBERLIST")
+        moved = batches = 0
+        while not self._stop.is_set():
+            with models.UnitOfWork(connection) as uow:
+                uow.cursor.arraysize = self.batch_size
+                uow.execute(table.pick, {"cutoff": cutoff, "batch_size": self.batch_size})
+                ids = [row[0] for row in uow.cursor.fetchall()]
+                if not ids:
+                    break
+                id_list = number_list.newobject(ids)
+                copied = uow.execute(table.copy, {"ids": id_list})
+                deleted = uow.execute(table.delete, {"ids": id_list})
+                if copied != deleted:
+                    # Rolls the batch back; the rows stay hot
+                    raise RuntimeError(f"{table.name}: copied {copied} rows to the archive "
+                                       f"but deleted {deleted}")
+            moved += deleted
+            batches += 1
+        return moved, batches
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "after_days": self.after_days,
+                "batch_size": self.batch_size,
+                "cutoff": self.cutoff,
+                "runs": self.runs,
+                "moved": dict(self.moved),
+                "last_run": self.last_run,
+                "running": self._running.locked(),
+                "interval_seconds": self._task.interval,
+            }
+
+    def start(self, get_connection: Callable):
+        """Archive every ARCHIVE_INTERVAL_SECONDS"""
+        self._stop.clear()
+        self._task.start(get_connection)
+
+    def stop(self):
+        # A long first run stops after its current batch
+        self._stop.set()
+        self._task.stop()
+
+# Global record archiver instance
+record_archiver = RecordArchiver()
@@ -0,0 +1,465 @@
+import csv
+import gzip
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import queries
+
+FORMATS = ("csv", "parquet")
+FORMAT_PATTERN = "^(csv|parquet)$"
+EXTENSIONS = {"csv": ".csv.gz", "parquet": ".parquet"}
+
+DEFAULT_ARRAYSIZE = 10000
+DEFAULT_PART_ROWS = 1_000_000
+DEFAULT_ROW_GROUP = 100_000
+
+# resume() continues these from their watermark
+RESUMABLE = ("failed", "cancelled", "interrupted")
+
+_EXPORT_ID = re.compile(r"^[a-z_]+-\d{14}-[0-9a-f]{6}$")
+
+class Dataset(NamedTuple):
+    query: queries.Query
+    # (name, type) in select-list order; types: int, float, str, timestamp
+    columns: Tuple[Tuple[str, str], ...]
+    time_column: str
+    key_column: str
+    # Same rows from the archive table (migrations/007), if the data has one
+    archive_query: Optional[queries.Query] = None
+
+DATASETS: Dict[str, Dataset] = {
+    "parking_records": Dataset(queries.EXPORT_PARKING_RECORDS, (
+        ("record_id", "int"), ("space_id", "int"), ("vehicle_id", "int"),
+        ("arrival_time", "timestamp"), ("departure_time", "timestamp"),
+    ), "arrival_time", "record_id", queries.EXPORT_ARCHIVED_PARKING_RECORDS),
+    "visitor_records": Dataset(queries.EXPORT_VISITOR_RECORDS, (
+        ("record_id", "int"), ("space_id", "int"), ("license_plate", "str"),
+        ("arrival_time", "timestamp"), ("departure_time", "timestamp"), ("parking_fee", "float"),
+    ), "arrival_time", "record_id", queries.EXPORT_ARCHIVED_VISITOR_RECORDS),
+    "shifts": Dataset(queries.EXPORT_SHIFTS, (
+        ("shift_id", "int"), ("space_id", "int"), ("supervisor_id", "int"), ("day", "str"),
+        ("check_in_time", "timestamp"), ("check_out_time", "timestamp"),
+        ("total_money_collected", "float"),
+    ), "check_in_time", "shift_id"),
+}
+DATASET_PATTERN = "^(" + "|".join(DATASETS) + ")$"
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet export needs pyarrow installed; use format=csv")
+    return pyarrow
+
+class CsvPart:
+    """gzip CSV part file; rows go straight from the fetch batch to the
+    compressor"""
+
+    def __init__(self, path: str, dataset: Dataset, level: int):
+        self._file = gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=level)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in dataset.columns])
+
+    def write(self, rows: List[tuple]):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+class ParquetPart:
+    """Parquet part file; each fetch batch is turned into Arrow columns at
+    once and a row group is written every `row_group` rows"""
+
+    TYPES = {"int": "int64", "float": "float64", "str": "string"}
+
+    def __init__(self, path: str, dataset: Dataset, row_group: int):
+        pa = _load_pyarrow()
+        self._pa = pa
+        self._schema = pa.schema([
+            (name, pa.timestamp("us") if kind == "timestamp" else pa.type_for_alias(self.TYPES[kind]))
+            for name, kind in dataset.columns
+        ])
+        self._writer = pa.parquet.ParquetWriter(path, self._schema, compression="snappy")
+        self._row_group = row_group
+        self._batches = []
+        self._buffered = 0
+
+    def write(self, rows: List[tuple]):
+        columns = zip(*rows)
+        arrays = [self._pa.array(values, type=field.type) for values, field in zip(columns, self._schema)]
+        self._batches.append(self._pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        self._buffered += len(rows)
+        if self._buffered >= self._row_group:
+            self._flush()
+
+    def _flush(self):
+        if self._batches:
+            self._writer.write_table(self._pa.Table.from_batches(self._batches),
+                                     row_group_size=self._buffered)
+            self._batches = []
+            self._buffered = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+class ExportJob:
+    """One export: its manifest on disk and its live progress.
+
+    The manifest (manifest.json in the export directory) lists the finished
+    part files and the key of the last row in them. It is rewritten after
+    each part, so a resumed export starts right after that key and never
+    repeats or skips a row; a part that was being written is discarded.
+    """
+
+    def __init__(self, directory: str, manifest: Dict):
+        self.directory = directory
+        self.manifest = manifest
+        self.cancel = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        # Live counters of the run in progress
+        self.run_rows = 0
+        self.run_rows_in_parts = 0
+        self.run_started: Optional[float] = None
+        self.run_from = 0.0
+        self.position: Optional[datetime] = None
+
+    @property
+    def export_id(self) -> str:
+        return self.manifest["export_id"]
+
+    @property
+    def status(self) -> str:
+        return self.manifest["status"]
+
+    def save(self):
+        self.manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        path = os.path.join(self.directory, "manifest.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def watermark(self) -> Dict:
+        mark = self.manifest["watermark"]
+        if mark is None:
+            return {"after_time": datetime.fromisoformat(self.manifest["start"]), "after_id": -1}
+        return {"after_time": datetime.fromisoformat(mark["time"]), "after_id": mark["id"]}
+
+    def progress(self) -> Dict:
+        m = self.manifest
+        start, end = datetime.fromisoformat(m["start"]), datetime.fromisoformat(m["end"])
+        position = self.position
+        if position is None and m["watermark"]:
+            position = datetime.fromisoformat(m["watermark"]["time"])
+        span = (end - start).total_seconds()
+        if m["status"] == "completed":
+            fraction = 1.0
+        elif position is not None and span > 0:
+            fraction = min(1.0, max(0.0, (position - start).total_seconds() / span))
+        else:
+            fraction = 0.0
+
+        rate = eta = None
+        if m["status"] == "running" and self.run_started is not None:
+            elapsed = time.perf_counter() - self.run_started
+            rate = round(self.run_rows / elapsed) if elapsed > 0 else None
+            if 0 < fraction < 1 and fraction > self.run_from:
+                # Extrapolated from the share of the date range done in this run
+                eta = round(elapsed * (1 - fraction) / (fraction - self.run_from), 1)
+        pending = self.run_rows - self.run_rows_in_parts if m["status"] == "running" else 0
+        return dict(
+            m,
+            # A copy: the export thread appends to the manifest's list
+            parts=list(m["parts"]),
+            # Including rows of the part being written
+            rows_exported=sum(p["rows"] for p in m["parts"]) + pending,
+            bytes=sum(p["bytes"] for p in m["parts"]),
+            # Share of the date range up to the last row read
+            progress=round(fraction, 4),
+            position=position.isoformat() if position else None,
+            rows_per_second=rate,
+            eta_seconds=eta,
+        )
+
+class BulkExporter:
+    """Streams ParkingRecord / VisitorParkingRecord / SupervisionShift
+    history for a date range into gzip CSV or Parquet files.
+
+    Paging the API 100 rows at a time is the only other way to get the
+    history out. An export instead runs one keyset-ordered query per run on
+    its own connection (one per table for records that may be archived,
+    merged in key order), with EXPORT_ARRAYSIZE rows per fetch, and writes
+    each batch to the current part file as it arrives, so memory stays at
+    one batch (plus one Parquet row group) however large the range is.
+    Parts hold EXPORT_PART_ROWS rows; after each one the manifest records
+    its last (time, id) key, which is where resume() continues after a
+    failure, a cancel or a restart.
+
+    Exports run in background threads, at most EXPORT_MAX_RUNNING at once,
+    and write under EXPORT_DIR/<export_id>/. Parquet needs pyarrow.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.directory = os.getenv("EXPORT_DIR", os.path.join(os.getcwd(), "exports"))
+        self.arraysize = int(os.getenv("EXPORT_ARRAYSIZE", str(DEFAULT_ARRAYSIZE)))
+        self.part_rows = int(os.getenv("EXPORT_PART_ROWS", str(DEFAULT_PART_ROWS)))
+        self.row_group = int(os.getenv("EXPORT_ROW_GROUP", str(DEFAULT_ROW_GROUP)))
+        self.gzip_level = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+        self.max_running = int(os.getenv("EXPORT_MAX_RUNNING", "2"))
+        self.jobs: Dict[str, ExportJob] = {}
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+    def begin(self, get_connection: Callable, dataset: str, fmt: str,
+              start: datetime, end: datetime) -> Optional[Dict]:
+        """Start exporting [start, end); None if EXPORT_MAX_RUNNING are running"""
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset {dataset!r}; use one of {', '.join(DATASETS)}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}")
+        if fmt == "parquet":
+            _load_pyarrow()
+        if end <= start:
+            raise ValueError("end must be after start")
+
+        export_id = f"{dataset}-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+        directory = os.path.join(self.directory, export_id)
+        job = ExportJob(directory, {
+            "export_id": export_id, "dataset": dataset, "format": fmt,
+            "start": start.isoformat(), "end": end.isoformat(),
+            "status": "running", "watermark": None, "parts": [], "runs": 0,
+            "created_at": datetime.now().isoformat(timespec="seconds"), "error": None,
+        })
+        with self._lock:
+            if self._running() >= self.max_running:
+                return None
+            os.makedirs(directory)
+            self.jobs[export_id] = job
+            self._launch(job, get_connection)
+        return job.progress()
+
+    def resume(self, get_connection: Callable, export_id: str) -> Optional[Dict]:
+        """Continue a failed, cancelled or interrupted export after its
+        watermark; None if EXPORT_MAX_RUNNING are running"""
+        job = self._job(export_id)
+        with self._lock:
+            if job.status not in RESUMABLE:
+                raise ValueError(f"Export {export_id} is {job.status}, not resumable")
+            if self._running() >= self.max_running:
+                return None
+            job.manifest["status"] = "running"
+            job.manifest["error"] = None
+            self._launch(job, get_connection)
+        return job.progress()
+
+    def cancel(self, export_id: str) -> Dict:
+        """Stop an export after the batch in progress; resume() picks it up"""
+        job = self._job(export_id)
+        job.cancel.set()
+        if job.thread:
+            job.thread.join(timeout=10)
+        return job.progress()
+
+    def get(self, export_id: str) -> Dict:
+        return self._job(export_id).progress()
+
+    def list_exports(self) -> List[Dict]:
+        """Every export under EXPORT_DIR, newest first"""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if _EXPORT_ID.match(name) and name not in self.jobs:
+                    try:
+                        self._job(name)
+                    except (KeyError, ValueError):
+                        continue
+        jobs = sorted(self.jobs.values(), key=lambda j: j.manifest["created_at"], reverse=True)
+        return [job.progress() for job in jobs]
+
+    def file_path(self, export_id: str, name: str) -> str:
+        """Path of a finished part file of the export"""
+        job = self._job(export_id)
+        if name not in {part["file"] for part in job.manifest["parts"]}:
+            raise KeyError(f"Export {export_id} has no part {name!r}")
+        return os.path.join(job.directory, name)
+
+    def stop(self):
+        """Interrupt running exports at shutdown; they stay resumable"""
+        for job in list(self.jobs.values()):
+            job.cancel.set()
+        for job in list(self.jobs.values()):
+            if job.thread:
+                job.thread.join(timeout=10)
+
+    def _running(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "running")
+
+    def _job(self, export_id: str) -> ExportJob:
+        job = self.jobs.get(export_id)
+        if job is not None:
+            return job
+        if not _EXPORT_ID.match(export_id):
+            raise KeyError(f"Export {export_id} not found")
+        directory = os.path.join(self.directory, export_id)
+        try:
+            with open(os.path.join(directory, "manifest.json")) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"Export {export_id} not found")
+        if manifest["status"] == "running":
+            # Written by a process that is gone
+            manifest["status"] = "interrupted"
+        job = ExportJob(directory, manifest)
+        with self._lock:
+            return self.jobs.setdefault(export_id, job)
+
+    def _launch(self, job: ExportJob, get_connection: Callable):
+        job.cancel.clear()
+        job.thread = threading.Thread(target=self._run, args=(job, get_connection),
+                                      name=f"export-{job.export_id}", daemon=True)
+        job.thread.start()
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def _open_part(self, job: ExportJob, path: str):
+        dataset = DATASETS[job.manifest["dataset"]]
+        if job.manifest["format"] == "parquet":
+            return ParquetPart(path, dataset, self.row_group)
+        return CsvPart(path, dataset, self.gzip_level)
+
+    def _run(self, job: ExportJob, get_connection: Callable):
+        m = job.manifest
+        dataset = DATASETS[m["dataset"]]
+        time_at = [name for name, _ in dataset.columns].index(dataset.time_column)
+        key_at = [name for name, _ in dataset.columns].index(dataset.key_column)
+        m["runs"] += 1
+        job.run_rows = job.run_rows_in_parts = 0
+        job.position = None
+        job.run_from = job.progress()["progress"]
+        job.run_started = time.perf_counter()
+        # A part cut short by the last run is not in the manifest
+        for name in os.listdir(job.directory):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(job.directory, name))
+        job.save()
+
+        connection = part = path = None
+        cursors = []
+        try:
+            connection = get_connection()
+            params = job.watermark()
+            params["end_time"] = datetime.fromisoformat(m["end"])
+            for query in filter(None, (dataset.query, dataset.archive_query)):
+                cursor = connection.cursor()
+                cursors.append(cursor)
+                cursor.arraysize = self.arraysize
+                cursor.prefetchrows = self.arraysize + 1
+                query.execute(cursor, params)
+            batches = self._batches(cursors, time_at, key_at)
+
+            part_rows = 0
+            last = None
+            while not job.cancel.is_set():
+                rows = next(batches, None)
+                if not rows:
+                    break
+                offset = 0
+                while offset < len(rows):
+                    if part is None:
+                        name = f"part-{len(m['parts']) + 1:05d}{EXTENSIONS[m['format']]}"
+                        path = os.path.join(job.directory, name + ".tmp")
+                        part = self._open_part(job, path)
+                        part_rows = 0
+                    chunk = rows[offset:offset + self.part_rows - part_rows]
+                    part.write(chunk)
+                    offset += len(chunk)
+                    part_rows += len(chunk)
+                    job.run_rows += len(chunk)
+                    last = chunk[-1]
+                    job.position = last[time_at]
+                    if part_rows >= self.part_rows:
+                        self._finish_part(job, part, path, part_rows, last[time_at], last[key_at])
+                        part = None
+            if part is not None and last is not None:
+                self._finish_part(job, part, path, part_rows, last[time_at], last[key_at])
+                part = None
+            if job.cancel.is_set():
+                m["status"] = "cancelled"
+            else:
+                m["status"] = "completed"
+                m["completed_at"] = datetime.now().isoformat(timespec="seconds")
+        except Exception as e:
+            m["status"] = "failed"
+            m["error"] = str(e)
+            print(f"⚠️ Export {job.export_id} failed after {job.run_rows} rows: {e}")
+        finally:
+            if part is not None:
+                # Unfinished part: the watermark is still before its first row
+                try:
+                    part.close()
+                    os.remove(path)
+                except Exception:
+                    pass
+            for cursor in cursors:
+                cursor.close()
+            if connection:
+                connection.close()
+            job.save()
+
+    def _batches(self, cursors: List, time_at: int, key_at: int):
+        """Fetch batches in key order; hot and archived rows are merged"""
+        def fetch(cursor):
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    return
+                yield rows
+
+        if len(cursors) == 1:
+            yield from fetch(cursors[0])
+            return
+        # Each table is already in key order: a streaming merge, no sort
+        merged = heapq.merge(*(itertools.chain.from_iterable(fetch(c)) for c in cursors),
+                             key=lambda row: (row[time_at], row[key_at]))
+        while True:
+            rows = list(itertools.islice(merged, self.arraysize))
+            if not rows:
+                return
+            yield rows
+
+    def _finish_part(self, job: ExportJob, part, path: str, rows: int,
+                     last_time: datetime, last_id: int):
+        part.close()
+        final = path[:-len(".tmp")]
+        os.replace(path, final)
+        job.manifest["parts"].append({
+            "file": os.path.basename(final), "rows": rows, "bytes": os.path.getsize(final),
+        })
+        job.manifest["watermark"] = {"time": last_time.isoformat(), "id": last_id}
+        job.run_rows_in_parts += rows
+        job.save()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {
+            "directory": self.directory,
+            "arraysize": self.arraysize,
+            "part_rows": self.part_rows,
+            "running": sum(1 for job in jobs if job.status == "running"),
+            "max_running": self.max_running,
+        }
+
+# Global bulk exporter instance
+bulk_exporter = BulkExporter()
@@ -0,0 +1,390 @@
+import codecs
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+import models
+import queries
+from services.id_allocator import id_allocator
+from services.plate_index import plate_index
+
+FORMATS = ("csv", "ndjson")
+FORMAT_PATTERN = "^(csv|ndjson)$"
+ENTITIES = ("residents", "vehicles")
+
+# Rows per executemany / commit
+DEFAULT_CHUNK_SIZE = 1000
+
+Record = Tuple[int, Dict]
+
+class RowParser:
+    """Incremental CSV / NDJSON reader.
+
+    feed() takes bytes as they arrive (an HTTP body chunk, a file block)
+    and returns the complete records so far as (line number, dict); a
+    record split across two feeds is finished by the next one. CSV needs a
+    header row; a quoted field may span lines. Lines that cannot be parsed
+    are collected in `errors` and skipped.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}")
+        self.fmt = fmt
+        self.line = 0
+        self.errors: List[Tuple[int, str]] = []
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._pending = ""
+        self._header: Optional[List[str]] = None
+        # CSV lines of a record whose quoted field is still open
+        self._record: List[str] = []
+        self._record_line = 0
+
+    def feed(self, data: bytes) -> List[Record]:
+        lines = (self._pending + self._decoder.decode(data)).split("\n")
+        self._pending = lines.pop()
+        return self._parse(lines)
+
+    def close(self) -> List[Record]:
+        tail = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        records = self._parse([tail] if tail else [])
+        if self._record:
+            self.errors.append((self._record_line, "Unterminated quoted field"))
+            self._record = []
+        return records
+
+    def _parse(self, lines: List[str]) -> List[Record]:
+        records = []
+        for line in lines:
+            self.line += 1
+            line = line.rstrip("\r")
+            if self.fmt == "ndjson":
+                record = self._parse_json(line)
+            else:
+                record = self._parse_csv(line)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def _parse_json(self, line: str) -> Optional[Record]:
+        if not line.strip():
+            return None
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            self.errors.append((self.line, f"Invalid JSON: {e}"))
+            return None
+        if not isinstance(value, dict):
+            self.errors.append((self.line, "Expected a JSON object"))
+            return None
+        return self.line, value
+
+    def _parse_csv(self, line: str) -> Optional[Record]:
+        if not self._record:
+            if not line.strip():
+                return None
+            self._record_line = self.line
+        self._record.append(line)
+        # An odd number of quotes leaves a quoted field open ("" escapes pair up)
+        if sum(part.count('"') for part in self._record) % 2:
+            return None
+        fields = next(csv.reader(["\n".join(self._record)]))
+        self._record = []
+        if self._header is None:
+            self._header = [field.strip().lower() for field in fields]
+            return None
+        if len(fields) != len(self._header):
+            self.errors.append((self._record_line, f"Expected {len(self._header)} fields, got {len(fields)}"))
+            return None
+        return self._record_line, dict(zip(self._header, fields))
+
+class ImportReport:
+    """Counts and per-row errors of one import"""
+
+    def __init__(self, entity: str, dry_run: bool, max_errors: int):
+        self.entity = entity
+        self.dry_run = dry_run
+        self.max_errors = max_errors
+        self.received = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.errors: List[Dict] = []
+        self._started = time.perf_counter()
+        self.seconds: Optional[float] = None
+
+    def reject(self, line: int, detail: str):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "detail": detail})
+
+    def as_dict(self) -> Dict:
+        seconds = self.seconds if self.seconds is not None else time.perf_counter() - self._started
+        return {
+            "entity": self.entity,
+            "dry_run": self.dry_run,
+            "received": self.received,
+            # With dry_run: rows that passed validation
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "chunks": self.chunks,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.received / seconds) if seconds else None,
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+        }
+
+class ImportKeys:
+    """Foreign keys and unique values the rows are checked against"""
+
+    def __init__(self):
+        self.apartments: Set[int] = set()
+        self.residents: Set[int] = set()
+        self.emails: Dict[str, int] = {}
+        self.plates: Set[str] = set()
+
+    @staticmethod
+    def _read(connection, query: queries.Query):
+        cursor = connection.cursor()
+        try:
+            # Whole tables: fewer, larger fetches
+            cursor.arraysize = 5000
+            query.execute(cursor)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def load(self, connection, entity: str):
+        if entity == "residents":
+            self.apartments = {row[0] for row in self._read(connection, queries.IMPORT_APARTMENT_IDS)}
+            return
+        for resident_id, email in self._read(connection, queries.IMPORT_RESIDENT_KEYS):
+            self.residents.add(resident_id)
+            if email:
+                self.emails.setdefault(email, resident_id)
+        self.plates = {row[0] for row in self._read(connection, queries.IMPORT_VEHICLE_PLATES)}
+
+def _text(row: Dict, field: str) -> str:
+    value = row.get(field)
+    value = "" if value is None else str(value).strip()
+    if not value:
+        raise ValueError(f"{field} is required")
+    return value
+
+def _integer(row: Dict, field: str) -> int:
+    value = _text(row, field)
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{field} must be an integer, got {value!r}")
+
+class ImportSession:
+    """One import: rows go in through add(), are validated and inserted a
+    chunk at a time, each chunk in its own transaction"""
+
+    def __init__(self, importer: "BulkImporter", connection, entity: str, dry_run: bool):
+        self.importer = importer
+        self.connection = connection
+        self.entity = entity
+        self.dry_run = dry_run
+        self.report = ImportReport(entity, dry_run, importer.max_errors)
+        self.keys = ImportKeys()
+        self.keys.load(connection, entity)
+        self._pending: List[Record] = []
+        # Plates seen in this import, for duplicates within the file
+        self._new_plates: Set[str] = set()
+
+    def add(self, records: Iterable[Record], parse_errors: List[Tuple[int, str]] = None):
+        for line, detail in parse_errors or ():
+            self.report.received += 1
+            self.report.reject(line, detail)
+        if parse_errors:
+            parse_errors.clear()
+        for record in records:
+            self.report.received += 1
+            self._pending.append(record)
+            if len(self._pending) >= self.importer.chunk_size:
+                self._flush()
+
+    def finish(self) -> ImportReport:
+        self._flush()
+        self.report.seconds = time.perf_counter() - self.report._started
+        self.importer._finished(self.report)
+        return self.report
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+    def _resident(self, row: Dict) -> Dict:
+        apartment_id = _integer(row, "apartment_id")
+        if apartment_id not in self.keys.apartments:
+            raise ValueError(f"Apartment {apartment_id} not found")
+        email = _text(row, "email")
+        if "@" not in email:
+            raise ValueError(f"Invalid email {email!r}")
+        return {
+            "apartment_id": apartment_id,
+            "name": _text(row, "name"),
+            "phone_number": _text(row, "phone_number"),
+            "email": email,
+        }
+
+    def _vehicle(self, row: Dict) -> Dict:
+        # resident_id, or the email of a resident imported earlier
+        if str(row.get("resident_id") or "").strip():
+            resident_id = _integer(row, "resident_id")
+            if resident_id not in self.keys.residents:
+                raise ValueError(f"Resident {resident_id} not found")
+        else:
+            email = _text(row, "resident_email").lower()
+            resident_id = self.keys.emails.get(email)
+            if resident_id is None:
+                raise ValueError(f"No resident with email {email!r}")
+        plate = _text(row, "license_plate")
+        if plate in self.keys.plates or plate in self._new_plates:
+            raise ValueError(f"License plate {plate} already registered")
+        self._new_plates.add(plate)
+        return {
+            "resident_id": resident_id,
+            "license_plate": plate,
+            "vehicle_type": _text(row, "vehicle_type"),
+        }
+
+    # ------------------------------------------------------------------
+    # Insert
+    # ------------------------------------------------------------------
+    def _flush(self):
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        validate = self._resident if self.entity == "residents" else self._vehicle
+        valid: List[Tuple[int, Dict]] = []
+        for line, row in records:
+            try:
+                valid.append((line, validate(row)))
+            except ValueError as e:
+                self.report.reject(line, str(e))
+        self.report.chunks += 1
+        if not valid:
+            return
+        if self.dry_run:
+            self.report.inserted += len(valid)
+            return
+
+        table, key, query = (("Resident", "resident_id", queries.INSERT_RESIDENT)
+                             if self.entity == "residents" else
+                             ("Vehicle", "vehicle_id", queries.INSERT_VEHICLE))
+        ids = id_allocator.next_ids(self.connection, table, len(valid))
+        rows = [dict(params, **{key: new_id}) for (_, params), new_id in zip(valid, ids)]
+        with models.UnitOfWork(self.connection) as uow:
+            cursor = uow.executemany(query, rows, batcherrors=True)
+            failed = {error.offset: error.message for error in cursor.getbatcherrors()}
+
+        inserted_vehicles = []
+        for offset, ((line, params), row) in enumerate(zip(valid, rows)):
+            if offset in failed:
+                self.report.reject(line, failed[offset])
+                if self.entity == "vehicles":
+                    self._new_plates.discard(params["license_plate"])
+                continue
+            self.report.inserted += 1
+            if self.entity == "vehicles":
+                inserted_vehicles.append((row["vehicle_id"], row["license_plate"]))
+        if inserted_vehicles:
+            # New vehicles have no subscriptions yet: no need to re-read them
+            plate_index.add_vehicles(inserted_vehicles)
+
+class BulkImporter:
+    """Streaming resident / vehicle import with array DML.
+
+    Onboarding a tower used to mean one POST per row, each allocating an
+    id, inserting and committing. An import instead validates rows a
+    chunk (IMPORT_CHUNK_SIZE) at a time against foreign-key maps read once
+    at the start (apartments, residents and their emails, registered
+    plates), takes the chunk's ids from the sequence blocks in one go and
+    inserts it with one executemany and one commit. Rows Oracle rejects
+    come back as batch errors and are reported with their line number
+    next to the validation failures; the rest of the chunk still commits.
+
+    Vehicles may name their owner by resident_id or by resident_email, so
+    a vehicles file can follow a residents file without knowing the new
+    ids.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.chunk_size = int(os.getenv("IMPORT_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+        self.max_errors = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+        self.imports = 0
+        self.rows_inserted = 0
+        self.rows_rejected = 0
+        self.last_import: Optional[Dict] = None
+
+    def begin(self, connection, entity: str, dry_run: bool = False) -> ImportSession:
+        if entity not in ENTITIES:
+            raise ValueError(f"Unsupported entity {entity!r}; use one of {', '.join(ENTITIES)}")
+        return ImportSession(self, connection, entity, dry_run)
+
+    def import_stream(self, connection, entity: str, fmt: str, blocks: Iterable[bytes],
+                      dry_run: bool = False) -> ImportReport:
+        """Import from an iterable of raw byte blocks (a file, a body)"""
+        parser = RowParser(fmt)
+        session = self.begin(connection, entity, dry_run)
+        for block in blocks:
+            session.add(parser.feed(block), parser.errors)
+        session.add(parser.close(), parser.errors)
+        return session.finish()
+
+    async def import_body(self, body: AsyncIterator[bytes], get_connection: Callable,
+                          release_connection: Callable, entity: str, fmt: str,
+                          dry_run: bool = False) -> ImportReport:
+        """Import an HTTP request body as it streams in.
+
+        Parsing runs on the event loop; key loading and each chunk's
+        validation and insert run in the threadpool on one connection
+        from `get_connection`, returned through `release_connection`.
+        """
+        parser = RowParser(fmt)
+        connection = await get_connection()
+        try:
+            session = await run_in_threadpool(self.begin, connection, entity, dry_run)
+            async for block in body:
+                records = parser.feed(block)
+                if records or parser.errors:
+                    await run_in_threadpool(session.add, records, parser.errors)
+            await run_in_threadpool(session.add, parser.close(), parser.errors)
+            return await run_in_threadpool(session.finish)
+        finally:
+            await release_connection(connection)
+
+    def _finished(self, report: ImportReport):
+        with self._lock:
+            self.imports += 1
+            if not report.dry_run:
+                self.rows_inserted += report.inserted
+            self.rows_rejected += report.rejected
+            self.last_import = {
+                "at": datetime.now(), "entity": report.entity, "dry_run": report.dry_run,
+                "received": report.received, "inserted": report.inserted,
+                "rejected": report.rejected, "seconds": round(report.seconds, 3),
+            }
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "chunk_size": self.chunk_size,
+                "imports": self.imports,
+                "rows_inserted": self.rows_inserted,
+                "rows_rejected": self.rows_rejected,
+                "last_import": self.last_import,
+            }
+
+# Global bulk importer instance
+bulk_importer = BulkImporter()
@@ -0,0 +1,172 @@
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import models
+from services.dates import day_start
+from services.expiry_scheduler import EXPIRING_WINDOW, expiry_scheduler
+from services.live_feed import live_feed
+from services.periodic import PeriodicTask
+
+FIELDS = (
+    "current_occupied_spaces",
+    "total_available_spaces",
+    "current_visitors",
+    "today_visitor_revenue",
+    "active_subscriptions",
+    "expiring_soon",
+)
+
+class DashboardSnapshot:
+    """In-memory copy of models.get_dashboard_stats.
+
+    Entry/exit routes apply deltas as they commit; a background task
+    recomputes everything every DASHBOARD_REFRESH_SECONDS to pick up writes
+    made outside the API. active_subscriptions / expiring_soon are read
+    from the expiry scheduler at read time (scanned by the recompute only
+    while it is not loaded), and its changes are republished on the feed.
+    Reads never touch the database once loaded.
+
+    A delta applied while a recompute's query runs is overwritten by its
+    result, which may or may not include that write; the counters can be
+    off by such writes until the next recompute, so drift is bounded by
+    DASHBOARD_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._values: Optional[Dict[str, float]] = None
+        self._revenue_day: Optional[datetime] = None
+        self.computed_at: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.incremental_updates = 0
+        self._refresher = PeriodicTask("dashboard-snapshot-refresh", self.refresh,
+                                       float(os.getenv("DASHBOARD_REFRESH_SECONDS", "60")))
+
+    # ------------------------------------------------------------------
+    # Full recompute
+    # ------------------------------------------------------------------
+    def refresh(self, connection):
+        """Recompute every counter from the database"""
+        row = models.get_dashboard_stats(connection)
+        if not expiry_scheduler.loaded:
+            row.update(models.get_subscription_counts(connection, EXPIRING_WINDOW.days))
+        values = {field: row.get(field) or 0 for field in FIELDS}
+        with self._lock:
+            self._values = values
+            self._revenue_day = day_start()
+            self.computed_at = datetime.now()
+            self.refreshes += 1
+
+    def start_refresh(self, get_connection: Callable):
+        self._refresher.start(get_connection)
+
+    def stop_refresh(self):
+        self._refresher.stop()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def read(self, get_connection: Callable) -> Dict:
+        """Return the current counters plus computed_at; loads on first use"""
+        if self._values is None:
+            self.misses += 1
+            # Concurrent first readers share one recompute
+            with self._load_lock:
+                if self._values is None:
+                    connection = get_connection()
+                    try:
+                        self.refresh(connection)
+                    finally:
+                        connection.close()
+        else:
+            self.hits += 1
+
+        with self._lock:
+            self._roll_day()
+            stats = dict(self._values)
+            stats["computed_at"] = self.computed_at
+        return self._with_schedule(stats)
+
+    def metrics(self) -> Dict:
+        staleness = (datetime.now() - self.computed_at).total_seconds() if self.computed_at else None
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "incremental_updates": self.incremental_updates,
+            "computed_at": self.computed_at,
+            "staleness_seconds": staleness,
+            "refresh_interval_seconds": self._refresher.interval,
+        }
+
+    def _with_schedule(self, stats: Dict) -> Dict:
+        # Outside self._lock: the scheduler may call back into subscriptions_changed
+        if expiry_scheduler.loaded:
+            stats.update(expiry_scheduler.counts(EXPIRING_WINDOW))
+        return stats
+
+    def _roll_day(self):
+        # Caller holds the lock; today's revenue restarts at midnight
+        today = day_start()
+        if self._revenue_day != today:
+            self._values["today_visitor_revenue"] = 0
+            self._revenue_day = today
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def _apply(self, event: str, deltas: Dict[str, float], detail: Dict = None):
+        with self._lock:
+            if self._values is None:
+                return
+            self._roll_day()
+            for field, delta in deltas.items():
+                self._values[field] += delta
+            self.incremental_updates += 1
+            stats = dict(self._values)
+        # One producer for /api/dashboard/stream: every applied delta
+        live_feed.publish(event, {
+            "delta": deltas,
+            "stats": self._with_schedule(stats),
+            "detail": detail or {},
+            "at": datetime.now(),
+        })
+
+    def current(self) -> Optional[Dict]:
+        """Counters without loading (None until the first refresh)"""
+        with self._lock:
+            if self._values is None:
+                return None
+            self._roll_day()
+            stats = dict(self._values)
+            stats["computed_at"] = self.computed_at
+        return self._with_schedule(stats)
+
+    def visitor_entered(self, spaces_taken: int = 1, count: int = 1, **detail):
+        self._apply("visitor_entry", {
+            "current_visitors": count,
+            "total_available_spaces": -spaces_taken,
+        }, detail)
+
+    def visitor_exited(self, parking_fee: float, spaces_freed: int = 1, count: int = 1, **detail):
+        self._apply("visitor_exit", {
+            "current_visitors": -count,
+            "total_available_spaces": spaces_freed,
+            "today_visitor_revenue": parking_fee or 0,
+        }, detail)
+
+    def subscriptions_changed(self, events: List):
+        """Expiry scheduler hook: republish the counters after any schedule change"""
+        detail = {}
+        for event, _, _, _ in events:
+            detail[event] = detail.get(event, 0) + 1
+        self._apply("subscription", {}, detail)
+
+# Global dashboard snapshot instance
+dashboard_snapshot = DashboardSnapshot()
+expiry_scheduler.subscribe(dashboard_snapshot.subscriptions_changed)
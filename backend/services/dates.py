@@ -0,0 +1,28 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Python equivalent of Oracle ADD_MONTHS (clamps to the month's last day)"""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+def subscription_months(subscription_type: str) -> int:
+    """Length in months of a 'monthly' / 'quarterly' / 'yearly' subscription"""
+    if subscription_type == 'monthly':
+        return 1
+    elif subscription_type == 'quarterly':
+        return 3
+    return 12
+
+def day_start(value: datetime = None) -> datetime:
+    """Midnight of the day containing `value` (default: today)"""
+    value = value or datetime.now()
+    return datetime(value.year, value.month, value.day)
+
+def month_start(value: datetime = None) -> datetime:
+    """First instant of the month containing `value` (default: this month)"""
+    value = value or datetime.now()
+    return datetime(value.year, value.month, 1)
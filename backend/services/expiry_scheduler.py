@@ -0,0 +1,328 @@
+import bisect
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from services.periodic import PeriodicTask
+from queries import EXPIRY_SCHEDULER_LOAD
+
+ADDED = "added"
+REMOVED = "removed"
+STARTED = "started"
+EXPIRED = "expired"
+
+# (event, subscription_id, vehicle_id, at)
+Event = Tuple[str, int, int, datetime]
+
+# The dashboard's expiring_soon window
+EXPIRING_WINDOW = timedelta(days=7)
+
+# (when, seq, subscription_id); seq identifies the window it was scheduled for
+Entry = Tuple[datetime, int, int]
+
+# Sorts after every (when, seq, ...) with the same `when`
+_LAST = float("inf")
+
+LOAD_ARRAYSIZE = 10000
+
+# Stale entries tolerated, as a multiple of the live windows, before a rebuild
+COMPACT_FACTOR = 2
+
+class ExpiryScheduler:
+    """In-memory schedule of every subscription that has not expired yet.
+
+    Expirations live in two tiers. Those further out than EXPIRING_WINDOW
+    sit in a min-heap; as advance() moves the window it pops them in order
+    and appends them to a sorted list holding the window itself, whose head
+    advance() then expires. Start dates that have not passed are a second
+    heap. Replacing or removing a subscription only drops it from the
+    window map: its entries go stale (their seq no longer matches) and are
+    skipped when they surface, so add(), remove() and each event cost
+    O(log n) however many subscriptions are scheduled. Only a window that
+    lands inside the next EXPIRING_WINDOW is inserted into the list
+    directly. Everything is rebuilt when stale entries pile up.
+
+    "Active now" is the live windows minus the not-started set, the
+    dashboard's expiring_soon is the size of the in-window set, and
+    /expiring within the window is a bisect of the list.
+
+    Changes are emitted to hooks registered with subscribe() as batches of
+    (event, subscription_id, vehicle_id, at) with event one of added,
+    removed, started or expired. Writers call add() / remove() after
+    committing; a reload every EXPIRY_SCHEDULER_REFRESH_SECONDS repairs
+    drift from writes made outside the API.
+    """
+
+    def __init__(self, expiring_window: timedelta = EXPIRING_WINDOW):
+        self._lock = threading.Lock()
+        self.expiring_window = expiring_window
+        self._seq = count()
+        # subscription_id -> (start_date, expiration_date, vehicle_id, seq)
+        self._windows: Dict[int, Tuple[datetime, datetime, int, int]] = {}
+        # Expiring after _horizon, soonest first
+        self._later: List[Entry] = []
+        # Expiring by _horizon, sorted; entries before _head have expired
+        self._soon: List[Entry] = []
+        self._head = 0
+        self._horizon = datetime.min
+        self._expiring: Set[int] = set()
+        # Stale entries in _soon[_head:], filtered out by the next read
+        self._soon_stale = 0
+        self._by_start: List[Entry] = []
+        self._not_started: Set[int] = set()
+        self._hooks: List[Callable[[List[Event]], None]] = []
+        self.loaded = False
+        self.loaded_at: Optional[datetime] = None
+        self.load_ms: Optional[float] = None
+        self.started = 0
+        self.expired = 0
+        self.compactions = 0
+        self._ticker = PeriodicTask("expiry-scheduler-tick", self.advance,
+                                    float(os.getenv("EXPIRY_TICK_SECONDS", "30")))
+        self._sweeper = PeriodicTask("expiry-scheduler-sweep", self.load,
+                                     float(os.getenv("EXPIRY_SCHEDULER_REFRESH_SECONDS", "3600")))
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load(self, connection):
+        """Rebuild the schedule from every subscription not yet expired"""
+        t0 = time.perf_counter()
+        cursor = connection.cursor()
+        try:
+            cursor.arraysize = LOAD_ARRAYSIZE
+            cursor.prefetchrows = LOAD_ARRAYSIZE + 1
+            EXPIRY_SCHEDULER_LOAD.execute(cursor)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        self.replace(rows)
+        self.load_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+    def replace(self, rows, now: Optional[datetime] = None):
+        """Install (subscription_id, vehicle_id, start_date, expiration_date) rows"""
+        now = now or datetime.now()
+        windows = {}
+        for subscription_id, vehicle_id, start, end in rows:
+            if end < now:
+                continue
+            windows[subscription_id] = (start, end, vehicle_id, next(self._seq))
+
+        with self._lock:
+            self._windows = windows
+            self._rebuild(now)
+            self.loaded = True
+            self.loaded_at = now
+
+    def _rebuild(self, now: datetime):
+        # Caller holds the lock; every structure from the live windows only
+        self._horizon = now + self.expiring_window
+        self._soon, self._later, self._by_start = [], [], []
+        for subscription_id, (start, end, _, seq) in self._windows.items():
+            (self._soon if end <= self._horizon else self._later).append((end, seq, subscription_id))
+            if start > now:
+                self._by_start.append((start, seq, subscription_id))
+        self._soon.sort()
+        self._head = 0
+        self._soon_stale = 0
+        heapq.heapify(self._later)
+        heapq.heapify(self._by_start)
+        self._expiring = {subscription_id for _, _, subscription_id in self._soon}
+        self._not_started = {subscription_id for _, _, subscription_id in self._by_start}
+
+    def _live(self, entry: Entry) -> bool:
+        window = self._windows.get(entry[2])
+        return window is not None and window[3] == entry[1]
+
+    def _entries(self) -> int:
+        return len(self._soon) - self._head + len(self._later) + len(self._by_start)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def add(self, subscription_id: int, vehicle_id: int, start: datetime, end: datetime):
+        """Schedule a subscription committed by the API (replaces any previous window)"""
+        now = datetime.now()
+        with self._lock:
+            self._drop(subscription_id)
+            if self.loaded and end >= now:
+                seq = next(self._seq)
+                entry = (end, seq, subscription_id)
+                self._windows[subscription_id] = (start, end, vehicle_id, seq)
+                if end <= self._horizon:
+                    # Rare (no plan is shorter than the window): O(window) insert
+                    bisect.insort(self._soon, entry, lo=self._head)
+                    self._expiring.add(subscription_id)
+                else:
+                    heapq.heappush(self._later, entry)
+                if start > now:
+                    heapq.heappush(self._by_start, (start, seq, subscription_id))
+                    self._not_started.add(subscription_id)
+                if self._entries() > COMPACT_FACTOR * len(self._windows) + LOAD_ARRAYSIZE:
+                    self._rebuild(now)
+                    self.compactions += 1
+        self._emit([(ADDED, subscription_id, vehicle_id, end)])
+
+    def remove(self, subscription_id: int, vehicle_id: Optional[int] = None):
+        with self._lock:
+            window = self._drop(subscription_id)
+        if window is not None:
+            vehicle_id = window[2]
+        self._emit([(REMOVED, subscription_id, vehicle_id, datetime.now())])
+
+    def _drop(self, subscription_id: int):
+        # Caller holds the lock; its entries go stale
+        window = self._windows.pop(subscription_id, None)
+        if window is None:
+            return None
+        if subscription_id in self._expiring:
+            self._expiring.discard(subscription_id)
+            self._soon_stale += 1
+        self._not_started.discard(subscription_id)
+        return window
+
+    # ------------------------------------------------------------------
+    # Time
+    # ------------------------------------------------------------------
+    def advance(self, now: Optional[datetime] = None) -> List[Event]:
+        """Start and expire everything `now` has passed; emits and returns the events"""
+        now = now or datetime.now()
+        events: List[Event] = []
+        with self._lock:
+            # BETWEEN start_date AND expiration_date is inclusive at both ends
+            while self._by_start and self._by_start[0][0] <= now:
+                entry = heapq.heappop(self._by_start)
+                if self._live(entry):
+                    start, _, subscription_id = entry
+                    self._not_started.discard(subscription_id)
+                    events.append((STARTED, subscription_id, self._windows[subscription_id][2], start))
+                    self.started += 1
+
+            # Popped in order and all later than the old horizon, so appending
+            # keeps the window sorted
+            self._horizon = max(self._horizon, now + self.expiring_window)
+            while self._later and self._later[0][0] <= self._horizon:
+                entry = heapq.heappop(self._later)
+                if self._live(entry):
+                    self._soon.append(entry)
+                    self._expiring.add(entry[2])
+
+            soon = self._soon
+            head = self._head
+            while head < len(soon) and soon[head][0] < now:
+                entry = soon[head]
+                head += 1
+                if self._live(entry):
+                    end, _, subscription_id = entry
+                    _, _, vehicle_id, _ = self._drop(subscription_id)
+                    events.append((EXPIRED, subscription_id, vehicle_id, end))
+                    self.expired += 1
+                # Stale either way now (_drop counted the live ones)
+                self._soon_stale -= 1
+            if head > LOAD_ARRAYSIZE and head * 2 > len(soon):
+                del soon[:head]
+                head = 0
+            self._head = head
+        if events:
+            self._emit(events)
+        return events
+
+    def start(self, get_connection: Callable):
+        """Advance every EXPIRY_TICK_SECONDS and reload every EXPIRY_SCHEDULER_REFRESH_SECONDS"""
+        self._ticker.start()
+        self._sweeper.start(get_connection)
+
+    def stop(self):
+        self._ticker.stop()
+        self._sweeper.stop()
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+    def subscribe(self, hook: Callable[[List[Event]], None]):
+        """Call `hook(events)` with every batch of schedule changes"""
+        self._hooks.append(hook)
+
+    def _emit(self, events: List[Event]):
+        for hook in self._hooks:
+            try:
+                hook(events)
+            except Exception as e:
+                print(f"⚠️ Expiry hook {getattr(hook, '__qualname__', hook)} failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def active_count(self) -> int:
+        """Subscriptions with start_date <= now <= expiration_date"""
+        self.advance()
+        with self._lock:
+            return len(self._windows) - len(self._not_started)
+
+    def _expiring_by(self, until: datetime) -> List[Entry]:
+        # Caller holds the lock and has advanced to now; soonest first
+        if self._soon_stale:
+            self._soon[self._head:] = [entry for entry in self._soon[self._head:] if self._live(entry)]
+            self._soon_stale = 0
+        if until <= self._horizon:
+            return self._soon[self._head:bisect.bisect_right(self._soon, (until, _LAST), lo=self._head)]
+        later = sorted(entry for entry in self._later if entry[0] <= until and self._live(entry))
+        return self._soon[self._head:] + later
+
+    def expiring_count(self, within: timedelta) -> int:
+        """Subscriptions with now <= expiration_date <= now + within"""
+        now = datetime.now()
+        self.advance(now)
+        with self._lock:
+            if within == self.expiring_window:
+                return len(self._expiring)
+            return len(self._expiring_by(now + within))
+
+    def expiring_ids(self, within: timedelta) -> List[int]:
+        """Ids expiring within `within`, soonest first"""
+        now = datetime.now()
+        self.advance(now)
+        with self._lock:
+            return [subscription_id for _, _, subscription_id in self._expiring_by(now + within)]
+
+    def counts(self, expiring_within: timedelta) -> Dict[str, int]:
+        """The dashboard's active_subscriptions / expiring_soon"""
+        now = datetime.now()
+        self.advance(now)
+        with self._lock:
+            return {
+                "active_subscriptions": len(self._windows) - len(self._not_started),
+                "expiring_soon": (len(self._expiring) if expiring_within == self.expiring_window
+                                  else len(self._expiring_by(now + expiring_within))),
+            }
+
+    def __len__(self):
+        return len(self._windows)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            upcoming = next((entry[0] for entry in self._soon[self._head:] if self._live(entry)), None)
+            while upcoming is None and self._later and not self._live(self._later[0]):
+                heapq.heappop(self._later)
+            if upcoming is None and self._later:
+                upcoming = self._later[0][0]
+            return {
+                "loaded": self.loaded,
+                "loaded_at": self.loaded_at,
+                "load_ms": self.load_ms,
+                "scheduled": len(self._windows),
+                "not_started": len(self._not_started),
+                "expiring_soon": len(self._expiring),
+                "entries": self._entries(),
+                "compactions": self.compactions,
+                "started": self.started,
+                "expired": self.expired,
+                "next_expiration": upcoming,
+            }
+
+# Global expiry scheduler instance
+expiry_scheduler = ExpiryScheduler()
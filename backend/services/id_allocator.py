@@ -0,0 +1,79 @@
+import threading
+from typing import Dict, List
+
+from queries import SEQUENCE_INCREMENT, nextval
+
+# Table -> sequence created by migrations/001_id_sequences.sql
+SEQUENCES = {
+    "Resident": "Resident_seq",
+    "Vehicle": "Vehicle_seq",
+    "ParkingSubscription": "ParkingSubscription_seq",
+    "VisitorParkingRecord": "VisitorParkingRecord_seq",
+    "Supervisor": "Supervisor_seq",
+    "SupervisionShift": "SupervisionShift_seq",
+}
+
+class _Block:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next = 0
+        self.limit = 0  # exclusive
+        self.size = 0
+
+class IdAllocator:
+    """Hands out primary keys from sequence-reserved blocks held in memory.
+
+    Each sequence increments by the block size, so one NEXTVAL reserves
+    [value, value + increment_by) for this process alone: ids never collide
+    across threads, workers or hosts, and only one in every block_size
+    inserts pays a round trip to refill.
+    """
+
+    def __init__(self, sequences: Dict[str, str] = None):
+        self.sequences = dict(sequences or SEQUENCES)
+        self._blocks: Dict[str, _Block] = {table: _Block() for table in self.sequences}
+        self.refills = 0
+
+    def next_id(self, connection, table: str) -> int:
+        """Return the next unused id for `table`"""
+        block = self._blocks[table]
+        with block.lock:
+            if block.next >= block.limit:
+                self._refill(connection, table, block)
+            new_id = block.next
+            block.next += 1
+            return new_id
+
+    def next_ids(self, connection, table: str, count: int) -> List[int]:
+        """Return `count` unused ids for `table` (for batch inserts)"""
+        block = self._blocks[table]
+        ids = []
+        with block.lock:
+            while len(ids) < count:
+                if block.next >= block.limit:
+                    self._refill(connection, table, block)
+                take = min(count - len(ids), block.limit - block.next)
+                ids.extend(range(block.next, block.next + take))
+                block.next += take
+        return ids
+
+    def _refill(self, connection, table: str, block: _Block):
+        sequence = self.sequences[table]
+        cursor = connection.cursor()
+        try:
+            if not block.size:
+                SEQUENCE_INCREMENT.execute(cursor, {"name": sequence.upper()})
+                row = cursor.fetchone()
+                if not row:
+                    raise RuntimeError(f"Sequence {sequence} not found; run migrations/001_id_sequences.sql")
+                block.size = int(row[0])
+            nextval(sequence).execute(cursor)
+            start = int(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+        block.next = start
+        block.limit = start + block.size
+        self.refills += 1
+
+# Global id allocator instance
+id_allocator = IdAllocator()
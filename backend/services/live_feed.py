@@ -0,0 +1,80 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 256
+
+def encode_event(event: str, payload: Dict) -> bytes:
+    """Format one Server-Sent Events frame"""
+    data = json.dumps(payload, default=str, separators=(",", ":"))
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+class LiveFeed:
+    """Fans dashboard deltas out to every connected stream subscriber.
+
+    Producers (route handlers running in worker threads) call publish();
+    the frame is encoded once and handed to each event loop with a single
+    call_soon_threadsafe, which then pushes it onto every subscriber queue
+    on that loop. Every frame carries the full counters, so a subscriber
+    that falls behind only drops intermediate frames, never state.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: Dict[asyncio.AbstractEventLoop, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._queues.values())
+
+    def publish(self, event: str, payload: Dict):
+        frame = encode_event(event, payload)
+        self.published += 1
+        with self._lock:
+            targets = list(self._queues.items())
+        for loop, queues in targets:
+            try:
+                loop.call_soon_threadsafe(self._fan_out, queues, frame)
+            except RuntimeError:
+                # Loop already closed
+                pass
+
+    def _fan_out(self, queues: Set[asyncio.Queue], frame: bytes):
+        for queue in list(queues):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(frame)
+
+    async def subscribe(self, first_frame: Optional[bytes] = None):
+        """Async iterator of SSE frames for one subscriber"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        with self._lock:
+            self._queues.setdefault(loop, set()).add(queue)
+        try:
+            if first_frame:
+                yield first_frame
+            while True:
+                if not queue.empty():
+                    yield queue.get_nowait()
+                    continue
+                try:
+                    yield await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            with self._lock:
+                queues = self._queues.get(loop)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self._queues[loop]
+
+# Global live feed instance
+live_feed = LiveFeed()
@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from services.periodic import PeriodicTask
+from queries import OPEN_SESSIONS_CLOCK, OPEN_SESSIONS_RESIDENTS, OPEN_SESSIONS_VISITORS, Query
+
+LOAD_ARRAYSIZE = 10000
+
+class VisitorSession(NamedTuple):
+    record_id: int
+    space_id: int
+    license_plate: str
+    arrival_time: datetime
+
+# ("entered", VisitorSession) | ("exited", record_id), replayed after a load
+Change = Tuple[str, object]
+
+class OpenSessions:
+    """Process-local index of the stays that are open right now.
+
+    Open visitor records are held by record_id, by plate and by space; open
+    resident ParkingRecords by space. The exit path finds a plate's stay
+    with a dict lookup, /api/visitors/active lists what is parked and the
+    counts are len(), so their cost follows the cars parked rather than
+    the history in the record tables.
+
+    Visitor routes call entered() / exited() after committing. Resident
+    records are written outside the API and, like writes from other
+    workers, are picked up by the reload every OPEN_SESSIONS_REFRESH_SECONDS
+    from the session tables of migrations/008. Each load also reads the
+    database clock: exits served from memory are priced at now() on that
+    clock, as the SYSTIMESTAMP lookup they replace was.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._visitors: Dict[int, VisitorSession] = {}
+        self._by_plate: Dict[str, Set[int]] = {}
+        self._by_space: Dict[int, Set[int]] = {}
+        self._residents: Dict[int, int] = {}
+        self._resident_spaces: Dict[int, int] = {}
+        # Changes committed while a load is in flight, replayed onto its result
+        self._pending: Optional[List[Change]] = None
+        self._clock_offset = timedelta(0)
+        self.loaded = False
+        self.loaded_at: Optional[datetime] = None
+        self.load_ms: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self._sweeper = PeriodicTask("open-sessions-sweep", self.load,
+                                     float(os.getenv("OPEN_SESSIONS_REFRESH_SECONDS", "60")))
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _read(self, connection, query: Query):
+        cursor = connection.cursor()
+        try:
+            cursor.arraysize = LOAD_ARRAYSIZE
+            query.execute(cursor)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def load(self, connection):
+        """Rebuild the index from OpenVisitorSession / OpenParkingSession"""
+        t0 = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        try:
+            before = datetime.now()
+            db_now = self._read(connection, OPEN_SESSIONS_CLOCK)[0][0]
+            # The database read its clock about halfway through the round trip
+            clock_offset = db_now - (before + (datetime.now() - before) / 2)
+            visitor_rows = self._read(connection, OPEN_SESSIONS_VISITORS)
+            resident_rows = self._read(connection, OPEN_SESSIONS_RESIDENTS)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        visitors: Dict[int, VisitorSession] = {}
+        by_plate: Dict[str, Set[int]] = {}
+        by_space: Dict[int, Set[int]] = {}
+        for row in visitor_rows:
+            session = VisitorSession(*row)
+            visitors[session.record_id] = session
+            by_plate.setdefault(session.license_plate, set()).add(session.record_id)
+            by_space.setdefault(session.space_id, set()).add(session.record_id)
+        residents: Dict[int, int] = {}
+        resident_spaces: Dict[int, int] = {}
+        for record_id, space_id in resident_rows:
+            residents[record_id] = space_id
+            resident_spaces[space_id] = resident_spaces.get(space_id, 0) + 1
+
+        with self._lock:
+            self._visitors = visitors
+            self._by_plate = by_plate
+            self._by_space = by_space
+            for change, value in self._pending:
+                if change == "entered":
+                    self._add(value)
+                else:
+                    self._remove(value)
+            self._pending = None
+            self._residents = residents
+            self._resident_spaces = resident_spaces
+            self._clock_offset = clock_offset
+            self.loaded = True
+            self.loaded_at = datetime.now()
+        self.load_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+    def start_reconciliation(self, get_connection: Callable):
+        """Reload the whole index every OPEN_SESSIONS_REFRESH_SECONDS"""
+        self._sweeper.start(get_connection)
+
+    def stop_reconciliation(self):
+        self._sweeper.stop()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _add(self, session: VisitorSession):
+        # Caller holds the lock
+        self._remove(session.record_id)
+        self._visitors[session.record_id] = session
+        self._by_plate.setdefault(session.license_plate, set()).add(session.record_id)
+        self._by_space.setdefault(session.space_id, set()).add(session.record_id)
+
+    def _remove(self, record_id: int):
+        # Caller holds the lock
+        session = self._visitors.pop(record_id, None)
+        if session is None:
+            return
+        for index, key in ((self._by_plate, session.license_plate), (self._by_space, session.space_id)):
+            records = index[key]
+            records.discard(record_id)
+            if not records:
+                del index[key]
+
+    def entered(self, record_id: int, space_id: int, license_plate: str,
+                arrival_time: Optional[datetime] = None):
+        """A committed visitor entry; arrival_time defaults to now() until the next load"""
+        session = VisitorSession(record_id, space_id, license_plate, arrival_time or self.now())
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("entered", session))
+            self._add(session)
+
+    def exited(self, record_id: int):
+        """A committed visitor exit, or a stay found closed by another worker"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("exited", record_id))
+            self._remove(record_id)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def now(self) -> datetime:
+        """The database clock as of the last load"""
+        return datetime.now() + self._clock_offset
+
+    def find(self, license_plate: str) -> Optional[VisitorSession]:
+        """The plate's oldest open stay, or None if this worker does not hold one"""
+        with self._lock:
+            records = self._by_plate.get(license_plate)
+            if not records:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return min((self._visitors[r] for r in records), key=lambda s: (s.arrival_time, s.record_id))
+
+    def visitors(self, space_id: Optional[int] = None) -> List[Dict]:
+        """Open visitor stays as ACTIVE_VISITORS rows, newest first"""
+        with self._lock:
+            if space_id is None:
+                sessions = list(self._visitors.values())
+            else:
+                sessions = [self._visitors[r] for r in self._by_space.get(space_id, ())]
+        sessions.sort(key=lambda s: (s.arrival_time, s.record_id), reverse=True)
+        return [dict(s._asdict(), parking_fee=0) for s in sessions]
+
+    def counts(self) -> Dict[str, int]:
+        """current_occupied_spaces / current_visitors, as in DASHBOARD_STATS"""
+        with self._lock:
+            return {"current_occupied_spaces": len(self._residents), "current_visitors": len(self._visitors)}
+
+    def occupied(self, space_id: int) -> Dict[str, int]:
+        """Open visitor and resident stays in one space"""
+        with self._lock:
+            return {
+                "visitors": len(self._by_space.get(space_id, ())),
+                "residents": self._resident_spaces.get(space_id, 0),
+            }
+
+    def __len__(self):
+        return len(self._visitors)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "visitors": len(self._visitors),
+                "residents": len(self._residents),
+                "plates": len(self._by_plate),
+                "spaces": len(self._by_space.keys() | self._resident_spaces.keys()),
+                "exit_lookups": {"hits": self.hits, "misses": self.misses},
+                "clock_offset_ms": round(self._clock_offset.total_seconds() * 1000, 2),
+                "loaded": self.loaded,
+                "loaded_at": self.loaded_at,
+                "load_ms": self.load_ms,
+                "refresh_interval_seconds": self._sweeper.interval,
+            }
+
+# Global open sessions instance
+open_sessions = OpenSessions()
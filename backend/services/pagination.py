@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Keyset (seek) pagination: a page ends with the sort key of its last row and
+# the next page starts strictly after it, so every page is an index range
+# scan of `limit` rows no matter how deep it is.
+#
+# The token handed to clients is opaque: base64url of {"k": keys, "v": values}
+# with datetimes tagged so they round-trip with their type.
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+def _decode_value(value: Any):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+def encode_cursor(keys: Sequence[str], values: Sequence[Any]) -> str:
+    payload = json.dumps({"k": list(keys), "v": [_encode_value(v) for v in values]},
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token: Optional[str], keys: Sequence[str]) -> Optional[Tuple]:
+    """Sort-key values encoded in `token`, or None for the first page.
+
+    Raises ValueError for a malformed token or one issued by another listing.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = tuple(_decode_value(v) for v in payload["v"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if payload.get("k") != list(keys) or len(values) != len(keys):
+        raise ValueError("Cursor does not belong to this listing")
+    return values
+
+def next_cursor(rows: List[Dict], limit: int, keys: Sequence[str]) -> Optional[str]:
+    """Cursor for the page after `rows`; None once a short page shows the end"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(keys, [last[k] for k in keys])
@@ -0,0 +1,46 @@
+import threading
+from typing import Callable, Optional
+
+class PeriodicTask:
+    """Runs `fn(connection)` every `interval` seconds in a daemon thread.
+
+    Each run acquires its own connection via `get_connection` and closes it
+    afterwards (started without one, `fn()` is called with no arguments);
+    failures are logged and retried on the next tick.
+    """
+
+    def __init__(self, name: str, fn: Callable, interval: float):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, get_connection: Optional[Callable] = None):
+        if self._thread or self.interval <= 0:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                connection = None
+                try:
+                    if get_connection is None:
+                        self.fn()
+                    else:
+                        connection = get_connection()
+                        self.fn(connection)
+                except Exception as e:
+                    print(f"⚠️ {self.name} failed: {e}")
+                finally:
+                    if connection:
+                        connection.close()
+
+        self._thread = threading.Thread(target=loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
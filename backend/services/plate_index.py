@@ -0,0 +1,152 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from services.periodic import PeriodicTask
+from queries import PLATE_INDEX_LOAD, PLATE_INDEX_VEHICLE, Query
+
+# Status payloads returned to the barrier; kept identical to models.validate_resident_entry
+BARRIER_OPEN = {"status": "BARRIER_OPEN", "message": "Welcome! Barrier opened."}
+SUBSCRIPTION_EXPIRED = {"status": "SUBSCRIPTION_EXPIRED", "message": "Subscription expired. Please renew."}
+VEHICLE_NOT_REGISTERED = {"status": "VEHICLE_NOT_REGISTERED", "message": "Vehicle not registered."}
+
+Window = Tuple[int, datetime, datetime]
+
+class PlateIndex:
+    """Process-local map of license plate -> (vehicle_id, subscription windows)
+
+    Answers barrier validation without a database round trip. Writers call
+    refresh_vehicle / add_subscription / remove_* after committing; a background sweep reloads
+    the whole index periodically to repair any drift.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plates: Dict[str, int] = {}
+        self._vehicle_plate: Dict[int, str] = {}
+        self._windows: Dict[int, List[Window]] = {}
+        self._sub_vehicle: Dict[int, int] = {}
+        self.loaded = False
+        self.loaded_at: Optional[datetime] = None
+        self._sweeper = PeriodicTask("plate-index-sweep", self.load,
+                                     float(os.getenv("PLATE_INDEX_REFRESH_SECONDS", "300")))
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _read(self, connection, query: Query, params: dict = None):
+        cursor = connection.cursor()
+        try:
+            query.execute(cursor, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def load(self, connection):
+        """Rebuild the whole index from the database"""
+        plates: Dict[str, int] = {}
+        vehicle_plate: Dict[int, str] = {}
+        windows: Dict[int, List[Window]] = {}
+        sub_vehicle: Dict[int, int] = {}
+        for vehicle_id, plate, sub_id, start, end in self._read(connection, PLATE_INDEX_LOAD):
+            plates[plate] = vehicle_id
+            vehicle_plate[vehicle_id] = plate
+            if sub_id is not None:
+                windows.setdefault(vehicle_id, []).append((sub_id, start, end))
+                sub_vehicle[sub_id] = vehicle_id
+
+        with self._lock:
+            self._plates = plates
+            self._vehicle_plate = vehicle_plate
+            self._windows = windows
+            self._sub_vehicle = sub_vehicle
+            self.loaded = True
+            self.loaded_at = datetime.now()
+
+    def refresh_vehicle(self, connection, vehicle_id: int):
+        """Re-read a single vehicle and its windows after a write"""
+        try:
+            rows = self._read(connection, PLATE_INDEX_VEHICLE, {"vehicle_id": vehicle_id})
+        except Exception as e:
+            print(f"⚠️ Plate index refresh failed for vehicle {vehicle_id}: {e}")
+            return
+
+        with self._lock:
+            self._drop_vehicle(vehicle_id)
+            for _, plate, sub_id, start, end in rows:
+                self._plates[plate] = vehicle_id
+                self._vehicle_plate[vehicle_id] = plate
+                if sub_id is not None:
+                    self._windows.setdefault(vehicle_id, []).append((sub_id, start, end))
+                    self._sub_vehicle[sub_id] = vehicle_id
+
+    def add_vehicles(self, vehicles: List[Tuple[int, str]]):
+        """Add committed (vehicle_id, plate) pairs that have no subscriptions yet"""
+        with self._lock:
+            for vehicle_id, plate in vehicles:
+                self._plates[plate] = vehicle_id
+                self._vehicle_plate[vehicle_id] = plate
+
+    def add_subscription(self, vehicle_id: int, subscription_id: int, start: datetime, end: datetime):
+        """Add a committed subscription's window (dates from its RETURNING clause)"""
+        with self._lock:
+            if vehicle_id not in self._vehicle_plate:
+                return
+            windows = [w for w in self._windows.get(vehicle_id, []) if w[0] != subscription_id]
+            windows.append((subscription_id, start, end))
+            self._windows[vehicle_id] = windows
+            self._sub_vehicle[subscription_id] = vehicle_id
+
+    def remove_vehicle(self, vehicle_id: int):
+        with self._lock:
+            self._drop_vehicle(vehicle_id)
+
+    def remove_subscription(self, subscription_id: int):
+        with self._lock:
+            vehicle_id = self._sub_vehicle.pop(subscription_id, None)
+            if vehicle_id is None:
+                return
+            remaining = [w for w in self._windows.get(vehicle_id, []) if w[0] != subscription_id]
+            if remaining:
+                self._windows[vehicle_id] = remaining
+            else:
+                self._windows.pop(vehicle_id, None)
+
+    def _drop_vehicle(self, vehicle_id: int):
+        # Caller holds the lock
+        plate = self._vehicle_plate.pop(vehicle_id, None)
+        if plate is not None and self._plates.get(plate) == vehicle_id:
+            del self._plates[plate]
+        for sub_id, _, _ in self._windows.pop(vehicle_id, []):
+            self._sub_vehicle.pop(sub_id, None)
+
+    # ------------------------------------------------------------------
+    # Gate path
+    # ------------------------------------------------------------------
+    def validate(self, license_plate: str, now: Optional[datetime] = None) -> Dict:
+        """Validate a plate against the in-memory index"""
+        vehicle_id = self._plates.get(license_plate)
+        if vehicle_id is None:
+            return VEHICLE_NOT_REGISTERED
+        now = now or datetime.now()
+        for _, start, end in self._windows.get(vehicle_id, ()):
+            if start <= now <= end:
+                return BARRIER_OPEN
+        return SUBSCRIPTION_EXPIRED
+
+    def __len__(self):
+        return len(self._plates)
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    def start_reconciliation(self, get_connection):
+        """Reload the whole index every PLATE_INDEX_REFRESH_SECONDS"""
+        self._sweeper.start(get_connection)
+
+    def stop_reconciliation(self):
+        self._sweeper.stop()
+
+# Global plate index instance
+plate_index = PlateIndex()
@@ -0,0 +1,131 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+from services.periodic import PeriodicTask
+
+# Fewer acquires than this in a window say nothing about the right size
+MIN_SAMPLES = 20
+
+# Grow when this share of acquires waited (or any timed out) at full busy
+GROW_WAIT_RATIO = 0.05
+
+# Shrink when nothing waited and the busiest moment used under this share
+SHRINK_BUSY_RATIO = 0.5
+
+# A grow that raised the average hold time by this factor without raising
+# throughput by MIN_GAIN means the database, not the pool, is the bottleneck
+HOLD_GROWTH_LIMIT = 1.25
+MIN_GAIN = 1.05
+
+# Ticks the backed-out size stays the limit for further grows; load
+# changes, so the sizer probes again afterwards
+HOLD_OFF_TICKS = 40
+
+class PoolSizer:
+    """Adaptive max for the primary pool (DB_POOL_ADAPTIVE=1).
+
+    Every DB_POOL_ADAPT_SECONDS it reads the pool's window (see
+    NamedPool.take_window): if requests queued for a connection while every
+    connection was busy, max grows by half up to the ceiling; if nothing
+    waited and at most half the pool was busy, max shrinks by one down to
+    the floor. More connections only help while the database has room for
+    them, so when a grow makes requests hold their connection longer
+    without serving more of them per second, the grow is backed out and
+    the size it came from caps further grows for HOLD_OFF_TICKS ticks.
+
+    Only sync pools can be resized (oracledb 2.0 has no reconfigure() on
+    asyncio pools), so app.py does not start the sizer in async mode.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.named = None
+        self.floor = int(os.getenv("DB_POOL_ADAPTIVE_MIN", "4"))
+        self.ticks = 0
+        # (max, ticks left) learned from the last backed-out grow
+        self.cap: Optional[int] = None
+        self.cap_ticks = 0
+        self.last_grow: Optional[Dict] = None
+        self.decisions = deque(maxlen=20)
+        self._task = PeriodicTask("pool-sizer", self.tick, float(os.getenv("DB_POOL_ADAPT_SECONDS", "15")))
+
+    def _decide(self, window: Dict, current: int) -> Optional[tuple]:
+        """(new max, reason), or None to keep the size"""
+        named = self.named
+        floor = max(self.floor, named.min, 1)
+        acquires = window["acquires"]
+        if acquires < MIN_SAMPLES and not window["timeouts"]:
+            return None
+        wait_ratio = window["waits"] / acquires if acquires else 1.0
+        avg_hold = window["hold_ms"] / window["holds"] if window["holds"] else None
+        rate = window["holds"] / window["seconds"] if window["seconds"] else 0.0
+
+        last_grow, self.last_grow = self.last_grow, None
+        if last_grow and avg_hold and last_grow["avg_hold"]:
+            if (avg_hold > last_grow["avg_hold"] * HOLD_GROWTH_LIMIT
+                    and rate < last_grow["rate"] * MIN_GAIN):
+                self.cap, self.cap_ticks = last_grow["from"], HOLD_OFF_TICKS
+                return last_grow["from"], (f"hold {last_grow['avg_hold']:.1f} -> {avg_hold:.1f} ms, "
+                                           f"{last_grow['rate']:.0f} -> {rate:.0f} req/s; backing out")
+
+        if self.cap_ticks:
+            self.cap_ticks -= 1
+        limit = min(named.ceiling, self.cap) if self.cap_ticks else named.ceiling
+        saturated = window["peak_busy"] >= current
+        if (wait_ratio >= GROW_WAIT_RATIO or window["timeouts"]) and saturated and current < limit:
+            new_max = min(limit, current + max(1, current // 2))
+            self.last_grow = {"from": current, "avg_hold": avg_hold, "rate": rate}
+            return new_max, f"{wait_ratio:.0%} of acquires waited, {window['timeouts']} timed out"
+        if not window["waits"] and window["peak_busy"] <= current * SHRINK_BUSY_RATIO and current > floor:
+            return current - 1, f"peak busy {window['peak_busy']} of {current}"
+        return None
+
+    def tick(self) -> Optional[Dict]:
+        """Look at the last window and resize the pool if it calls for it"""
+        named = self.named
+        if named is None or named.pool is None:
+            return None
+        window = named.take_window()
+        with self._lock:
+            self.ticks += 1
+            current = named.max
+            decision = self._decide(window, current)
+            if decision is None:
+                return None
+            new_max, reason = decision
+        named.resize(new_max)
+        entry = {"at": datetime.now(), "from": current, "to": new_max, "reason": reason,
+                 "acquires": window["acquires"], "waits": window["waits"],
+                 "peak_busy": window["peak_busy"]}
+        with self._lock:
+            self.decisions.append(entry)
+        print(f"🔧 Pool {named.name} max {current} -> {new_max}: {reason}")
+        return entry
+
+    def start(self, named):
+        """Size `named` (a db.connect.NamedPool) from now on"""
+        self.named = named
+        self._task.start()
+
+    def stop(self):
+        self._task.stop()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            named = self.named
+            return {
+                "enabled": named is not None,
+                "pool": named.name if named else None,
+                "max": named.max if named else None,
+                "floor": self.floor,
+                "ceiling": named.ceiling if named else None,
+                "ticks": self.ticks,
+                "grow_cap": self.cap if self.cap_ticks else None,
+                "decisions": list(self.decisions),
+            }
+
+# Global pool sizer instance
+pool_sizer = PoolSizer()
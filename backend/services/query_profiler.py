@@ -0,0 +1,205 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Adhoc SQL texts remembered with their normalized form
+NORMALIZED_CACHE_SIZE = 512
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+def normalize_sql(sql: str) -> str:
+    """Statement shape of adhoc SQL: literals become ?, whitespace collapses"""
+    return _SPACES.sub(" ", _LITERALS.sub("?", sql)).strip()[:200]
+
+def bind_size(params, many: bool = False) -> tuple:
+    """(bind count, approximate bytes) of a bind dict, or of a row list
+    with `many`; array binds are estimated from their first row"""
+    if not params:
+        return 0, 0
+    rows = len(params) if many else 1
+    first = params[0] if many else params
+    values = first.values() if isinstance(first, dict) else first
+    count = size = 0
+    for value in values:
+        count += 1
+        if isinstance(value, (str, bytes)):
+            size += len(value)
+        elif value is not None:
+            # NUMBER / DATE / out variables
+            size += 8
+    return count * rows, size * rows
+
+class StatementProfile:
+    __slots__ = ("name", "executions", "errors", "exec_ms", "fetch_ms", "max_ms",
+                 "rows", "max_rows", "binds", "bind_bytes", "max_bind_bytes")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executions = 0
+        self.errors = 0
+        self.exec_ms = 0.0
+        self.fetch_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.max_rows = 0
+        self.binds = 0
+        self.bind_bytes = 0
+        self.max_bind_bytes = 0
+
+    def as_dict(self) -> Dict:
+        n = self.executions or 1
+        return {
+            "statement": self.name,
+            "executions": self.executions,
+            "errors": self.errors,
+            "total_ms": round(self.exec_ms + self.fetch_ms, 2),
+            "avg_exec_ms": round(self.exec_ms / n, 3),
+            "avg_fetch_ms": round(self.fetch_ms / n, 3),
+            "max_ms": round(self.max_ms, 2),
+            "avg_rows": round(self.rows / n, 1),
+            "max_rows": self.max_rows,
+            "avg_binds": round(self.binds / n, 1),
+            "avg_bind_bytes": round(self.bind_bytes / n),
+            "max_bind_bytes": self.max_bind_bytes,
+        }
+
+class QueryProfiler:
+    """Execute / fetch time, rows and bind sizes per statement.
+
+    models.execute_query, execute_update and UnitOfWork report every
+    statement they run through record(): named queries under their
+    registry name, adhoc SQL under its normalized text. Besides the
+    per-statement totals it keeps, for each minute, the QUERY_SLOW_TOP
+    slowest single executions; slowest() merges the minutes of the last
+    QUERY_SLOW_WINDOW_MINUTES into a rolling top-N. With QUERY_SPANS=1 and
+    opentelemetry installed, each execution is also emitted as a client
+    span under the current trace.
+
+    record() takes one lock and only builds a slow-log entry when the
+    execution beats the slowest-so-far of its minute, which keeps the cost
+    to a few microseconds per statement (benchmarks/bench_query_profiler.py).
+    QUERY_PROFILING=0 turns it off.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = os.getenv("QUERY_PROFILING", "1") == "1"
+        self.top_n = int(os.getenv("QUERY_SLOW_TOP", "20"))
+        self.window_minutes = int(os.getenv("QUERY_SLOW_WINDOW_MINUTES", "15"))
+        self._statements: Dict[str, StatementProfile] = {}
+        self._normalized: Dict[str, str] = {}
+        # (minute, heap of (total_ms, seq, entry)), oldest first
+        self._minutes = deque()
+        self._seq = itertools.count()
+        self._tracer = self._load_tracer() if os.getenv("QUERY_SPANS", "0") == "1" else None
+
+    @staticmethod
+    def _load_tracer():
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            print("⚠️ QUERY_SPANS=1 but opentelemetry is not installed; no query spans")
+            return None
+        return trace.get_tracer("parking.db")
+
+    def statement_name(self, query: str) -> str:
+        name = getattr(query, "name", None)
+        if name is not None:
+            return name
+        normalized = self._normalized.get(query)
+        if normalized is None:
+            normalized = normalize_sql(query)
+            if len(self._normalized) < NORMALIZED_CACHE_SIZE:
+                self._normalized[query] = normalized
+        return normalized
+
+    def record(self, query: str, params, exec_ms: float, fetch_ms: float = 0.0,
+               rows: int = 0, failed: bool = False, many: bool = False):
+        """Account one execution of `query` (params as bound)"""
+        if not self.enabled:
+            return
+        name = self.statement_name(query)
+        binds, bind_bytes = bind_size(params, many)
+        total_ms = exec_ms + fetch_ms
+        minute = int(time.time() // 60)
+        with self._lock:
+            profile = self._statements.get(name)
+            if profile is None:
+                profile = self._statements[name] = StatementProfile(name)
+            profile.executions += 1
+            profile.exec_ms += exec_ms
+            profile.fetch_ms += fetch_ms
+            profile.rows += rows
+            profile.binds += binds
+            profile.bind_bytes += bind_bytes
+            if failed:
+                profile.errors += 1
+            if total_ms > profile.max_ms:
+                profile.max_ms = total_ms
+            if rows > profile.max_rows:
+                profile.max_rows = rows
+            if bind_bytes > profile.max_bind_bytes:
+                profile.max_bind_bytes = bind_bytes
+
+            if not self._minutes or self._minutes[-1][0] != minute:
+                self._minutes.append((minute, []))
+                while self._minutes[0][0] <= minute - self.window_minutes:
+                    self._minutes.popleft()
+            heap = self._minutes[-1][1]
+            if len(heap) < self.top_n or total_ms > heap[0][0]:
+                entry = {"statement": name, "at": datetime.now(), "total_ms": round(total_ms, 2),
+                         "exec_ms": round(exec_ms, 2), "fetch_ms": round(fetch_ms, 2),
+                         "rows": rows, "binds": binds, "bind_bytes": bind_bytes, "failed": failed}
+                item = (total_ms, next(self._seq), entry)
+                if len(heap) < self.top_n:
+                    heapq.heappush(heap, item)
+                else:
+                    heapq.heapreplace(heap, item)
+
+        if self._tracer is not None:
+            self._emit_span(name, exec_ms, fetch_ms, rows, binds, failed)
+
+    def _emit_span(self, name: str, exec_ms: float, fetch_ms: float, rows: int, binds: int, failed: bool):
+        end_ns = time.time_ns()
+        span = self._tracer.start_span(
+            f"db {name}", start_time=end_ns - int((exec_ms + fetch_ms) * 1e6),
+            attributes={"db.system": "oracle", "db.statement.name": name,
+                        "db.exec_ms": exec_ms, "db.fetch_ms": fetch_ms,
+                        "db.rows": rows, "db.binds": binds})
+        if failed:
+            from opentelemetry.trace import Status, StatusCode
+            span.set_status(Status(StatusCode.ERROR))
+        span.end(end_time=end_ns)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def slowest(self, limit: Optional[int] = None, minutes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The slowest single executions of the last `minutes` (default: the window)"""
+        limit = limit or self.top_n
+        since = int(time.time() // 60) - (minutes or self.window_minutes)
+        with self._lock:
+            items = [item for minute, heap in self._minutes if minute > since for item in heap]
+        return [entry for _, _, entry in heapq.nlargest(limit, items)]
+
+    def stats(self, sort: str = "total_ms", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-statement totals, largest `sort` first"""
+        with self._lock:
+            rows = [profile.as_dict() for profile in self._statements.values()]
+        rows.sort(key=lambda r: r.get(sort) or 0, reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._minutes.clear()
+
+# Global query profiler instance
+query_profiler = QueryProfiler()
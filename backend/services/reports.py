@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import oracledb
+
+import queries
+from services.dates import add_months, month_start
+from services.periodic import PeriodicTask
+from services.transactions import transaction_stats
+
+WATERMARK = "reports"
+
+def months_between(start: datetime, end: datetime) -> List[datetime]:
+    """First days of the months from start's to end's, both included"""
+    months = []
+    month = month_start(start)
+    while month <= end:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+class FinancialReports:
+    """Writes SupervisorFinancialReport / ManagerFinancialReport (migrations/009).
+
+    A month's reports are always recomputed whole from its source rows:
+    checked-out shifts by month of check_in_time for supervisors, and
+    subscriptions by month of start_date for the manager of the resident's
+    building. Rows with nothing left behind them are deleted and the rest
+    merged on (month, id), so recomputing a month any number of times, from
+    any worker, leaves the same rows.
+
+    Every REPORTS_REFRESH_SECONDS the refresh locks the 'reports' watermark
+    (as services/rollups.py does its own), recomputes the months touched by
+    check-outs and sales in [high_water, now - lag) plus the current month,
+    and advances the watermark in the same transaction. backfill() recomputes
+    a range of months in parallel, one connection and one transaction per
+    month, for history that predates the watermark.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backfilling = threading.Lock()
+        self.lag_seconds = int(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+        self.backfill_workers = int(os.getenv("REPORT_BACKFILL_WORKERS", "4"))
+        self.pay = {
+            "base_salary": int(os.getenv("REPORT_SUPERVISOR_BASE_SALARY", "5000000")),
+            "shift_pay": int(os.getenv("REPORT_SUPERVISOR_SHIFT_PAY", "250000")),
+            "manager_base_salary": int(os.getenv("REPORT_MANAGER_BASE_SALARY", "10000000")),
+            "commission": float(os.getenv("REPORT_MANAGER_COMMISSION", "0.15")),
+        }
+        self.high_water: Optional[datetime] = None
+        self.refreshed_at: Optional[datetime] = None
+        self.refreshes = 0
+        self.skipped = 0
+        self.months_written = 0
+        self.last_refresh_ms: Optional[float] = None
+        self.last_backfill: Optional[Dict] = None
+        self._refresher = PeriodicTask("financial-report-refresh", self.refresh,
+                                       float(os.getenv("REPORTS_REFRESH_SECONDS", "300")))
+
+    # ------------------------------------------------------------------
+    # One month
+    # ------------------------------------------------------------------
+    def _recompute_month(self, cursor, month: datetime) -> Tuple[int, int]:
+        """Rewrite one month's reports; returns (supervisor rows, manager rows)"""
+        bounds = {"month_start": month, "month_end": add_months(month, 1)}
+        queries.REPORT_CLEAR_SUPERVISORS.execute(cursor, bounds)
+        queries.REPORT_MERGE_SUPERVISORS.execute(cursor, {
+            **bounds, "base_salary": self.pay["base_salary"], "shift_pay": self.pay["shift_pay"]})
+        supervisor_rows = cursor.rowcount
+        queries.REPORT_CLEAR_MANAGERS.execute(cursor, bounds)
+        queries.REPORT_MERGE_MANAGERS.execute(cursor, {
+            **bounds, "manager_base_salary": self.pay["manager_base_salary"],
+            "commission": self.pay["commission"]})
+        return supervisor_rows, cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Incremental refresh
+    # ------------------------------------------------------------------
+    def refresh(self, connection) -> Optional[Dict]:
+        """Recompute the months dirtied since the watermark; None if another worker holds it"""
+        started = time.perf_counter()
+        cursor = connection.cursor()
+        try:
+            try:
+                queries.ROLLUP_WATERMARK_LOCK.execute(
+                    cursor, {"name": WATERMARK, "lag_seconds": self.lag_seconds})
+            except oracledb.DatabaseError as e:
+                error, = e.args
+                if getattr(error, "full_code", "") == "ORA-00054":
+                    with self._lock:
+                        self.skipped += 1
+                    return None  # another worker is refreshing
+                raise
+            row = cursor.fetchone()
+            if not row:
+                raise RuntimeError("Report watermark missing; run migrations/009_financial_reports.sql")
+            since, until = row
+            until = max(since, until)
+            queries.REPORT_DIRTY_MONTHS.execute(cursor, {"since": since, "until": until})
+            months = [month for month, in cursor.fetchall()]
+            supervisor_rows = manager_rows = 0
+            for month in months:
+                s_rows, m_rows = self._recompute_month(cursor, month)
+                supervisor_rows += s_rows
+                manager_rows += m_rows
+            queries.ROLLUP_WATERMARK_ADVANCE.execute(cursor, {"name": WATERMARK, "high_water": until})
+            connection.commit()
+            transaction_stats.committed()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        with self._lock:
+            self.high_water = until
+            self.refreshed_at = datetime.now()
+            self.refreshes += 1
+            self.months_written += len(months)
+            self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 2)
+        return {"since": since, "until": until, "months": months,
+                "supervisor_rows": supervisor_rows, "manager_rows": manager_rows}
+
+    # ------------------------------------------------------------------
+    # Backfill
+    # ------------------------------------------------------------------
+    def _backfill_month(self, get_connection: Callable, month: datetime) -> Tuple[int, int, int]:
+        """Recompute one month on its own connection; returns (supervisor rows, manager rows, retries)"""
+        connection = get_connection()
+        try:
+            for attempt in range(2):
+                cursor = connection.cursor()
+                try:
+                    rows = self._recompute_month(cursor, month)
+                    connection.commit()
+                    transaction_stats.committed()
+                    return rows + (attempt,)
+                except oracledb.IntegrityError:
+                    # The refresh inserted the same (month, id) first; the
+                    # second pass finds it and updates it
+                    connection.rollback()
+                    if attempt:
+                        raise
+                except Exception:
+                    connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+        finally:
+            connection.close()
+
+    def backfill(self, get_connection: Callable, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, workers: Optional[int] = None) -> Optional[Dict]:
+        """Recompute every month from start's to end's; None if a backfill is running.
+
+        Without start / end the range covers all shifts and subscriptions.
+        Months run in parallel on `workers` connections (REPORT_BACKFILL_WORKERS).
+        """
+        if not self._backfilling.acquire(blocking=False):
+            return None
+        started = time.perf_counter()
+        try:
+            if start is None or end is None:
+                connection = get_connection()
+                try:
+                    cursor = connection.cursor()
+                    queries.REPORT_SOURCE_RANGE.execute(cursor)
+                    first, last = cursor.fetchone()
+                    cursor.close()
+                finally:
+                    connection.close()
+                start = start or first
+                end = end or last
+            months = months_between(start, end) if start and end else []
+            workers = max(1, min(workers or self.backfill_workers, len(months) or 1))
+
+            totals = {"supervisor_rows": 0, "manager_rows": 0, "retries": 0}
+            failed = []
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-backfill") as pool:
+                futures = {month: pool.submit(self._backfill_month, get_connection, month) for month in months}
+                for month, future in futures.items():
+                    try:
+                        supervisor_rows, manager_rows, retries = future.result()
+                    except Exception as e:
+                        failed.append({"month": month, "error": str(e)})
+                        continue
+                    totals["supervisor_rows"] += supervisor_rows
+                    totals["manager_rows"] += manager_rows
+                    totals["retries"] += retries
+        finally:
+            self._backfilling.release()
+
+        result = {"start": months[0] if months else None, "end": months[-1] if months else None,
+                  "months": len(months) - len(failed), **totals, "workers": workers, "failed": failed,
+                  "ms": round((time.perf_counter() - started) * 1000, 2)}
+        with self._lock:
+            self.months_written += result["months"]
+            self.last_backfill = result
+        return result
+
+    # ------------------------------------------------------------------
+    # Metrics / lifecycle
+    # ------------------------------------------------------------------
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "high_water": self.high_water,
+                "refreshed_at": self.refreshed_at,
+                "refreshes": self.refreshes,
+                "skipped": self.skipped,
+                "months_written": self.months_written,
+                "last_refresh_ms": self.last_refresh_ms,
+                "backfilling": self._backfilling.locked(),
+                "last_backfill": self.last_backfill,
+                "pay": dict(self.pay),
+                "lag_seconds": self.lag_seconds,
+                "interval_seconds": self._refresher.interval,
+            }
+
+    def start_refresh(self, get_connection: Callable):
+        """Recompute dirty months every REPORTS_REFRESH_SECONDS"""
+        self._refresher.start(get_connection)
+
+    def stop_refresh(self):
+        self._refresher.stop()
+
+# Global financial reports instance
+financial_reports = FinancialReports()
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import oracledb
+
+import queries
+from services.periodic import PeriodicTask
+from services.transactions import transaction_stats
+
+WATERMARK = "hourly"
+
+class HourlyRollups:
+    """Keeps OccupancyRollup / RevenueRollup (migrations/004) up to date.
+
+    Each refresh locks the watermark row, folds in only the records that
+    arrived, closed or started in [high_water, now - lag) with two MERGEs,
+    and advances the watermark in the same transaction. The row lock makes
+    concurrent workers take turns; a worker that finds it held skips the
+    tick. The lag leaves room for in-flight transactions to commit.
+
+    Rows written with timestamps already behind the watermark (buffered gate
+    events, re-priced fees) are picked up by rebuild() for their range.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lag_seconds = int(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+        self.high_water: Optional[datetime] = None
+        self.refreshed_at: Optional[datetime] = None
+        self.refreshes = 0
+        self.skipped = 0
+        self.rebuilds = 0
+        self.last_refresh_ms: Optional[float] = None
+        self._refresher = PeriodicTask("hourly-rollup-refresh", self.refresh,
+                                       float(os.getenv("ROLLUP_REFRESH_SECONDS", "60")))
+
+    def _lock_watermark(self, cursor, wait: bool):
+        query = queries.ROLLUP_WATERMARK_WAIT if wait else queries.ROLLUP_WATERMARK_LOCK
+        params = {"name": WATERMARK} if wait else {"name": WATERMARK, "lag_seconds": self.lag_seconds}
+        try:
+            query.execute(cursor, params)
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            if getattr(error, "full_code", "") == "ORA-00054":
+                return None  # another worker is refreshing
+            raise
+        row = cursor.fetchone()
+        if not row:
+            raise RuntimeError("Rollup watermark missing; run migrations/004_hourly_rollups.sql")
+        return row
+
+    def refresh(self, connection) -> Optional[Dict]:
+        """Fold everything since the watermark; None if another worker holds it"""
+        started = time.perf_counter()
+        cursor = connection.cursor()
+        try:
+            row = self._lock_watermark(cursor, wait=False)
+            if row is None:
+                with self._lock:
+                    self.skipped += 1
+                return None
+            since, until = row
+            if until > since:
+                window = {"since": since, "until": until}
+                queries.ROLLUP_FOLD_OCCUPANCY.execute(cursor, window)
+                occupancy_rows = cursor.rowcount
+                queries.ROLLUP_FOLD_REVENUE.execute(cursor, window)
+                revenue_rows = cursor.rowcount
+                queries.ROLLUP_WATERMARK_ADVANCE.execute(cursor, {"name": WATERMARK, "high_water": until})
+            else:
+                until, occupancy_rows, revenue_rows = since, 0, 0
+            connection.commit()
+            transaction_stats.committed()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        with self._lock:
+            self.high_water = until
+            self.refreshed_at = datetime.now()
+            self.refreshes += 1
+            self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 2)
+        return {"since": since, "until": until,
+                "occupancy_buckets": occupancy_rows, "revenue_buckets": revenue_rows}
+
+    def rebuild(self, connection, start: datetime, end: datetime) -> Dict:
+        """Recompute the buckets for whole hours in [start, end) from raw rows.
+
+        `end` is clamped to the watermark's hour so the partially folded hour
+        is left to the incremental refresh.
+        """
+        cursor = connection.cursor()
+        try:
+            high_water, = self._lock_watermark(cursor, wait=True)
+            range_start = start.replace(minute=0, second=0, microsecond=0)
+            range_end = min(end, high_water.replace(minute=0, second=0, microsecond=0))
+            if range_end <= range_start:
+                connection.rollback()
+                return {"range_start": range_start, "range_end": range_start, "buckets": 0}
+
+            bounds = {"range_start": range_start, "range_end": range_end}
+            queries.ROLLUP_CLEAR_OCCUPANCY.execute(cursor, bounds)
+            queries.ROLLUP_CLEAR_REVENUE.execute(cursor, bounds)
+            queries.ROLLUP_REBUILD_OCCUPANCY.execute(cursor, {**bounds, "high_water": high_water})
+            buckets = cursor.rowcount
+            queries.ROLLUP_REBUILD_REVENUE.execute(cursor, bounds)
+            buckets += cursor.rowcount
+            connection.commit()
+            transaction_stats.committed()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        with self._lock:
+            self.rebuilds += 1
+        return {"range_start": range_start, "range_end": range_end, "buckets": buckets}
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "high_water": self.high_water,
+                "refreshed_at": self.refreshed_at,
+                "refreshes": self.refreshes,
+                "skipped": self.skipped,
+                "rebuilds": self.rebuilds,
+                "last_refresh_ms": self.last_refresh_ms,
+                "lag_seconds": self.lag_seconds,
+                "interval_seconds": self._refresher.interval,
+            }
+
+    def start_refresh(self, get_connection: Callable):
+        """Fold new records every ROLLUP_REFRESH_SECONDS"""
+        self._refresher.start(get_connection)
+
+    def stop_refresh(self):
+        self._refresher.stop()
+
+# Global hourly rollups instance
+hourly_rollups = HourlyRollups()
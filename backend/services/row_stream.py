@@ -0,0 +1,82 @@
+import itertools
+from typing import Callable, Iterator, Optional, Sequence
+
+import orjson
+
+from queries import Query
+from services.pagination import encode_cursor
+
+# Large listings are written straight from the cursor: each fetchmany()
+# batch of tuples becomes one orjson call, with no per-row dict and no
+# jsonable_encoder pass, and at most one batch is held in memory.
+#
+#   columnar  {"columns": [...], "data": [[...], ...], "count": N, "next_cursor": ...}
+#   ndjson    {"columns": [...]}\n  [...]\n  ...  {"count": N, "next_cursor": ...}\n
+
+FORMATS = ("columnar", "ndjson")
+MEDIA_TYPES = {"columnar": "application/json", "ndjson": "application/x-ndjson"}
+FORMAT_PATTERN = "^(columnar|ndjson)$"
+
+DEFAULT_ARRAYSIZE = 1000
+
+def _dumps(value) -> bytes:
+    # orjson handles datetime natively; default=str covers Decimal, LOBs read as str, etc.
+    return orjson.dumps(value, default=str)
+
+def stream_rows(get_connection: Callable, query: Query, params: dict = None, fmt: str = "columnar",
+                arraysize: int = DEFAULT_ARRAYSIZE, page_keys: Optional[Sequence[str]] = None,
+                limit: Optional[int] = None) -> Iterator[bytes]:
+    """Run `query` on its own pooled connection and yield the encoded body.
+
+    The generator owns the connection, so it stays open for as long as the
+    response streams. With `page_keys` and `limit` the trailer carries the
+    keyset next_cursor for the page, as the dict-returning routes do.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown stream format {fmt!r}")
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.arraysize = arraysize
+        cursor.prefetchrows = arraysize + 1
+        query.execute(cursor, params)
+        columns = [col[0].lower() for col in cursor.description]
+        key_positions = [columns.index(k) for k in page_keys] if page_keys else None
+
+        if fmt == "ndjson":
+            yield _dumps({"columns": columns}) + b"\n"
+        else:
+            yield b'{"columns":' + _dumps(columns) + b',"data":['
+
+        count = 0
+        last = None
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            if fmt == "ndjson":
+                yield b"\n".join(_dumps(row) for row in rows) + b"\n"
+            else:
+                # Strip the batch's own brackets and splice it into the array
+                yield (b"," if count else b"") + _dumps(rows)[1:-1]
+            count += len(rows)
+            last = rows[-1]
+
+        next_cursor = None
+        if key_positions and limit and count >= limit:
+            next_cursor = encode_cursor(page_keys, [last[i] for i in key_positions])
+        trailer = {"count": count, "next_cursor": next_cursor}
+        if fmt == "ndjson":
+            yield _dumps(trailer) + b"\n"
+        else:
+            yield b"]," + _dumps(trailer)[1:]
+    finally:
+        cursor.close()
+        connection.close()
+
+def start_stream(*args, **kwargs) -> Iterator[bytes]:
+    """stream_rows(), primed so connection and query errors raise here,
+    while the route can still answer with an HTTP error status"""
+    body = stream_rows(*args, **kwargs)
+    first = next(body)
+    return itertools.chain([first], body)
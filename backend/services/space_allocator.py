@@ -0,0 +1,210 @@
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from services.periodic import PeriodicTask
+from services.space_counters import space_counters
+from queries import SPACE_ALLOCATOR_LOAD
+
+# Tried in order when an entry names neither a space nor a type
+DEFAULT_VISITOR_TYPES = "Visitor,Standard,Compact"
+
+# Claims lost to another worker before giving up on a type
+MAX_CLAIM_ATTEMPTS = 8
+
+class _Bucket:
+    """Free capacity of one space_type: space_id -> spaces_available (> 0 only)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.free: Dict[int, int] = {}
+
+class SpaceAllocator:
+    """Assigns visitor spaces from an in-memory free-space index per space_type.
+
+    Each type keeps an insertion-ordered map of the spaces that still have
+    capacity, under its own lock. allocate() reserves the head of that map
+    in O(1) (moving it to the back, so concurrent gates spread over spaces)
+    and then claims it in Oracle with space_counters.take() inside the
+    caller's open transaction. The database guard is what rules out over-allocation
+    across workers; a lost claim means this worker's copy was stale, so the
+    space is dropped from the index and the next one is tried.
+
+    Callers commit after inserting the record, or roll back and release().
+    A reload every SPACE_ALLOCATOR_REFRESH_SECONDS repairs drift.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, _Bucket] = {}
+        self._space_type: Dict[int, str] = {}
+        self._load_lock = threading.Lock()
+        self.visitor_types = [t.strip() for t in os.getenv("VISITOR_SPACE_TYPES", DEFAULT_VISITOR_TYPES).split(",") if t.strip()]
+        self.loaded = False
+        self.loaded_at: Optional[datetime] = None
+        self.allocations = 0
+        self.rejections = 0
+        self.lost_claims = 0
+        self.releases = 0
+        self._sweeper = PeriodicTask("space-allocator-sweep", self.load,
+                                     float(os.getenv("SPACE_ALLOCATOR_REFRESH_SECONDS", "60")))
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load(self, connection):
+        """Rebuild the index from the space stripes"""
+        cursor = connection.cursor()
+        try:
+            SPACE_ALLOCATOR_LOAD.execute(cursor)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        buckets: Dict[str, _Bucket] = {}
+        space_type: Dict[int, str] = {}
+        for space_id, type_name, available in rows:
+            bucket = buckets.setdefault(type_name, _Bucket())
+            space_type[space_id] = type_name
+            if available and available > 0:
+                bucket.free[space_id] = available
+        # Swapped whole: a reservation in flight on the old bucket is already
+        # reflected (or not) in the rows just read and is settled by its claim
+        self._buckets = buckets
+        self._space_type = space_type
+        self.loaded = True
+        self.loaded_at = datetime.now()
+
+    def ensure_loaded(self, connection):
+        if self.loaded:
+            return
+        with self._load_lock:
+            if not self.loaded:
+                self.load(connection)
+
+    def start_reconciliation(self, get_connection: Callable):
+        self._sweeper.start(get_connection)
+
+    def stop_reconciliation(self):
+        self._sweeper.stop()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _bucket_of(self, space_id: int) -> Optional[_Bucket]:
+        type_name = self._space_type.get(space_id)
+        return self._buckets.get(type_name) if type_name else None
+
+    def _reserve(self, type_name: str) -> Optional[int]:
+        bucket = self._buckets.get(type_name)
+        if bucket is None:
+            return None
+        with bucket.lock:
+            if not bucket.free:
+                return None
+            space_id = next(iter(bucket.free))
+            remaining = bucket.free.pop(space_id) - 1
+            if remaining:
+                bucket.free[space_id] = remaining
+            return space_id
+
+    def _mark_full(self, space_id: int):
+        bucket = self._bucket_of(space_id)
+        if bucket is not None:
+            with bucket.lock:
+                bucket.free.pop(space_id, None)
+
+    def _adjust(self, space_id: int, delta: int):
+        bucket = self._bucket_of(space_id)
+        if bucket is None:
+            return
+        with bucket.lock:
+            available = bucket.free.get(space_id, 0) + delta
+            if available > 0:
+                bucket.free[space_id] = available
+            else:
+                bucket.free.pop(space_id, None)
+
+    # ------------------------------------------------------------------
+    # Gate path
+    # ------------------------------------------------------------------
+    def _claim(self, connection, space_id: int) -> bool:
+        return space_counters.take(connection, space_id)
+
+    def check_visitor_space(self, space_id: Optional[int] = None, space_type: Optional[str] = None):
+        """Raise ValueError unless the space and type are VISITOR_SPACE_TYPES ones"""
+        if space_id is not None and self._space_type.get(space_id) not in self.visitor_types:
+            raise ValueError(f"Space {space_id} is not a visitor space")
+        if space_type is not None and space_type not in self.visitor_types:
+            raise ValueError(f"Space type '{space_type}' is not open to visitors")
+
+    def allocate(self, connection, space_type: Optional[str] = None,
+                 space_id: Optional[int] = None) -> Optional[int]:
+        """Claim a space in `connection`'s open transaction; None when full.
+
+        With `space_id` only that space is tried; otherwise the first free
+        space of `space_type`, or of each VISITOR_SPACE_TYPES in turn.
+        Raises ValueError for a space or type visitors may not use.
+        """
+        self.ensure_loaded(connection)
+        self.check_visitor_space(space_id, space_type)
+        if space_id is not None:
+            if self._claim(connection, space_id):
+                self._adjust(space_id, -1)
+                self.allocations += 1
+                return space_id
+            self._mark_full(space_id)
+            self.rejections += 1
+            return None
+
+        for type_name in ([space_type] if space_type else self.visitor_types):
+            for _ in range(MAX_CLAIM_ATTEMPTS):
+                candidate = self._reserve(type_name)
+                if candidate is None:
+                    break
+                try:
+                    claimed = self._claim(connection, candidate)
+                except Exception:
+                    self._adjust(candidate, 1)
+                    raise
+                if claimed:
+                    self.allocations += 1
+                    return candidate
+                # Another worker took the last of it
+                self.lost_claims += 1
+                self._mark_full(candidate)
+        self.rejections += 1
+        return None
+
+    def release(self, space_id: int):
+        """Return a space to the index (exit committed, or an entry rolled back)"""
+        self._adjust(space_id, 1)
+        self.releases += 1
+
+    def taken(self, space_id: int, count: int = 1):
+        """Record capacity taken outside allocate() (buffered batch entries)"""
+        self._adjust(space_id, -count)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def free_by_type(self) -> Dict[str, int]:
+        result = {}
+        for type_name, bucket in list(self._buckets.items()):
+            with bucket.lock:
+                result[type_name] = sum(bucket.free.values())
+        return result
+
+    def metrics(self) -> Dict:
+        return {
+            "loaded_at": self.loaded_at,
+            "free_by_type": self.free_by_type(),
+            "visitor_types": self.visitor_types,
+            "allocations": self.allocations,
+            "rejections": self.rejections,
+            "lost_claims": self.lost_claims,
+            "releases": self.releases,
+        }
+
+# Global space allocator instance
+space_allocator = SpaceAllocator()
@@ -0,0 +1,209 @@
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from services.periodic import PeriodicTask
+from queries import SPACE_GIVE, SPACE_GIVE_MANY, SPACE_RECONCILE, SPACE_TAKE, SPACE_TAKE_MANY
+
+# Stripes per space; must match migrations/005_space_stripes.sql
+STRIPES = 8
+
+# space_take / space_give results
+FULL = 0
+TAKEN = 1
+WAITED = 2
+
+class SpaceCounters:
+    """Visitor space availability, striped over SpaceStripe rows.
+
+    Gates no longer update the single ParkingSpace row of their space: take()
+    and give() move one place on whichever of the space's STRIPES rows no
+    other transaction holds (FOR UPDATE SKIP LOCKED, see
+    migrations/005_space_stripes.sql), so concurrent entries and exits on
+    one space only queue when every stripe is busy. Both run inside the
+    caller's open transaction, next to the record they belong to; the
+    caller commits. Batch paths send one PL/SQL call for the whole batch,
+    with exits folded into one give per space.
+
+    A reconcile every SPACE_RECONCILE_SECONDS resets each space to capacity
+    minus its open visitor records and copies the result to
+    ParkingSpace.spaces_available. The counters record how often a gate had
+    to wait for a stripe lock and how much the reconcile had to correct.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Starting stripe for the next call; spreads gates over the stripes
+        self._offsets = itertools.count()
+        self.takes = 0
+        self.gives = 0
+        self.full = 0
+        self.lock_waits = 0
+        self.lock_wait_ms = 0.0
+        self.reconciles = 0
+        self.reconciled_at: Optional[datetime] = None
+        self.last_reconcile: Optional[Dict] = None
+        self.spaces_corrected = 0
+        self.drift_corrected = 0
+        self._reconciler = PeriodicTask("space-counter-reconcile", self.reconcile,
+                                        float(os.getenv("SPACE_RECONCILE_SECONDS", "60")))
+
+    def _offset(self) -> int:
+        return next(self._offsets) % STRIPES
+
+    def _record(self, results: List[int], elapsed_ms: float, taking: bool):
+        waits = sum(1 for result in results if result == WAITED)
+        with self._lock:
+            if taking:
+                self.takes += sum(1 for result in results if result != FULL)
+                self.full += sum(1 for result in results if result == FULL)
+            else:
+                self.gives += len(results)
+            if waits:
+                # The call's elapsed time is an upper bound on the lock wait
+                self.lock_waits += waits
+                self.lock_wait_ms += elapsed_ms
+
+    # ------------------------------------------------------------------
+    # Gate path
+    # ------------------------------------------------------------------
+    def take(self, connection, space_id: int) -> bool:
+        """Take one place of `space_id`; False when it is full"""
+        cursor = connection.cursor()
+        try:
+            result = cursor.var(int)
+            started = time.perf_counter()
+            SPACE_TAKE.execute(cursor, {"result": result, "space_id": space_id, "offset": self._offset()})
+            value = int(result.getvalue() or FULL)
+        finally:
+            cursor.close()
+        self._record([value], (time.perf_counter() - started) * 1000, taking=True)
+        return value != FULL
+
+    def take_many(self, connection, space_ids: List[int]) -> List[bool]:
+        """Take one place per entry, in one round trip; False where full"""
+        if not space_ids:
+            return []
+        number_list = connection.gettype("SYS.ODCINUMBERLIST")
+        cursor = connection.cursor()
+        try:
+            results = cursor.var(number_list)
+            started = time.perf_counter()
+            SPACE_TAKE_MANY.execute(cursor, {
+                "space_ids": number_list.newobject(space_ids),
+                "offset": self._offset(),
+                "results": results,
+            })
+            values = [int(v or FULL) for v in _aslist(results.getvalue())]
+        finally:
+            cursor.close()
+        self._record(values, (time.perf_counter() - started) * 1000, taking=True)
+        return [value != FULL for value in values]
+
+    def give(self, connection, space_id: int, count: int = 1) -> bool:
+        """Return `count` places of `space_id`; False if it has no stripes"""
+        cursor = connection.cursor()
+        try:
+            result = cursor.var(int)
+            started = time.perf_counter()
+            SPACE_GIVE.execute(cursor, {"result": result, "space_id": space_id,
+                                        "count": count, "offset": self._offset()})
+            value = int(result.getvalue() or FULL)
+        finally:
+            cursor.close()
+        self._record([value], (time.perf_counter() - started) * 1000, taking=False)
+        return value != FULL
+
+    def give_many(self, connection, space_ids: Iterable[int]) -> Dict[int, bool]:
+        """Return one place per entry, grouped into one give per space.
+
+        Spaces are visited in id order so two batches never lock each
+        other's stripes in opposite orders.
+        """
+        counts: Dict[int, int] = {}
+        for space_id in space_ids:
+            counts[space_id] = counts.get(space_id, 0) + 1
+        if not counts:
+            return {}
+        ordered = sorted(counts)
+        number_list = connection.gettype("SYS.ODCINUMBERLIST")
+        cursor = connection.cursor()
+        try:
+            results = cursor.var(number_list)
+            started = time.perf_counter()
+            SPACE_GIVE_MANY.execute(cursor, {
+                "space_ids": number_list.newobject(ordered),
+                "counts": number_list.newobject([counts[space_id] for space_id in ordered]),
+                "offset": self._offset(),
+                "results": results,
+            })
+            values = [int(v or FULL) for v in _aslist(results.getvalue())]
+        finally:
+            cursor.close()
+        self._record(values, (time.perf_counter() - started) * 1000, taking=False)
+        return {space_id: value != FULL for space_id, value in zip(ordered, values)}
+
+    # ------------------------------------------------------------------
+    # Reconcile
+    # ------------------------------------------------------------------
+    def reconcile(self, connection) -> Dict:
+        """Reset every space's stripes to capacity - open visitor records"""
+        started = time.perf_counter()
+        cursor = connection.cursor()
+        try:
+            spaces, fixed, drift = cursor.var(int), cursor.var(int), cursor.var(int)
+            SPACE_RECONCILE.execute(cursor, {"spaces": spaces, "fixed": fixed, "drift": drift})
+            result = {
+                "spaces": int(spaces.getvalue() or 0),
+                "corrected": int(fixed.getvalue() or 0),
+                "drift": int(drift.getvalue() or 0),
+                "ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+        finally:
+            cursor.close()
+        with self._lock:
+            self.reconciles += 1
+            self.reconciled_at = datetime.now()
+            self.last_reconcile = result
+            self.spaces_corrected += result["corrected"]
+            self.drift_corrected += result["drift"]
+        if result["corrected"]:
+            print(f"⚠️ Space reconcile corrected {result['corrected']} space(s), drift {result['drift']}")
+        return result
+
+    def start_reconciliation(self, get_connection: Callable):
+        self._reconciler.start(get_connection)
+
+    def stop_reconciliation(self):
+        self._reconciler.stop()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def metrics(self) -> Dict:
+        with self._lock:
+            calls = self.takes + self.full + self.gives
+            return {
+                "stripes": STRIPES,
+                "takes": self.takes,
+                "gives": self.gives,
+                "full": self.full,
+                "lock_waits": self.lock_waits,
+                "lock_wait_ratio": round(self.lock_waits / calls, 4) if calls else 0.0,
+                "lock_wait_ms": round(self.lock_wait_ms, 2),
+                "reconciles": self.reconciles,
+                "reconciled_at": self.reconciled_at,
+                "last_reconcile": self.last_reconcile,
+                "spaces_corrected": self.spaces_corrected,
+                "drift_corrected": self.drift_corrected,
+            }
+
+def _aslist(value) -> list:
+    # Collection OUT binds come back as DbObjects
+    return value.aslist() if hasattr(value, "aslist") else list(value or [])
+
+# Global space counters instance
+space_counters = SpaceCounters()
@@ -0,0 +1,114 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Day rate (6:00-18:00): 15,000 VND/hour; night rate (18:00-6:00): 10,000 VND/hour
+DEFAULT_TARIFF = "6-18:15000,18-6:10000"
+
+class Tariff:
+    """Hourly visitor tariff with time-of-day rates.
+
+    A stay is billed in started hours counted from arrival (seconds are
+    ignored, as the old PL/SQL did). Each billed hour is priced at the rate
+    of the clock hour it starts in, so a stay from 16:00 to 20:00 pays two
+    day hours and two night hours instead of four at the departure rate.
+
+    Periods are "start-end:rate" clock-hour ranges that must cover the day
+    exactly once; ranges may wrap past midnight ("18-6").
+    """
+
+    def __init__(self, periods: List[Tuple[int, int, int]]):
+        hourly = [None] * 24
+        for start, end, rate in periods:
+            hour = start
+            while True:
+                if hourly[hour] is not None:
+                    raise ValueError(f"Tariff hour {hour} is covered twice")
+                hourly[hour] = rate
+                hour = (hour + 1) % 24
+                if hour == end % 24:
+                    break
+        missing = [h for h, rate in enumerate(hourly) if rate is None]
+        if missing:
+            raise ValueError(f"Tariff does not cover hours {missing}")
+
+        self.periods = periods
+        self.hourly = np.array(hourly, dtype=np.int64)
+        self.day_total = int(self.hourly.sum())
+        # cumulative[h] = sum of rates for clock hours [0, h) over two days
+        self.cumulative = np.concatenate(([0], np.cumsum(np.tile(self.hourly, 2))))
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "Tariff":
+        periods = []
+        for part in spec.split(","):
+            hours, rate = part.strip().split(":")
+            start, end = hours.split("-")
+            periods.append((int(start), int(end), int(rate)))
+        return cls(periods)
+
+    def to_dict(self) -> Dict:
+        return {
+            "periods": [{"start_hour": s, "end_hour": e, "hourly_rate": r} for s, e, r in self.periods],
+            "hourly_rates": self.hourly.tolist(),
+        }
+
+    # ------------------------------------------------------------------
+    # Scalar pricing
+    # ------------------------------------------------------------------
+    @staticmethod
+    def billed_hours(arrival_time: datetime, departure_time: datetime) -> int:
+        minutes = int((departure_time - arrival_time).total_seconds()) // 60
+        return max(0, -(-minutes // 60))
+
+    def price(self, arrival_time: datetime, departure_time: datetime) -> int:
+        """Fee for one stay"""
+        hours = self.billed_hours(arrival_time, departure_time)
+        start = arrival_time.hour
+        days, rest = divmod(hours, 24)
+        return int(days * self.day_total + self.cumulative[start + rest] - self.cumulative[start])
+
+    def segments(self, arrival_time: datetime, departure_time: datetime) -> List[Dict]:
+        """Split a stay into consecutive same-rate segments (for receipts)"""
+        result = []
+        hours = self.billed_hours(arrival_time, departure_time)
+        for k in range(hours):
+            slot_start = arrival_time + timedelta(hours=k)
+            rate = int(self.hourly[slot_start.hour])
+            if result and result[-1]["hourly_rate"] == rate:
+                result[-1]["hours"] += 1
+                result[-1]["amount"] += rate
+                result[-1]["end"] = slot_start + timedelta(hours=1)
+            else:
+                result.append({
+                    "start": slot_start,
+                    "end": slot_start + timedelta(hours=1),
+                    "hourly_rate": rate,
+                    "hours": 1,
+                    "amount": rate,
+                })
+        if result:
+            result[-1]["end"] = min(result[-1]["end"], departure_time)
+        return result
+
+    # ------------------------------------------------------------------
+    # Vectorized pricing
+    # ------------------------------------------------------------------
+    def price_many(self, arrival_times, departure_times) -> np.ndarray:
+        """Fees for many stays at once.
+
+        Accepts sequences of datetimes or datetime64 arrays (naive local
+        time); returns an int64 array. O(1) per stay regardless of length.
+        """
+        arrivals = np.asarray(arrival_times, dtype="datetime64[s]").astype(np.int64)
+        departures = np.asarray(departure_times, dtype="datetime64[s]").astype(np.int64)
+        minutes = np.maximum(departures - arrivals, 0) // 60
+        hours = (minutes + 59) // 60
+        start = (arrivals // 3600) % 24
+        days, rest = np.divmod(hours, 24)
+        return days * self.day_total + self.cumulative[start + rest] - self.cumulative[start]
+
+# Global visitor tariff, configurable with VISITOR_TARIFF="start-end:rate,..."
+visitor_tariff = Tariff.from_spec(os.getenv("VISITOR_TARIFF", DEFAULT_TARIFF))
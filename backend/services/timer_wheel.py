@@ -0,0 +1,74 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+EPOCH = datetime(1970, 1, 1)
+
+Timer = Tuple[Hashable, datetime, Any]
+
+class TimerWheel:
+    """Hashed timing wheel of keyed one-shot timers.
+
+    A timer lands in the slot of its due tick (mod `slots`); schedule() and
+    cancel() are O(1) and advance() visits only the slots whose ticks have
+    elapsed since the last call. Timers more than one rotation out share a
+    slot with nearer ones and are skipped until their due time passes.
+    Scheduling a key again replaces its previous timer.
+
+    Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, tick_seconds: float = 60, slots: int = 1440, now: Optional[datetime] = None):
+        self.tick_seconds = tick_seconds
+        self._slots: List[Dict[Hashable, Tuple[datetime, Any]]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[Hashable, int] = {}
+        # Last tick whose slot has been fully drained
+        self._tick = self._tick_of(now or datetime.now()) - 1
+
+    def _tick_of(self, when: datetime) -> int:
+        return math.floor((when - EPOCH).total_seconds() / self.tick_seconds)
+
+    def schedule(self, key: Hashable, due: datetime, payload: Any = None):
+        self.cancel(key)
+        # Overdue timers go in the next slot to be visited
+        slot = max(self._tick_of(due), self._tick + 1) % len(self._slots)
+        self._slots[slot][key] = (due, payload)
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    def due(self, key: Hashable) -> Optional[datetime]:
+        slot = self._slot_of.get(key)
+        return None if slot is None else self._slots[slot][key][0]
+
+    def advance(self, now: Optional[datetime] = None) -> List[Timer]:
+        """Remove and return every timer due at or before `now`"""
+        now = now or datetime.now()
+        target = self._tick_of(now)
+        fired: List[Timer] = []
+        # A gap longer than one rotation still visits each slot only once
+        for tick in range(max(self._tick + 1, target - len(self._slots) + 1), target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            expired = [key for key, (due, _) in slot.items() if due <= now]
+            for key in expired:
+                due, payload = slot.pop(key)
+                del self._slot_of[key]
+                fired.append((key, due, payload))
+        # The current tick's slot may still hold timers due later in the tick
+        self._tick = max(self._tick, target - 1)
+        fired.sort(key=lambda timer: timer[1])
+        return fired
+
+    def keys(self) -> List[Hashable]:
+        return list(self._slot_of)
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable):
+        return key in self._slot_of
@@ -0,0 +1,99 @@
+import threading
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Commits made by the request being served; None outside a request
+_request_commits: ContextVar[Optional[List[int]]] = ContextVar("request_commits", default=None)
+
+class TransactionStats:
+    """Commits per request, per route.
+
+    CommitCounterMiddleware opens a tally with begin() and hands it back to
+    finish() with the matched route; models.commit() / UnitOfWork add to
+    the tally of whichever request is running. Background jobs commit
+    outside any request and are not counted. A write endpoint working as
+    intended shows every successful request with exactly one commit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def begin(self):
+        tally = [0]
+        return tally, _request_commits.set(tally)
+
+    def committed(self):
+        tally = _request_commits.get()
+        if tally is not None:
+            tally[0] += 1
+
+    def finish(self, state, method: str, route: str, status_code: int):
+        tally, token = state
+        _request_commits.reset(token)
+        commits = tally[0]
+        if method not in WRITE_METHODS and not commits:
+            return
+        key = f"{method} {route}"
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = {
+                    "route": key, "requests": 0, "failed": 0, "commits": 0,
+                    "max_commits": 0, "by_commits": {},
+                }
+            stats["requests"] += 1
+            if status_code >= 400:
+                stats["failed"] += 1
+                return
+            stats["commits"] += commits
+            stats["max_commits"] = max(stats["max_commits"], commits)
+            bucket = str(commits) if commits < 3 else "3+"
+            stats["by_commits"][bucket] = stats["by_commits"].get(bucket, 0) + 1
+
+    def stats(self) -> List[Dict]:
+        """One row per route; commits_per_request is over successful requests"""
+        with self._lock:
+            rows = [dict(s, by_commits=dict(s["by_commits"])) for s in self._routes.values()]
+        for row in rows:
+            ok = row["requests"] - row["failed"]
+            row["commits_per_request"] = round(row["commits"] / ok, 3) if ok else None
+        return sorted(rows, key=lambda r: r["route"])
+
+# Global transaction stats instance
+transaction_stats = TransactionStats()
+
+class CommitCounterMiddleware:
+    """ASGI middleware: tally the commits each HTTP request makes.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streamed responses pass
+    through untouched. Sync routes run in the threadpool with a copy of
+    this context, which still holds the same tally list.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = transaction_stats.begin()
+        status_code = 500
+
+        async def send_and_watch(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_watch)
+        finally:
+            # The router records the matched route in the shared scope
+            route = scope.get("route")
+            transaction_stats.finish(state, scope["method"],
+                                     getattr(route, "path", "(unmatched)"), status_code)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""EXPLAIN PLAN every registered query and fail on unexpected full scans.
+
+Each statement in queries.registry is explained (DML is planned, never
+run). A TABLE ACCESS FULL on a table that is neither a small reference
+table nor listed for that query in FULL_SCAN_ALLOWED is a regression and
+makes the script exit 1. Run it against a database whose optimizer
+statistics look like production, after applying migrations/.
+
+Usage: python backend/tools/check_query_plans.py [--query NAME ...] [--verbose]
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Set
+
+import oracledb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import db
+import queries
+
+# A few hundred rows at most: scanning them is the cheapest plan
+REFERENCE_TABLES = {
+    "BUILDING", "APARTMENT", "PARKINGSPACE", "BUILDINGMANAGER", "SUPERVISOR",
+    "ROLLUPWATERMARK", "SPACESTRIPE",
+    # Open stays only (migrations/008): as many rows as cars parked now
+    "OPENVISITORSESSION", "OPENPARKINGSESSION",
+}
+
+# Queries that read (most of) a large table by design
+FULL_SCAN_ALLOWED: Dict[str, Set[str]] = {
+    # Rebuilds the whole in-memory index
+    "plate_index_load": {"VEHICLE", "PARKINGSUBSCRIPTION"},
+    "expiry_scheduler_load": {"PARKINGSUBSCRIPTION"},
+    # Foreign-key maps, once per bulk import
+    "import_resident_keys": {"RESIDENT"},
+    "import_vehicle_plates": {"VEHICLE"},
+    # Only while the expiry scheduler is not loaded
+    "subscription_counts": {"PARKINGSUBSCRIPTION"},
+    # No foreign-key index on resident_id / supervisor_id
+    "vehicles_by_resident": {"VEHICLE"},
+    "shifts_by_supervisor": {"SUPERVISIONSHIFT"},
+}
+
+# Dictionary-view and sequence statements have nothing to check; PL/SQL
+# blocks cannot be explained
+SKIPPED = {
+    "oracle_parse_stats", "sequence_increment",
+    "space_take", "space_give", "space_take_many", "space_give_many", "space_reconcile",
+}
+
+def explain(connection, name: str, sql: str) -> List[tuple]:
+    """Plan rows (operation, options, object_name) for one statement"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{name}' FOR {sql}")
+        cursor.execute("""
+            SELECT operation, options, object_name
+            FROM PLAN_TABLE
+            WHERE statement_id = :name
+            ORDER BY id
+        """, {"name": name})
+        rows = cursor.fetchall()
+        cursor.execute("DELETE FROM PLAN_TABLE WHERE statement_id = :name", {"name": name})
+        return rows
+    finally:
+        cursor.close()
+
+def full_scans(plan: List[tuple]) -> Set[str]:
+    return {
+        object_name for operation, options, object_name in plan
+        if operation in ("TABLE ACCESS", "MAT_VIEW ACCESS") and options and "FULL" in options
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--query", action="append", help="check only these registry names")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    names = args.query or sorted(n for n in queries.registry.queries
+                                 if n not in SKIPPED and not n.startswith("nextval_"))
+    connection = oracledb.connect(user=db.user, password=db.password, dsn=db.dsn)
+    failures = 0
+    try:
+        for name in names:
+            query = queries.registry.queries[name]
+            try:
+                plan = explain(connection, name, query)
+            except Exception as e:
+                print(f"❌ {name}: EXPLAIN PLAN failed: {e}")
+                failures += 1
+                continue
+
+            allowed = REFERENCE_TABLES | FULL_SCAN_ALLOWED.get(name, set())
+            unexpected = sorted(full_scans(plan) - allowed)
+            if unexpected:
+                print(f"❌ {name}: full scan of {', '.join(unexpected)}")
+                failures += 1
+            else:
+                print(f"✅ {name}")
+            if args.verbose or unexpected:
+                for operation, options, object_name in plan:
+                    print(f"      {operation} {options or ''} {object_name or ''}".rstrip())
+    finally:
+        connection.rollback()
+        connection.close()
+
+    print(f"\n{len(names) - failures}/{len(names)} queries use their indexes")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
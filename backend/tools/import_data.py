@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Bulk-load residents or vehicles from a CSV or NDJSON file.
+
+Runs the same pipeline as POST /api/residents/import and
+POST /api/vehicles/import (services/bulk_import.py) directly against the
+database: the file is read in blocks, rows are validated against the
+apartment / resident / plate maps and inserted with executemany, one
+commit per --chunk-size rows. Rejected rows are printed with their line
+number; the exit status is 1 if any row was rejected.
+
+Usage: python backend/tools/import_data.py residents towers.csv
+       python backend/tools/import_data.py vehicles cars.ndjson [--chunk-size N] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+
+import oracledb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connect import db
+from services.bulk_import import ENTITIES, FORMATS, bulk_importer
+
+BLOCK_SIZE = 1 << 16
+
+def read_blocks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("entity", choices=ENTITIES)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="default: from the file extension (.ndjson / .jsonl, else csv)")
+    parser.add_argument("--chunk-size", type=int, default=bulk_importer.chunk_size)
+    parser.add_argument("--dry-run", action="store_true", help="validate only, insert nothing")
+    parser.add_argument("--show-errors", type=int, default=50, help="rejected rows to print")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    bulk_importer.chunk_size = args.chunk_size
+    connection = oracledb.connect(user=db.user, password=db.password, dsn=db.dsn)
+    try:
+        report = bulk_importer.import_stream(connection, args.entity, fmt, read_blocks(args.path),
+                                             dry_run=args.dry_run)
+    finally:
+        connection.close()
+
+    result = report.as_dict()
+    for error in result["errors"][:args.show_errors]:
+        print(f"❌ line {error['line']}: {error['detail']}")
+    if result["rejected"] > args.show_errors:
+        print(f"   ... {result['rejected'] - args.show_errors} more")
+    verb = "valid" if args.dry_run else "inserted"
+    print(f"\n{args.entity}: {result['received']} rows, {result['inserted']} {verb}, "
+          f"{result['rejected']} rejected in {result['seconds']}s ({result['rows_per_second']} rows/s)")
+    sys.exit(1 if result["rejected"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,9 @@ const api = axios.create({
 });
 
 // Residents
-export const getResidents = (limit = 100, offset = 0) => 
-  api.get(`/api/residents?limit=${limit}&offset=${offset}`);
+// Pass the previous response's next_cursor to fetch the following page
+export const getResidents = (limit = 100, cursor = null) => 
+  api.get('/api/residents', { params: { limit, cursor } });
 
 export const getResident = (id) => 
   api.get(`/api/residents/${id}`);
@@ -26,8 +27,8 @@ export const deleteResident = (id) =>
   api.delete(`/api/residents/${id}`);
 
 // Vehicles
-export const getVehicles = (limit = 100, offset = 0) => 
-  api.get(`/api/vehicles?limit=${limit}&offset=${offset}`);
+export const getVehicles = (limit = 100, cursor = null) => 
+  api.get('/api/vehicles', { params: { limit, cursor } });
 
 export const getVehiclesByResident = (residentId) => 
   api.get(`/api/vehicles/resident/${residentId}`);
@@ -45,8 +46,8 @@ export const validateEntry = (licensePlate) =>
   api.post('/api/vehicles/validate-entry', null, { params: { license_plate: licensePlate } });
 
 // Subscriptions
-export const getSubscriptions = (limit = 100, offset = 0) => 
-  api.get(`/api/subscriptions?limit=${limit}&offset=${offset}`);
+export const getSubscriptions = (limit = 100, cursor = null) => 
+  api.get('/api/subscriptions', { params: { limit, cursor } });
 
 export const getExpiringSubscriptions = (days = 7) => 
   api.get(`/api/subscriptions/expiring?days=${days}`);
@@ -61,8 +62,8 @@ export const deleteSubscription = (id) =>
   api.delete(`/api/subscriptions/${id}`);
 
 // Visitors
-export const getVisitors = (limit = 100, offset = 0) => 
-  api.get(`/api/visitors?limit=${limit}&offset=${offset}`);
+export const getVisitors = (limit = 100, cursor = null) => 
+  api.get('/api/visitors', { params: { limit, cursor } });
 
 export const getActiveVisitors = () => 
   api.get('/api/visitors/active');
@@ -86,12 +87,18 @@ export const getManagerDashboard = (managerId) =>
 export const getOccupancyDetails = () => 
   api.get('/api/dashboard/occupancy');
 
-export const getAlerts = () => 
-  api.get('/api/dashboard/alerts');
+export const getAlerts = (limit = 100, cursor = null) => 
+  api.get('/api/dashboard/alerts', { params: { limit, cursor } });
+
+export const acknowledgeAlert = (alertId) => 
+  api.post(`/api/dashboard/alerts/${alertId}/acknowledge`);
 
 export const getRevenueDetails = () => 
   api.get('/api/dashboard/revenue');
 
+export const openDashboardStream = () => 
+  new EventSource(`${API_BASE_URL}/api/dashboard/stream`);
+
 // Supervisors
 export const getSupervisors = () => 
   api.get('/api/supervisors');
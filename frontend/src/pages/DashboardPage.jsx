@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, PieChart, Pie, Cell, LineChart, Line } from 'recharts';
-import { getDashboardStats, getExpiringSubscriptions, getVisitorStats, getAlerts } from '../api/client';
+import { getDashboardStats, getExpiringSubscriptions, getVisitorStats, getAlerts, openDashboardStream } from '../api/client';
 import Loading from '../components/Loading';
 import { AlertCircle, TrendingUp, Users, Car, DollarSign, Clock, Activity, ParkingSquare } from 'lucide-react';
 
@@ -16,6 +16,30 @@ const DashboardPage = () => {
     fetchDashboardData();
   }, []);
 
+  // Live occupancy/revenue counters pushed by the server
+  useEffect(() => {
+    const stream = openDashboardStream();
+    const applyStats = (event) => {
+      const payload = JSON.parse(event.data);
+      if (payload.stats) {
+        setStats((prev) => ({ ...(prev || {}), ...payload.stats }));
+      }
+    };
+    ['snapshot', 'visitor_entry', 'visitor_exit', 'subscription'].forEach((type) =>
+      stream.addEventListener(type, applyStats)
+    );
+    // Alerts raised and cleared by the alert engine
+    stream.addEventListener('alert', (event) => {
+      const alert = JSON.parse(event.data);
+      setAlerts((prev) => [alert, ...prev.filter((a) => a.alert_id !== alert.alert_id)]);
+    });
+    stream.addEventListener('alert_cleared', (event) => {
+      const { alert_id } = JSON.parse(event.data);
+      setAlerts((prev) => prev.filter((a) => a.alert_id !== alert_id));
+    });
+    return () => stream.close();
+  }, []);
+
   const fetchDashboardData = async () => {
     try {
       const [statsRes, expiringRes, visitorStatsRes, alertsRes] = await Promise.all([
@@ -350,7 +374,7 @@ const DashboardPage = () => {
           <div className="space-y-3">
             {alerts.slice(0, 5).map((alert, index) => (
               <div
-                key={index}
+                key={alert.alert_id ?? index}
                 className="flex items-start gap-4 p-5 rounded-xl border-2 border-red-200 bg-red-50 hover:bg-red-100 hover:border-red-300 transition-all"
               >
                 <div className="flex-1">
@@ -35,8 +35,8 @@ const ResidentsPage = () => {
   const fetchData = async () => {
     try {
       const [residentsRes, vehiclesRes] = await Promise.all([
-        getResidents(100, 0),
-        getVehicles(100, 0)
+        getResidents(100),
+        getVehicles(100)
       ]);
       
       console.log('=== RESIDENTS DEBUG ===');
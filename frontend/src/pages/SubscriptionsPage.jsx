@@ -27,7 +27,7 @@ const SubscriptionsPage = () => {
   const fetchData = async () => {
     try {
       const [subsRes, expiringRes] = await Promise.all([
-        getSubscriptions(100, 0),
+        getSubscriptions(100),
         getExpiringSubscriptions(7)
       ]);
       setSubscriptions(subsRes.data?.data || []);
@@ -29,7 +29,7 @@ const VisitorsPage = () => {
   const fetchData = async () => {
     try {
       const [visitorsRes, activeRes, statsRes] = await Promise.all([
-        getVisitors(50, 0),
+        getVisitors(50),
         getActiveVisitors(999, 0),
         getVisitorStats()
       ]);
@@ -46,7 +46,8 @@ const VisitorsPage = () => {
   const handleEntry = async (e) => {
     e.preventDefault();
     try {
-      await recordVisitorEntry(entryForm);
+      // Leave the space empty to have one assigned
+      await recordVisitorEntry({ ...entryForm, space_id: entryForm.space_id || null });
       setShowEntryForm(false);
       setEntryForm({ license_plate: '', space_id: '' });
       fetchData();
@@ -165,7 +166,7 @@ const VisitorsPage = () => {
                 value={entryForm.space_id}
                 onChange={(e) => setEntryForm({...entryForm, space_id: e.target.value})}
                 className="input-field"
-                required
+                placeholder="Assigned automatically"
               />
             </div>
             <br></br>
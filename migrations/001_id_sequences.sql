@@ -0,0 +1,38 @@
+-- =====================================================
+-- 001. ID SEQUENCES
+-- =====================================================
+-- One sequence per table created through the API. Each NEXTVAL reserves a
+-- block of INCREMENT BY ids that services/id_allocator.py hands out from
+-- memory, so an insert no longer needs SELECT NVL(MAX(id), 0) + 1.
+-- Run AFTER data.sql: sequences start just above the current MAX(id).
+-- The allocator reads the block size from USER_SEQUENCES.increment_by.
+-- =====================================================
+
+DECLARE
+    TYPE name_array IS VARRAY(6) OF VARCHAR2(30);
+    v_tables name_array := name_array(
+        'Resident', 'Vehicle', 'ParkingSubscription',
+        'VisitorParkingRecord', 'Supervisor', 'SupervisionShift'
+    );
+    v_columns name_array := name_array(
+        'resident_id', 'vehicle_id', 'subscription_id',
+        'record_id', 'supervisor_id', 'shift_id'
+    );
+    v_start NUMBER;
+    v_exists NUMBER;
+BEGIN
+    FOR i IN 1..v_tables.COUNT LOOP
+        SELECT COUNT(*) INTO v_exists
+        FROM USER_SEQUENCES
+        WHERE sequence_name = UPPER(v_tables(i) || '_SEQ');
+
+        IF v_exists = 0 THEN
+            EXECUTE IMMEDIATE 'SELECT NVL(MAX(' || v_columns(i) || '), 0) + 1 FROM ' || v_tables(i)
+                INTO v_start;
+            EXECUTE IMMEDIATE 'CREATE SEQUENCE ' || v_tables(i) || '_seq'
+                || ' START WITH ' || v_start
+                || ' INCREMENT BY 50 CACHE 20 NOCYCLE';
+        END IF;
+    END LOOP;
+END;
+/
@@ -0,0 +1,23 @@
+-- =====================================================
+-- 002. KEYSET PAGINATION INDEXES
+-- =====================================================
+-- The visitor listing pages by (arrival_time DESC, record_id DESC) and
+-- seeks past the last row of the previous page (queries.VISITORS_BEFORE).
+-- This index lets every page be a short descending range scan instead of
+-- sorting the table and discarding OFFSET rows. Residents, vehicles and
+-- subscriptions page by their primary key and need no extra index.
+-- =====================================================
+
+DECLARE
+    v_exists NUMBER;
+BEGIN
+    SELECT COUNT(*) INTO v_exists
+    FROM USER_INDEXES
+    WHERE index_name = 'VPR_ARRIVAL_IX';
+
+    IF v_exists = 0 THEN
+        EXECUTE IMMEDIATE 'CREATE INDEX VPR_arrival_ix'
+            || ' ON VisitorParkingRecord (arrival_time, record_id)';
+    END IF;
+END;
+/
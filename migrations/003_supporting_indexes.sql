@@ -0,0 +1,47 @@
+-- =====================================================
+-- 003. SUPPORTING INDEXES FOR DATE-RANGE QUERIES
+-- =====================================================
+-- The dashboard, report and gate queries in backend/queries.py filter on
+-- half-open ranges (col >= TRUNC(SYSDATE) AND col < TRUNC(SYSDATE) + 1)
+-- instead of TRUNC(col) = TRUNC(SYSDATE), so plain B-tree indexes on the
+-- date columns can serve them:
+--   PR_space_arrival_ix       occupancy per space today
+--   VPR_departure_ix          visitor revenue today / this month
+--   VPR_plate_departure_ix    open visitor record by plate (exit path)
+--   PS_vehicle_expiration_ix  active subscription by vehicle (gate path)
+--   PS_expiration_ix          expiring / expired subscriptions
+--   PS_start_ix               subscription revenue this month
+--   SS_check_in_ix            supervisor collections this month
+-- Names stay under 30 characters for pre-12.2 databases.
+-- Verify with: python backend/tools/check_query_plans.py
+-- =====================================================
+
+DECLARE
+    TYPE text_array IS VARRAY(7) OF VARCHAR2(200);
+    v_names text_array := text_array(
+        'PR_space_arrival_ix', 'VPR_departure_ix', 'VPR_plate_departure_ix',
+        'PS_vehicle_expiration_ix', 'PS_expiration_ix', 'PS_start_ix',
+        'SS_check_in_ix'
+    );
+    v_columns text_array := text_array(
+        'ParkingRecord (space_id, arrival_time)',
+        'VisitorParkingRecord (departure_time)',
+        'VisitorParkingRecord (license_plate, departure_time)',
+        'ParkingSubscription (vehicle_id, expiration_date)',
+        'ParkingSubscription (expiration_date)',
+        'ParkingSubscription (start_date)',
+        'SupervisionShift (check_in_time)'
+    );
+    v_exists NUMBER;
+BEGIN
+    FOR i IN 1..v_names.COUNT LOOP
+        SELECT COUNT(*) INTO v_exists
+        FROM USER_INDEXES
+        WHERE index_name = UPPER(v_names(i));
+
+        IF v_exists = 0 THEN
+            EXECUTE IMMEDIATE 'CREATE INDEX ' || v_names(i) || ' ON ' || v_columns(i);
+        END IF;
+    END LOOP;
+END;
+/
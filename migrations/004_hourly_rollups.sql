@@ -0,0 +1,46 @@
+-- =====================================================
+-- 004. HOURLY OCCUPANCY AND REVENUE ROLLUPS
+-- =====================================================
+-- Maintained by services/rollups.py. Every ROLLUP_REFRESH_SECONDS, one
+-- worker locks the 'hourly' watermark row. It folds in the ParkingRecord
+-- arrivals and closures, visitor fees and subscription starts that fall
+-- between the old and the new watermark. The dashboard reads the buckets
+-- plus the short raw tail after the watermark.
+--
+-- OccupancyRollup  per space and arrival hour: arrivals, closed stays and
+--                  their total minutes
+-- RevenueRollup    per hour and source ('VISITOR' by departure hour,
+--                  'SUBSCRIPTION' by start_date hour): amount and item count
+-- RollupWatermark  everything strictly before high_water is folded in
+-- =====================================================
+
+CREATE TABLE OccupancyRollup (
+    space_id      NUMBER NOT NULL,
+    hour_start    DATE NOT NULL,
+    arrivals      NUMBER DEFAULT 0 NOT NULL,
+    closed_stays  NUMBER DEFAULT 0 NOT NULL,
+    stay_minutes  NUMBER DEFAULT 0 NOT NULL,
+    CONSTRAINT OccupancyRollup_pk PRIMARY KEY (hour_start, space_id)
+);
+
+CREATE TABLE RevenueRollup (
+    hour_start  DATE NOT NULL,
+    source      VARCHAR2(12) NOT NULL,
+    amount      NUMBER DEFAULT 0 NOT NULL,
+    items       NUMBER DEFAULT 0 NOT NULL,
+    CONSTRAINT RevenueRollup_pk PRIMARY KEY (hour_start, source),
+    CONSTRAINT RevenueRollup_source_ck CHECK (source IN ('VISITOR', 'SUBSCRIPTION'))
+);
+
+CREATE TABLE RollupWatermark (
+    name        VARCHAR2(30) NOT NULL,
+    high_water  DATE NOT NULL,
+    CONSTRAINT RollupWatermark_pk PRIMARY KEY (name)
+);
+
+-- Closures are folded by departure hour
+CREATE INDEX PR_departure_ix ON ParkingRecord (departure_time);
+
+-- Start from the beginning of time: the first refresh folds all history
+INSERT INTO RollupWatermark (name, high_water) VALUES ('hourly', DATE '1970-01-01');
+COMMIT;
@@ -0,0 +1,108 @@
+-- =====================================================
+-- 005. STRIPED SPACE AVAILABILITY
+-- =====================================================
+-- Maintained by services/space_counters.py. Every visitor entry and exit
+-- used to update the one ParkingSpace row of its space, so gates on a busy
+-- space queued behind each other's row lock until commit. Each space's free
+-- places are now spread over 8 SpaceStripe rows:
+--
+-- space_take(space_id, offset)          takes a place from the first stripe
+--                                       with capacity that no other
+--                                       transaction holds (SKIP LOCKED) and
+--                                       only waits when every such stripe is
+--                                       held. 1 = taken, 2 = taken after a
+--                                       lock wait, 0 = full.
+-- space_give(space_id, count, offset)   returns places the same way.
+--                                       1 / 2 as above, 0 = unknown space.
+--
+-- ParkingSpace.capacity is the number of places: free plus occupied by an
+-- open visitor record when this migration runs. The reconcile job resets
+-- every space's stripes to capacity - open records and writes the same
+-- value to ParkingSpace.spaces_available, which readers other than the
+-- gates and the dashboard keep using (at most one reconcile interval old).
+-- =====================================================
+
+ALTER TABLE ParkingSpace ADD (capacity NUMBER);
+
+UPDATE ParkingSpace ps
+SET capacity = GREATEST(ps.spaces_available, 0) + (
+    SELECT COUNT(*)
+    FROM VisitorParkingRecord vpr
+    WHERE vpr.space_id = ps.space_id
+    AND vpr.departure_time IS NULL
+);
+
+CREATE TABLE SpaceStripe (
+    space_id   NUMBER NOT NULL,
+    stripe_no  NUMBER NOT NULL,
+    available  NUMBER DEFAULT 0 NOT NULL,
+    CONSTRAINT SpaceStripe_pk PRIMARY KEY (space_id, stripe_no),
+    CONSTRAINT SpaceStripe_available_ck CHECK (available >= 0)
+);
+
+INSERT INTO SpaceStripe (space_id, stripe_no, available)
+SELECT ps.space_id, s.stripe_no,
+       FLOOR(GREATEST(ps.spaces_available, 0) / 8)
+       + CASE WHEN s.stripe_no < MOD(GREATEST(ps.spaces_available, 0), 8) THEN 1 ELSE 0 END
+FROM ParkingSpace ps
+CROSS JOIN (SELECT LEVEL - 1 AS stripe_no FROM DUAL CONNECT BY LEVEL <= 8) s;
+COMMIT;
+
+-- Open visitor records per space, counted by the reconcile job
+CREATE INDEX VPR_space_departure_ix ON VisitorParkingRecord (space_id, departure_time);
+
+CREATE OR REPLACE FUNCTION space_take (p_space_id NUMBER, p_offset NUMBER) RETURN NUMBER IS
+    CURSOR unlocked IS
+        SELECT stripe_no
+        FROM SpaceStripe
+        WHERE space_id = p_space_id
+        AND available > 0
+        ORDER BY MOD(stripe_no + p_offset, 8)
+        FOR UPDATE SKIP LOCKED;
+    v_stripe NUMBER;
+BEGIN
+    OPEN unlocked;
+    FETCH unlocked INTO v_stripe;
+    IF unlocked%FOUND THEN
+        UPDATE SpaceStripe SET available = available - 1 WHERE CURRENT OF unlocked;
+        CLOSE unlocked;
+        RETURN 1;
+    END IF;
+    CLOSE unlocked;
+
+    -- Every stripe with capacity is held by an in-flight gate: wait for one.
+    -- If it is emptied meanwhile, the statement restarts on another stripe.
+    UPDATE SpaceStripe
+    SET available = available - 1
+    WHERE space_id = p_space_id
+    AND available > 0
+    AND ROWNUM = 1;
+    RETURN CASE WHEN SQL%ROWCOUNT > 0 THEN 2 ELSE 0 END;
+END;
+/
+
+CREATE OR REPLACE FUNCTION space_give (p_space_id NUMBER, p_count NUMBER, p_offset NUMBER) RETURN NUMBER IS
+    CURSOR unlocked IS
+        SELECT stripe_no
+        FROM SpaceStripe
+        WHERE space_id = p_space_id
+        ORDER BY MOD(stripe_no + p_offset, 8)
+        FOR UPDATE SKIP LOCKED;
+    v_stripe NUMBER;
+BEGIN
+    OPEN unlocked;
+    FETCH unlocked INTO v_stripe;
+    IF unlocked%FOUND THEN
+        UPDATE SpaceStripe SET available = available + p_count WHERE CURRENT OF unlocked;
+        CLOSE unlocked;
+        RETURN 1;
+    END IF;
+    CLOSE unlocked;
+
+    UPDATE SpaceStripe
+    SET available = available + p_count
+    WHERE space_id = p_space_id
+    AND stripe_no = MOD(p_offset, 8);
+    RETURN CASE WHEN SQL%ROWCOUNT > 0 THEN 2 ELSE 0 END;
+END;
+/
@@ -0,0 +1,25 @@
+-- =====================================================
+-- 006. HISTORY EXPORT INDEX
+-- =====================================================
+-- services/bulk_export.py reads a date range of history in
+-- (arrival_time, record_id) order and resumes after the last key it wrote
+-- (queries.EXPORT_*). VisitorParkingRecord already has VPR_arrival_ix
+-- (migrations/002); ParkingRecord only had (space_id, arrival_time), so an
+-- export would scan and sort the whole table before the first row. With
+-- PR_arrival_ix it is an ordered range scan that streams from the start.
+-- SupervisionShift is small enough to sort its range on SS_check_in_ix.
+-- =====================================================
+
+DECLARE
+    v_exists NUMBER;
+BEGIN
+    SELECT COUNT(*) INTO v_exists
+    FROM USER_INDEXES
+    WHERE index_name = 'PR_ARRIVAL_IX';
+
+    IF v_exists = 0 THEN
+        EXECUTE IMMEDIATE 'CREATE INDEX PR_arrival_ix'
+            || ' ON ParkingRecord (arrival_time, record_id)';
+    END IF;
+END;
+/
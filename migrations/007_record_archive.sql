@@ -0,0 +1,52 @@
+-- =====================================================
+-- 007. HOT / COLD PARKING HISTORY
+-- =====================================================
+-- Maintained by services/archiver.py. The dashboard, alert and gate
+-- queries filter on departure_time IS NULL or on today's dates, and the
+-- open-record ones full-scan the record tables (tools/check_query_plans.py,
+-- FULL_SCAN_ALLOWED). Those tables only grew, so every tick got slower.
+-- Closed records older than ARCHIVE_AFTER_DAYS (and already folded into
+-- the hourly rollups) now move to a cold table with the same columns; the
+-- hot tables hold only recent and open records.
+--
+-- ParkingRecordArchive / VisitorParkingRecordArchive
+--     cold rows, same columns and record_id as in the hot table
+-- ParkingRecordHistory / VisitorParkingRecordHistory
+--     hot UNION ALL cold, with archived = 0 / 1, for history readers
+--     (record by id, rollup rebuilds, re-pricing)
+--
+-- A pair of tables rather than range partitions: partitioning is an
+-- Enterprise Edition option, and this works on every edition.
+-- =====================================================
+
+CREATE TABLE ParkingRecordArchive AS
+SELECT record_id, space_id, vehicle_id, arrival_time, departure_time
+FROM ParkingRecord
+WHERE 1 = 0;
+
+ALTER TABLE ParkingRecordArchive ADD CONSTRAINT ParkingRecordArchive_pk PRIMARY KEY (record_id);
+CREATE INDEX PRA_arrival_ix ON ParkingRecordArchive (arrival_time, record_id);
+CREATE INDEX PRA_departure_ix ON ParkingRecordArchive (departure_time);
+
+CREATE TABLE VisitorParkingRecordArchive AS
+SELECT record_id, space_id, license_plate, arrival_time, departure_time, parking_fee
+FROM VisitorParkingRecord
+WHERE 1 = 0;
+
+ALTER TABLE VisitorParkingRecordArchive ADD CONSTRAINT VisitorParkingRecordArchive_pk PRIMARY KEY (record_id);
+CREATE INDEX VPRA_arrival_ix ON VisitorParkingRecordArchive (arrival_time, record_id);
+CREATE INDEX VPRA_departure_ix ON VisitorParkingRecordArchive (departure_time);
+
+CREATE OR REPLACE VIEW ParkingRecordHistory AS
+SELECT record_id, space_id, vehicle_id, arrival_time, departure_time, 0 AS archived
+FROM ParkingRecord
+UNION ALL
+SELECT record_id, space_id, vehicle_id, arrival_time, departure_time, 1
+FROM ParkingRecordArchive;
+
+CREATE OR REPLACE VIEW VisitorParkingRecordHistory AS
+SELECT record_id, space_id, license_plate, arrival_time, departure_time, parking_fee, 0 AS archived
+FROM VisitorParkingRecord
+UNION ALL
+SELECT record_id, space_id, license_plate, arrival_time, departure_time, parking_fee, 1
+FROM VisitorParkingRecordArchive;
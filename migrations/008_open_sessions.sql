@@ -0,0 +1,75 @@
+-- =====================================================
+-- 008. OPEN PARKING SESSIONS
+-- =====================================================
+-- Read by services/open_sessions.py. The active visitor listing, the
+-- dashboard's current_occupied_spaces / current_visitors, the overstay
+-- alert, the stripe reconcile and the exit lookup by plate all looked for
+-- departure_time IS NULL in the record tables, which are mostly closed
+-- history. The open stays now also live in two compact tables that only
+-- ever hold what is parked right now:
+--
+-- OpenVisitorSession   one row per open VisitorParkingRecord
+-- OpenParkingSession   one row per open ParkingRecord
+--
+-- Row triggers on the record tables keep them exact for every writer
+-- (the API, batch DML, data.sql, ad-hoc SQL): a row is added when a
+-- record is inserted open or reopened, and removed when it is closed or
+-- deleted. Archiving (migrations/007) only moves closed records and never
+-- touches them.
+-- =====================================================
+
+CREATE TABLE OpenVisitorSession AS
+SELECT record_id, space_id, license_plate, arrival_time
+FROM VisitorParkingRecord
+WHERE 1 = 0;
+
+ALTER TABLE OpenVisitorSession ADD CONSTRAINT OpenVisitorSession_pk PRIMARY KEY (record_id);
+CREATE INDEX OVS_plate_ix ON OpenVisitorSession (license_plate, arrival_time);
+CREATE INDEX OVS_space_ix ON OpenVisitorSession (space_id);
+
+CREATE TABLE OpenParkingSession AS
+SELECT record_id, space_id, vehicle_id, arrival_time
+FROM ParkingRecord
+WHERE 1 = 0;
+
+ALTER TABLE OpenParkingSession ADD CONSTRAINT OpenParkingSession_pk PRIMARY KEY (record_id);
+CREATE INDEX OPS_space_ix ON OpenParkingSession (space_id);
+
+INSERT INTO OpenVisitorSession (record_id, space_id, license_plate, arrival_time)
+SELECT record_id, space_id, license_plate, arrival_time
+FROM VisitorParkingRecord
+WHERE departure_time IS NULL;
+
+INSERT INTO OpenParkingSession (record_id, space_id, vehicle_id, arrival_time)
+SELECT record_id, space_id, vehicle_id, arrival_time
+FROM ParkingRecord
+WHERE departure_time IS NULL;
+COMMIT;
+
+CREATE OR REPLACE TRIGGER VisitorParkingRecord_session
+AFTER INSERT OR DELETE OR UPDATE OF departure_time ON VisitorParkingRecord
+FOR EACH ROW
+BEGIN
+    IF (DELETING OR UPDATING) AND :old.departure_time IS NULL THEN
+        DELETE FROM OpenVisitorSession WHERE record_id = :old.record_id;
+    END IF;
+    IF (INSERTING OR UPDATING) AND :new.departure_time IS NULL THEN
+        INSERT INTO OpenVisitorSession (record_id, space_id, license_plate, arrival_time)
+        VALUES (:new.record_id, :new.space_id, :new.license_plate, :new.arrival_time);
+    END IF;
+END;
+/
+
+CREATE OR REPLACE TRIGGER ParkingRecord_session
+AFTER INSERT OR DELETE OR UPDATE OF departure_time ON ParkingRecord
+FOR EACH ROW
+BEGIN
+    IF (DELETING OR UPDATING) AND :old.departure_time IS NULL THEN
+        DELETE FROM OpenParkingSession WHERE record_id = :old.record_id;
+    END IF;
+    IF (INSERTING OR UPDATING) AND :new.departure_time IS NULL THEN
+        INSERT INTO OpenParkingSession (record_id, space_id, vehicle_id, arrival_time)
+        VALUES (:new.record_id, :new.space_id, :new.vehicle_id, :new.arrival_time);
+    END IF;
+END;
+/
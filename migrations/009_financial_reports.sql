@@ -0,0 +1,60 @@
+-- =====================================================
+-- 009. COMPUTED MONTHLY FINANCIAL REPORTS
+-- =====================================================
+-- Maintained by services/reports.py. SupervisorFinancialReport and
+-- ManagerFinancialReport held random seed rows (data.sql) that nothing
+-- recomputed, and the supervisor summary re-aggregated SupervisionShift
+-- on every call. Both tables are now written by month from the source
+-- rows:
+--
+-- SupervisorFinancialReport  per supervisor and month of check_in_time:
+--                            checked-out shifts, money collected, salary
+-- ManagerFinancialReport     per manager and month of start_date: the
+--                            subscriptions sold in the manager's building
+--                            by type, their cost, salary
+--
+-- A month is rewritten whole (stale rows deleted, the rest merged on the
+-- keys below), so running it twice gives the same rows. The 'reports'
+-- watermark marks months dirty when a shift in them checks out or a
+-- subscription in them starts. It starts at the current month; older
+-- months come from the backfill:
+--     POST /api/admin/reports/backfill
+--
+-- Supervisor.manager_id says whose report a supervisor rolls up to. It is
+-- filled round-robin over BuildingManager, as data.sql assigned them.
+-- The seed report rows have no supervisor_id and are replaced.
+-- =====================================================
+
+ALTER TABLE Supervisor ADD (manager_id NUMBER);
+
+UPDATE Supervisor s
+SET manager_id = (
+    SELECT m.manager_id
+    FROM (
+        SELECT manager_id,
+               ROW_NUMBER() OVER (ORDER BY manager_id) - 1 AS slot,
+               COUNT(*) OVER () AS managers
+        FROM BuildingManager
+    ) m
+    WHERE m.slot = MOD(s.supervisor_id - 1, m.managers)
+)
+WHERE manager_id IS NULL;
+
+DELETE FROM SupervisorFinancialReport;
+DELETE FROM ManagerFinancialReport;
+COMMIT;
+
+ALTER TABLE SupervisorFinancialReport ADD CONSTRAINT SFR_month_supervisor_uk UNIQUE (month, supervisor_id);
+ALTER TABLE ManagerFinancialReport ADD CONSTRAINT MFR_month_manager_uk UNIQUE (month, manager_id);
+-- One supervisor's history (/api/supervisors/{id}/financial-report)
+CREATE INDEX SFR_supervisor_ix ON SupervisorFinancialReport (supervisor_id, month);
+
+-- Report ids are assigned by the MERGEs, not by services/id_allocator.py
+CREATE SEQUENCE SupervisorFinancialReport_seq START WITH 1 INCREMENT BY 1 CACHE 20 NOCYCLE;
+CREATE SEQUENCE ManagerFinancialReport_seq START WITH 1 INCREMENT BY 1 CACHE 20 NOCYCLE;
+
+-- Check-outs since the watermark
+CREATE INDEX SS_check_out_ix ON SupervisionShift (check_out_time);
+
+INSERT INTO RollupWatermark (name, high_water) VALUES ('reports', TRUNC(SYSDATE, 'MM'));
+COMMIT;
@@ -0,0 +1,80 @@
+-- =====================================================
+-- 010. CAP RETURNED PLACES AT CAPACITY
+-- =====================================================
+-- space_give (005) added p_count to a stripe unconditionally, so an exit
+-- that had not taken a place pushed the space above ParkingSpace.capacity
+-- until the next reconcile, and the allocator handed out places that do
+-- not exist. A stripe now holds at most its share of capacity, the same
+-- split the reconcile writes:
+--
+--     FLOOR(capacity / 8) + (1 if stripe_no < MOD(capacity, 8))
+--
+-- Places are returned to the first stripes with room that no other
+-- transaction holds (SKIP LOCKED), waiting for a held one only when no
+-- free stripe has room; whatever does not fit once every stripe is at its
+-- share is dropped. Results are as before: 1 = returned without a lock
+-- wait, 2 = after one, 0 = unknown space (no capacity or no stripes).
+-- space_give_many calls space_give per space and is capped with it.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION space_give (p_space_id NUMBER, p_count NUMBER, p_offset NUMBER) RETURN NUMBER IS
+    v_capacity NUMBER;
+    v_stripes NUMBER;
+    v_left NUMBER := p_count;
+    v_add NUMBER;
+    v_stripe NUMBER;
+    v_available NUMBER;
+    v_result NUMBER := 1;
+    CURSOR unlocked IS
+        SELECT available,
+               FLOOR(v_capacity / 8) + CASE WHEN stripe_no < MOD(v_capacity, 8) THEN 1 ELSE 0 END AS share
+        FROM SpaceStripe
+        WHERE space_id = p_space_id
+        AND available < FLOOR(v_capacity / 8) + CASE WHEN stripe_no < MOD(v_capacity, 8) THEN 1 ELSE 0 END
+        ORDER BY MOD(stripe_no + p_offset, 8)
+        FOR UPDATE SKIP LOCKED;
+BEGIN
+    SELECT MAX(ps.capacity), COUNT(st.stripe_no)
+    INTO v_capacity, v_stripes
+    FROM ParkingSpace ps
+    JOIN SpaceStripe st ON st.space_id = ps.space_id
+    WHERE ps.space_id = p_space_id;
+    IF v_capacity IS NULL OR v_stripes = 0 THEN
+        RETURN 0;
+    END IF;
+
+    FOR st IN unlocked LOOP
+        v_add := LEAST(v_left, st.share - st.available);
+        UPDATE SpaceStripe SET available = available + v_add WHERE CURRENT OF unlocked;
+        v_left := v_left - v_add;
+        EXIT WHEN v_left = 0;
+    END LOOP;
+
+    -- Every stripe with room is held by an in-flight gate: wait for one,
+    -- then look again, as it may have been filled meanwhile
+    WHILE v_left > 0 LOOP
+        SELECT MIN(stripe_no) INTO v_stripe
+        FROM SpaceStripe
+        WHERE space_id = p_space_id
+        AND available < FLOOR(v_capacity / 8) + CASE WHEN stripe_no < MOD(v_capacity, 8) THEN 1 ELSE 0 END;
+        EXIT WHEN v_stripe IS NULL;
+
+        SELECT available INTO v_available
+        FROM SpaceStripe
+        WHERE space_id = p_space_id
+        AND stripe_no = v_stripe
+        FOR UPDATE;
+        v_add := LEAST(v_left, FLOOR(v_capacity / 8)
+                       + CASE WHEN v_stripe < MOD(v_capacity, 8) THEN 1 ELSE 0 END - v_available);
+        IF v_add > 0 THEN
+            UPDATE SpaceStripe
+            SET available = available + v_add
+            WHERE space_id = p_space_id
+            AND stripe_no = v_stripe;
+            v_left := v_left - v_add;
+        END IF;
+        v_result := 2;
+    END LOOP;
+    RETURN v_result;
+END;
+/